@@ -0,0 +1,51 @@
+"""Add crossovers table
+
+Revision ID: 3c5e1f0d9b27
+Revises: a46f494755c9
+Create Date: 2026-10-19 17:24:51.380219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e1f0d9b27'
+down_revision: Union[str, Sequence[str], None] = 'a46f494755c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.create_table(f'{table}_crossovers',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('release', sa.String(), server_default='', nullable=False),
+    sa.Column('variant', sa.String(), server_default='', nullable=False),
+    sa.Column('label', sa.String(), nullable=False),
+    sa.Column('satellite', sa.String(length=1), nullable=False),
+    sa.Column('longitude', sa.Float(), nullable=False),
+    sa.Column('latitude', sa.Float(), nullable=False),
+    sa.Column('datetime_asc', sa.DateTime(), nullable=False),
+    sa.Column('datetime_desc', sa.DateTime(), nullable=False),
+    sa.Column('dt', sa.Float(), nullable=False),
+    sa.Column('postfit_asc', sa.Float(), nullable=True),
+    sa.Column('postfit_desc', sa.Float(), nullable=True),
+    sa.Column('d_postfit', sa.Float(), nullable=True),
+    sa.Column('up_combined_asc', sa.Float(), nullable=True),
+    sa.Column('up_combined_desc', sa.Float(), nullable=True),
+    sa.Column('d_up_combined', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(f'ix_{table}_crossovers_label_datetime', f'{table}_crossovers', ['label', 'datetime_asc'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.drop_index(f'ix_{table}_crossovers_label_datetime', table_name=f'{table}_crossovers')
+    op.drop_table(f'{table}_crossovers')
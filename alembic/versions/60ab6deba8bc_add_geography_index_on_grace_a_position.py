@@ -0,0 +1,32 @@
+"""Add geography index on GRACE-A position
+
+Revision ID: 60ab6deba8bc
+Revises: a2bfc63076ca
+Create Date: 2026-10-19 11:48:22.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = '60ab6deba8bc'
+down_revision: Union[str, Sequence[str], None] = 'a2bfc63076ca'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # expression index for geodesic (geography) polygon and radius queries
+    op.create_index(f'ix_{getenv("TABLE_NAME")}_geography_a', getenv("TABLE_NAME"),
+                    [sa.text('geography(ST_SetSRID(ST_MakePoint("longitude_A", "latitude_A"), 4326))')],
+                    postgresql_using='gist')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(f'ix_{getenv("TABLE_NAME")}_geography_a', table_name=getenv("TABLE_NAME"))
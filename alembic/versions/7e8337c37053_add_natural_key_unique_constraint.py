@@ -0,0 +1,45 @@
+"""Add natural key unique constraint
+
+Revision ID: 7e8337c37053
+Revises: 60ab6deba8bc
+Create Date: 2026-10-19 13:02:57.661203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e8337c37053'
+down_revision: Union[str, Sequence[str], None] = '60ab6deba8bc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LABEL_COLUMNS = ('label', 'release', 'variant', 'source')
+NATURAL_KEY = ('timestamp',) + LABEL_COLUMNS
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    table = getenv("TABLE_NAME")
+    # NULLs are distinct in unique constraints: store '' instead
+    for column in LABEL_COLUMNS:
+        op.execute(f"UPDATE {table} SET {column} = '' WHERE {column} IS NULL")
+        op.alter_column(table, column, existing_type=sa.String(), nullable=False, server_default='')
+    # keep the first copy of rows inserted more than once
+    op.execute(f"""
+        DELETE FROM {table} a USING {table} b
+        WHERE a.id > b.id AND {' AND '.join(f'a.{c} = b.{c}' for c in NATURAL_KEY)}
+    """)
+    op.create_unique_constraint(f'uq_{table}_natural_key', table, list(NATURAL_KEY))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.drop_constraint(f'uq_{table}_natural_key', table, type_='unique')
+    for column in LABEL_COLUMNS:
+        op.alter_column(table, column, existing_type=sa.String(), nullable=True, server_default=None)
@@ -0,0 +1,32 @@
+"""Add spatial index on GRACE-A position
+
+Revision ID: a2bfc63076ca
+Revises: ed96b13ace57
+Create Date: 2026-10-19 10:31:05.117942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2bfc63076ca'
+down_revision: Union[str, Sequence[str], None] = 'ed96b13ace57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # expression index: must match the point expression used in scripts/space_time_query.py
+    op.create_index(f'ix_{getenv("TABLE_NAME")}_point_a', getenv("TABLE_NAME"),
+                    [sa.text('ST_SetSRID(ST_MakePoint("longitude_A", "latitude_A"), 4326)')],
+                    postgresql_using='gist')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(f'ix_{getenv("TABLE_NAME")}_point_a', table_name=getenv("TABLE_NAME"))
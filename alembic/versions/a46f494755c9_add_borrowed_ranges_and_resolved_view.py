@@ -0,0 +1,77 @@
+"""Add borrowed ranges and resolved view
+
+Revision ID: a46f494755c9
+Revises: 7e8337c37053
+Create Date: 2026-10-19 14:20:13.904127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a46f494755c9'
+down_revision: Union[str, Sequence[str], None] = '7e8337c37053'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# columns of the table at this revision; the view SQL is frozen here, not read from the current model
+COLUMNS = ('id', 'timestamp', 'postfit', 'observation_vector', 'up_combined', 'up_local', 'up_common', 'up_global',
+           'latitude_A', 'longitude_A', 'altitude_A', 'shadow_A', 'adtrack_A', 'latitude_B', 'longitude_B',
+           'altitude_B', 'shadow_B', 'adtrack_B', 'longitude_MP', 'latitude_MP', 'altitude_MP', 'source', 'variant',
+           'label', 'release', 'datetime')
+BORROWED = {
+    'timestamp': 'k."timestamp" + EXTRACT(EPOCH FROM (b.target_start - b.source_start))::double precision AS "timestamp"',
+    'datetime': 'k."datetime" + (b.target_start - b.source_start) AS "datetime"',
+    'label': 'b.target_label AS "label"',
+    'source': '\'borrowed\'::varchar AS "source"',
+}
+
+
+def resolved_view_sql(table: str) -> str:
+    own = ", ".join(f'k."{c}"' for c in COLUMNS)
+    borrowed = ", ".join(BORROWED.get(c, f'k."{c}"') for c in COLUMNS)
+    return f"""
+        CREATE OR REPLACE VIEW {table}_resolved AS
+        SELECT {own}, FALSE AS borrowed
+        FROM {table} k
+        UNION ALL
+        SELECT {borrowed}, TRUE AS borrowed
+        FROM {table}_borrowed b
+        JOIN {table} k
+          ON k.label = b.source_label AND k.release = b.release AND k.variant = b.variant
+         AND k.datetime BETWEEN b.source_start AND b.source_end
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.create_index(f'ix_{table}_label_datetime', table, ['label', 'datetime'])
+    op.create_table(f'{table}_borrowed',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('release', sa.String(), server_default='', nullable=False),
+    sa.Column('variant', sa.String(), server_default='', nullable=False),
+    sa.Column('target_label', sa.String(), nullable=False),
+    sa.Column('source_label', sa.String(), nullable=False),
+    sa.Column('target_start', sa.DateTime(), nullable=False),
+    sa.Column('target_end', sa.DateTime(), nullable=False),
+    sa.Column('source_start', sa.DateTime(), nullable=False),
+    sa.Column('source_end', sa.DateTime(), nullable=False),
+    sa.Column('n_samples', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(f'ix_{table}_borrowed_target', f'{table}_borrowed', ['target_label', 'target_start'])
+    op.execute(resolved_view_sql(table))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.execute(f"DROP VIEW IF EXISTS {table}_resolved")
+    op.drop_index(f'ix_{table}_borrowed_target', table_name=f'{table}_borrowed')
+    op.drop_table(f'{table}_borrowed')
+    op.drop_index(f'ix_{table}_label_datetime', table_name=table)
@@ -0,0 +1,31 @@
+"""Add (datetime, id) index for keyset pagination
+
+Revision ID: b52f0c7d8e14
+Revises: e7c41b9a2f68
+Create Date: 2026-10-21 10:12:45.301442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b52f0c7d8e14'
+down_revision: Union[str, Sequence[str], None] = 'e7c41b9a2f68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    table = getenv("TABLE_NAME")
+    # created on every partition of the table
+    op.create_index(f'ix_{table}_datetime_id', table, ['datetime', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.drop_index(f'ix_{table}_datetime_id', table_name=table)
@@ -0,0 +1,69 @@
+"""Add dataset catalog
+
+Revision ID: b81d2e4c6a10
+Revises: 3c5e1f0d9b27
+Create Date: 2026-10-19 18:02:37.514102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81d2e4c6a10'
+down_revision: Union[str, Sequence[str], None] = '3c5e1f0d9b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# a step longer than 1.5 cadences of 5 s is a gap; the catalog SQL is frozen here, not read from the current model
+MAX_STEP = 1.5 * 5
+
+
+def catalog_sql(table: str) -> str:
+    return f"""
+        INSERT INTO {table}_catalog (release, variant, label, source, start_time, end_time, rows,
+                                     min_longitude, min_latitude, max_longitude, max_latitude, gaps, loaded_at)
+        SELECT release, variant, label, source, MIN(datetime), MAX(datetime), COUNT(*),
+               MIN("longitude_A"), MIN("latitude_A"), MAX("longitude_A"), MAX("latitude_A"),
+               COUNT(*) FILTER (WHERE step > :max_step), now()
+        FROM (
+            SELECT release, variant, label, source, datetime, "longitude_A", "latitude_A",
+                   timestamp - LAG(timestamp) OVER (PARTITION BY release, variant, label, source ORDER BY timestamp) AS step
+            FROM {table}
+        ) s
+        GROUP BY release, variant, label, source
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.create_table(f'{table}_catalog',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('release', sa.String(), server_default='', nullable=False),
+    sa.Column('variant', sa.String(), server_default='', nullable=False),
+    sa.Column('label', sa.String(), server_default='', nullable=False),
+    sa.Column('source', sa.String(), server_default='', nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=True),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('rows', sa.Integer(), nullable=False),
+    sa.Column('min_longitude', sa.Float(), nullable=True),
+    sa.Column('min_latitude', sa.Float(), nullable=True),
+    sa.Column('max_longitude', sa.Float(), nullable=True),
+    sa.Column('max_latitude', sa.Float(), nullable=True),
+    sa.Column('gaps', sa.Integer(), nullable=False),
+    sa.Column('loaded_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('release', 'variant', 'label', 'source', name=f'uq_{table}_catalog_group')
+    )
+    # catalog the data already stored
+    op.execute(sa.text(catalog_sql(table)).bindparams(max_step=MAX_STEP))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.drop_table(f'{table}_catalog')
@@ -0,0 +1,70 @@
+"""Add residual sketches
+
+Revision ID: c4f7a92e1d35
+Revises: b81d2e4c6a10
+Create Date: 2026-10-19 21:14:05.280917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f7a92e1d35'
+down_revision: Union[str, Sequence[str], None] = 'b81d2e4c6a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# daily sketches of the data already stored (relative accuracy 1%, values below 1e-15 in bin 0);
+# the SQL is frozen here, not read from the current model
+VARIABLES = ('postfit', 'observation_vector', 'up_combined', 'up_local', 'up_common', 'up_global')
+BIN = ("CASE WHEN abs(v.value) < 1e-15 THEN 0 ELSE CAST(sign(v.value) AS integer) * "
+       "(CAST(ceil(ln(abs(v.value) / 1e-15) / ln(1.02020202020202)) AS integer) + 1) END")
+
+
+def sketches_sql(table: str) -> str:
+    values = ", ".join(f"('{v}', {v})" for v in VARIABLES)
+    return f"""
+        INSERT INTO {table}_sketches (release, variant, label, source, bucket, variable, bin, count, total, total_sq, min, max)
+        SELECT release, variant, label, source, date_trunc('day', datetime), v.variable, {BIN} AS bin, COUNT(*) AS count,
+               SUM(v.value) AS total, SUM(v.value * v.value) AS total_sq, MIN(v.value) AS min, MAX(v.value) AS max
+        FROM {table} CROSS JOIN LATERAL (VALUES {values}) AS v(variable, value)
+        WHERE v.value IS NOT NULL AND datetime IS NOT NULL
+        GROUP BY 1, 2, 3, 4, 5, 6, 7
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.create_table(f'{table}_sketches',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('release', sa.String(), server_default='', nullable=False),
+    sa.Column('variant', sa.String(), server_default='', nullable=False),
+    sa.Column('label', sa.String(), server_default='', nullable=False),
+    sa.Column('source', sa.String(), server_default='', nullable=False),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('variable', sa.String(), nullable=False),
+    sa.Column('bin', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('total_sq', sa.Float(), nullable=False),
+    sa.Column('min', sa.Float(), nullable=False),
+    sa.Column('max', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(f'ix_{table}_sketches_variable_bucket', f'{table}_sketches', ['variable', 'bucket'])
+    op.create_index(f'ix_{table}_sketches_label', f'{table}_sketches', ['label'])
+    # sketch the data already stored
+    op.execute(sa.text(sketches_sql(table)))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.drop_index(f'ix_{table}_sketches_label', table_name=f'{table}_sketches')
+    op.drop_index(f'ix_{table}_sketches_variable_bucket', table_name=f'{table}_sketches')
+    op.drop_table(f'{table}_sketches')
@@ -0,0 +1,144 @@
+"""Partition by release and label
+
+Revision ID: d3a8e61f5b92
+Revises: c4f7a92e1d35
+Create Date: 2026-10-19 23:02:41.517364
+
+"""
+import hashlib
+import re
+from typing import List, Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8e61f5b92'
+down_revision: Union[str, Sequence[str], None] = 'c4f7a92e1d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NATURAL_KEY = ('timestamp', 'label', 'release', 'variant', 'source')
+
+# partition layout and view of this revision (see src/utils/partitions.py and src/models.py), frozen here:
+# the partitions created below keep these names whatever the current code does
+NAME_LENGTH = 54
+COLUMNS = ('id', 'timestamp', 'postfit', 'observation_vector', 'up_combined', 'up_local', 'up_common', 'up_global',
+           'latitude_A', 'longitude_A', 'altitude_A', 'shadow_A', 'adtrack_A', 'latitude_B', 'longitude_B',
+           'altitude_B', 'shadow_B', 'adtrack_B', 'longitude_MP', 'latitude_MP', 'altitude_MP', 'source', 'variant',
+           'label', 'release', 'datetime')
+BORROWED = {
+    'timestamp': 'k."timestamp" + EXTRACT(EPOCH FROM (b.target_start - b.source_start))::double precision AS "timestamp"',
+    'datetime': 'k."datetime" + (b.target_start - b.source_start) AS "datetime"',
+    'label': 'b.target_label AS "label"',
+    'source': '\'borrowed\'::varchar AS "source"',
+}
+
+
+def sql_literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def partition_name(table: str, release: str, label: Optional[str] = None) -> str:
+    values = [release] if label is None else [release, label]
+    digest = hashlib.sha1("\x00".join(values).encode()).hexdigest()[:8]
+    prefix = f"{table}_p_"
+    slug = re.sub(r"[^a-z0-9]+", "_", "_".join(values).lower()).strip("_")
+    slug = slug[:max(NAME_LENGTH - len(prefix) - len(digest) - 1, 0)].rstrip("_")
+    return f"{prefix}{slug}_{digest}" if slug else f"{prefix}{digest}"
+
+
+def create_partition_sql(table: str, name: str, release: str, label: Optional[str] = None) -> List[str]:
+    check = f"release = {sql_literal(release)}"
+    if label is not None:
+        check = f"{check} AND label = {sql_literal(label)}"
+    statements = [f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"
+                  + (" PARTITION BY LIST (label)" if label is None else ""),
+                  f"ALTER TABLE {name} ADD CONSTRAINT {name}_check CHECK ({check})"]
+    if label is None:
+        statements.append(f"CREATE TABLE {name}_default PARTITION OF {name} DEFAULT")
+    return statements
+
+
+def attach_sql(parent: str, name: str, value: str) -> str:
+    return f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES IN ({sql_literal(value)})"
+
+
+def resolved_view_sql(table: str) -> str:
+    own = ", ".join(f'k."{c}"' for c in COLUMNS)
+    borrowed = ", ".join(BORROWED.get(c, f'k."{c}"') for c in COLUMNS)
+    return f"""
+        CREATE OR REPLACE VIEW {table}_resolved AS
+        SELECT {own}, FALSE AS borrowed
+        FROM {table} k
+        UNION ALL
+        SELECT {borrowed}, TRUE AS borrowed
+        FROM {table}_borrowed b
+        JOIN {table} k
+          ON k.label = b.source_label AND k.release = b.release AND k.variant = b.variant
+         AND k.datetime BETWEEN b.source_start AND b.source_end
+    """
+
+
+def create_indexes(table: str) -> None:
+    # same names and expressions as the previous migrations (see src/models.py)
+    op.create_unique_constraint(f'uq_{table}_natural_key', table, list(NATURAL_KEY))
+    op.create_index(f'ix_{table}_timestamp', table, ['timestamp'])
+    op.create_index(f'ix_{table}_label_datetime', table, ['label', 'datetime'])
+    op.create_index(f'ix_{table}_point_a', table,
+                    [sa.text('ST_SetSRID(ST_MakePoint("longitude_A", "latitude_A"), 4326)')],
+                    postgresql_using='gist')
+    op.create_index(f'ix_{table}_geography_a', table,
+                    [sa.text('geography(ST_SetSRID(ST_MakePoint("longitude_A", "latitude_A"), 4326))')],
+                    postgresql_using='gist')
+
+
+def replace_table(table: str, new: str) -> None:
+    """Moves the rows and the id sequence of 'table' to 'new', then drops 'table' and gives its name to 'new'."""
+    op.execute(f"INSERT INTO {new} SELECT * FROM {table}")
+    sequence = op.get_bind().execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}).scalar()
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {new}.id")
+    op.execute(f"DROP TABLE {table}")
+    op.execute(f"ALTER TABLE {new} RENAME TO {table}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    table = getenv("TABLE_NAME")
+    new = f"{table}_partitioned"
+    pairs = op.get_bind().execute(sa.text(f"SELECT DISTINCT release, label FROM {table} ORDER BY 1, 2")).all()
+
+    op.execute(f"DROP VIEW IF EXISTS {table}_resolved")
+    op.execute(f"CREATE TABLE {new} (LIKE {table} INCLUDING DEFAULTS) PARTITION BY LIST (release)")
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {new} DEFAULT")
+    for release in sorted({release for release, _ in pairs}):
+        for statement in create_partition_sql(table, partition_name(table, release), release):
+            op.execute(statement)
+        op.execute(attach_sql(new, partition_name(table, release), release))
+    for release, label in pairs:
+        for statement in create_partition_sql(table, partition_name(table, release, label), release, label):
+            op.execute(statement)
+        op.execute(attach_sql(partition_name(table, release), partition_name(table, release, label), label))
+
+    # one copy of the stored rows, then the indexes are built on the filled partitions
+    replace_table(table, new)
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, label, release)")
+    create_indexes(table)
+    op.execute(f"ANALYZE {table}")
+    op.execute(resolved_view_sql(table))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    table = getenv("TABLE_NAME")
+    new = f"{table}_unpartitioned"
+    # archived partitions (see scripts/releases.py) are left in the TABLE_NAME_archive schema
+    op.execute(f"DROP VIEW IF EXISTS {table}_resolved")
+    op.execute(f"CREATE TABLE {new} (LIKE {table} INCLUDING DEFAULTS)")
+    replace_table(table, new)
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+    create_indexes(table)
+    op.execute(f"ANALYZE {table}")
+    op.execute(resolved_view_sql(table))
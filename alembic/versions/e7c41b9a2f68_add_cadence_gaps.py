@@ -0,0 +1,63 @@
+"""Add cadence gaps
+
+Revision ID: e7c41b9a2f68
+Revises: d3a8e61f5b92
+Create Date: 2026-10-20 09:41:27.836120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c41b9a2f68'
+down_revision: Union[str, Sequence[str], None] = 'd3a8e61f5b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# a step longer than 1.5 cadences of 5 s is a gap; the gaps SQL is frozen here, not read from the current model
+INTERVAL = 5
+MAX_STEP = 1.5 * INTERVAL
+
+
+def gaps_sql(table: str) -> str:
+    return f"""
+        INSERT INTO {table}_gaps (release, variant, label, source, start_time, end_time, missing)
+        SELECT release, variant, label, source, previous, datetime, CAST(ROUND(step / :interval) AS integer) - 1
+        FROM (
+            SELECT release, variant, label, source, datetime,
+                   LAG(datetime) OVER w AS previous, timestamp - LAG(timestamp) OVER w AS step
+            FROM {table}
+            WINDOW w AS (PARTITION BY release, variant, label, source ORDER BY timestamp)
+        ) s
+        WHERE step > :max_step
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.create_table(f'{table}_gaps',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('release', sa.String(), server_default='', nullable=False),
+    sa.Column('variant', sa.String(), server_default='', nullable=False),
+    sa.Column('label', sa.String(), server_default='', nullable=False),
+    sa.Column('source', sa.String(), server_default='', nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=False),
+    sa.Column('missing', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(f'ix_{table}_gaps_label_start_time', f'{table}_gaps', ['label', 'start_time'])
+    # gaps of the data already stored
+    op.execute(sa.text(gaps_sql(table)).bindparams(max_step=MAX_STEP, interval=INTERVAL))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    table = getenv("TABLE_NAME")
+    op.drop_index(f'ix_{table}_gaps_label_start_time', table_name=f'{table}_gaps')
+    op.drop_table(f'{table}_gaps')
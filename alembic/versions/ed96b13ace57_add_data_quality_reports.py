@@ -0,0 +1,37 @@
+"""Add data quality reports table
+
+Revision ID: ed96b13ace57
+Revises: 2f0ac4b752e5
+Create Date: 2026-10-19 09:12:41.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ed96b13ace57'
+down_revision: Union[str, Sequence[str], None] = '2f0ac4b752e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(f'{getenv("TABLE_NAME")}_quality',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('source_file', sa.String(), nullable=False),
+    sa.Column('loaded_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('rows', sa.Integer(), nullable=False),
+    sa.Column('problems', sa.Integer(), nullable=False),
+    sa.Column('report', sa.JSON(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table(f'{getenv("TABLE_NAME")}_quality')
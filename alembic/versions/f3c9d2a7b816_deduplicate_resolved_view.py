@@ -0,0 +1,72 @@
+"""Deduplicate borrowed rows of the resolved view
+
+Revision ID: f3c9d2a7b816
+Revises: b52f0c7d8e14
+Create Date: 2026-10-22 09:41:27.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from src.machinery import getenv
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9d2a7b816'
+down_revision: Union[str, Sequence[str], None] = 'b52f0c7d8e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# columns of the table at this revision; the view SQL is frozen here, not read from the current model
+COLUMNS = ('id', 'timestamp', 'postfit', 'observation_vector', 'up_combined', 'up_local', 'up_common', 'up_global',
+           'latitude_A', 'longitude_A', 'altitude_A', 'shadow_A', 'adtrack_A', 'latitude_B', 'longitude_B',
+           'altitude_B', 'shadow_B', 'adtrack_B', 'longitude_MP', 'latitude_MP', 'altitude_MP', 'source', 'variant',
+           'label', 'release', 'datetime')
+SHIFT = '(b.target_start - b.source_start)'
+SECONDS = f'EXTRACT(EPOCH FROM {SHIFT})::double precision'
+BORROWED = {
+    'timestamp': f'k."timestamp" + {SECONDS} AS "timestamp"',
+    'datetime': f'k."datetime" + {SHIFT} AS "datetime"',
+    'label': 'b.target_label AS "label"',
+    'source': '\'borrowed\'::varchar AS "source"',
+}
+
+
+def resolved_view_sql(table: str, deduplicate: bool = True) -> str:
+    own = ", ".join(f'k."{c}"' for c in COLUMNS)
+    borrowed = ", ".join(BORROWED.get(c, f'k."{c}"') for c in COLUMNS)
+    join = f"""
+        FROM {table}_borrowed b
+        JOIN {table} k
+          ON k.label = b.source_label AND k.release = b.release AND k.variant = b.variant
+         AND k.datetime BETWEEN b.source_start AND b.source_end"""
+    if deduplicate:
+        key = f"b.target_label, k.release, k.variant, k.datetime + {SHIFT}, k.timestamp + {SECONDS}"
+        borrowed_sql = f"""
+        SELECT * FROM (
+            SELECT DISTINCT ON ({key}) {borrowed}, TRUE AS borrowed{join}
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {table} c
+                WHERE c.timestamp = k.timestamp + {SECONDS} AND c.label = b.target_label
+                  AND c.release = k.release AND c.variant = k.variant AND c.source = 'borrowed')
+            ORDER BY {key}, b.id, k.source
+        ) d"""
+    else:
+        borrowed_sql = f"""
+        SELECT {borrowed}, TRUE AS borrowed{join}"""
+    return f"""
+        CREATE OR REPLACE VIEW {table}_resolved AS
+        SELECT {own}, FALSE AS borrowed
+        FROM {table} k
+        UNION ALL{borrowed_sql}
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(resolved_view_sql(getenv("TABLE_NAME")))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(resolved_view_sql(getenv("TABLE_NAME"), deduplicate=False))
@@ -0,0 +1,101 @@
+import argparse
+import pandas as pd
+from sqlalchemy import create_engine, text
+from src.machinery import getenv
+from src.utils.gaps import gap_epochs
+from src.utils.repair_month import borrowed_ranges
+from scripts.catalog import refresh_catalog
+from scripts.gaps import month_holes
+
+
+def register_borrowed_ranges(engine, ranges: pd.DataFrame, release: str, variant: str,
+                             target_label: str, source_label: str) -> int:
+    """
+    Stores borrowed ranges (see src/utils/repair_month.plan_borrowed_ranges) in the TABLE_NAME_borrowed table,
+    replacing any ranges registered before for the same target label, release and variant.
+
+    Returns:
+        int: Number of borrowed samples.
+    """
+    table = f'{getenv("TABLE_NAME")}_borrowed'
+    key = {"release": release, "variant": variant, "target_label": target_label}
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {table} WHERE release = :release AND variant = :variant AND target_label = :target_label"), key)
+        if len(ranges):
+            conn.execute(
+                text(f"""
+                    INSERT INTO {table} (release, variant, target_label, source_label, target_start, target_end, source_start, source_end, n_samples)
+                    VALUES (:release, :variant, :target_label, :source_label, :target_start, :target_end, :source_start, :source_end, :n_samples)
+                """),
+                [{**key, "source_label": source_label,
+                  "target_start": r.target_start.to_pydatetime(), "target_end": r.target_end.to_pydatetime(),
+                  "source_start": r.source_start.to_pydatetime(), "source_end": r.source_end.to_pydatetime(),
+                  "n_samples": int(r.n_samples)} for r in ranges.itertuples(index=False)],
+            )
+    return int(ranges["n_samples"].sum()) if len(ranges) else 0
+
+
+def repair_label(engine, release: str, variant: str, target_label: str, source_label: str,
+                 interval_seconds: int = 5, drop_copies: bool = False) -> pd.DataFrame:
+    """
+    Fills the missing epochs of 'target_label' with data of 'source_label' without copying rows,
+    like src/utils/repair_month.repair_month does in memory. The missing epochs come from the gaps table and the
+    catalog (see scripts/gaps.month_holes); only as many timestamps of 'source_label' as epochs missing are read.
+
+    Args:
+        engine: SQLAlchemy engine for database connection.
+        release, variant: Release and processing variant of both labels.
+        target_label: Label with missing epochs (e.g. RL06_12-04).
+        source_label: Label to borrow from.
+        interval_seconds: Expected time interval between readings.
+        drop_copies: Also delete rows previously copied into 'target_label' (source = 'borrowed').
+
+    Returns:
+        pd.DataFrame: The registered ranges.
+    """
+    params = {"release": release, "variant": variant}
+    holes = month_holes(engine, release, variant, target_label, interval_seconds)
+    if holes is None:
+        raise ValueError(f"No data found for label {target_label} ({release}, {variant}).")
+    missing_times = gap_epochs(holes, interval_seconds)
+    query = text(f"""
+        SELECT datetime FROM {getenv("TABLE_NAME")}
+        WHERE label = :label AND release = :release AND variant = :variant AND source <> 'borrowed'
+        ORDER BY datetime ASC
+        LIMIT :limit
+    """)
+    with engine.connect() as conn:
+        df_source = pd.read_sql_query(query, conn, params={**params, "label": source_label, "limit": len(missing_times)})
+
+    ranges = borrowed_ranges(missing_times, df_source["datetime"], interval_seconds)
+    register_borrowed_ranges(engine, ranges, release, variant, target_label, source_label)
+
+    if drop_copies:
+        with engine.begin() as conn:
+            conn.execute(text(f"""
+                DELETE FROM {getenv("TABLE_NAME")}
+                WHERE label = :label AND release = :release AND variant = :variant AND source = 'borrowed'
+            """), {**params, "label": target_label})
+        refresh_catalog(engine, pd.DataFrame([{**params, "label": target_label, "source": "borrowed"}]), interval_seconds)
+
+    return ranges
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the missing epochs of a label with data of another label, stored as time ranges.")
+    parser.add_argument("--release", type=str, required=True, help="Release (e.g. RL06)")
+    parser.add_argument("--variant", type=str, default="", help="Processing variant (e.g. CSR_v1)")
+    parser.add_argument("--target", type=str, required=True, help="Label with missing epochs (e.g. RL06_12-04)")
+    parser.add_argument("--source", type=str, required=True, help="Label to borrow from (e.g. RL06_12-03)")
+    parser.add_argument("--interval", type=int, default=5, help="Expected time interval between readings (s)")
+    parser.add_argument("--drop_copies", action="store_true", help="Delete rows previously copied into the target label")
+    args = parser.parse_args()
+
+    engine = create_engine(getenv('DATABASE_URL'))
+    ranges = repair_label(engine, args.release, args.variant, args.target, args.source, args.interval, args.drop_copies)
+    print(ranges)
+    print(f"Registered {len(ranges)} ranges ({int(ranges['n_samples'].sum()) if len(ranges) else 0} samples) for {args.target}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import pandas as pd
+from typing import List, Optional
+from sqlalchemy import text
+from src.machinery import getenv
+from src.models import refresh_catalog_sql, refresh_gaps_sql, refresh_sketches_sql
+from src.utils.catalog import CATALOG_GROUP, GAP_FACTOR, catalog_groups
+
+
+def refresh_catalog(engine, groups: Optional[pd.DataFrame] = None, interval_seconds: float = 5) -> int:
+    """
+    Recomputes the catalog rows of the given groups (see catalog_groups) from TABLE_NAME, or of all groups
+    if 'groups' is None, their daily residual sketches (TABLE_NAME_sketches, see scripts/residual_stats.py)
+    and their cadence gaps (TABLE_NAME_gaps, see scripts/gaps.py).
+    Groups without stored rows anymore are removed from the catalog.
+    Called after every ingestion; only the rows of the given groups are read.
+
+    Returns:
+        int: Number of catalog rows written.
+    """
+    table = getenv("TABLE_NAME")
+    params = {"max_step": GAP_FACTOR * interval_seconds, "interval": interval_seconds}
+    stored = " AND ".join(f"t.{c} = c.{c}" for c in CATALOG_GROUP)
+    with engine.begin() as conn:
+        if groups is None:
+            written = conn.execute(text(refresh_catalog_sql(all_groups=True)), params).rowcount
+            conn.execute(text(f"DELETE FROM {table}_catalog c WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {stored})"))
+            conn.execute(text(f"DELETE FROM {table}_sketches"))
+            conn.execute(text(refresh_sketches_sql(all_groups=True)))
+            conn.execute(text(f"DELETE FROM {table}_gaps"))
+            conn.execute(text(refresh_gaps_sql(all_groups=True)), params)
+            return written
+        if groups.empty:
+            return 0
+        params.update({f"{c}s": groups[c].astype(str).tolist() for c in CATALOG_GROUP})
+        written = conn.execute(text(refresh_catalog_sql()), params).rowcount
+        conn.execute(text(f"""
+            DELETE FROM {table}_catalog c
+            WHERE ({", ".join(f"c.{col}" for col in CATALOG_GROUP)}) IN (
+                SELECT * FROM unnest(CAST(:releases AS varchar[]), CAST(:variants AS varchar[]),
+                                     CAST(:labels AS varchar[]), CAST(:sources AS varchar[])))
+            AND NOT EXISTS (SELECT 1 FROM {table} t WHERE {stored})
+        """), params)
+        for derived in ("sketches", "gaps"):
+            conn.execute(text(f"""
+                DELETE FROM {table}_{derived}
+                WHERE label = ANY(CAST(:labels AS varchar[]))
+                AND ({", ".join(CATALOG_GROUP)}) IN (
+                    SELECT * FROM unnest(CAST(:releases AS varchar[]), CAST(:variants AS varchar[]),
+                                         CAST(:labels AS varchar[]), CAST(:sources AS varchar[])))
+            """), params)
+        conn.execute(text(refresh_sketches_sql()), params)
+        conn.execute(text(refresh_gaps_sql()), params)
+        return written
+
+
+def read_catalog(engine, releases: Optional[List[str]] = None, labels: Optional[List[str]] = None) -> pd.DataFrame:
+    """Returns the catalog (one row per release/variant/label/source), optionally for some releases/labels."""
+    conditions = ["TRUE"]
+    if releases:
+        conditions.append("release = ANY(:releases)")
+    if labels:
+        conditions.append("label = ANY(:labels)")
+    query = text(f"""
+        SELECT release, variant, label, source, start_time, end_time, rows,
+               min_longitude, min_latitude, max_longitude, max_latitude, gaps, loaded_at
+        FROM {getenv("TABLE_NAME")}_catalog
+        WHERE {" AND ".join(conditions)}
+        ORDER BY release, label, variant, source
+    """)
+    with engine.connect() as conn:
+        return pd.read_sql_query(query, conn, params={"releases": list(releases or []), "labels": list(labels or [])})
+
+
+def catalog_version(engine, conditions: List[str], params: dict) -> Optional[str]:
+    """
+    Version of the stored rows of the catalog groups matching 'conditions' (SQL on the catalog columns, bound to
+    'params'): it changes whenever a load, upsert, deletion or release swap refreshes one of these groups.
+    None if the catalog holds no such group. Used to invalidate the tile and month caches.
+    """
+    query = text(f"""
+        SELECT COUNT(*) AS groups, SUM(rows) AS rows, MAX(loaded_at) AS loaded_at
+        FROM {getenv("TABLE_NAME")}_catalog
+        WHERE {" AND ".join(conditions)}
+    """)
+    with engine.connect() as conn:
+        groups, rows, loaded_at = conn.execute(query, params).one()
+    return None if not groups else f"{groups}:{rows}:{pd.Timestamp(loaded_at).isoformat()}"
+
+
+def validate_catalog_labels(engine) -> dict:
+    """Validates the stored labels (see src/utils/label_validation.validate_data_labels) without scanning the table."""
+    from src.utils.label_validation import validate_data_labels
+    return validate_data_labels(read_catalog(engine))
+
+
+def main(argv=None):
+    """Same as 'grace-db stats' (see src/cli.py)."""
+    from src.cli import run
+    run("stats", argv)
+
+
+if __name__ == "__main__":
+    main()
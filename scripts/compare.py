@@ -0,0 +1,148 @@
+import pandas as pd
+from typing import Iterator, NamedTuple, Optional, Sequence
+from sqlalchemy import text
+from src.machinery import getenv
+from src.utils.catalog import GAP_FACTOR
+from src.utils.sketches import SKETCH_VARIABLES
+
+DEFAULT_VARIABLES = ("postfit", "up_combined")
+BUCKETS = {"day": "date_trunc('day', a.datetime)", "month": "date_trunc('month', a.datetime)", "label": "a.label"}
+
+
+class Side(NamedTuple):
+    """One side of a comparison: the rows of a release and processing variant, optionally of one label/source."""
+    release: str
+    variant: str = ""
+    label: Optional[str] = None
+    source: Optional[str] = None
+
+    @classmethod
+    def parse(cls, value: str) -> "Side":
+        """Parses 'release:variant[:label[:source]]' (e.g. 'RL06:CSR_v1' or 'RL06:CSR_v2:RL06_12-03')."""
+        parts = value.split(":")
+        if not 1 <= len(parts) <= 4:
+            raise ValueError(f"Expected 'release:variant[:label[:source]]', got '{value}'")
+        return cls(*[p if p or i < 2 else None for i, p in enumerate(parts)])
+
+
+def paired_rows_sql(a: Side, b: Side, variables: Sequence[str], start_time=None, end_time=None,
+                    extra_columns: Sequence[str] = ()) -> tuple:
+    """
+    SQL pairing the rows of side 'a' with the rows of side 'b' at the same epoch, and its parameters.
+    Rows of 'b' are looked up on the natural-key index (timestamp, label, release, variant, source), in the label
+    of 'b' if it has one and else in the label of the 'a' row; the pairing runs entirely in the database.
+    Columns: timestamp, datetime, label, latitude_A, longitude_A, adtrack_A, and for each variable
+    <v>_a, <v>_b and d_<v> (a - b), preceded by the SQL expressions 'extra_columns'.
+    """
+    unknown = [v for v in variables if v not in SKETCH_VARIABLES]
+    if unknown:
+        raise ValueError(f"Cannot compare {unknown} (expected some of {list(SKETCH_VARIABLES)})")
+    params = {"a_release": a.release, "a_variant": a.variant, "b_release": b.release, "b_variant": b.variant,
+              "a_label": a.label, "a_source": a.source, "b_label": b.label, "b_source": b.source,
+              "start_time": start_time, "end_time": end_time}
+    on = ["b.timestamp = a.timestamp", f"b.label = {':b_label' if b.label is not None else 'a.label'}",
+          "b.release = :b_release", "b.variant = :b_variant"]
+    if b.source is not None:
+        on.append("b.source = :b_source")
+    where = ["a.release = :a_release", "a.variant = :a_variant"]
+    if a.label is not None:
+        where.append("a.label = :a_label")
+    if a.source is not None:
+        where.append("a.source = :a_source")
+    if start_time is not None:
+        where.append("a.datetime >= :start_time")
+    if end_time is not None:
+        where.append("a.datetime <= :end_time")
+    values = "".join(f', a.{v} AS {v}_a, b.{v} AS {v}_b, a.{v} - b.{v} AS d_{v}' for v in variables)
+    query = f"""
+        SELECT {"".join(f"{c}, " for c in extra_columns)}a.timestamp, a.datetime, a.label, a."latitude_A", a."longitude_A", a."adtrack_A"{values}
+        FROM {getenv("TABLE_NAME")} a
+        JOIN {getenv("TABLE_NAME")} b ON {" AND ".join(on)}
+        WHERE {" AND ".join(where)}
+    """
+    return query, params
+
+
+def iter_differences(engine, a: Side, b: Side, variables: Sequence[str] = DEFAULT_VARIABLES, start_time=None,
+                     end_time=None, chunksize: int = 100000) -> Iterator[pd.DataFrame]:
+    """
+    Streams the difference series of 'a' - 'b' (see paired_rows_sql) in chunks of 'chunksize' rows, ordered by
+    label and time, through a server-side cursor: memory stays bounded whatever the length of the window.
+    """
+    query, params = paired_rows_sql(a, b, variables, start_time, end_time)
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+        yield from pd.read_sql_query(text(f"{query} ORDER BY a.label, a.timestamp"), conn, params=params, chunksize=chunksize)
+
+
+def query_differences(engine, a: Side, b: Side, variables: Sequence[str] = DEFAULT_VARIABLES, start_time=None, end_time=None) -> pd.DataFrame:
+    """Difference series of 'a' - 'b' in one DataFrame (see iter_differences for long windows)."""
+    frames = list(iter_differences(engine, a, b, variables, start_time, end_time))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def compare_summary(engine, a: Side, b: Side, variables: Sequence[str] = DEFAULT_VARIABLES, start_time=None,
+                    end_time=None, by: Optional[str] = "day", interval_seconds: float = 5) -> pd.DataFrame:
+    """
+    Summary statistics of 'a' - 'b', computed in the database, one row per group of 'by':
+    'day', 'month', 'label', 'pass' (continuous arcs of one track direction, split as in src/utils/arcs.segment_passes)
+    or None (whole window). For each variable: n_<v> (paired epochs), bias_<v> (mean difference),
+    std_<v> (standard deviation of the difference), rms_<v> (RMS difference) and corr_<v> (correlation of a and b).
+    """
+    if by is not None and by not in BUCKETS and by != "pass":
+        raise ValueError(f"Unknown grouping '{by}' (expected 'day', 'month', 'label', 'pass' or None)")
+    stats = "".join(f""",
+               COUNT(d_{v}) AS n_{v}, AVG(d_{v}) AS bias_{v}, STDDEV_SAMP(d_{v}) AS std_{v},
+               SQRT(AVG(d_{v} * d_{v})) AS rms_{v}, CORR({v}_a, {v}_b) AS corr_{v}""" for v in variables)
+
+    if by == "pass":
+        query, params = paired_rows_sql(a, b, variables, start_time, end_time)
+        params["max_step"] = GAP_FACTOR * interval_seconds
+        summary = text(f"""
+            WITH pairs AS ({query}),
+            marked AS (
+                SELECT *, CASE WHEN "adtrack_A" IS DISTINCT FROM LAG("adtrack_A") OVER w
+                                 OR timestamp - LAG(timestamp) OVER w > :max_step THEN 1 ELSE 0 END AS new_pass
+                FROM pairs
+                WINDOW w AS (PARTITION BY label ORDER BY timestamp)
+            ),
+            passes AS (SELECT *, SUM(new_pass) OVER (PARTITION BY label ORDER BY timestamp) - 1 AS pass FROM marked)
+            SELECT label, pass, MIN(datetime) AS start_time, MAX(datetime) AS end_time,
+                   MIN("adtrack_A") AS "adtrack_A"{stats}
+            FROM passes
+            GROUP BY label, pass
+            ORDER BY label, pass
+        """)
+    else:
+        bucket = [f"{BUCKETS[by]} AS {by}"] if by in ("day", "month") else []  # 'label' is already a column
+        query, params = paired_rows_sql(a, b, variables, start_time, end_time, bucket)
+        summary = text(f"""
+            SELECT {f"{by}, " if by else ""}MIN(datetime) AS start_time, MAX(datetime) AS end_time{stats}
+            FROM ({query}) pairs
+            {f"GROUP BY {by} ORDER BY {by}" if by else ""}
+        """)
+
+    with engine.connect() as conn:
+        return pd.read_sql_query(summary, conn, params=params)
+
+
+def export_differences(engine, a: Side, b: Side, output_format: str, filename_prefix: str,
+                       variables: Sequence[str] = DEFAULT_VARIABLES, start_time=None, end_time=None) -> int:
+    """Streams the difference series to a csv/netcdf file chunk by chunk (see iter_differences) and returns the number of rows."""
+    from scripts.space_time_query import save_data
+    rows = 0
+    for df in iter_differences(engine, a, b, variables, start_time, end_time):
+        if not df.empty:
+            save_data(df, output_format, filename_prefix, append=rows > 0)
+        rows += len(df)
+    return rows
+
+
+def main(argv=None):
+    """Same as 'grace-db compare' (see src/cli.py)."""
+    from src.cli import run
+    run("compare", argv)
+
+
+if __name__ == "__main__":
+    main()
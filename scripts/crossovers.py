@@ -0,0 +1,129 @@
+import argparse
+import time
+import pandas as pd
+import shapely
+from sqlalchemy import create_engine, text
+from src.machinery import getenv
+from src.utils.crossovers import find_crossovers
+from src.utils.utils import check_polygon_validity, polygon_geometry
+from scripts.populate_db import copy_dataframe
+
+EPOCH = pd.Timestamp("2000-01-01")  # origin of the 'timestamp' column
+
+
+def fetch_tracks(engine, label, release, variant="", satellite="A", start_time=None, end_time=None) -> pd.DataFrame:
+    """
+    Reads the columns needed to find crossovers for one label, including epochs the label borrows
+    from another label (TABLE_NAME_resolved view), ordered by time.
+    """
+    time_filter = "AND datetime BETWEEN :start_time AND :end_time" if start_time is not None and end_time is not None else ""
+    query = text(f"""
+        SELECT timestamp, "longitude_{satellite}", "latitude_{satellite}", "adtrack_{satellite}", postfit, up_combined
+        FROM {getenv("TABLE_NAME")}_resolved
+        WHERE label = :label AND release = :release AND variant = :variant {time_filter}
+        ORDER BY timestamp ASC
+    """)
+    with engine.connect() as conn:
+        return pd.read_sql_query(query, conn, params={"label": label, "release": release, "variant": variant,
+                                                      "start_time": start_time, "end_time": end_time})
+
+
+def store_crossovers(engine, crossovers: pd.DataFrame, label, release, variant="", satellite="A",
+                     start_time=None, end_time=None, polygon_coordinates=None) -> int:
+    """
+    Writes crossovers to the TABLE_NAME_crossovers table, replacing those stored before for the same
+    label, release, variant and satellite within the same time window and region.
+
+    Returns:
+        int: Number of crossovers written.
+    """
+    table = f'{getenv("TABLE_NAME")}_crossovers'
+    key = {"label": label, "release": release, "variant": variant, "satellite": satellite}
+    conditions = "label = :label AND release = :release AND variant = :variant AND satellite = :satellite"
+    params = dict(key)
+    if start_time is not None and end_time is not None:
+        conditions += " AND datetime_asc BETWEEN :start_time AND :end_time"
+        params.update(start_time=start_time, end_time=end_time)
+    if polygon_coordinates is not None:
+        conditions += " AND ST_Covers(ST_GeomFromText(:polygon, 4326), ST_SetSRID(ST_MakePoint(longitude, latitude), 4326))"
+        params["polygon"] = polygon_geometry(polygon_coordinates).wkt
+
+    rows = crossovers.assign(
+        **key,
+        datetime_asc=EPOCH + pd.to_timedelta(crossovers["time_asc"], unit="s"),
+        datetime_desc=EPOCH + pd.to_timedelta(crossovers["time_desc"], unit="s"),
+    ).drop(columns=["time_asc", "time_desc", "arc_asc", "arc_desc"])
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {table} WHERE {conditions}"), params)
+        if len(rows):
+            copy_dataframe(rows, conn, table)
+    return len(rows)
+
+
+def compute_crossovers(engine, label, release, variant="", satellite="A", start_time=None, end_time=None,
+                       polygon_coordinates=None, max_dt_hours=None, interval_seconds=5, store=True) -> pd.DataFrame:
+    """
+    Finds the ascending x descending crossovers of one label (see src/utils/crossovers.py),
+    optionally within a time window and a polygon, and stores them in TABLE_NAME_crossovers.
+
+    Args:
+        engine: SQLAlchemy engine for database connection.
+        label, release, variant: Data to use.
+        satellite: 'A' or 'B'.
+        start_time, end_time: Optional time window (both passes must be inside it).
+        polygon_coordinates: Optional region as a list of (longitude, latitude) tuples.
+        max_dt_hours: Optional maximum time between the two passes.
+        interval_seconds: Expected time interval between readings.
+        store: Write the crossovers to the database.
+
+    Returns:
+        pd.DataFrame: The crossovers (see find_crossovers).
+    """
+    region = None
+    if polygon_coordinates is not None:
+        if not check_polygon_validity(polygon_coordinates):
+            raise ValueError("Invalid polygon coordinates provided.")
+        region = polygon_geometry(polygon_coordinates)
+
+    df = fetch_tracks(engine, label, release, variant, satellite, start_time, end_time)
+    crossovers = find_crossovers(df, satellite=satellite, interval_seconds=interval_seconds,
+                                 max_dt=max_dt_hours * 3600 if max_dt_hours is not None else None,
+                                 bbox=region.bounds if region is not None else None)
+    if region is not None:
+        crossovers = crossovers[shapely.contains_xy(region, crossovers["longitude"].to_numpy(),
+                                                    crossovers["latitude"].to_numpy())].reset_index(drop=True)
+
+    if store:
+        store_crossovers(engine, crossovers, label, release, variant, satellite, start_time, end_time, polygon_coordinates)
+    return crossovers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find ascending x descending crossovers of a label and store the residual differences.")
+    parser.add_argument("--label", type=str, required=True, help="Label (e.g. RL06_12-03)")
+    parser.add_argument("--release", type=str, required=True, help="Release (e.g. RL06)")
+    parser.add_argument("--variant", type=str, default="", help="Processing variant (e.g. CSR_v1)")
+    parser.add_argument("--satellite", type=str, default="A", choices=["A", "B"], help="Satellite whose tracks are crossed")
+    parser.add_argument("--start_time", type=str, help="Start time in format YYYY-MM-DD HH:MM:SS")
+    parser.add_argument("--end_time", type=str, help="End time in format YYYY-MM-DD HH:MM:SS")
+    parser.add_argument("--polygon", type=str, help="Polygon coordinates as 'lon1 lat1, lon2 lat2, ...'")
+    parser.add_argument("--max_dt_hours", type=float, help="Maximum time between the two passes (hours)")
+    parser.add_argument("--interval", type=int, default=5, help="Expected time interval between readings (s)")
+    parser.add_argument("--dry_run", action="store_true", help="Do not write the crossovers to the database")
+    args = parser.parse_args()
+
+    polygon_coordinates = None
+    if args.polygon:
+        polygon_coordinates = [(float(lon), float(lat)) for lon, lat in (pair.split() for pair in args.polygon.split(","))]
+    engine = create_engine(getenv('DATABASE_URL'))
+    start = time.perf_counter()
+    crossovers = compute_crossovers(engine, args.label, args.release, args.variant, args.satellite,
+                                    args.start_time, args.end_time, polygon_coordinates, args.max_dt_hours,
+                                    args.interval, store=not args.dry_run)
+    print(crossovers[["longitude", "latitude", "dt", "d_postfit", "d_up_combined"]].describe())
+    print(f"Found {len(crossovers)} crossovers for {args.label} in {time.perf_counter() - start:.1f} s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import pandas as pd
+from sqlalchemy import text
+from tqdm import tqdm
+from src.machinery import getenv
+from src.utils.parquet_store import write_partitioned, month_windows, DEFAULT_ROW_GROUP_SIZE
+
+
+def export_parquet(root: str, engine, start_time=None, end_time=None, labels=None,
+                   row_group_size: int = DEFAULT_ROW_GROUP_SIZE, partial_months: bool = False) -> int:
+    """
+    Exports the TABLE_NAME table to a Hive-partitioned (release/label/month) GeoParquet dataset,
+    one month at a time so that only a month of data is held in memory. Each exported month replaces
+    its partitions, so a window that starts or ends inside a month exports that whole month.
+    The dataset can be queried without database access with src.utils.parquet_store.read_residuals.
+
+    Args:
+        root: Output directory.
+        engine: SQLAlchemy engine for database connection.
+        start_time, end_time: Optional time window (default: everything in the table).
+        labels: Optional list of labels to export.
+        row_group_size: Maximum number of rows per Parquet row group.
+        partial_months: Export only [start_time, end_time] of the first and last months, adding their rows
+            to the existing partitions instead of replacing them (see month_windows).
+
+    Returns:
+        int: Number of exported rows.
+    """
+    label_filter = "AND label = ANY(:labels)" if labels else ""
+
+    with engine.connect() as conn:
+        if start_time is None or end_time is None:
+            bounds = conn.execute(text(f"SELECT MIN(datetime), MAX(datetime) FROM {getenv('TABLE_NAME')}")).one()
+            start_time = start_time if start_time is not None else bounds[0]
+            end_time = end_time if end_time is not None else bounds[1]
+        if start_time is None:
+            print("Nothing to export.")
+            return 0
+
+        windows = month_windows(start_time, end_time, partial_months)
+
+        query = text(f"""
+            SELECT *
+            FROM {getenv("TABLE_NAME")}
+            WHERE datetime >= :start_time AND datetime < :end_time {label_filter}
+            ORDER BY datetime ASC
+        """)
+
+        exported = 0
+        for window_start, window_end, replace in tqdm(windows, desc="Exporting months"):
+            params = {"start_time": window_start, "end_time": window_end}
+            if labels:
+                params["labels"] = list(labels)
+            df = pd.read_sql_query(query, conn, params=params)
+            write_partitioned(df, root, row_group_size=row_group_size, replace=replace)
+            exported += len(df)
+
+    return exported
+
+
+def main(argv=None):
+    """Same as 'grace-db export' (see src/cli.py)."""
+    from src.cli import run
+    run("export", argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import pandas as pd
+from typing import List, Optional, Sequence
+from sqlalchemy import text
+from src.machinery import getenv
+from src.utils.catalog import CATALOG_GROUP
+from src.utils.gaps import covered_intervals, holes, month_window
+
+# Completeness from TABLE_NAME_gaps and the catalog (see src/utils/gaps.py): no query here reads TABLE_NAME.
+HOLE_COLUMNS = ["release", "variant", "start_time", "end_time", "missing"]
+
+
+def _filters(start_time=None, end_time=None, labels: Optional[List[str]] = None, release: Optional[str] = None,
+             variant: Optional[str] = None, exclude_sources: Sequence[str] = ()):
+    """Conditions and parameters selecting the groups (and their rows) overlapping a time window."""
+    conditions = ["TRUE"]
+    if start_time is not None:
+        conditions.append("end_time >= :start_time")
+    if end_time is not None:
+        conditions.append("start_time <= :end_time")
+    if labels:
+        conditions.append("label = ANY(:labels)")
+    if release is not None:
+        conditions.append("release = :release")
+    if variant is not None:
+        conditions.append("variant = :variant")
+    if exclude_sources:
+        conditions.append("NOT source = ANY(:exclude_sources)")
+    params = {"start_time": None if start_time is None else pd.Timestamp(start_time).to_pydatetime(),
+              "end_time": None if end_time is None else pd.Timestamp(end_time).to_pydatetime(),
+              "labels": list(labels or []), "release": release, "variant": variant,
+              "exclude_sources": list(exclude_sources)}
+    return " AND ".join(conditions), params
+
+
+def read_gaps(engine, start_time=None, end_time=None, labels: Optional[List[str]] = None, release: Optional[str] = None,
+              variant: Optional[str] = None, exclude_sources: Sequence[str] = ()) -> pd.DataFrame:
+    """Stored gaps (one row per gap of a release/variant/label/source group) overlapping the time window."""
+    where, params = _filters(start_time, end_time, labels, release, variant, exclude_sources)
+    query = text(f"""
+        SELECT {", ".join(CATALOG_GROUP)}, start_time, end_time, missing
+        FROM {getenv("TABLE_NAME")}_gaps
+        WHERE {where}
+        ORDER BY release, variant, label, source, start_time
+    """)
+    with engine.connect() as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def read_spans(engine, start_time=None, end_time=None, labels: Optional[List[str]] = None, release: Optional[str] = None,
+               variant: Optional[str] = None, exclude_sources: Sequence[str] = ()) -> pd.DataFrame:
+    """First and last epochs of the catalog groups overlapping the time window."""
+    where, params = _filters(start_time, end_time, labels, release, variant, exclude_sources)
+    query = text(f"""
+        SELECT {", ".join(CATALOG_GROUP)}, start_time, end_time
+        FROM {getenv("TABLE_NAME")}_catalog
+        WHERE {where}
+        ORDER BY release, variant, label, source
+    """)
+    with engine.connect() as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def window_gaps(engine, start_time, end_time, labels: Optional[List[str]] = None, release: Optional[str] = None,
+                variant: Optional[str] = None, interval_seconds: float = 5,
+                exclude_sources: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Missing stretches of each release/variant in [start_time, end_time], over all its labels and sources: gaps
+    within groups, between consecutive labels and at the ends of the window (see src/utils/gaps.holes).
+    A release given without stored data in the window is missing as a whole.
+
+    Returns:
+        pd.DataFrame with columns release, variant, start_time, end_time (epochs bounding the missing ones)
+        and missing (number of missing epochs).
+    """
+    spans = read_spans(engine, start_time, end_time, labels, release, variant, exclude_sources)
+    gaps = read_gaps(engine, start_time, end_time, labels, release, variant, exclude_sources)
+    parts = []
+    for (rel, var), group in spans.groupby(["release", "variant"], sort=True):
+        group_gaps = gaps[(gaps["release"] == rel) & (gaps["variant"] == var)]
+        parts.append(holes(covered_intervals(group, group_gaps), start_time, end_time, interval_seconds)
+                     .assign(release=rel, variant=var))
+    if spans.empty and release is not None:
+        parts.append(holes(spans, start_time, end_time, interval_seconds).assign(release=release, variant=variant or ""))
+    return pd.concat(parts, ignore_index=True)[HOLE_COLUMNS] if parts else pd.DataFrame(columns=HOLE_COLUMNS)
+
+
+def window_completeness(engine, start_time, end_time, labels: Optional[List[str]] = None, release: Optional[str] = None,
+                        variant: Optional[str] = None, interval_seconds: float = 5) -> pd.DataFrame:
+    """
+    Is the window complete? One row per release/variant: expected epochs in [start_time, end_time] at the cadence,
+    missing epochs, number of gaps, and 'complete' (nothing missing). Reads only the catalog and the gaps table.
+    """
+    found = window_gaps(engine, start_time, end_time, labels, release, variant, interval_seconds)
+    spans = read_spans(engine, start_time, end_time, labels, release, variant)[["release", "variant"]]
+    if spans.empty and release is not None:
+        spans = pd.DataFrame({"release": [release], "variant": [variant or ""]})
+    expected = int((pd.Timestamp(end_time) - pd.Timestamp(start_time)) / pd.Timedelta(seconds=interval_seconds)) + 1
+    summary = (spans.drop_duplicates().merge(found, how="left", on=["release", "variant"])
+               .groupby(["release", "variant"], as_index=False)
+               .agg(missing=("missing", "sum"), gaps=("missing", "count")))
+    summary.insert(2, "epochs", expected)
+    summary["missing"] = summary["missing"].astype(int)
+    summary["complete"] = summary["missing"] == 0
+    return summary
+
+
+def is_complete(engine, start_time, end_time, labels: Optional[List[str]] = None, release: Optional[str] = None,
+                variant: Optional[str] = None, interval_seconds: float = 5) -> bool:
+    """True if data is stored for every epoch of [start_time, end_time] (for each release/variant stored there)."""
+    summary = window_completeness(engine, start_time, end_time, labels, release, variant, interval_seconds)
+    return not summary.empty and bool(summary["complete"].all())
+
+
+def month_holes(engine, release: str, variant: str, label: str, interval_seconds: float = 5,
+                exclude_sources: Sequence[str] = ("borrowed",)) -> Optional[pd.DataFrame]:
+    """
+    Gaps of a label over its month (from the day of its first epoch, see src/utils/gaps.month_window): the epochs
+    that src/utils/repair_month.missing_timestamps finds missing, as gaps. None if the label has no data.
+    """
+    spans = read_spans(engine, labels=[label], release=release, variant=variant, exclude_sources=exclude_sources)
+    if spans.empty:
+        return None
+    start_time, end_time = month_window(spans["start_time"].min(), interval_seconds)
+    gaps = read_gaps(engine, labels=[label], release=release, variant=variant, exclude_sources=exclude_sources)
+    return holes(covered_intervals(spans, gaps), start_time, end_time, interval_seconds)
+
+
+def main(argv=None):
+    """Same as 'grace-db gaps' (see src/cli.py)."""
+    from src.cli import run
+    run("gaps", argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import pandas as pd
+from typing import Optional
+from sqlalchemy import text
+from src.machinery import getenv
+from src.utils.month_cache import entry_dir, evict, open_entry, to_dataframe, write_entry
+
+DEFAULT_CACHE_DIR = "~/.cache/grace-db/months"
+DEFAULT_MAX_BYTES = 20 * 2**30
+
+
+def cache_dir() -> str:
+    """Root of the month cache: MONTH_CACHE_DIR, or ~/.cache/grace-db/months."""
+    return os.getenv("MONTH_CACHE_DIR") or DEFAULT_CACHE_DIR
+
+
+def read_month(engine, release: str, label: str) -> pd.DataFrame:
+    """All rows of a (release, label) month from TABLE_NAME (every variant and source), ordered by time."""
+    query = text(f"""
+        SELECT * FROM {getenv("TABLE_NAME")}
+        WHERE release = :release AND label = :label
+        ORDER BY datetime, variant, source
+    """)
+    with engine.connect() as conn:
+        return pd.read_sql_query(query, conn, params={"release": release, "label": label})
+
+
+def load_month(release: str, label: str, engine=None, root: Optional[str] = None,
+               max_bytes: int = DEFAULT_MAX_BYTES, check_stale: bool = True) -> pd.DataFrame:
+    """
+    Rows of a (release, label) month, read from the local month cache (see src/utils/month_cache.py) and
+    materialized from the database on first use or when the catalog shows it changed since.
+    The returned DataFrame is backed by read-only memory maps: reopening a cached month takes milliseconds and
+    processes working on the same month share one copy in the page cache. Copy it ('df.copy()') to modify it.
+    With check_stale=False, a cached month is used without contacting the database.
+    A month missing from the catalog (e.g. written outside ingestion) is read from the table and not cached.
+    """
+    root = root or cache_dir()
+    if not check_stale:
+        columns = open_entry(root, release, label)
+        if columns is not None:
+            return to_dataframe(columns)
+    if engine is None:
+        from src.models import get_engine
+        engine = get_engine()
+
+    from scripts.catalog import catalog_version
+    token = catalog_version(engine, ["release = :release", "label = :label"], {"release": release, "label": label})
+    if token is None:
+        return read_month(engine, release, label)
+    columns = open_entry(root, release, label, token)
+    if columns is None:
+        write_entry(root, release, label, read_month(engine, release, label), token)
+        evict(root, max_bytes, keep=(str(entry_dir(root, release, label)),))
+        columns = open_entry(root, release, label, token)
+    return to_dataframe(columns)
+
+
+def main(argv=None):
+    """Same as 'grace-db cache' (see src/cli.py)."""
+    from src.cli import run
+    run("cache", argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
-import argparse         # Library for parsing command-line arguments
 import pandas as pd     # Library for handling tabular data (tables like Excel)
-from sqlalchemy import create_engine, text  # Library for talking to databases
+from sqlalchemy import text, Integer  # Library for talking to databases
 import os               # Library for system operations, like reading environment variables
-import sys
+import io
+import time
+import uuid
 import yaml             # Library for reading YAML-formated files
 from tqdm import tqdm   # Library to make progress bars
 from pickle import Unpickler
-from pathlib import Path
-from src.machinery import inspect_df, getenv
+from contextlib import contextmanager
+from src.machinery import inspect_df, inspect_report, getenv
+from src.utils.data_quality import chunk_stats, merge_stats, finalize_stats, report_problems
+from src.utils.pipeline import run_pipeline, log_counters, logger
+from src.utils.partitions import attach_sql, create_partition_sql, default_name, partition_name
+from src.models import KBRGravimetry, NATURAL_KEY
+from src.utils.catalog import CATALOG_GROUP
+from scripts.catalog import refresh_catalog, catalog_groups
 
 
 def load_config(config_file: str = 'scripts/config.yaml') -> dict:
@@ -50,10 +57,19 @@ def chunker(seq, size):
     # from http://stackoverflow.com/a/434328
     return (seq[pos:pos + size] for pos in range(0, len(seq), size))
 
-def insert_with_progress(df,engine,chunksize):
+def insert_with_progress(df,engine,chunksize,interval_seconds=5):
+    """
+    Inserts 'df' in chunks of 'chunksize' rows. Data-quality statistics are computed per chunk
+    while inserting and merged into a single report, which is returned. The catalog is refreshed afterwards.
+    """
     chunks = [df.iloc[i:i+chunksize] for i in range(0, len(df), chunksize)]
+    stats = None
+    with engine.begin() as conn:
+        ensure_partitions(conn, partition_pairs(df))
     with tqdm(total=len(df)) as pbar:
         for i, cdf in enumerate(chunks):
+            cstats = chunk_stats(cdf, interval_seconds=interval_seconds)
+            stats = cstats if stats is None else merge_stats(stats, cstats)
             # Use pandas built-in batching via chunksize if batching is enabled
             cdf.to_sql(
                 index=False,               # Don't save the DataFrame index as a column
@@ -63,20 +79,269 @@ def insert_with_progress(df,engine,chunksize):
                 method="multi",            # Insert using efficient multi-insert method
                 chunksize=chunksize, #batch_size if use_batches else None  # Control batching
             )
-            pbar.update(chunksize)
+            pbar.update(len(cdf))
+    refresh_catalog(engine, catalog_groups(df), interval_seconds)
+    return finalize_stats(stats if stats is not None else chunk_stats(df, interval_seconds=interval_seconds))
 
-def populate_db(filepath: str, engine, use_batches: bool = False, batch_size: int = 1000, config: dict = load_config()) -> None:
+def append_dataframe(df, engine, chunksize: int = 100000, interval_seconds: float = 5, workers: int = 2):
     """
-    Loads a .pkl file and populates the TABLE_NAME table in the database.
-    Allows full load or batched inserts based on user choice.
+    Appends 'df' to the TABLE_NAME table with a pipelined COPY (see copy_pipelined), in one transaction:
+    chunks are checked and encoded while the previous ones are being written, so the load is limited by the
+    database rather than by Python. Like insert_with_progress, fails if a natural key is already stored.
+    The catalog is refreshed afterwards.
+
+    Returns:
+        (report, counters): the data-quality report and the per-stage throughput counters.
+    """
+    df = normalize_key_columns(df)
+    with engine.begin() as conn:  # committed right away: creating partitions briefly locks the table
+        ensure_partitions(conn, partition_pairs(df))
+    with engine.begin() as conn:
+        reports, counters = copy_pipelined([(None, df)], conn, getenv("TABLE_NAME"), chunksize, interval_seconds, workers)
+    refresh_catalog(engine, catalog_groups(df), interval_seconds)
+    return reports[None], counters
+
+def normalize_key_columns(df):
+    """
+    Natural-key columns (label, release, variant, source) are stored as '' when not applicable,
+    because NULLs never conflict in a unique constraint.
+    """
+    missing = [c for c in NATURAL_KEY[1:] if c in df.columns and df[c].isna().any()]
+    if missing:
+        df = df.assign(**{c: df[c].fillna('') for c in missing})
+    return df
+
+def encode_csv(df) -> io.StringIO:
+    """Encodes 'df' as headerless CSV for COPY (float-typed integer columns are written as integers)."""
+    integer_columns = [c.name for c in KBRGravimetry.__table__.columns if isinstance(c.type, Integer)]
+    df = df.astype({c: "Int64" for c in integer_columns if c in df.columns and df[c].dtype.kind == "f"})
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    return buffer
+
+def copy_csv(conn, table: str, columns, buffer) -> None:
+    """COPYs a CSV buffer (see encode_csv) with the given columns into 'table', in the current transaction of 'conn'."""
+    quoted = ", ".join(f'"{c}"' for c in columns)
+    not_null = ", ".join(f'"{c}"' for c in columns if c in NATURAL_KEY[1:])
+    options = f", FORCE_NOT_NULL ({not_null})" if not_null else ""  # '' stays '' instead of NULL
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({quoted}) FROM STDIN WITH (FORMAT csv{options})", buffer)
+    finally:
+        cursor.close()
+
+def copy_dataframe(df, conn, table: str) -> None:
+    """
+    Streams 'df' into 'table' with COPY (much faster than INSERT statements).
+    'conn' is a SQLAlchemy connection; the COPY runs in its current transaction.
+    """
+    copy_csv(conn, table, list(df.columns), encode_csv(df))
+
+def copy_pipelined(frames, conn, table: str, chunksize: int = 100000, interval_seconds: float = 5,
+                   workers: int = 2, queue_size: int = 4, prepare=None):
+    """
+    COPYs DataFrames into 'table' through a pipeline (see src/utils/pipeline.run_pipeline) whose stages overlap:
+    frames are read and sliced into chunks in a background thread, chunks are checked (data-quality statistics)
+    and encoded to CSV on 'workers' threads, and the encoded chunks are COPYed in order on 'conn', in its current
+    transaction. Up to 'queue_size' chunks are kept ready, so the COPY does not wait for Python between chunks.
 
     Args:
-        filepath: Path to the .pkl file containing the satellite data.
-        engine: SQLAlchemy engine for database connection.
-        use_batches: If True, insert in batches. If False, insert all at once.
-        batch_size: Number of rows per batch (only relevant if use_batches=True).
+        frames: Iterable of (source_file, DataFrame); read lazily (e.g. the next file loads during the COPY).
+        conn: SQLAlchemy connection.
+        table: Target table.
+        chunksize: Rows per COPY.
+        interval_seconds: Expected cadence, for the data-quality reports.
+        workers: Threads checking and encoding chunks.
+        queue_size: Maximum number of chunks between reading and COPY.
+        prepare: Optional function applied to each DataFrame before it is sliced.
+
+    Returns:
+        (reports, counters): finalized data-quality report per source file, and per-stage throughput counters.
     """
+    stats = {}
+    empty = {}
+
+    def chunks():
+        for source_file, df in frames:
+            if prepare is not None:
+                df = prepare(df)
+            if df.empty:
+                empty[source_file] = df
+            for i in range(0, len(df), chunksize):
+                yield source_file, df.iloc[i:i+chunksize]
+
+    def encode(item):
+        source_file, cdf = item
+        return source_file, chunk_stats(cdf, interval_seconds=interval_seconds), list(cdf.columns), encode_csv(cdf)
+
+    with tqdm(desc=f"COPY to {table}", unit=" rows") as pbar:
+        def write(result):
+            source_file, cstats, columns, buffer = result
+            copy_csv(conn, table, columns, buffer)
+            stats[source_file] = merge_stats(stats[source_file], cstats) if source_file in stats else cstats
+            pbar.update(cstats["rows"])
+
+        counters = run_pipeline(chunks(), encode, write, workers, queue_size, size=lambda item: len(item[1]))
+
+    for source_file, df in empty.items():
+        stats[source_file] = chunk_stats(df, interval_seconds=interval_seconds)
+    return {source_file: finalize_stats(s) for source_file, s in stats.items()}, counters
+
+def partition_pairs(df) -> list:
+    """(release, label) pairs of the rows of 'df' ('' for missing columns, as stored)."""
+    keys = df.reindex(columns=["release", "label"]).fillna('').astype(str)
+    return list(keys.drop_duplicates().itertuples(index=False, name=None))
+
+def is_partitioned(conn, table: str) -> bool:
+    return bool(conn.execute(text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+                             {"table": table}).scalar())
+
+def create_partition(conn, release: str, label: str = None) -> str:
+    """
+    Creates and attaches the partition of a release (label None) or of one of its labels (see src/utils/partitions.py),
+    moving its rows out of the DEFAULT partition they were stored in, if any. The partition is created as a
+    standalone table and attached, which takes a weaker lock on TABLE_NAME than CREATE TABLE ... PARTITION OF
+    (queries go on). Returns its name.
+    """
+    table = getenv("TABLE_NAME")
+    name = partition_name(table, release, label)
+    parent, default = (table, default_name(table)) if label is None else (partition_name(table, release),
+                                                                         default_name(table, release))
+    for statement in create_partition_sql(table, name, release, label):
+        conn.execute(text(statement))
+    condition = "release = :release" + ("" if label is None else " AND label = :label")
+    conn.execute(text(f"""
+        WITH moved AS (DELETE FROM {default} WHERE {condition} RETURNING *)
+        INSERT INTO {name} SELECT * FROM moved
+    """), {"release": release, "label": label})
+    conn.execute(text(attach_sql(parent, name, release if label is None else label)))
+    return name
+
+def lock_partitions(conn) -> None:
+    """
+    Serializes the creation of partitions of TABLE_NAME: a transaction-level advisory lock, held until the
+    transaction ends, so that concurrent loads do not both find a partition missing and create it.
+    """
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f'{getenv("TABLE_NAME")}_partitions'})
+
+def ensure_partitions(conn, pairs) -> list:
+    """
+    Creates the missing partitions of TABLE_NAME for the (release, label) pairs 'pairs' (see create_partition),
+    so that loaded rows land in the partition of their month. Does nothing if TABLE_NAME is not partitioned.
+    The lock of lock_partitions is taken only when a partition is missing, and the check is repeated once it is held.
+    Returns the names of the partitions created.
+    """
+    table = getenv("TABLE_NAME")
+    if not pairs or not is_partitioned(conn, table):
+        return []
+
+    def missing(release, level):
+        name = partition_name(table, release, level)
+        return conn.execute(text("SELECT to_regclass(:name) IS NULL"), {"name": name}).scalar()
+
+    levels = [(release, level) for release, label in sorted({tuple(pair) for pair in pairs}) for level in (None, label)]
+    levels = [(release, level) for release, level in levels if missing(release, level)]
+    if not levels:
+        return []
+    lock_partitions(conn)
+    return [create_partition(conn, release, level) for release, level in levels if missing(release, level)]
+
+def create_staging_table(conn, columns) -> str:
+    """
+    Creates an empty UNLOGGED copy of the TABLE_NAME columns 'columns' (no WAL, no indexes) and returns its name.
+    The table is dropped by drop_staging_table, or when the transaction that created it rolls back.
+    """
+    staging = f'{getenv("TABLE_NAME")}_staging_{uuid.uuid4().hex[:8]}'
+    column_list = ", ".join(f'"{c}"' for c in columns)
+    conn.execute(text(f"CREATE UNLOGGED TABLE {staging} AS SELECT {column_list} FROM {getenv('TABLE_NAME')} WITH NO DATA"))
+    return staging
+
+def drop_staging_table(conn, staging: str) -> None:
+    conn.execute(text(f"DROP TABLE IF EXISTS {staging}"))
 
+def upsert_dataframe(df, engine, chunksize: int = 100000, replace: bool = False, interval_seconds: float = 5,
+                     workers: int = 2):
+    """
+    Upserts 'df' into the TABLE_NAME table on its natural key (timestamp, label, release, variant, source):
+    rows are COPYed into an unlogged staging table and merged with a single INSERT ... ON CONFLICT DO UPDATE.
+    With replace=True, rows of the same (label, release, variant, source) groups that are not in 'df'
+    are deleted, so a re-delivered month replaces the stored one. Everything runs in one transaction.
+    The COPY is pipelined with the checks and CSV encoding of the next chunks on 'workers' threads (see copy_pipelined).
+
+    Returns:
+        (report, counts): the data-quality report and a dict with 'inserted', 'updated' and 'deleted' row counts.
+    """
+    df = normalize_key_columns(df)
+    columns = list(df.columns)
+    missing = [c for c in NATURAL_KEY if c not in columns]
+    if missing:
+        raise ValueError(f"Upserts need all natural-key columns, missing: {missing}")
+    table = getenv("TABLE_NAME")
+    quoted = ", ".join(f'"{c}"' for c in columns)
+    key = ", ".join(f'"{c}"' for c in NATURAL_KEY)
+    updates = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in columns if c not in NATURAL_KEY)
+
+    counts = {"inserted": 0, "updated": 0, "deleted": 0}
+    with engine.begin() as conn:
+        ensure_partitions(conn, partition_pairs(df))
+    with engine.begin() as conn:
+        staging = create_staging_table(conn, columns)
+        reports, counters = copy_pipelined([(None, df)], conn, staging, chunksize, interval_seconds, workers)
+        log_counters(counters)
+        conn.execute(text(f"CREATE INDEX ON {staging} ({key})"))
+        conn.execute(text(f"ANALYZE {staging}"))
+
+        if replace:
+            groups = " AND ".join(f't."{c}" = g."{c}"' for c in NATURAL_KEY[1:])
+            matches = " AND ".join(f's."{c}" = t."{c}"' for c in NATURAL_KEY)
+            counts["deleted"] = conn.execute(text(f"""
+                DELETE FROM {table} t
+                USING (SELECT DISTINCT {", ".join(f'"{c}"' for c in NATURAL_KEY[1:])} FROM {staging}) g
+                WHERE {groups}
+                AND NOT EXISTS (SELECT 1 FROM {staging} s WHERE {matches})
+            """)).rowcount
+
+        conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        inserted, updated = conn.execute(text(f"""
+            WITH merged AS (
+                INSERT INTO {table} ({quoted})
+                SELECT DISTINCT ON ({key}) {quoted} FROM {staging}
+                ON CONFLICT ON CONSTRAINT uq_{table}_natural_key {conflict}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM merged
+        """)).one()
+        counts["inserted"], counts["updated"] = int(inserted), int(updated)
+        drop_staging_table(conn, staging)
+
+    refresh_catalog(engine, catalog_groups(df), interval_seconds)
+    return reports[None], counts
+
+def store_quality_report(engine, source_file: str, report: dict) -> None:
+    """
+    Stores a finalized data-quality report in the TABLE_NAME_quality table, next to the ingested data.
+    """
+    from src.models import DataQualityReport
+    from sqlalchemy.orm import Session
+    with Session(engine) as session:
+        session.add(DataQualityReport(
+            source_file=source_file,
+            rows=report["rows"],
+            problems=len(report_problems(report)),
+            report=report,
+        ))
+        session.commit()
+
+def table_columns(engine) -> list:
+    """Returns the column names of the TABLE_NAME table."""
+    with engine.connect() as conn:
+        return list(pd.read_sql_query(text(f"""SELECT * FROM {getenv("TABLE_NAME")} LIMIT 0"""), conn).columns)
+
+def load_satellite_file(filepath: str, config: dict, columns: list) -> pd.DataFrame:
+    """
+    Loads a .pkl file and keeps the satellite fields of 'config' that are columns of the table ('columns').
+    """
     print(f"Loading data from {filepath}...")
 
     # Safety check: only allow .pkl files
@@ -99,16 +364,179 @@ def populate_db(filepath: str, engine, use_batches: bool = False, batch_size: in
         intersec_satfields = sorted(set(config['SATELLITE_FIELDS']).intersection(list(df.columns)) ,key=lambda x:config['SATELLITE_FIELDS'].index(x))
         df = df[intersec_satfields]
 
-    with engine.connect() as conn:
-        getSQLtable = pd.read_sql_query(text(f"""SELECT * FROM {getenv("TABLE_NAME")}"""), conn)
-        intersec_satfields = sorted(set(list(df.columns)).intersection(list(getSQLtable.columns)) ,key=lambda x:list(df.columns).index(x))
-        df = df[intersec_satfields]
+    intersec_satfields = sorted(set(list(df.columns)).intersection(columns) ,key=lambda x:list(df.columns).index(x))
+    df = df[intersec_satfields]
+
+    return normalize_key_columns(df)
+
+@contextmanager
+def timed(timings: dict, step: str):
+    """Records the wall-clock duration of a step in 'timings' (seconds) and logs it at INFO on 'grace_db.ingestion'."""
+    start = time.perf_counter()
+    yield
+    timings[step] = time.perf_counter() - start
+    logger.info("%s: %.1f s", step, timings[step])
+
+def secondary_indexes(conn, table: str) -> list:
+    """
+    Returns the indexes of 'table' except the primary key, as dicts with 'name', 'definition' (CREATE INDEX statement)
+    and 'constraint' (the ADD CONSTRAINT definition for indexes backing a unique constraint, else None).
+    """
+    rows = conn.execute(text("""
+        SELECT i.relname, pg_get_indexdef(i.oid), c.conname, pg_get_constraintdef(c.oid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        LEFT JOIN pg_constraint c ON c.conindid = x.indexrelid AND c.conrelid = x.indrelid
+        WHERE x.indrelid = CAST(:table AS regclass) AND NOT x.indisprimary
+        ORDER BY i.relname
+    """), {"table": table}).all()
+    return [{"name": conname or name, "definition": definition, "constraint": constraint}
+            for name, definition, conname, constraint in rows]
+
+def drop_secondary_indexes(conn, table: str, indexes: list) -> None:
+    for index in indexes:
+        if index["constraint"]:
+            conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{index["name"]}"'))
+        else:
+            conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+
+def rebuild_indexes(conn, table: str, indexes: list, timings: dict, maintenance_workers: int = 4,
+                    maintenance_work_mem: str = "1GB") -> None:
+    """
+    Recreates dropped indexes, one at a time with the whole maintenance memory.
+    B-tree builds (including unique constraints) use parallel maintenance workers; GiST builds are single-threaded.
+    """
+    conn.execute(text(f"SET LOCAL max_parallel_maintenance_workers = {int(maintenance_workers)}"))
+    conn.execute(text("SELECT set_config('maintenance_work_mem', :mem, true)"), {"mem": maintenance_work_mem})
+    for index in indexes:
+        with timed(timings, f"rebuild {index['name']}"):
+            if index["constraint"]:
+                conn.execute(text(f'ALTER TABLE {table} ADD CONSTRAINT "{index["name"]}" {index["constraint"]}'))
+            else:  # indexes of a partitioned table are defined 'ON ONLY' the parent: build them on the partitions too
+                conn.execute(text(index["definition"].replace(" ON ONLY ", " ON ", 1)))
+
+def bulk_load(frames, engine, chunksize: int = 100000, interval_seconds: float = 5,
+              maintenance_workers: int = 4, maintenance_work_mem: str = "1GB", workers: int = 2):
+    """
+    Loads large amounts of data (e.g. the whole archive) without per-row index maintenance, in one transaction:
+    the secondary indexes and the natural-key constraint of TABLE_NAME are dropped, every frame is COPYed into
+    an unlogged staging table, rows are moved across with one INSERT ... SELECT (in time order, skipping rows
+    whose natural key is already stored or repeated), then the indexes are rebuilt with parallel maintenance
+    workers and the table is analyzed. If any step fails, everything is rolled back, indexes included.
+    The table is locked for the duration of the load.
+
+    Args:
+        frames: Iterable of (source_file, DataFrame); the next frame is read while the current one is COPYed.
+        engine: SQLAlchemy engine for database connection.
+        chunksize: Rows per COPY.
+        interval_seconds: Expected cadence, for the data-quality reports.
+        maintenance_workers: max_parallel_maintenance_workers for the index builds.
+        maintenance_work_mem: maintenance_work_mem for the index builds.
+        workers: Threads checking and encoding chunks during the COPY (see copy_pipelined).
+
+    Returns:
+        (reports, counts, timings): data-quality report per source file, a dict with 'inserted' and 'skipped'
+        row counts, and the duration of each step in seconds.
+    """
+    table = getenv("TABLE_NAME")
+    columns = [c.name for c in KBRGravimetry.__table__.columns if c.name != "id"]
+    quoted = ", ".join(f'"{c}"' for c in columns)
+    key = ", ".join(f'"{c}"' for c in NATURAL_KEY)
+    stored = " AND ".join(f't."{c}" = s."{c}"' for c in NATURAL_KEY)
+    timings = {}
+
+    with engine.begin() as conn:
+        indexes = secondary_indexes(conn, table)
+        with timed(timings, "drop indexes"):
+            drop_secondary_indexes(conn, table, indexes)
+        staging = create_staging_table(conn, columns)
+
+        with timed(timings, "copy"):
+            reports, counters = copy_pipelined(
+                frames, conn, staging, chunksize, interval_seconds, workers,
+                prepare=lambda df: normalize_key_columns(df.assign(**{c: '' for c in NATURAL_KEY[1:] if c not in df.columns})))
+        log_counters(counters)
+        copied = sum(report["rows"] for report in reports.values())
+        ensure_partitions(conn, conn.execute(text(f"SELECT DISTINCT release, label FROM {staging}")).all())
+
+        with timed(timings, "move rows"):
+            inserted = conn.execute(text(f"""
+                INSERT INTO {table} ({quoted})
+                SELECT DISTINCT ON ({key}) {quoted} FROM {staging} s
+                WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {stored})
+                ORDER BY {key}
+            """)).rowcount
+            groups = pd.DataFrame(conn.execute(text(f"SELECT DISTINCT {', '.join(CATALOG_GROUP)} FROM {staging}")).all(),
+                                  columns=list(CATALOG_GROUP))
+            drop_staging_table(conn, staging)
+
+        rebuild_indexes(conn, table, indexes, timings, maintenance_workers, maintenance_work_mem)
+        with timed(timings, "analyze"):
+            conn.execute(text(f"ANALYZE {table}"))
+
+    with timed(timings, "refresh catalog"):
+        refresh_catalog(engine, groups, interval_seconds)
+
+    return reports, {"inserted": inserted, "skipped": copied - inserted}, timings
+
+def bulk_load_files(filepaths, engine, config: dict = None, chunksize: int = 100000, **kwargs):
+    """
+    Bulk-loads several .pkl files (see bulk_load) with a single index rebuild, and stores their quality reports.
+    'config' defaults to scripts/config.yaml.
+    """
+    config = config if config is not None else load_config()
+    columns = table_columns(engine)  # read before bulk_load locks the table
+    frames = ((str(f), load_satellite_file(str(f), config, columns)) for f in filepaths)
+    reports, counts, timings = bulk_load(frames, engine, chunksize, config.get('CADENCE_SECONDS', 5), **kwargs)
+    for source_file, report in reports.items():
+        inspect_report(report)
+        store_quality_report(engine, source_file, report)
+    print(f"Inserted {counts['inserted']} rows, skipped {counts['skipped']} duplicates in {sum(timings.values()):.1f} s.")
+    return counts, timings
+
+def populate_db(filepath: str, engine, use_batches: bool = False, batch_size: int = 1000, config: dict = None, mode: str = "append",
+                workers: int = 2) -> None:
+    """
+    Loads a .pkl file and populates the TABLE_NAME table in the database.
+    Allows full load or batched inserts based on user choice.
+
+    Args:
+        filepath: Path to the .pkl file containing the satellite data.
+        engine: SQLAlchemy engine for database connection.
+        use_batches: If True, insert in batches. If False, insert all at once.
+        batch_size: Number of rows per batch (only relevant if use_batches=True).
+        config: Configuration (default: scripts/config.yaml).
+        mode: 'append' inserts the rows; 'upsert' inserts or updates them on the natural key;
+            'replace' upserts and deletes stored rows of the same label/release/variant/source missing from the file
+            (use it when a month is re-delivered); 'bulk' loads without index maintenance (see bulk_load).
+            All modes COPY the rows through a pipeline (see copy_pipelined).
+        workers: Threads checking and encoding chunks while the previous ones are written.
+    """
+    config = config if config is not None else load_config()  # read at call time, not at import
+    if mode not in ("append", "upsert", "replace", "bulk"):
+        raise ValueError(f"Unknown mode '{mode}' (expected 'append', 'upsert', 'replace' or 'bulk')")
+
+    df = load_satellite_file(filepath, config, table_columns(engine))
 
     inspect_df(df)
 
     print(f"Populating database...")
 
-    insert_with_progress(df,engine,batch_size)
+    if mode == "append":
+        report, counters = append_dataframe(df, engine, max(batch_size, 100000), config.get('CADENCE_SECONDS', 5), workers)
+        log_counters(counters)
+    elif mode == "bulk":
+        reports, counts, timings = bulk_load([(filepath, df)], engine, max(batch_size, 100000),
+                                             interval_seconds=config.get('CADENCE_SECONDS', 5), workers=workers)
+        report = reports[filepath]
+        print(f"Inserted {counts['inserted']} rows, skipped {counts['skipped']} duplicates in {sum(timings.values()):.1f} s.")
+    else:
+        report, counts = upsert_dataframe(df, engine, max(batch_size, 100000), replace=(mode == "replace"),
+                                          interval_seconds=config.get('CADENCE_SECONDS', 5), workers=workers)
+        print(f"Inserted {counts['inserted']}, updated {counts['updated']} and deleted {counts['deleted']} rows.")
+
+    inspect_report(report)
+    store_quality_report(engine, filepath, report)
 
     print("Database populated successfully.")
 
@@ -139,6 +567,7 @@ def add_test_row(filepath: str, engine, config: dict) -> None:
     df = df[df['timestamp']==df['timestamp'].min()].head(1)
 
     df.loc[0,"timestamp"] = df.loc[0,"timestamp"] - 0.05 * df.loc[0,"timestamp"]
+    df = normalize_key_columns(df)
 
     # Insert this single test row into the database
     df.to_sql(
@@ -149,6 +578,7 @@ def add_test_row(filepath: str, engine, config: dict) -> None:
         method="multi",           # Insert using efficient multi-insert method
         chunksize=1               # Only one row
     )
+    refresh_catalog(engine, catalog_groups(df), config.get('CADENCE_SECONDS', 5))
 
 def return_test_row(filepath: str, config: dict) -> pd.core.frame.DataFrame:
     """
@@ -181,47 +611,12 @@ def return_test_row(filepath: str, config: dict) -> pd.core.frame.DataFrame:
 # Command-Line Setup #
 # ------------------ #
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Populate the KBR Gravimety Data table from a .pkl file.")
-    parser.add_argument("--filepath", type=str, help="Path to the .pkl data file.")
-    parser.add_argument("--use_batches", action="store_true", help="Use batch inserts (default: False).")
-    parser.add_argument("--batch_size", type=int, default=1000, help="Batch size to use when batching (default: 1000).")
-    args = parser.parse_args()
-
-    # Database connection
-
-    # Determine the data file to use
-    if args.filepath:
-        data_file = Path(args.filepath)
-        if not data_file.exists():
-            print(f"Specified file {data_file} does not exist.")
-            sys.exit(1)
-    else:
-        # Try to find a .pkl file in 'data/' folder
-        DATA_DIR = Path("data")
-        data_files = list(DATA_DIR.glob("*.pkl"))
-        if data_files:
-            data_file = data_files[0]
-            print(f"Found data file(s): {[f.name for f in data_files]}")
-        else:
-            print("No data file found in 'data/' folder. Skipping population.")
-            sys.exit(0)
 
+def main(argv=None):
+    """Same as 'grace-db load' (see src/cli.py)."""
+    from src.cli import run
+    run("load", argv)
 
-    print(f"Populating database with {data_file}...")
 
-    try:
-        engine = create_engine(getenv('DATABASE_URL'))
-
-        populate_db(
-            filepath=str(data_file),
-            engine=engine,
-            use_batches=args.use_batches,
-            batch_size=args.batch_size
-        )
-    
-        print("Database population completed successfully.")
-
-    except Exception as e:
-        print(f"Failed to populate database: {e}")
-        sys.exit(1)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+import uuid
+import pandas as pd
+from typing import List, Optional
+from sqlalchemy import text
+from src.machinery import getenv, inspect_report
+from src.models import KBRGravimetry, NATURAL_KEY
+from src.utils.catalog import CATALOG_GROUP
+from src.utils.pipeline import log_counters
+from src.utils.partitions import (archive_schema, attach_sql, check_values, create_partition_sql, default_name,
+                                  index_on, partition_name)
+from scripts.catalog import refresh_catalog
+from scripts.populate_db import (copy_pipelined, create_partition, create_staging_table, drop_staging_table,
+                                 is_partitioned, lock_partitions, normalize_key_columns, secondary_indexes, timed)
+
+# Lifecycle of whole releases and months, as operations on the partitions of TABLE_NAME (see src/utils/partitions.py)
+# instead of DELETEs and INSERTs of their rows: dropping, archiving, restoring and swapping change the system
+# catalogs only, and take a short exclusive lock on TABLE_NAME. 'lock_timeout' bounds the wait for that lock, so a
+# long-running query makes the operation fail instead of queueing every other query behind it.
+
+
+def _require_partitioned(conn) -> None:
+    if not is_partitioned(conn, getenv("TABLE_NAME")):
+        raise ValueError(f"{getenv('TABLE_NAME')} is not partitioned: run 'alembic upgrade head' first")
+
+
+def _set_lock_timeout(conn, lock_timeout: str) -> None:
+    conn.execute(text("SELECT set_config('lock_timeout', :value, true)"), {"value": lock_timeout})
+
+
+def _exists(conn, name: str, schema: Optional[str] = None) -> bool:
+    qualified = f"{schema}.{name}" if schema else name
+    return conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": qualified}).scalar()
+
+
+def _tree(conn, name: str, schema: Optional[str] = None) -> list:
+    """(name, relkind) of table 'name' of 'schema' (default: the current one) and of its partitions, parents first."""
+    return conn.execute(text("""
+        WITH RECURSIVE tree AS (
+            SELECT c.oid, 0 AS depth FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relname = :name AND n.nspname = COALESCE(:schema, current_schema())
+            UNION ALL
+            SELECT i.inhrelid, t.depth + 1 FROM pg_inherits i JOIN tree t ON i.inhparent = t.oid
+        )
+        SELECT c.relname, c.relkind FROM tree t JOIN pg_class c ON c.oid = t.oid ORDER BY t.depth, c.relname
+    """), {"name": name, "schema": schema}).all()
+
+
+def _target(release: str, label: Optional[str] = None) -> tuple:
+    """Partition of a release or month, the table it is attached to, and its partition bound."""
+    table = getenv("TABLE_NAME")
+    if label is None:
+        return partition_name(table, release), table, release
+    return partition_name(table, release, label), partition_name(table, release), label
+
+
+def _describe(release: str, label: Optional[str] = None) -> str:
+    return release if label is None else f"{release} {label}"
+
+
+def _condition(label: Optional[str] = None) -> str:
+    return "release = :release" + ("" if label is None else " AND label = :label")
+
+
+def _delete_derived(conn, release: str, label: Optional[str], tables) -> dict:
+    """Deletes the rows of a release or month from the given tables derived from TABLE_NAME; returns their counts."""
+    table = getenv("TABLE_NAME")
+    params = {"release": release, "label": label}
+    counts = {}
+    for derived in tables:
+        if derived == "borrowed":
+            condition = "release = :release" + ("" if label is None else " AND :label IN (target_label, source_label)")
+        else:
+            condition = _condition(label)
+        counts[derived] = conn.execute(text(f"DELETE FROM {table}_{derived} WHERE {condition}"), params).rowcount
+    return counts
+
+
+def _move_to_schema(conn, relations, schema: str) -> None:
+    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+    for relation in relations:
+        conn.execute(text(f"ALTER TABLE {relation} SET SCHEMA {schema}"))
+
+
+def list_partitions(engine) -> pd.DataFrame:
+    """
+    One row per partition holding rows (one month, or the DEFAULT partition of a release or of TABLE_NAME):
+    its release and label (None for DEFAULT partitions), name, status ('attached', or 'archived' in the
+    TABLE_NAME_archive schema), estimated rows (from the last ANALYZE), size on disk with indexes, and tablespace.
+    """
+    table = getenv("TABLE_NAME")
+    rows = []
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            SELECT n.nspname, c.relname, c.relispartition,
+                   array_agg(pg_get_constraintdef(k.oid)) FILTER (WHERE k.oid IS NOT NULL),
+                   GREATEST(c.reltuples, 0)::bigint, pg_total_relation_size(c.oid), COALESCE(ts.spcname, 'pg_default')
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            LEFT JOIN pg_constraint k ON k.conrelid = c.oid AND k.contype = 'c'
+            LEFT JOIN pg_tablespace ts ON ts.oid = c.reltablespace
+            WHERE c.relkind = 'r' AND n.nspname IN (current_schema(), :archive)
+              AND (left(c.relname, length(:prefix)) = :prefix OR c.relname = :default)
+            GROUP BY n.nspname, c.relname, c.relispartition, c.reltuples, c.oid, ts.spcname
+        """), {"archive": archive_schema(table), "prefix": f"{table}_p_", "default": default_name(table)})
+        for schema, name, attached, checks, estimate, size, tablespace in result:
+            values = check_values(checks or [])
+            status = "archived" if schema == archive_schema(table) else ("attached" if attached else "detached")
+            rows.append((values.get("release"), values.get("label"), name, status, estimate, size, tablespace))
+    columns = ["release", "label", "partition", "status", "rows_estimate", "bytes", "tablespace"]
+    return pd.DataFrame(rows, columns=columns).sort_values(["release", "label", "status"], na_position="last",
+                                                           ignore_index=True)
+
+
+def drop(engine, release: str, label: Optional[str] = None, lock_timeout: str = "10s") -> dict:
+    """
+    Deletes a release (label None) or one of its months by dropping its partition, with its rows stored in the
+    DEFAULT partitions, if any, and its catalog, sketches, gaps, crossovers and borrowed ranges. No row is deleted
+    from the stored partitions, so nothing is left to vacuum.
+
+    Returns:
+        dict: the dropped partition (None if there was none) and the rows deleted from the other tables.
+    """
+    table = getenv("TABLE_NAME")
+    name = _target(release, label)[0]
+    with engine.begin() as conn:
+        _require_partitioned(conn)
+        _set_lock_timeout(conn, lock_timeout)
+        dropped = _exists(conn, name)
+        if dropped:
+            conn.execute(text(f"DROP TABLE {name}"))
+        # the remaining rows can only be in DEFAULT partitions: the DELETE reads those only
+        deleted = conn.execute(text(f"DELETE FROM {table} WHERE {_condition(label)}"),
+                               {"release": release, "label": label}).rowcount
+        counts = {"partition": name if dropped else None, "default_rows": deleted}
+        counts.update(_delete_derived(conn, release, label, ("catalog", "sketches", "gaps", "crossovers", "borrowed")))
+    return counts
+
+
+def archive(engine, release: str, label: Optional[str] = None, tablespace: Optional[str] = None,
+            lock_timeout: str = "10s") -> str:
+    """
+    Detaches the partition of a release (label None) or month and moves it, with its indexes and partitions, to
+    the TABLE_NAME_archive schema: the rows leave TABLE_NAME and its catalog, but stay on disk ready to be
+    restored (see restore). With 'tablespace', the archive is then moved there (see move).
+    Crossovers and borrowed ranges are kept. Returns the qualified name of the archived table.
+    """
+    table = getenv("TABLE_NAME")
+    schema = archive_schema(table)
+    name, parent, _ = _target(release, label)
+    with engine.begin() as conn:
+        _require_partitioned(conn)
+        if not _exists(conn, name):
+            raise ValueError(f"No partition of {_describe(release, label)} to archive")
+        if _exists(conn, name, schema):
+            raise ValueError(f"{_describe(release, label)} is already archived: drop or restore the archive first")
+        _set_lock_timeout(conn, lock_timeout)
+        relations = [relation for relation, _ in _tree(conn, name)]
+        conn.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {name}"))
+        _move_to_schema(conn, relations, schema)
+        _delete_derived(conn, release, label, ("catalog", "sketches", "gaps"))
+    if tablespace:
+        move(engine, release, label, tablespace, archived=True)
+    return f"{schema}.{name}"
+
+
+def restore(engine, release: str, label: Optional[str] = None, interval_seconds: float = 5,
+            lock_timeout: str = "10s") -> str:
+    """
+    Attaches an archived release or month (see archive) to TABLE_NAME again; its CHECK constraint spares the
+    validation scan. Its catalog, sketches and gaps are then recomputed, which reads the restored rows once.
+    Fails if the release or month was stored again since it was archived. Returns the name of the partition.
+    """
+    table = getenv("TABLE_NAME")
+    schema = archive_schema(table)
+    name, parent, value = _target(release, label)
+    with engine.begin() as conn:
+        _require_partitioned(conn)
+        if not _exists(conn, name, schema):
+            raise ValueError(f"{_describe(release, label)} is not archived")
+        if _exists(conn, name):
+            raise ValueError(f"{_describe(release, label)} is stored again: drop it before restoring the archive")
+        _set_lock_timeout(conn, lock_timeout)
+        if label is not None and not _exists(conn, parent):
+            lock_partitions(conn)
+            if not _exists(conn, parent):
+                create_partition(conn, release)
+        relations = [relation for relation, _ in _tree(conn, name, schema)]
+        current = conn.execute(text("SELECT current_schema()")).scalar()
+        _move_to_schema(conn, [f"{schema}.{relation}" for relation in relations], current)
+        conn.execute(text(attach_sql(parent, name, value)))
+    with engine.connect() as conn:
+        groups = pd.DataFrame(conn.execute(text(f"SELECT DISTINCT {', '.join(CATALOG_GROUP)} FROM {name}")).all(),
+                              columns=list(CATALOG_GROUP))
+    refresh_catalog(engine, groups, interval_seconds)
+    return name
+
+
+def move(engine, release: str, label: Optional[str] = None, tablespace: str = "pg_default",
+         archived: bool = False) -> List[str]:
+    """
+    Moves the partitions of a release (label None) or month and their indexes to 'tablespace' (e.g. on cheaper
+    disks), archived ones with archived=True. Unlike the other operations, this copies the data files: each month
+    is locked while it is copied, in its own transaction. Returns the names of the tables moved.
+    """
+    table = getenv("TABLE_NAME")
+    schema = archive_schema(table) if archived else None
+    name = _target(release, label)[0]
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT EXISTS (SELECT 1 FROM pg_tablespace WHERE spcname = :name)"),
+                            {"name": tablespace}).scalar():
+            raise ValueError(f"No tablespace '{tablespace}'")
+        relations = _tree(conn, name, schema)
+    if not relations:
+        raise ValueError(f"No {'archived ' if archived else ''}partition of {_describe(release, label)}")
+    quoted = '"' + tablespace.replace('"', '""') + '"'
+    moved = []
+    for relation, kind in relations:
+        qualified = f"{schema}.{relation}" if schema else relation
+        with engine.begin() as conn:
+            # a partitioned table has no storage: its tablespace is the default of its future partitions
+            conn.execute(text(f"ALTER TABLE {qualified} SET TABLESPACE {quoted}"))
+            if kind == "r":
+                indexes = conn.execute(text("""
+                    SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+                    WHERE x.indrelid = CAST(:table AS regclass)
+                """), {"table": qualified}).scalars().all()
+                for index in indexes:
+                    conn.execute(text(f"ALTER INDEX {f'{schema}.' if schema else ''}{index} SET TABLESPACE {quoted}"))
+        moved.append(qualified)
+    return moved
+
+
+def _create_swap_tables(conn, new: str, release: str, label: Optional[str], labels) -> list:
+    """
+    Creates the standalone table 'new' for the rows of a release (one partition per label of 'labels') or of a
+    month. Returns the (temporary name, final name) of the tables created.
+    """
+    table = getenv("TABLE_NAME")
+    for statement in create_partition_sql(table, new, release, label):
+        conn.execute(text(statement))
+    if label is not None:
+        return [(new, partition_name(table, release, label))]
+    renames = [(new, partition_name(table, release)), (default_name(new), default_name(table, release))]
+    for i, month in enumerate(labels):
+        for statement in create_partition_sql(table, f"{new}_{i}", release, month):
+            conn.execute(text(statement))
+        conn.execute(text(attach_sql(new, f"{new}_{i}", month)))
+        renames.append((f"{new}_{i}", partition_name(table, release, month)))
+    return renames
+
+
+def _copy_indexes(conn, table: str, new: str) -> None:
+    """
+    Builds on 'new' the primary key, constraints and indexes of 'table', so that attaching 'new' adopts them
+    instead of building them while TABLE_NAME is locked.
+    """
+    primary_key = conn.execute(text("""
+        SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND contype = 'p'
+    """), {"table": table}).scalar()
+    if primary_key:
+        conn.execute(text(f'ALTER TABLE {new} ADD CONSTRAINT "{new}_pkey" {primary_key}'))
+    for i, index in enumerate(secondary_indexes(conn, table)):
+        if index["constraint"]:
+            conn.execute(text(f'ALTER TABLE {new} ADD CONSTRAINT "{new}_c{i}" {index["constraint"]}'))
+        else:
+            conn.execute(text(index_on(index["definition"], new)))
+
+
+def swap(frames, engine, release: str, label: Optional[str] = None, archive_old: bool = False,
+         chunksize: int = 100000, interval_seconds: float = 5, workers: int = 2, lock_timeout: str = "10s"):
+    """
+    Replaces the stored rows of a release (label None) or month by the rows of 'frames', atomically. The rows are
+    COPYed, deduplicated on the natural key and indexed in tables apart from TABLE_NAME, while queries go on
+    reading the stored rows; then, in one short transaction, the stored partition is detached (and dropped, or
+    archived with archive_old=True, see archive) and the new one attached in its place. Queries see either
+    the old rows or the new ones. Crossovers of the replaced rows are deleted, and the catalog is refreshed.
+
+    Args:
+        frames: Iterable of (source_file, DataFrame), as for scripts/populate_db.bulk_load; all rows must belong
+            to 'release' (and to 'label' if given).
+        engine: SQLAlchemy engine for database connection.
+
+    Returns:
+        (reports, counts, timings): data-quality report per source file, a dict with 'inserted' and 'skipped'
+        row counts, and the duration of each step in seconds.
+    """
+    table = getenv("TABLE_NAME")
+    schema = archive_schema(table)
+    name, parent, value = _target(release, label)
+    columns = [c.name for c in KBRGravimetry.__table__.columns if c.name != "id"]
+    quoted = ", ".join(f'"{c}"' for c in columns)
+    key = ", ".join(f'"{c}"' for c in NATURAL_KEY)
+    new = f"{table}_swap_{uuid.uuid4().hex[:8]}"
+    params = {"release": release, "label": label}
+    timings = {}
+
+    with engine.begin() as conn:
+        _require_partitioned(conn)
+        if archive_old and _exists(conn, name, schema):
+            raise ValueError(f"{_describe(release, label)} is already archived: drop or restore the archive first")
+        staging = create_staging_table(conn, columns)
+        with timed(timings, "copy"):
+            reports, counters = copy_pipelined(
+                frames, conn, staging, chunksize, interval_seconds, workers,
+                prepare=lambda df: normalize_key_columns(df.assign(**{c: '' for c in NATURAL_KEY[1:] if c not in df.columns})))
+        log_counters(counters)
+        copied = sum(report["rows"] for report in reports.values())
+        pairs = conn.execute(text(f"SELECT DISTINCT release, label FROM {staging} ORDER BY label")).all()
+        unexpected = [tuple(p) for p in pairs if p[0] != release or (label is not None and p[1] != label)]
+        if unexpected or not pairs:
+            raise ValueError(f"Expected rows of {_describe(release, label)} only, got {unexpected or 'none'}")
+        groups = pd.DataFrame(conn.execute(text(f"SELECT DISTINCT {', '.join(CATALOG_GROUP)} FROM {staging}")).all(),
+                              columns=list(CATALOG_GROUP))
+
+        renames = _create_swap_tables(conn, new, release, label, [p[1] for p in pairs])
+        with timed(timings, "move rows"):
+            inserted = conn.execute(text(f"""
+                INSERT INTO {new} ({quoted})
+                SELECT DISTINCT ON ({key}) {quoted} FROM {staging}
+                ORDER BY {key}
+            """)).rowcount
+            drop_staging_table(conn, staging)
+        with timed(timings, "build indexes"):
+            _copy_indexes(conn, table, new)
+        with timed(timings, "analyze"):
+            conn.execute(text(f"ANALYZE {new}"))
+        stored = conn.execute(text(f"SELECT {', '.join(CATALOG_GROUP)} FROM {table}_catalog WHERE {_condition(label)}"),
+                              params).all()
+
+    try:
+        with timed(timings, "swap"), engine.begin() as conn:
+            _set_lock_timeout(conn, lock_timeout)
+            if label is not None and not _exists(conn, parent):
+                lock_partitions(conn)
+                if not _exists(conn, parent):
+                    create_partition(conn, release)
+            if _exists(conn, name):
+                relations = [relation for relation, _ in _tree(conn, name)]
+                conn.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {name}"))
+                if archive_old:
+                    _move_to_schema(conn, relations, schema)
+                else:
+                    conn.execute(text(f"DROP TABLE {name}"))
+            conn.execute(text(f"DELETE FROM {table} WHERE {_condition(label)}"), params)  # DEFAULT partitions only
+            for temporary, final in renames:
+                conn.execute(text(f"ALTER TABLE {temporary} RENAME TO {final}"))
+            conn.execute(text(attach_sql(parent, name, value)))
+            _delete_derived(conn, release, label, ("crossovers",))
+    except Exception:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {new}"))
+        raise
+
+    with timed(timings, "refresh catalog"):
+        stored = pd.DataFrame([tuple(g) for g in stored], columns=list(CATALOG_GROUP))
+        refresh_catalog(engine, pd.concat([stored, groups]).drop_duplicates(ignore_index=True), interval_seconds)
+    return reports, {"inserted": inserted, "skipped": copied - inserted}, timings
+
+
+def swap_files(filepaths, engine, release: str, label: Optional[str] = None, config: dict = None,
+               chunksize: int = 100000, **kwargs):
+    """Swaps in the rows of several .pkl files (see swap), and stores their quality reports. 'config' defaults to scripts/config.yaml."""
+    from scripts.populate_db import load_config, load_satellite_file, store_quality_report, table_columns
+    config = config if config is not None else load_config()
+    columns = table_columns(engine)
+    frames = ((str(f), load_satellite_file(str(f), config, columns)) for f in filepaths)
+    reports, counts, timings = swap(frames, engine, release, label, chunksize=chunksize,
+                                    interval_seconds=config.get('CADENCE_SECONDS', 5), **kwargs)
+    for source_file, report in reports.items():
+        inspect_report(report)
+        store_quality_report(engine, source_file, report)
+    print(f"Swapped in {counts['inserted']} rows ({counts['skipped']} duplicates skipped); "
+          f"the swap itself took {timings['swap']:.2f} s.")
+    return counts, timings
+
+
+def main(argv=None):
+    """Same as 'grace-db release' (see src/cli.py)."""
+    from src.cli import run
+    run("release", argv)
+
+
+if __name__ == "__main__":
+    main()
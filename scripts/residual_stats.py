@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Sequence
+from sqlalchemy import text
+from src.machinery import getenv
+from src.models import sketch_rows_sql
+from src.utils.sketches import DEFAULT_QUANTILES, SKETCH_COLUMNS, SKETCH_VARIABLES, describe, histogram, whole_days
+
+# groupings of read_sketches: SQL expression on TABLE_NAME_sketches, and on TABLE_NAME
+GROUPINGS = {
+    "label": ("label", "label"),
+    "release": ("release", "release"),
+    "day": ("bucket", "date_trunc('day', datetime)"),
+    "month": ("date_trunc('month', bucket)", "date_trunc('month', datetime)"),
+}
+
+
+def read_sketches(engine, variables: Sequence[str] = ("postfit",), start_time=None, end_time=None,
+                  labels: Optional[List[str]] = None, releases: Optional[List[str]] = None,
+                  polygon_coordinates=None, geodesic: bool = False, by: Optional[str] = None) -> pd.DataFrame:
+    """
+    Merged sketch (see src/utils/sketches.py) of the residual columns 'variables' within a time window,
+    optionally for some labels/releases, grouped by 'by' ('label', 'release', 'day', 'month' or None).
+    Whole days are read from TABLE_NAME_sketches; the partial days at the ends of the window, and windows with
+    a polygon, are sketched from TABLE_NAME in the database. Only the merged bins are transferred.
+
+    Returns:
+        pd.DataFrame with columns [by,] variable, bin, count, total, total_sq, min, max.
+    """
+    if by is not None and by not in GROUPINGS:
+        raise ValueError(f"Unknown grouping '{by}' (expected one of {sorted(GROUPINGS)})")
+    unknown = [v for v in variables if v not in SKETCH_VARIABLES]
+    if unknown:
+        raise ValueError(f"Not sketched: {unknown} (expected some of {list(SKETCH_VARIABLES)})")
+    table = getenv("TABLE_NAME")
+    params = {"variables": list(variables), "labels": list(labels or []), "releases": list(releases or []),
+              "start_time": start_time, "end_time": end_time}
+    common = []
+    if labels:
+        common.append("label = ANY(:labels)")
+    if releases:
+        common.append("release = ANY(:releases)")
+    stored = ["variable = ANY(:variables)"] + common
+    live = ["v.variable = ANY(:variables)"] + common
+
+    days = whole_days(start_time, end_time)
+    if polygon_coordinates is not None:
+        from scripts.space_time_query import polygon_filter
+        condition, params["polygon"] = polygon_filter(polygon_coordinates, geodesic)
+        stored.append("FALSE")
+        live.append(condition)
+        if start_time is not None:
+            live.append("datetime >= :start_time")
+        if end_time is not None:
+            live.append("datetime <= :end_time")
+    elif days is None:
+        stored.append("FALSE")
+        live.append("datetime BETWEEN :start_time AND :end_time")
+    else:
+        params["first_day"], params["end_day"] = days
+        edges = []
+        if days[0] is not None:
+            stored.append("bucket >= :first_day")
+            edges.append("(datetime >= :start_time AND datetime < :first_day)")
+        if days[1] is not None:
+            stored.append("bucket < :end_day")
+            edges.append("(datetime >= :end_day AND datetime <= :end_time)")
+        live.append(f"({' OR '.join(edges)})" if edges else "FALSE")
+
+    group_stored = [f"{GROUPINGS[by][0]} AS {by}"] if by else []
+    group_live = [GROUPINGS[by][1]] if by else []
+    group_columns = f"{by}, " if by else ""
+    query = text(f"""
+        SELECT {group_columns}variable, bin, SUM(count) AS count, SUM(total) AS total, SUM(total_sq) AS total_sq,
+               MIN(min) AS min, MAX(max) AS max
+        FROM (
+            SELECT {"".join(f"{g}, " for g in group_stored)}variable, bin, count, total, total_sq, min, max
+            FROM {table}_sketches
+            WHERE {" AND ".join(stored)}
+            UNION ALL
+            {sketch_rows_sql(" AND ".join(live), group_live)}
+        ) s
+        GROUP BY {group_columns}variable, bin
+        ORDER BY {group_columns}variable, bin
+    """)
+    with engine.connect() as conn:
+        df = pd.read_sql_query(query, conn, params=params)
+    return df[([by] if by else []) + ["variable"] + SKETCH_COLUMNS]
+
+
+def residual_distribution(engine, variables: Sequence[str] = ("postfit",), start_time=None, end_time=None,
+                          labels=None, releases=None, polygon_coordinates=None, geodesic=False, by=None,
+                          quantiles: Sequence[float] = DEFAULT_QUANTILES) -> pd.DataFrame:
+    """
+    Count, mean, std, min and max (exact) and approximate quantiles (within 1%, see src/utils/sketches.py) of residual
+    columns, one row per variable and 'by' group. Arguments as in read_sketches.
+    """
+    bins = read_sketches(engine, variables, start_time, end_time, labels, releases, polygon_coordinates, geodesic, by)
+    return describe(bins, ([by] if by else []) + ["variable"], quantiles)
+
+
+def residual_histogram(engine, variable: str = "postfit", edges=None, bins: int = 50, start_time=None, end_time=None,
+                       labels=None, releases=None, polygon_coordinates=None, geodesic=False) -> pd.DataFrame:
+    """
+    Histogram of a residual column between 'edges' (default: 'bins' equal bins between its minimum and maximum).
+    Arguments as in read_sketches. Counts near the edges are approximate (see src/utils/sketches.histogram).
+
+    Returns:
+        pd.DataFrame with columns left, right, count.
+    """
+    sketch = read_sketches(engine, [variable], start_time, end_time, labels, releases, polygon_coordinates, geodesic)
+    if edges is None:
+        if sketch.empty:
+            return pd.DataFrame(columns=["left", "right", "count"])
+        edges = np.linspace(sketch["min"].min(), sketch["max"].max(), bins + 1)
+    edges = np.asarray(edges, dtype=float)
+    return pd.DataFrame({"left": edges[:-1], "right": edges[1:], "count": histogram(sketch, edges)})
+
+
+def main(argv=None):
+    """Same as 'grace-db residuals' (see src/cli.py)."""
+    from src.cli import run
+    run("residuals", argv)
+
+
+if __name__ == "__main__":
+    main()
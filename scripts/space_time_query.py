@@ -1,125 +1,502 @@
-import argparse
+import os
 import pandas as pd
 from src.machinery import getenv
-from sqlalchemy import create_engine, text
-from src.utils.utils import check_polygon_validity
-import xarray as xr 
+from sqlalchemy import text
+from src.models import get_engine
+from src.utils.fanout import split_time_range, fan_out
+from src.utils.pagination import PAGE_SIZE, decode_token, encode_token, query_key
+from src.utils.query_metrics import read_sql
+from src.utils.utils import check_polygon_validity, polygon_geometry
 
-# Setup the database connection
-engine = create_engine(getenv('DATABASE_URL'))
+# The database engine is created on first use (see src/models.get_engine); queries are timed and optionally
+# logged with their plans (see src/utils/query_metrics.py)
 
-def query_satellite_data_by_time(start_time, end_time):
-    """Query the TABLE_NAME table for records within a time window."""
+# Position of GRACE-A; these expressions match the GiST indexes defined in src/models.py
+POINT_A = 'ST_SetSRID(ST_MakePoint("longitude_A", "latitude_A"), 4326)'
+GEOGRAPHY_A = f'geography({POINT_A})'
+
+QUERY_COLUMNS = ["id", "datetime", "latitude_A", "longitude_A", "postfit", "up_combined"]
+
+def polygon_filter(polygon_coordinates, geodesic=False, antimeridian=False):
+    """
+    Returns the SQL condition and the WKT parameter ':polygon' selecting records inside a polygon.
+    By default the polygon is planar in lon/lat, as given; with antimeridian=True its edges take the short way
+    across +/-180 degrees and a ring around a pole encloses it (see polygon_geometry). With geodesic=True the
+    polygon edges are great circles (PostGIS geography type).
+    """
+    if not check_polygon_validity(polygon_coordinates):
+        raise ValueError("Invalid polygon coordinates provided.")
+    if geodesic:
+        polygon_wkt = f"POLYGON(({', '.join([f'{lon} {lat}' for lon, lat in polygon_coordinates])}))"
+        return f"ST_Covers(ST_GeogFromText(:polygon), {GEOGRAPHY_A})", polygon_wkt
+    return f"ST_Contains(ST_GeomFromText(:polygon, 4326), {POINT_A})", polygon_geometry(polygon_coordinates, antimeridian).wkt
+
+def complete_arcs_filter():
+    """
+    SQL condition keeping the records of complete daily arcs only: days in which the record's release, variant,
+    label and source have no cadence gap, as recorded in TABLE_NAME_gaps at ingestion (see scripts/gaps.py).
+    The gaps are expanded into the days they overlap, and records are matched to those days on equalities only,
+    so the condition is planned as one hash anti-join rather than a range probe of the gaps per record.
+    """
+    table = getenv("TABLE_NAME")
+    return f"""NOT EXISTS (
+            SELECT 1 FROM {table}_gaps g
+            CROSS JOIN LATERAL generate_series(date_trunc('day', g.start_time), g.end_time, interval '1 day') AS d(day)
+            WHERE d.day < g.end_time
+              AND g.label = {table}.label AND g.release = {table}.release
+              AND g.variant = {table}.variant AND g.source = {table}.source
+              AND d.day = date_trunc('day', {table}.datetime))"""
+
+def query_satellite_data_by_time(start_time, end_time, complete_arcs=False):
+    """
+    Query the TABLE_NAME table for records within a time window.
+    With complete_arcs=True, only records of days without cadence gaps are returned (see complete_arcs_filter).
+    """
     query = text(f"""
         SELECT id, datetime, "latitude_A", "longitude_A", postfit, up_combined
         FROM {getenv("TABLE_NAME")}
         WHERE datetime BETWEEN :start_time AND :end_time
+        AND {complete_arcs_filter() if complete_arcs else "TRUE"}
         ORDER BY datetime ASC
     """)
 
-    with engine.connect() as conn:
-        df = pd.read_sql_query(query, conn, params={"start_time": start_time, "end_time": end_time})
+    with get_engine().connect() as conn:
+        df = read_sql(query, conn, params={"start_time": start_time, "end_time": end_time})
 
     return df
 
-def query_satellite_data_by_polygon(polygon_coordinates):
-    """Query the TABLE_NAME table for records within a spatial polygon."""
-    # Check if the polygon is valid
-    if not check_polygon_validity(polygon_coordinates):
-        raise ValueError("Invalid polygon coordinates provided.")
+def query_satellite_data_by_label(label, start_time=None, end_time=None, resolve_borrowed=True):
+    """
+    Query the TABLE_NAME table for the records of one label (solution month), optionally within a time window.
+    With resolve_borrowed=True, epochs the label borrows from another label (see scripts/borrow_map.py)
+    are included, resolved at read time through the TABLE_NAME_resolved view.
+    """
+    source = f'{getenv("TABLE_NAME")}_resolved' if resolve_borrowed else getenv("TABLE_NAME")
+    borrowed = "borrowed" if resolve_borrowed else "FALSE AS borrowed"
+    time_filter = "AND datetime BETWEEN :start_time AND :end_time" if start_time is not None and end_time is not None else ""
+    query = text(f"""
+        SELECT id, datetime, "latitude_A", "longitude_A", postfit, up_combined, {borrowed}
+        FROM {source}
+        WHERE label = :label {time_filter}
+        ORDER BY datetime ASC
+    """)
 
-    # Convert the polygon coordinates to WKT format
-    polygon_wkt = f"POLYGON(({', '.join([f'{lon} {lat}' for lon, lat in polygon_coordinates])}))"
+    with get_engine().connect() as conn:
+        df = read_sql(query, conn, params={"label": label, "start_time": start_time, "end_time": end_time})
+
+    return df
+
+def query_satellite_data_by_polygon(polygon_coordinates, geodesic=False, antimeridian=False):
+    """Query the TABLE_NAME table for records within a spatial polygon (see polygon_filter)."""
+    condition, polygon_wkt = polygon_filter(polygon_coordinates, geodesic, antimeridian)
 
     query = text(f"""
         SELECT id, datetime, "latitude_A", "longitude_A", postfit, up_combined
         FROM {getenv("TABLE_NAME")}
-        WHERE ST_Contains(
-            ST_GeomFromText(:polygon, 4326),
-            ST_SetSRID(ST_MakePoint("longitude_A", "latitude_A"), 4326)
-        )
+        WHERE {condition}
         ORDER BY datetime ASC
     """)
 
-    with engine.connect() as conn:
-        df = pd.read_sql_query(query, conn, params={"polygon": polygon_wkt})
+    with get_engine().connect() as conn:
+        df = read_sql(query, conn, params={"polygon": polygon_wkt})
 
     return df
 
-def query_satellite_data_within_polygon(start_time, end_time, polygon_coordinates):
-    """Query the TABLE_NAME table for records inside a polygon and time window."""
-    # Check if the polygon is valid
-    if not check_polygon_validity(polygon_coordinates):
-        raise ValueError("Invalid polygon coordinates provided.")
-
-    polygon_wkt = f"POLYGON(({', '.join([f'{lon} {lat}' for lon, lat in polygon_coordinates])}))"
+def query_satellite_data_within_polygon(start_time, end_time, polygon_coordinates, geodesic=False, complete_arcs=False,
+                                        antimeridian=False):
+    """
+    Query the TABLE_NAME table for records inside a polygon (see polygon_filter) and time window.
+    With complete_arcs=True, only records of days without cadence gaps are returned (see complete_arcs_filter).
+    """
+    condition, polygon_wkt = polygon_filter(polygon_coordinates, geodesic, antimeridian)
 
     query = text(f"""
         SELECT id, datetime, "latitude_A", "longitude_A", postfit, up_combined
         FROM {getenv("TABLE_NAME")}
         WHERE datetime BETWEEN :start_time AND :end_time
-        AND ST_Contains(
-            ST_GeomFromText(:polygon, 4326),
-            ST_SetSRID(ST_MakePoint("longitude_A", "latitude_A"), 4326)
-        )
+        AND {condition}
+        AND {complete_arcs_filter() if complete_arcs else "TRUE"}
+        ORDER BY datetime ASC
+    """)
+
+    with get_engine().connect() as conn:
+        df = read_sql(query, conn, params={"start_time": start_time, "end_time": end_time, "polygon": polygon_wkt})
+
+    return df
+
+def iter_satellite_data_parallel(start_time, end_time, polygon_coordinates=None, geodesic=False,
+                                 freq="MS", max_workers=4, max_pending=None, complete_arcs=False, antimeridian=False):
+    """
+    Parallel counterpart of query_satellite_data_by_time / query_satellite_data_within_polygon for long windows:
+    the window is split into sub-windows aligned on 'freq' (see src/utils/fanout.py), queried concurrently on
+    pooled connections, and yielded as DataFrames in time order. 'max_workers' should not exceed the engine's
+    pool size + overflow (5 + 10 by default); 'max_pending' bounds the sub-windows fetched ahead of the consumer.
+    """
+    condition, polygon_wkt = (polygon_filter(polygon_coordinates, geodesic, antimeridian)
+                              if polygon_coordinates is not None else ("TRUE", None))
+    if complete_arcs:
+        condition = f"{condition} AND {complete_arcs_filter()}"
+
+    def fetch(window):
+        query = text(f"""
+            SELECT id, datetime, "latitude_A", "longitude_A", postfit, up_combined
+            FROM {getenv("TABLE_NAME")}
+            WHERE datetime >= :start_time AND datetime {"<=" if window.closed else "<"} :end_time
+            AND {condition}
+            ORDER BY datetime ASC
+        """)
+        with get_engine().connect() as conn:
+            return read_sql(query, conn, params={"start_time": window.start.to_pydatetime(),
+                                                 "end_time": window.end.to_pydatetime(), "polygon": polygon_wkt},
+                            name="iter_satellite_data_parallel")
+
+    windows = split_time_range(start_time, end_time, freq)
+
+    yield from fan_out(fetch, windows, max_workers, max_pending)
+
+def query_satellite_data_parallel(start_time, end_time, polygon_coordinates=None, geodesic=False,
+                                  freq="MS", max_workers=4, complete_arcs=False, antimeridian=False):
+    """Same records as query_satellite_data_within_polygon (or _by_time without a polygon), fetched in parallel."""
+    frames = list(iter_satellite_data_parallel(start_time, end_time, polygon_coordinates, geodesic, freq, max_workers,
+                                               complete_arcs=complete_arcs, antimeridian=antimeridian))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=QUERY_COLUMNS)
+
+def export_parallel(start_time, end_time, polygon_coordinates, geodesic, output_format, filename_prefix,
+                    freq="MS", max_workers=4, complete_arcs=False, antimeridian=False):
+    """Streams a parallel query to a file sub-window by sub-window (see save_data) and returns the number of rows."""
+    rows = 0
+    for df in iter_satellite_data_parallel(start_time, end_time, polygon_coordinates, geodesic, freq, max_workers,
+                                           complete_arcs=complete_arcs, antimeridian=antimeridian):
+        if output_format and not df.empty:
+            save_data(df, output_format, filename_prefix, append=rows > 0)
+        rows += len(df)
+    return rows
+
+def query_page(start_time=None, end_time=None, polygon_coordinates=None, geodesic=False, page_token=None,
+               page_size=PAGE_SIZE, complete_arcs=False, antimeridian=False):
+    """
+    One page of the records of a time window, a polygon, or both (as query_satellite_data_by_time, _by_polygon and
+    _within_polygon), ordered by (datetime, id). Pass the returned token to get the next page: each page is a range
+    scan of the (datetime, id) index starting after the last row of the previous one (see src/utils/pagination.py),
+    so every page of a long window costs about the same (one index probe per partition of the table, whatever the
+    depth of the page). Records without datetime are not returned.
+
+    Returns:
+        (pd.DataFrame, str or None): the page (at most page_size rows) and the token of the next page,
+        None after the last page. Raises ValueError if page_size is below 1 or page_token belongs to another query.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    key = query_key(start_time=start_time, end_time=end_time, polygon_coordinates=polygon_coordinates,
+                    geodesic=geodesic, complete_arcs=complete_arcs, antimeridian=antimeridian)
+    conditions = ["datetime IS NOT NULL"]
+    params = {"page_size": page_size + 1}
+    if start_time is not None:
+        conditions.append("datetime >= :start_time")
+        params["start_time"] = pd.Timestamp(start_time).to_pydatetime()
+    if end_time is not None:
+        conditions.append("datetime <= :end_time")
+        params["end_time"] = pd.Timestamp(end_time).to_pydatetime()
+    if polygon_coordinates is not None:
+        condition, params["polygon"] = polygon_filter(polygon_coordinates, geodesic, antimeridian)
+        conditions.append(condition)
+    if complete_arcs:
+        conditions.append(complete_arcs_filter())
+    if page_token is not None:
+        after, after_id = decode_token(page_token, key)
+        conditions.append("(datetime, id) > (:after_datetime, :after_id)")
+        params.update(after_datetime=after.to_pydatetime(), after_id=after_id)
+
+    query = text(f"""
+        SELECT id, datetime, "latitude_A", "longitude_A", postfit, up_combined
+        FROM {getenv("TABLE_NAME")}
+        WHERE {" AND ".join(conditions)}
+        ORDER BY datetime, id
+        LIMIT :page_size
+    """)
+    with get_engine().connect() as conn:
+        df = read_sql(query, conn, params=params, name="query_page")
+
+    if len(df) <= page_size:
+        return df, None
+    df = df.iloc[:page_size]
+    return df, encode_token(df["datetime"].iloc[-1], df["id"].iloc[-1], key)
+
+def iter_pages(start_time=None, end_time=None, polygon_coordinates=None, geodesic=False, page_token=None,
+               page_size=PAGE_SIZE, complete_arcs=False, antimeridian=False):
+    """Yields (page, next_token) for every page of a query_page query, from page_token on (the first page by default)."""
+    while True:
+        df, page_token = query_page(start_time, end_time, polygon_coordinates, geodesic, page_token, page_size,
+                                    complete_arcs, antimeridian)
+        yield df, page_token
+        if page_token is None:
+            return
+
+def query_satellite_data_within_radius(longitude, latitude, radius_km, start_time=None, end_time=None):
+    """
+    Query the TABLE_NAME table for records within 'radius_km' (geodesic distance) of a point,
+    optionally within a time window. Works across the antimeridian and near the poles.
+    """
+    if not (-180 <= longitude <= 180 and -90 <= latitude <= 90):
+        raise ValueError(f"Invalid point ({longitude}, {latitude}).")
+    if radius_km <= 0:
+        raise ValueError("The radius must be positive.")
+
+    time_filter = "AND datetime BETWEEN :start_time AND :end_time" if start_time is not None and end_time is not None else ""
+    query = text(f"""
+        SELECT id, datetime, "latitude_A", "longitude_A", postfit, up_combined,
+               ST_Distance({GEOGRAPHY_A}, geography(ST_SetSRID(ST_MakePoint(:lon, :lat), 4326))) / 1000.0 AS distance_km
+        FROM {getenv("TABLE_NAME")}
+        WHERE ST_DWithin({GEOGRAPHY_A}, geography(ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)), :radius_m)
+        {time_filter}
         ORDER BY datetime ASC
     """)
 
-    with engine.connect() as conn:
-        df = pd.read_sql_query(query, conn, params={"start_time": start_time, "end_time": end_time, "polygon": polygon_wkt})
+    with get_engine().connect() as conn:
+        df = read_sql(query, conn, params={"lon": longitude, "lat": latitude, "radius_m": radius_km * 1000.0,
+                                           "start_time": start_time, "end_time": end_time})
+
+    return df
+
+def query_nearest_neighbours(longitude, latitude, k=10, start_time=None, end_time=None, label=None):
+    """
+    Query the TABLE_NAME table for the 'k' records closest to a point (e.g. a ground station), optionally within
+    a time window and for one label. The records are found by a nearest-neighbour scan of the geography index
+    ('<->' operator), so no radius has to be guessed; distances are geodesic.
+
+    Returns:
+        pd.DataFrame of the records with 'distance_km', closest first.
+    """
+    if not (-180 <= longitude <= 180 and -90 <= latitude <= 90):
+        raise ValueError(f"Invalid point ({longitude}, {latitude}).")
+    if k < 1:
+        raise ValueError("k must be at least 1.")
+
+    conditions = ["TRUE"]
+    if start_time is not None and end_time is not None:
+        conditions.append("datetime BETWEEN :start_time AND :end_time")
+    if label is not None:
+        conditions.append("label = :label")
+    query = text(f"""
+        SELECT id, datetime, "latitude_A", "longitude_A", postfit, up_combined, label,
+               ST_Distance({GEOGRAPHY_A}, geography(ST_SetSRID(ST_MakePoint(:lon, :lat), 4326))) / 1000.0 AS distance_km
+        FROM {getenv("TABLE_NAME")}
+        WHERE {" AND ".join(conditions)}
+        ORDER BY {GEOGRAPHY_A} <-> geography(ST_SetSRID(ST_MakePoint(:lon, :lat), 4326))
+        LIMIT :k
+    """)
+
+    with get_engine().connect() as conn:
+        df = read_sql(query, conn, params={"lon": longitude, "lat": latitude, "k": int(k), "label": label,
+                                           "start_time": start_time, "end_time": end_time})
+
+    return df
+
+def query_track_context(record_ids, minutes=10):
+    """
+    Query the TABLE_NAME table for the samples within +/- 'minutes' of each given record, along the same track
+    (same label, release, variant and source). Each window is one lookup of the (label, datetime) index.
+
+    Returns:
+        pd.DataFrame of the samples tagged with 'anchor_id' (the given record) and 'dt_seconds'
+        (time from the anchor), ordered by anchor and time.
+    """
+    ids = [int(i) for i in record_ids]
+    if not ids:
+        return pd.DataFrame(columns=["anchor_id"] + QUERY_COLUMNS + ["dt_seconds"])
+
+    same_track = " AND ".join(f"k.{c} = a.{c}" for c in ("label", "release", "variant", "source"))
+    query = text(f"""
+        SELECT a.id AS anchor_id, k.id, k.datetime, k."latitude_A", k."longitude_A", k.postfit, k.up_combined,
+               EXTRACT(EPOCH FROM k.datetime - a.datetime) AS dt_seconds
+        FROM {getenv("TABLE_NAME")} a
+        JOIN LATERAL (
+            SELECT * FROM {getenv("TABLE_NAME")} k
+            WHERE {same_track}
+            AND k.datetime BETWEEN a.datetime - make_interval(secs => :seconds)
+                               AND a.datetime + make_interval(secs => :seconds)
+        ) k ON TRUE
+        WHERE a.id = ANY(:ids)
+        ORDER BY a.id, k.datetime ASC
+    """)
+
+    with get_engine().connect() as conn:
+        df = read_sql(query, conn, params={"ids": ids, "seconds": float(minutes) * 60})
+
+    return df
+
+def query_along_track(longitude, latitude, minutes=10, passes=1, start_time=None, end_time=None, label=None,
+                      interval_seconds=5):
+    """
+    Query the +/- 'minutes' of track around the closest approaches of the satellite to a point:
+    nearest-neighbour candidates are fetched (see query_nearest_neighbours), the closest sample of each of the
+    'passes' nearest passes is kept (see src/utils/arcs.closest_approaches), and the track around each one is
+    fetched (see query_track_context). Fewer passes are returned if the candidates cover fewer passes.
+
+    Returns:
+        pd.DataFrame of the samples with 'anchor_id', 'dt_seconds' and 'approach_km' (distance of the
+        closest approach), ordered by approach distance and time.
+    """
+    from src.utils.arcs import closest_approaches
+    candidates = query_nearest_neighbours(longitude, latitude, passes * int(2 * minutes * 60 / interval_seconds + 1),
+                                          start_time, end_time, label)
+    if candidates.empty:
+        return pd.DataFrame(columns=["anchor_id"] + QUERY_COLUMNS + ["dt_seconds", "approach_km"])
+    seconds = pd.to_datetime(candidates["datetime"]).to_numpy("datetime64[ns]").astype("int64") / 1e9
+    anchors = candidates.iloc[closest_approaches(seconds, candidates["distance_km"], minutes * 60, passes)]
+
+    df = query_track_context(anchors["id"], minutes)
+    approach = dict(zip(anchors["id"], anchors["distance_km"]))
+    df["approach_km"] = df["anchor_id"].map(approach)
+    return df.sort_values(["approach_km", "datetime"], ignore_index=True)
+
+def query_downsampled(start_time, end_time, width=1000, variable="postfit", label=None, release=None, variant=None,
+                      method="m4"):
+    """
+    Query a residual time series downsampled for a plot 'width' pixels wide (see src/utils/downsample.py):
+    the time window is split into 'width' buckets and only the first, last, minimum and maximum samples of each
+    bucket are returned (M4, computed in the database), so peaks survive and at most 4 * width rows per series
+    are transferred. With method='lttb', the M4 samples are further reduced to 'width' points per series.
+    Each release/variant is a separate series, optionally restricted to one label/release/variant.
+
+    Returns:
+        pd.DataFrame with columns release, variant, datetime and 'variable', ordered by series and time.
+    """
+    from src.utils.downsample import METHODS, lttb_indices
+    from src.utils.sketches import SKETCH_VARIABLES
+    if variable not in SKETCH_VARIABLES:
+        raise ValueError(f"Cannot downsample '{variable}' (expected one of {list(SKETCH_VARIABLES)})")
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}' (expected one of {METHODS})")
+    if width < 1:
+        raise ValueError("width must be at least 1")
+    columns = ["release", "variant", "datetime", variable]
+
+    conditions = ["datetime BETWEEN :start_time AND :end_time", f"{variable} IS NOT NULL"]
+    for name, value in (("label", label), ("release", release), ("variant", variant)):
+        if value is not None:
+            conditions.append(f"{name} = :{name}")
+    # one aggregation per bucket: its samples in time order, of which the first, last, smallest and largest are kept
+    # (array_position finds the first occurrence, so ties go to the earliest sample)
+    query = text(f"""
+        WITH samples AS (
+            SELECT release, variant, datetime, {variable},
+                   LEAST(FLOOR(EXTRACT(EPOCH FROM datetime - :start_time) / :bucket_seconds), :width - 1) AS bucket
+            FROM {getenv("TABLE_NAME")}
+            WHERE {" AND ".join(conditions)}
+        ),
+        buckets AS (
+            SELECT release, variant, array_agg(datetime ORDER BY datetime) AS times,
+                   array_agg({variable} ORDER BY datetime) AS vals, MIN({variable}) AS lo, MAX({variable}) AS hi
+            FROM samples
+            GROUP BY release, variant, bucket
+        )
+        SELECT b.release, b.variant, b.times[k.i] AS datetime, b.vals[k.i] AS {variable}
+        FROM buckets b
+        CROSS JOIN LATERAL (
+            SELECT DISTINCT i
+            FROM unnest(ARRAY[1, cardinality(b.vals), array_position(b.vals, b.lo), array_position(b.vals, b.hi)]) AS i
+        ) k
+        ORDER BY release, variant, datetime
+    """)
+
+    start_time, end_time = pd.Timestamp(start_time), pd.Timestamp(end_time)
+    bucket_seconds = max((end_time - start_time).total_seconds() / width, 1e-6)
+    with get_engine().connect() as conn:
+        df = read_sql(query, conn, params={"start_time": start_time.to_pydatetime(), "end_time": end_time.to_pydatetime(),
+                                           "bucket_seconds": bucket_seconds, "width": int(width),
+                                           "label": label, "release": release, "variant": variant})
+
+    if method == "lttb":
+        df = pd.concat([g.iloc[lttb_indices(pd.to_datetime(g["datetime"]).to_numpy("datetime64[ns]").astype("int64") / 1e9,
+                                              g[variable], width)]
+                        for _, g in df.groupby(["release", "variant"], sort=False)] or [df], ignore_index=True)
+    return df[columns]
+
+def query_satellite_data_by_regions(regions, start_time=None, end_time=None, id_column=None, aggregate=False):
+    """
+    Query the TABLE_NAME table for records inside any of many regions (e.g. river basins or mascons)
+    in a single round trip. The regions are uploaded to a temporary table with a GiST index and
+    joined with the data, so N regions cost one indexed join instead of N scans.
+
+    Args:
+        regions: Path to a GeoJSON/shapefile, a GeoJSON FeatureCollection dict, or a GeoDataFrame.
+        start_time, end_time: Optional time window.
+        id_column: Column of 'regions' holding the region identifiers (default: row index).
+        aggregate: If True, return per-region statistics instead of the records.
+
+    Returns:
+        pd.DataFrame of records tagged with 'region_id' (a record inside overlapping regions
+        appears once per region), or of per-region statistics if aggregate=True.
+        Raises ValueError (from load_regions) if 'regions' is empty.
+    """
+    from src.utils.regions import load_regions
+    gdf = load_regions(regions, id_column)
+
+    time_filter = "AND k.datetime BETWEEN :start_time AND :end_time" if start_time is not None and end_time is not None else ""
+
+    if aggregate:
+        query = text(f"""
+            SELECT r.region_id,
+                   COUNT(k.id) AS n,
+                   MIN(k.datetime) AS first_datetime,
+                   MAX(k.datetime) AS last_datetime,
+                   AVG(k.postfit) AS mean_postfit,
+                   STDDEV_SAMP(k.postfit) AS std_postfit,
+                   SQRT(AVG(k.postfit * k.postfit)) AS rms_postfit,
+                   AVG(k.up_combined) AS mean_up_combined,
+                   STDDEV_SAMP(k.up_combined) AS std_up_combined,
+                   SQRT(AVG(k.up_combined * k.up_combined)) AS rms_up_combined
+            FROM query_regions r
+            LEFT JOIN {getenv("TABLE_NAME")} k
+              ON ST_Contains(r.geom, {POINT_A}) {time_filter}
+            GROUP BY r.region_id
+            ORDER BY r.region_id
+        """)
+    else:
+        query = text(f"""
+            SELECT r.region_id, k.id, k.datetime, k."latitude_A", k."longitude_A", k.postfit, k.up_combined
+            FROM query_regions r
+            JOIN {getenv("TABLE_NAME")} k
+              ON ST_Contains(r.geom, {POINT_A}) {time_filter}
+            ORDER BY r.region_id, k.datetime ASC
+        """)
+
+    with get_engine().begin() as conn:
+        conn.execute(text("CREATE TEMPORARY TABLE query_regions (region_id text PRIMARY KEY, geom geometry(Geometry, 4326)) ON COMMIT DROP"))
+        conn.execute(
+            text("INSERT INTO query_regions (region_id, geom) VALUES (:region_id, ST_GeomFromWKB(:wkb, 4326))"),
+            [{"region_id": rid, "wkb": geom.wkb} for rid, geom in zip(gdf["region_id"], gdf.geometry)],
+        )
+        conn.execute(text("CREATE INDEX ON query_regions USING GIST (geom)"))
+        conn.execute(text("ANALYZE query_regions"))
+        df = read_sql(query, conn, params={"start_time": start_time, "end_time": end_time})
 
     return df
 
-def save_data(df, output_format, filename_prefix):
+def save_data(df, output_format, filename_prefix, append=False):
+    """
+    Saves query results to '<filename_prefix>.csv' or '<filename_prefix>.nc'.
+    With append=True the rows are added to an existing file, so results can be written batch by batch.
+    NetCDF files are written along a 'sample' dimension (datetimes may repeat across labels),
+    compressed and chunked per orbit; see src/utils/netcdf_writer.py.
+    """
     if output_format == 'csv':
-        df.to_csv(f"{filename_prefix}.csv", index=False)
+        filename = f"{filename_prefix}.csv"
+        header = not (append and os.path.exists(filename))
+        df.to_csv(filename, index=False, mode='a' if append else 'w', header=header)
     elif output_format == 'netcdf':
-        ds = df.set_index('datetime').to_xarray()
-        ds.to_netcdf(f"{filename_prefix}.nc")
+        from src.utils.netcdf_writer import append_netcdf
+        append_netcdf(df, f"{filename_prefix}.nc", mode='a' if append else 'w', title=f"{getenv('TABLE_NAME')} query results")
     else:
         raise ValueError(f"Unsupported output format: {output_format}")
 
-def main():
-    parser = argparse.ArgumentParser(description="Query KBR Gravimetry Data within polygon and time bounds.")
-    parser.add_argument("--start_time", type=str, help="Start time (e.g. '2017-01-01T00:00:00')")
-    parser.add_argument("--end_time", type=str, help="End time (e.g. '2017-02-01T00:00:00')")
-    parser.add_argument("--polygon", type=str, help="Polygon coordinates as 'lon1 lat1,lon2 lat2,...,lonN latN'")
-    parser.add_argument("--output_format", type=str, choices=['csv', 'netcdf'], help="Output format (csv or netcdf)")
-    args = parser.parse_args()
-
-    if args.start_time and args.end_time and args.polygon:
-        start_time = pd.to_datetime(args.start_time)
-        end_time = pd.to_datetime(args.end_time)
-        polygon_coordinates = [(float(lon), float(lat)) for lon, lat in (pair.split() for pair in args.polygon.split(","))]
-    else:
-        print("\u26a0\ufe0f No parameters provided, using default small polygon for test.")
-        start_time = pd.to_datetime("2010-02-28T22:00:00")
-        end_time = pd.to_datetime("2012-10-01T00:00:00")
-        polygon_coordinates = [
-            (71.44, 20.25),
-            (71.44, 20.91),
-            (71.48, 20.91),
-            (71.48, 20.25),
-            (71.44, 20.25)
-        ]
-
-    print("\n--- Time Filter Only ---")
-    df_time = query_satellite_data_by_time(start_time, end_time)
-    print(df_time)
-    if args.output_format and not df_time.empty:
-        save_data(df_time, args.output_format, "time_filter_output")
-
-    print("\n--- Space Filter Only (Polygon) ---")
-    df_space = query_satellite_data_by_polygon(polygon_coordinates)
-    print(df_space)
-    if args.output_format and not df_space.empty:
-        save_data(df_space, args.output_format, "space_filter_output")
-
-    print("\n--- Time + Space Filter (Combined) ---")
-    df_both = query_satellite_data_within_polygon(start_time, end_time, polygon_coordinates)
-    print(df_both)
-    if args.output_format and not df_both.empty:
-        save_data(df_both, args.output_format, "combined_filter_output")
+
+def main(argv=None):
+    """Same as 'grace-db query' (see src/cli.py)."""
+    from src.cli import run
+    run("query", argv)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+from sqlalchemy import text
+from src.machinery import getenv
+from src.utils.fanout import TimeWindow, split_time_range
+from src.utils.sketches import SKETCH_VARIABLES
+from src.utils.spectra import ARC_KEYS, arc_ids, arc_table, filter_columns, psd_dataset, welch_psd
+
+
+def _reset_engine() -> None:
+    """Process pool initializer: connections inherited from the parent process must not be reused."""
+    import src.models
+    if src.models._engine is not None:
+        src.models._engine.dispose(close=False)
+
+
+def read_window(window: TimeWindow, variables: Sequence[str], label: Optional[str] = None,
+                release: Optional[str] = None, variant: Optional[str] = None) -> pd.DataFrame:
+    """Rows of one time window needed for arc processing, sorted by ARC_KEYS and timestamp."""
+    unknown = [v for v in variables if v not in SKETCH_VARIABLES]
+    if unknown:
+        raise ValueError(f"Cannot process {unknown} (expected some of {list(SKETCH_VARIABLES)})")
+    from src.models import get_engine
+    conditions = [f"datetime >= :start_time AND datetime {'<=' if window.closed else '<'} :end_time"]
+    for name, value in (("label", label), ("release", release), ("variant", variant)):
+        if value is not None:
+            conditions.append(f"{name} = :{name}")
+    query = text(f"""
+        SELECT {", ".join(ARC_KEYS)}, timestamp, datetime, "latitude_A", "longitude_A", "adtrack_A", {", ".join(variables)}
+        FROM {getenv("TABLE_NAME")}
+        WHERE {" AND ".join(conditions)}
+        ORDER BY {", ".join(ARC_KEYS)}, timestamp
+    """)
+    with get_engine().connect() as conn:
+        return pd.read_sql_query(query, conn, params={"start_time": window.start.to_pydatetime(),
+                                                      "end_time": window.end.to_pydatetime(),
+                                                      "label": label, "release": release, "variant": variant})
+
+
+def window_psd(window: TimeWindow, variable: str, nperseg: int, overlap: float, interval_seconds: float,
+               **filters) -> tuple:
+    """Per-arc Welch spectra of one time window: (arc table, frequencies, PSD, segments per arc)."""
+    df = read_window(window, [variable], **filters)
+    arcs = arc_ids(df, interval_seconds)
+    freqs, psd, counts = welch_psd(df[variable], arcs, 1 / interval_seconds, nperseg, overlap)
+    return arc_table(df, arcs), freqs, psd, counts
+
+
+def window_filtered(window: TimeWindow, variables: Sequence[str], interval_seconds: float, low_cut, high_cut,
+                    order: int, **filters) -> pd.DataFrame:
+    """Rows of one time window with their '<v>_filtered' columns and arc ids (see src/utils/spectra.filter_columns)."""
+    df = read_window(window, variables, **filters)
+    return filter_columns(df, variables, interval_seconds, low_cut=low_cut, high_cut=high_cut, order=order)
+
+
+def _map(function, windows: List[TimeWindow], workers: int, *args, **kwargs):
+    """Runs function(window, ...) for each window, in a process pool if workers > 1; yields results in window order."""
+    if workers <= 1:
+        yield from (function(w, *args, **kwargs) for w in windows)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_reset_engine) as executor:
+        futures = [executor.submit(function, w, *args, **kwargs) for w in windows]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def arc_spectra(start_time, end_time, variable: str = "postfit", nperseg: int = 256, overlap: float = 0.5,
+                interval_seconds: float = 5, freq: str = "MS", workers: int = 4, label: Optional[str] = None,
+                release: Optional[str] = None, variant: Optional[str] = None):
+    """
+    Welch power spectral density of 'variable' for every continuous arc (one pass of one release/variant/
+    label/source, see src/utils/spectra.arc_ids) in a time window. The window is split into sub-windows aligned
+    on 'freq' (see src/utils/fanout.split_time_range), which are read and processed in parallel by 'workers'
+    processes; arcs are cut at sub-window boundaries.
+
+    Returns:
+        xarray.Dataset with 'psd' (arc, frequency), 'mean_psd' (frequency) and the arc coordinates
+        (see src/utils/spectra.psd_dataset).
+    """
+    filters = {"label": label, "release": release, "variant": variant}
+    tables, spectra, counts, freqs = [], [], [], np.fft.rfftfreq(nperseg, interval_seconds)
+    for table, freqs, psd, count in _map(window_psd, split_time_range(start_time, end_time, freq), workers,
+                                         variable, nperseg, overlap, interval_seconds, **filters):
+        tables.append(table)
+        spectra.append(psd)
+        counts.append(count)
+    arcs = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=ARC_KEYS)
+    psd = np.concatenate(spectra) if spectra else np.empty((0, len(freqs)))
+    attrs = {"title": f"{getenv('TABLE_NAME')} along-track spectra of {variable}", "variable": variable,
+             "nperseg": nperseg, "overlap": overlap, "start_time": str(start_time), "end_time": str(end_time)}
+    return psd_dataset(arcs, freqs, psd, np.concatenate(counts) if counts else np.empty(0, dtype=np.int64),
+                       variable, attrs)
+
+
+def export_filtered(start_time, end_time, output_format: str, filename_prefix: str,
+                    variables: Sequence[str] = ("postfit",), low_cut: Optional[float] = None,
+                    high_cut: Optional[float] = None, order: int = 4, interval_seconds: float = 5, freq: str = "MS",
+                    workers: int = 4, label: Optional[str] = None, release: Optional[str] = None,
+                    variant: Optional[str] = None) -> int:
+    """
+    Writes the residuals of a time window with zero-phase filtered columns '<v>_filtered' (high-pass above
+    'low_cut', low-pass below 'high_cut', in Hz; see src/utils/spectra.zero_phase_filter) to a csv/netcdf file,
+    sub-window by sub-window as they are processed in parallel. Returns the number of rows written.
+    """
+    from scripts.space_time_query import save_data
+    rows = arcs = 0
+    filters = {"label": label, "release": release, "variant": variant}
+    for df in _map(window_filtered, split_time_range(start_time, end_time, freq), workers,
+                   list(variables), interval_seconds, low_cut, high_cut, order, **filters):
+        if not df.empty:
+            save_data(df.assign(arc=df["arc"] + arcs), output_format, filename_prefix, append=rows > 0)
+            arcs += int(df["arc"].max()) + 1  # arc ids continue across sub-windows
+        rows += len(df)
+    return rows
+
+
+def main(argv=None):
+    """Same as 'grace-db spectra' (see src/cli.py)."""
+    from src.cli import run
+    run("spectra", argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import itertools
+import os
+import pandas as pd
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qs, urlsplit
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from src.machinery import getenv
+from src.utils.tiles import (BUFFER, EXTENT, LAYER, cell_size, check_filters, evict, lonlat_bounds, read_tile,
+                             request_key, tile_bounds, write_tile)
+
+DEFAULT_CACHE_DIR = "~/.cache/grace-db/tiles"
+DEFAULT_MAX_BYTES = 2 * 2**30
+EVICT_EVERY = 500  # rendered tiles between two evictions
+CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+
+_rendered = itertools.count(1)
+
+
+def cache_dir() -> str:
+    """Root of the tile cache: TILE_CACHE_DIR, or ~/.cache/grace-db/tiles."""
+    return os.getenv("TILE_CACHE_DIR") or DEFAULT_CACHE_DIR
+
+
+def _conditions(labels, start_time, end_time, start_column: str, end_column: str) -> List[str]:
+    conditions = ["TRUE"]
+    if labels:
+        conditions.append("label = ANY(:labels)")
+    if start_time is not None:
+        conditions.append(f"{end_column} >= :start_time")
+    if end_time is not None:
+        conditions.append(f"{start_column} <= :end_time")
+    return conditions
+
+
+def _params(labels, start_time, end_time) -> dict:
+    return {"labels": list(labels or []),
+            "start_time": None if start_time is None else pd.Timestamp(start_time).to_pydatetime(),
+            "end_time": None if end_time is None else pd.Timestamp(end_time).to_pydatetime()}
+
+
+def tile_query(z: int, labels=None, start_time=None, end_time=None) -> str:
+    """
+    SQL of tile z: the points of GRACE-A in the tile (found with the lon/lat GiST index), or from zoom levels
+    below POINT_ZOOM their count and mean residuals per grid cell, encoded by ST_AsMVT.
+    """
+    from scripts.space_time_query import POINT_A
+    conditions = [f"{POINT_A} && ST_MakeEnvelope(:west, :south, :east, :north, 4326)"] \
+        + _conditions(labels, start_time, end_time, "datetime", "datetime")[1:]
+    bounds = "ST_MakeEnvelope(:xmin, :ymin, :xmax, :ymax, 3857)"
+    if cell_size(z) is None:
+        features = f"""
+            SELECT ST_AsMVTGeom(geom, {bounds}, {EXTENT}, {BUFFER}) AS geom, id, label, timestamp, postfit, up_combined
+            FROM points"""
+    else:
+        features = f"""
+            SELECT ST_AsMVTGeom(cell, {bounds}, {EXTENT}, {BUFFER}) AS geom, n, postfit, up_combined, postfit_rms
+            FROM (SELECT ST_SnapToGrid(geom, :cell) AS cell, COUNT(*) AS n, AVG(postfit) AS postfit,
+                         AVG(up_combined) AS up_combined, SQRT(AVG(postfit * postfit)) AS postfit_rms
+                  FROM points
+                  GROUP BY 1) AS cells"""
+    return f"""
+        WITH points AS (
+            SELECT ST_Transform({POINT_A}, 3857) AS geom, id, label, timestamp, postfit, up_combined
+            FROM {getenv("TABLE_NAME")}
+            WHERE {" AND ".join(conditions)}
+        )
+        SELECT ST_AsMVT(tile, '{LAYER}', {EXTENT}, 'geom')
+        FROM ({features}) AS tile
+        WHERE geom IS NOT NULL
+    """
+
+
+def render_tile(engine, z: int, x: int, y: int, labels=None, start_time=None, end_time=None) -> bytes:
+    """Renders tile z/x/y in the database (see tile_query)."""
+    from src.utils.query_metrics import read_sql
+    west, south, east, north = lonlat_bounds(z, x, y)
+    xmin, ymin, xmax, ymax = tile_bounds(z, x, y)
+    params = {**_params(labels, start_time, end_time), "west": west, "south": south, "east": east, "north": north,
+              "xmin": xmin, "ymin": ymin, "xmax": xmax, "ymax": ymax, "cell": cell_size(z)}
+    query = text(tile_query(z, labels, start_time, end_time))
+    with engine.connect() as conn:
+        data = read_sql(query, conn, params=params, name="tile").iloc[0, 0]
+    return bytes(data or b"")
+
+
+def get_tile(z: int, x: int, y: int, labels: Optional[List[str]] = None, start_time=None, end_time=None,
+             engine=None, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> bytes:
+    """
+    Mapbox Vector Tile z/x/y (layer 'residuals') of the given labels and time window, from the tile cache
+    (see src/utils/tiles.py), rendered in the database on first use or when the catalog shows that the data
+    changed since (see scripts/catalog.catalog_version). Costs one catalog query when cached. Tiles of data
+    missing from the catalog are rendered on every request and not cached.
+    Low-zoom tiles need labels or a short time window (see src/utils/tiles.check_filters).
+    """
+    tile_bounds(z, x, y)  # checks the tile and its filters before any query
+    check_filters(z, labels, start_time, end_time)
+    root = root or cache_dir()
+    if engine is None:
+        from src.models import get_engine
+        engine = get_engine()
+    from scripts.catalog import catalog_version
+    version = catalog_version(engine, _conditions(labels, start_time, end_time, "start_time", "end_time"),
+                              _params(labels, start_time, end_time))
+    if version is None:
+        return render_tile(engine, z, x, y, labels, start_time, end_time)
+    key = request_key(labels, start_time, end_time)
+    data = read_tile(root, z, x, y, key, version)
+    if data is None:
+        data = render_tile(engine, z, x, y, labels, start_time, end_time)
+        write_tile(root, z, x, y, key, version, data)
+        if next(_rendered) % EVICT_EVERY == 0:
+            evict(root, max_bytes)
+    return data
+
+
+class TileHandler(BaseHTTPRequestHandler):
+    """GET /{z}/{x}/{y}.mvt?label=...&start_time=...&end_time=... (label repeatable), see get_tile."""
+    root: Optional[str] = None
+    max_bytes: int = DEFAULT_MAX_BYTES
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = Path(url.path).with_suffix("").parts[-3:]
+        if not url.path.endswith((".mvt", ".pbf")) or len(parts) != 3 or not all(p.isdigit() for p in parts):
+            self.send_error(404, "Expected /{z}/{x}/{y}.mvt")
+            return
+        query = parse_qs(url.query)
+        try:
+            data = get_tile(*map(int, parts), labels=query.get("label"), start_time=query.get("start_time", [None])[0],
+                            end_time=query.get("end_time", [None])[0], root=self.root, max_bytes=self.max_bytes)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        except SQLAlchemyError as e:
+            self.log_error("Tile %s failed: %s", self.path, e)
+            self.send_error(503, "Database error, try again later")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, root: Optional[str] = None,
+          max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+    """Serves the tiles over HTTP (one thread per request) until interrupted."""
+    handler = type("Handler", (TileHandler,), {"root": root, "max_bytes": max_bytes})
+    with ThreadingHTTPServer((host, port), handler) as server:
+        print(f"Serving tiles at http://{host}:{port}/{{z}}/{{x}}/{{y}}.mvt")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv=None):
+    """Same as 'grace-db tiles' (see src/cli.py)."""
+    from src.cli import run
+    run("tiles", argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+# src/cli.py
+"""
+grace-db: single command-line entry point (init, load, query, export, stats, residuals, compare, spectra, cache, release, tiles, gaps).
+Only argparse is imported at startup; each subcommand imports what it needs when it runs,
+and the database engine is created on first use, so '--help' and small commands start fast.
+The scripts' own command lines (e.g. 'python scripts/tiles.py get 0/0/0') run their subcommand through run().
+"""
+import argparse
+import sys
+
+
+def parse_polygon(value: str) -> list:
+    """Parses 'lon1 lat1,lon2 lat2,...' into a list of (longitude, latitude) tuples."""
+    return [(float(lon), float(lat)) for lon, lat in (pair.split() for pair in value.split(","))]
+
+
+def data_files(filepaths) -> list:
+    """Returns 'filepaths', or all .pkl files of the 'data/' folder if none are given."""
+    from pathlib import Path
+    if filepaths:
+        missing = [f for f in filepaths if not Path(f).exists()]
+        if missing:
+            raise SystemExit(f"File(s) not found: {missing}")
+        return [str(f) for f in filepaths]
+    return sorted(str(f) for f in Path("data").glob("*.pkl"))
+
+
+def cmd_init(args) -> None:
+    from src.models import init_db
+    init_db()
+    print("Database initialized successfully.")
+    if args.populate:
+        cmd_load(args)
+
+
+def cmd_load(args) -> None:
+    from src.models import get_engine
+    from scripts.populate_db import populate_db, bulk_load_files
+    from src.utils.pipeline import echo_counters
+
+    files = data_files(args.filepath)
+    if not files:
+        print("No data file found in 'data/' folder. Skipping population.")
+        return
+    echo_counters()
+    if args.mode == "bulk":
+        bulk_load_files(files, get_engine(), chunksize=max(args.batch_size, 100000), workers=args.workers)
+        return
+    for f in files:
+        populate_db(filepath=f, engine=get_engine(), use_batches=args.use_batches, batch_size=args.batch_size, mode=args.mode,
+                    workers=args.workers)
+
+
+def cmd_query(args) -> None:
+    from scripts import space_time_query as q
+
+    polygon = parse_polygon(args.polygon) if args.polygon else None
+    point = tuple(float(v) for v in args.point.split()) if args.point else None
+    if args.width:
+        if not (args.start_time and args.end_time):
+            raise SystemExit("--width requires --start_time and --end_time")
+        df = q.query_downsampled(args.start_time, args.end_time, args.width, args.variable, args.label, method=args.method)
+    elif point and args.track_minutes:
+        df = q.query_along_track(*point, args.track_minutes, args.passes, args.start_time, args.end_time, args.label)
+    elif point and args.nearest:
+        df = q.query_nearest_neighbours(*point, args.nearest, args.start_time, args.end_time, args.label)
+    elif point and args.radius_km:
+        df = q.query_satellite_data_within_radius(*point, args.radius_km, args.start_time, args.end_time)
+    elif args.regions:
+        df = q.query_satellite_data_by_regions(args.regions, args.start_time, args.end_time,
+                                               id_column=args.region_id, aggregate=args.aggregate)
+    elif args.page_size is not None or args.page_token:
+        if not (args.start_time or args.end_time or polygon):
+            raise SystemExit("--page_size/--page_token require --start_time/--end_time and/or --polygon")
+        if args.page_size is not None and args.page_size < 1:
+            raise SystemExit("--page_size must be at least 1")
+        df, token = q.query_page(args.start_time, args.end_time, polygon, args.geodesic, args.page_token,
+                                 q.PAGE_SIZE if args.page_size is None else args.page_size, args.complete_arcs,
+                                 args.antimeridian)
+        print(df)
+        print(f"Next page: --page_token {token}" if token else "Last page")
+        if args.output_format and not df.empty:
+            q.save_data(df, args.output_format, args.output)
+        return
+    elif args.label:
+        df = q.query_satellite_data_by_label(args.label, args.start_time, args.end_time)
+    elif args.start_time and args.end_time and args.workers > 1:
+        if args.output_format:
+            rows = q.export_parallel(args.start_time, args.end_time, polygon, args.geodesic, args.output_format,
+                                     args.output, args.chunk, args.workers, args.complete_arcs, args.antimeridian)
+            print(f"Wrote {rows} records to {args.output}.{'nc' if args.output_format == 'netcdf' else 'csv'}")
+            return
+        df = q.query_satellite_data_parallel(args.start_time, args.end_time, polygon, args.geodesic, args.chunk, args.workers,
+                                             args.complete_arcs, args.antimeridian)
+    elif args.start_time and args.end_time:
+        df = (q.query_satellite_data_within_polygon(args.start_time, args.end_time, polygon, args.geodesic, args.complete_arcs,
+                                                    args.antimeridian)
+              if polygon else q.query_satellite_data_by_time(args.start_time, args.end_time, args.complete_arcs))
+    elif polygon:
+        df = q.query_satellite_data_by_polygon(polygon, args.geodesic, args.antimeridian)
+    else:
+        raise SystemExit("Nothing to query: give --start_time/--end_time (optionally --width), --polygon, --label, --regions, "
+                         "or --point with --radius_km, --nearest or --track_minutes.")
+
+    print(df)
+    if args.output_format and not df.empty:
+        q.save_data(df, args.output_format, args.output)
+
+
+def cmd_export(args) -> None:
+    from src.models import get_engine
+    from scripts.export_parquet import export_parquet
+    n = export_parquet(args.output, get_engine(), args.start_time, args.end_time, args.labels, args.row_group_size,
+                       args.partial_months)
+    print(f"Exported {n} rows to {args.output}")
+
+
+def cmd_stats(args) -> None:
+    import pandas as pd
+    if args.queries is not None:
+        from src.utils.query_metrics import read_metrics, summarize
+        records = read_metrics(args.queries or None)
+        if records.empty:
+            raise SystemExit("No query recorded: set QUERY_METRICS to a file (see src/utils/query_metrics.py) or give its path")
+        with pd.option_context("display.max_rows", None, "display.width", 200, "display.max_colwidth", 80):
+            print(summarize(records, args.top))
+            if args.shape:
+                latest = records[records["shape"] == args.shape].sort_values("started_at").iloc[-1]
+                print(f"\n{latest['sql']}\n{latest['plan'] or '(no plan captured: see QUERY_EXPLAIN_SECONDS)'}")
+        return
+    from src.models import get_engine
+    from scripts.catalog import read_catalog, refresh_catalog
+    from src.utils.catalog import summarize
+    if args.refresh:
+        print(f"Catalogued {refresh_catalog(get_engine(), interval_seconds=args.interval)} groups.")
+        return
+    catalog = read_catalog(get_engine(), args.release, args.label)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(catalog if args.detail else summarize(catalog))
+
+
+def cmd_residuals(args) -> None:
+    import pandas as pd
+    from src.models import get_engine
+    from scripts.residual_stats import residual_distribution, residual_histogram
+    polygon = parse_polygon(args.polygon) if args.polygon else None
+    variables = args.variable or ["postfit"]
+    if args.histogram:
+        import numpy as np
+        edges = np.linspace(*args.range, args.histogram + 1) if args.range else None
+        df = residual_histogram(get_engine(), variables[0], edges, args.histogram, args.start_time, args.end_time,
+                                args.label, args.release, polygon, args.geodesic)
+    else:
+        df = residual_distribution(get_engine(), variables, args.start_time, args.end_time, args.label, args.release,
+                                   polygon, args.geodesic, args.by)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(df)
+
+
+def cmd_compare(args) -> None:
+    import pandas as pd
+    from src.models import get_engine
+    from scripts.compare import Side, DEFAULT_VARIABLES, compare_summary, export_differences
+    a, b = Side.parse(args.a), Side.parse(args.b)
+    variables = args.variable or list(DEFAULT_VARIABLES)
+    summary = compare_summary(get_engine(), a, b, variables, args.start_time, args.end_time,
+                              None if args.by == "all" else args.by, args.interval)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(summary)
+    if args.output_format:
+        rows = export_differences(get_engine(), a, b, args.output_format, args.output, variables, args.start_time, args.end_time)
+        print(f"Wrote {rows} differences to {args.output}.{'nc' if args.output_format == 'netcdf' else 'csv'}")
+
+
+def cmd_spectra(args) -> None:
+    from scripts.spectra import arc_spectra, export_filtered
+    variables = args.variable or ["postfit"]
+    filters = {"label": args.label, "release": args.release, "variant": args.variant}
+    if args.action == "psd":
+        output = args.output or "spectra"
+        ds = arc_spectra(args.start_time, args.end_time, variables[0], args.nperseg, args.overlap, args.interval,
+                         args.chunk, args.workers, **filters)
+        ds.to_netcdf(f"{output}.nc")
+        print(f"Wrote the spectra of {ds.sizes['arc']} arcs to {output}.nc")
+        return
+    if args.low_cut is None and args.high_cut is None:
+        raise SystemExit("spectra filter requires --low_cut and/or --high_cut")
+    output = args.output or "filtered"
+    rows = export_filtered(args.start_time, args.end_time, args.output_format, output, variables, args.low_cut,
+                           args.high_cut, args.order, args.interval, args.chunk, args.workers, **filters)
+    print(f"Wrote {rows} filtered records to {output}.{'nc' if args.output_format == 'netcdf' else 'csv'}")
+
+
+def cmd_cache(args) -> None:
+    import pandas as pd
+    from scripts.month_cache import cache_dir, load_month
+    from src.utils.month_cache import cache_entries, evict
+    max_bytes = int(args.max_gb * 2**30)
+    if args.action == "load":
+        if not args.release or not args.label:
+            raise SystemExit("cache load requires --release and --label")
+        for label in args.label:
+            print(f"{args.release} {label}: {len(load_month(args.release, label, max_bytes=max_bytes))} rows")
+    elif args.action == "evict":
+        for path in evict(cache_dir(), max_bytes):
+            print(f"Removed {path}")
+    else:
+        entries = pd.DataFrame(cache_entries(cache_dir()), columns=["release", "label", "rows", "nbytes", "last_used", "path"])
+        entries["last_used"] = pd.to_datetime(entries["last_used"], unit="s")
+        with pd.option_context("display.max_rows", None, "display.width", 200):
+            print(entries)
+
+
+def cmd_release(args) -> None:
+    import pandas as pd
+    from src.models import get_engine
+    from scripts.releases import archive, drop, list_partitions, move, restore, swap_files
+    from src.utils.pipeline import echo_counters
+    echo_counters()
+    engine = get_engine()
+    if args.action == "list":
+        with pd.option_context("display.max_rows", None, "display.width", 200):
+            print(list_partitions(engine))
+        return
+    if not args.release:
+        raise SystemExit(f"release {args.action} requires --release")
+    if args.action == "drop":
+        print(drop(engine, args.release, args.label, args.lock_timeout))
+    elif args.action == "archive":
+        print(f"Archived to {archive(engine, args.release, args.label, args.tablespace, args.lock_timeout)}")
+    elif args.action == "restore":
+        print(f"Restored {restore(engine, args.release, args.label, lock_timeout=args.lock_timeout)}")
+    elif args.action == "move":
+        if not args.tablespace:
+            raise SystemExit("release move requires --tablespace")
+        for name in move(engine, args.release, args.label, args.tablespace, args.archived):
+            print(f"Moved {name} to {args.tablespace}")
+    else:
+        if not args.filepath:
+            raise SystemExit("release swap requires the .pkl file(s) of the replacement rows")
+        swap_files(data_files(args.filepath), engine, args.release, args.label, archive_old=args.archive_old,
+                   lock_timeout=args.lock_timeout, workers=args.workers)
+
+
+def cmd_tiles(args) -> None:
+    from pathlib import Path
+    from scripts.tiles import cache_dir, get_tile, serve
+    from src.utils.tiles import evict
+    max_bytes = int(args.max_gb * 2**30)
+    if args.action == "serve":
+        serve(args.host, args.port, max_bytes=max_bytes)
+    elif args.action == "evict":
+        for path in evict(cache_dir(), max_bytes):
+            print(f"Removed {path}")
+    else:
+        if not args.tile:
+            raise SystemExit("tiles get requires the tile as 'z/x/y'")
+        try:
+            z, x, y = map(int, args.tile.split("/"))
+            data = get_tile(z, x, y, args.label, args.start_time, args.end_time, max_bytes=max_bytes)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        output = args.output or f"{z}_{x}_{y}.mvt"
+        Path(output).write_bytes(data)
+        print(f"Wrote {len(data)} bytes to {output}")
+
+
+def cmd_gaps(args) -> None:
+    import pandas as pd
+    from src.models import get_engine
+    from scripts.gaps import read_gaps, window_completeness, window_gaps
+    engine = get_engine()
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        if args.action == "list":
+            print(read_gaps(engine, args.start_time, args.end_time, args.label, args.release, args.variant))
+            return
+        if not (args.start_time and args.end_time):
+            raise SystemExit("gaps check requires --start_time and --end_time")
+        print(window_completeness(engine, args.start_time, args.end_time, args.label, args.release, args.variant, args.interval))
+        print(window_gaps(engine, args.start_time, args.end_time, args.label, args.release, args.variant, args.interval))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="grace-db", description="GRACE orbit residuals database.")
+    sub = parser.add_subparsers(dest="command", metavar="command")
+
+    load_options = argparse.ArgumentParser(add_help=False)
+    load_options.add_argument("--use_batches", action="store_true", help="Use batch inserts.")
+    load_options.add_argument("--batch_size", type=int, default=1000, help="Batch size for inserts (default: 1000).")
+    load_options.add_argument("--mode", type=str, default="append", choices=["append", "upsert", "replace", "bulk"],
+                              help="append rows, upsert them on the natural key, replace re-delivered months, "
+                                   "or bulk-load without index maintenance (default: append).")
+    load_options.add_argument("--workers", type=int, default=2,
+                              help="Threads checking and encoding chunks during the COPY (default: 2).")
+
+    p = sub.add_parser("init", parents=[load_options], help="Create the tables (and optionally load data).")
+    p.add_argument("--populate", action="store_true", help="Load data after creating the tables.")
+    p.add_argument("--filepath", type=str, nargs="*", help=".pkl file(s) to load (default: the 'data/' folder).")
+    p.set_defaults(func=cmd_init)
+
+    p = sub.add_parser("load", parents=[load_options], help="Load .pkl files into the database.")
+    p.add_argument("filepath", type=str, nargs="*", help=".pkl file(s) to load (default: the 'data/' folder).")
+    p.set_defaults(func=cmd_load)
+
+    p = sub.add_parser("query", help="Query records by time window, polygon, label, radius, nearest neighbours or regions.")
+    p.add_argument("--start_time", type=str, help="Start time (e.g. '2017-01-01T00:00:00')")
+    p.add_argument("--end_time", type=str, help="End time (e.g. '2017-02-01T00:00:00')")
+    p.add_argument("--polygon", type=str, help="Polygon coordinates as 'lon1 lat1,lon2 lat2,...,lonN latN'")
+    p.add_argument("--geodesic", action="store_true", help="Polygon edges are great circles (geography type)")
+    p.add_argument("--antimeridian", action="store_true",
+                   help="Polygon edges take the short way across +/-180 degrees; rings around a pole enclose it")
+    p.add_argument("--label", type=str, help="Records of one label (e.g. RL06_12-03), borrowed epochs included; with --point, only this label")
+    p.add_argument("--point", type=str, help="Radius query center as 'lon lat' (use with --radius_km)")
+    p.add_argument("--radius_km", type=float, help="Radius of the query around --point, in km")
+    p.add_argument("--nearest", type=int, help="With --point: the N records closest to the point")
+    p.add_argument("--track_minutes", type=float, help="With --point: +/- this many minutes of track around the closest approach")
+    p.add_argument("--passes", type=int, default=1, help="With --track_minutes: number of passes (closest first)")
+    p.add_argument("--regions", type=str, help="GeoJSON/shapefile of regions to query in one batch")
+    p.add_argument("--region_id", type=str, help="Column of --regions holding the region identifiers")
+    p.add_argument("--aggregate", action="store_true", help="With --regions: return per-region statistics")
+    p.add_argument("--width", type=int, help="Downsample the time series for a plot this many pixels wide")
+    p.add_argument("--method", type=str, default="m4", choices=["m4", "lttb"],
+                   help="With --width: first/last/min/max per pixel (m4) or one point per pixel (lttb)")
+    p.add_argument("--variable", type=str, default="postfit", help="With --width: residual column (default: postfit)")
+    p.add_argument("--complete_arcs", action="store_true",
+                   help="With --start_time/--end_time: only days without cadence gaps (from the gaps table)")
+    p.add_argument("--page_size", type=int, help="Time/polygon filters: one page of this many records, in (datetime, id) order")
+    p.add_argument("--page_token", type=str, help="Continue a paged query with the token printed after its previous page")
+    p.add_argument("--workers", type=int, default=1, help="Query time sub-windows on this many connections in parallel")
+    p.add_argument("--chunk", type=str, default="MS", help="Sub-window frequency with --workers (pandas alias, e.g. MS or 7D)")
+    p.add_argument("--output_format", type=str, choices=['csv', 'netcdf'], help="Also write the results (csv or netcdf)")
+    p.add_argument("--output", type=str, default="query_output", help="Output file name without extension")
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser("export", help="Export to a partitioned GeoParquet dataset.")
+    p.add_argument("--output", type=str, required=True, help="Root directory of the Parquet dataset.")
+    p.add_argument("--start_time", type=str, help="Start time (e.g. '2017-01-01T00:00:00')")
+    p.add_argument("--end_time", type=str, help="End time (e.g. '2017-02-01T00:00:00')")
+    p.add_argument("--labels", type=str, nargs="+", help="Labels to export (e.g. RL06_12-03)")
+    p.add_argument("--row_group_size", type=int, default=17280, help="Rows per Parquet row group (default: one day).")
+    p.add_argument("--partial_months", action="store_true",
+                   help="Add only the window's rows to its first/last months instead of re-exporting them whole")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("stats", help="Summarize the stored data from the catalog, or the recorded queries.")
+    p.add_argument("--release", type=str, action="append", help="Only this release (repeatable)")
+    p.add_argument("--label", type=str, action="append", help="Only this label (repeatable)")
+    p.add_argument("--detail", action="store_true", help="One line per variant/source instead of per label")
+    p.add_argument("--queries", type=str, nargs="?", const="", metavar="METRICS",
+                   help="Summarize the recorded queries instead, slowest shapes first (default file: QUERY_METRICS)")
+    p.add_argument("--top", type=int, default=10, help="With --queries: number of query shapes (default: 10)")
+    p.add_argument("--shape", type=str, help="With --queries: also print the SQL and latest plan of this shape")
+    p.add_argument("--refresh", action="store_true", help="Recompute the whole catalog from the table instead")
+    p.add_argument("--interval", type=int, default=5, help="With --refresh: expected time interval between readings (s)")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("residuals", help="Approximate quantiles or histograms of the residuals, from daily sketches.")
+    p.add_argument("--variable", type=str, action="append", help="Residual column (repeatable, default: postfit)")
+    p.add_argument("--start_time", type=str, help="Start time (e.g. '2012-01-01T00:00:00')")
+    p.add_argument("--end_time", type=str, help="End time (e.g. '2012-12-31T23:59:59')")
+    p.add_argument("--label", type=str, action="append", help="Only this label (repeatable)")
+    p.add_argument("--release", type=str, action="append", help="Only this release (repeatable)")
+    p.add_argument("--polygon", type=str, help="Polygon coordinates as 'lon1 lat1,lon2 lat2,...,lonN latN'")
+    p.add_argument("--geodesic", action="store_true", help="Polygon edges are great circles (geography type)")
+    p.add_argument("--by", type=str, choices=["label", "release", "day", "month"], help="One row per label, release, day or month")
+    p.add_argument("--histogram", type=int, metavar="BINS", help="Histogram with this many bins instead of quantiles")
+    p.add_argument("--range", type=float, nargs=2, metavar=("MIN", "MAX"), help="With --histogram: range of the bins")
+    p.set_defaults(func=cmd_residuals)
+
+    p = sub.add_parser("compare", help="Compare two releases, variants or labels at the same epochs (a - b).")
+    p.add_argument("a", type=str, help="First side as 'release:variant[:label[:source]]' (e.g. RL06:CSR_v1)")
+    p.add_argument("b", type=str, help="Second side (e.g. RL06:CSR_v2)")
+    p.add_argument("--variable", type=str, action="append", help="Residual column (repeatable, default: postfit and up_combined)")
+    p.add_argument("--start_time", type=str, help="Start time (e.g. '2012-01-01T00:00:00')")
+    p.add_argument("--end_time", type=str, help="End time (e.g. '2012-12-31T23:59:59')")
+    p.add_argument("--by", type=str, default="day", choices=["day", "month", "label", "pass", "all"],
+                   help="Statistics per day, month, label, pass, or over the whole window (default: day)")
+    p.add_argument("--interval", type=int, default=5, help="Expected time interval between readings (s), for --by pass")
+    p.add_argument("--output_format", type=str, choices=['csv', 'netcdf'], help="Also stream the difference series to a file")
+    p.add_argument("--output", type=str, default="differences", help="Output file name without extension")
+    p.set_defaults(func=cmd_compare)
+
+    p = sub.add_parser("spectra", help="Along-track spectra (psd) or zero-phase filtered residuals (filter) per continuous arc.")
+    p.add_argument("action", choices=["psd", "filter"], help="Welch spectra per arc (NetCDF), or filtered residuals")
+    p.add_argument("--start_time", type=str, required=True, help="Start time (e.g. '2012-01-01T00:00:00')")
+    p.add_argument("--end_time", type=str, required=True, help="End time (e.g. '2012-12-31T23:59:59')")
+    p.add_argument("--variable", type=str, action="append", help="Residual column (repeatable for filter, default: postfit)")
+    p.add_argument("--label", type=str, help="Only this label")
+    p.add_argument("--release", type=str, help="Only this release")
+    p.add_argument("--variant", type=str, help="Only this processing variant")
+    p.add_argument("--nperseg", type=int, default=256, help="psd: samples per Welch segment (default: 256)")
+    p.add_argument("--overlap", type=float, default=0.5, help="psd: overlap of the Welch segments (default: 0.5)")
+    p.add_argument("--low_cut", type=float, help="filter: high-pass cutoff frequency (Hz)")
+    p.add_argument("--high_cut", type=float, help="filter: low-pass cutoff frequency (Hz)")
+    p.add_argument("--order", type=int, default=4, help="filter: Butterworth order (default: 4)")
+    p.add_argument("--interval", type=int, default=5, help="Expected time interval between readings (s)")
+    p.add_argument("--chunk", type=str, default="MS", help="Sub-window frequency (pandas alias, e.g. MS or 7D)")
+    p.add_argument("--workers", type=int, default=4, help="Processes working on sub-windows in parallel (default: 4)")
+    p.add_argument("--output_format", type=str, default="netcdf", choices=["csv", "netcdf"], help="filter: output format")
+    p.add_argument("--output", type=str, help="Output file name without extension (default: spectra / filtered)")
+    p.set_defaults(func=cmd_spectra)
+
+    p = sub.add_parser("cache", help="Local memory-mapped cache of (release, label) months.")
+    p.add_argument("action", choices=["load", "list", "evict"], help="cache months, list the cache, or shrink it")
+    p.add_argument("--release", type=str, help="load: release of the months")
+    p.add_argument("--label", type=str, nargs="+", help="load: labels of the months (e.g. RL06_12-03)")
+    p.add_argument("--max_gb", type=float, default=20, help="Size limit of the cache in GB (default: 20)")
+    p.set_defaults(func=cmd_cache)
+
+    p = sub.add_parser("release", help="Drop, archive, restore, move or swap whole releases or months (partitions).")
+    p.add_argument("action", choices=["list", "drop", "archive", "restore", "move", "swap"],
+                   help="list the partitions, or act on the partition of --release (and --label)")
+    p.add_argument("filepath", type=str, nargs="*", help="swap: .pkl file(s) holding the replacement rows")
+    p.add_argument("--release", type=str, help="Release to act on")
+    p.add_argument("--label", type=str, help="Only this month of the release")
+    p.add_argument("--tablespace", type=str, help="move: target tablespace; archive: also move the archive there")
+    p.add_argument("--archived", action="store_true", help="move: move the archived partition")
+    p.add_argument("--archive_old", action="store_true", help="swap: archive the replaced rows instead of dropping them")
+    p.add_argument("--lock_timeout", type=str, default="10s", help="Longest wait for the table lock (default: 10s)")
+    p.add_argument("--workers", type=int, default=2, help="swap: threads checking and encoding chunks during the COPY")
+    p.set_defaults(func=cmd_release)
+
+    p = sub.add_parser("tiles", help="Mapbox Vector Tiles of the residuals for web maps, with a local tile cache.")
+    p.add_argument("action", choices=["serve", "get", "evict"], help="serve tiles over HTTP, write one tile, or shrink the cache")
+    p.add_argument("tile", type=str, nargs="?", help="get: tile as 'z/x/y'")
+    p.add_argument("--label", type=str, action="append", help="Only this label (repeatable)")
+    p.add_argument("--start_time", type=str, help="Start time (e.g. '2012-03-01T00:00:00')")
+    p.add_argument("--end_time", type=str, help="End time (e.g. '2012-04-01T00:00:00')")
+    p.add_argument("--host", type=str, default="127.0.0.1", help="serve: address to listen on (default: 127.0.0.1)")
+    p.add_argument("--port", type=int, default=8080, help="serve: port to listen on (default: 8080)")
+    p.add_argument("--output", type=str, help="get: file of the tile (default: z_x_y.mvt)")
+    p.add_argument("--max_gb", type=float, default=2, help="Size limit of the tile cache in GB (default: 2)")
+    p.set_defaults(func=cmd_tiles)
+
+    p = sub.add_parser("gaps", help="List the cadence gaps of the stored data, or check that a time window is complete.")
+    p.add_argument("action", choices=["list", "check"], help="list the stored gaps, or check the completeness of a window")
+    p.add_argument("--start_time", type=str, help="Start time (e.g. '2012-03-01T00:00:00'); required by check")
+    p.add_argument("--end_time", type=str, help="End time (e.g. '2012-03-31T23:59:55'); required by check")
+    p.add_argument("--label", type=str, action="append", help="Only this label (repeatable)")
+    p.add_argument("--release", type=str, help="Only this release")
+    p.add_argument("--variant", type=str, help="Only this processing variant")
+    p.add_argument("--interval", type=int, default=5, help="Expected time interval between readings (s)")
+    p.set_defaults(func=cmd_gaps)
+
+    return parser
+
+
+def main(argv=None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        sys.exit(2)
+    args.func(args)
+
+
+def run(command: str, argv=None) -> None:
+    """Runs 'grace-db <command>' with 'argv' (default: the command line); the scripts' entry points delegate here."""
+    main([command, *(sys.argv[1:] if argv is None else argv)])
+
+
+if __name__ == "__main__":
+    main()
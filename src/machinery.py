@@ -15,7 +15,7 @@ def showenv():
 def getenv(name: str) -> str:
   value = os.getenv(name)
   if not value:
-      raise EnvironmentError("{name} not found in environment variables.")
+      raise EnvironmentError(f"{name} not found in environment variables.")
   return value
 
 class bc:
@@ -29,12 +29,21 @@ class bc:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
-def inspect_df(df):
+def inspect_df(df, report: dict = None):
   print(f'{bc.OKGREEN}Data size:{bc.ENDC} {df.shape[0]} rows, {df.shape[1]} columns, {df.size} entries')
   print(f'{bc.OKGREEN}Data head:{bc.ENDC}\n{df.head(n=5)}')
   print(f'{bc.OKGREEN}Data tail:{bc.ENDC}\n{df.tail(n=5)}')
-  print(f'{bc.OKGREEN}Data sample:{bc.ENDC}\n{df.sample(n=5)}')
-  print(f'{bc.OKGREEN}Data info:{bc.ENDC}')
-  df.info()
-  print(f'{bc.OKGREEN}Data missing:{bc.ENDC}\n{df.isnull().sum()}')
-  print(f'{bc.OKGREEN}Duplicated entries:{bc.ENDC}\n{df.duplicated().sum()}')
+  print(f'{bc.OKGREEN}Data sample:{bc.ENDC}\n{df.sample(n=min(5, len(df)))}')
+  print(f'{bc.OKGREEN}Data types:{bc.ENDC}\n{df.dtypes}')
+  # full-frame checks (missing values, duplicates, gaps) come from the streaming report of src/utils/data_quality.py
+  if report is not None:
+    inspect_report(report)
+
+def inspect_report(report: dict):
+  from src.utils.data_quality import report_problems
+  print(f'{bc.OKGREEN}Data missing:{bc.ENDC}\n' + '\n'.join(f'{k:<20}{v}' for k, v in report['nulls'].items()))
+  print(f'{bc.OKGREEN}Duplicated entries:{bc.ENDC} {report["duplicate_keys"]}')
+  print(f'{bc.OKGREEN}Cadence gaps:{bc.ENDC} {report["gaps"]} ({report["missing_epochs"]} missing epochs)')
+  problems = report_problems(report)
+  if problems:
+    print(f'{bc.WARNING}Data quality problems:{bc.ENDC}\n' + '\n'.join(problems))
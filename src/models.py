@@ -1,12 +1,19 @@
-from sqlalchemy import create_engine, Column, Float, Integer, String, DateTime
+from sqlalchemy import create_engine, text, Column, Float, Integer, String, DateTime, JSON, Index, UniqueConstraint, func
 from sqlalchemy.orm import declarative_base, sessionmaker
+from typing import Sequence
 from src.machinery import getenv
+from src.utils.catalog import CATALOG_GROUP, GAP_FACTOR
+from src.utils.partitions import default_name
+from src.utils.sketches import SKETCH_VARIABLES, bin_sql
 
 # If you want spatial queries later, you can reintroduce geoalchemy2
 # from geoalchemy2 import Geometry
 
 Base = declarative_base()
 
+# columns identifying one observation: the same epoch may be stored once per label/release/variant/source
+NATURAL_KEY = ("timestamp", "label", "release", "variant", "source")
+
 class KBRGravimetry(Base):
     __tablename__ = getenv("TABLE_NAME")
 
@@ -42,18 +49,342 @@ class KBRGravimetry(Base):
     latitude_MP  = Column(Float, nullable=True)  # degrees
     altitude_MP  = Column(Float, nullable=True)  # km
 
-    # additional information for flexible labeling
-    source       = Column(String, nullable=True) # source filename (without redundant particles)
-    variant      = Column(String, nullable=True) # processing variant (internal to CSR)
-    label        = Column(String, nullable=True) # solution month (RL06_YY-MM format)
-    release      = Column(String, nullable=True) # GRACE data processing version
+    # additional information for flexible labeling (part of the natural key: '' when not applicable)
+    source       = Column(String, nullable=False, server_default='') # source filename (without redundant particles)
+    variant      = Column(String, nullable=False, server_default='') # processing variant (internal to CSR)
+    label        = Column(String, nullable=False, server_default='', primary_key=True) # solution month (RL06_YY-MM format)
+    release      = Column(String, nullable=False, server_default='', primary_key=True) # GRACE data processing version
 
     #derived quantities
     datetime = Column(DateTime, nullable=True)  # optional: datetime for convenience
 
-# Database setup
-engine = create_engine(getenv('DATABASE_URL'))
-SessionLocal = sessionmaker(bind=engine)
+    # natural key (used by upserts), (datetime, id) for keyset pagination (see src/utils/pagination.py) and
+    # spatial indexes on the GRACE-A position (planar and geodesic);
+    # queries must build the point with the same expressions to use the spatial indexes (see scripts/space_time_query.py).
+    # The table is partitioned by release, then by label (see src/utils/partitions.py): release and label are part of
+    # the primary key because unique constraints of a partitioned table must include its partition keys.
+    __table_args__ = (
+        UniqueConstraint(*NATURAL_KEY, name=f'uq_{getenv("TABLE_NAME")}_natural_key'),
+        Index(f'ix_{getenv("TABLE_NAME")}_label_datetime', label, datetime),
+        Index(f'ix_{getenv("TABLE_NAME")}_datetime_id', datetime, id),
+        Index(f'ix_{getenv("TABLE_NAME")}_point_a',
+              func.ST_SetSRID(func.ST_MakePoint(longitude_A, latitude_A), 4326),
+              postgresql_using='gist'),
+        Index(f'ix_{getenv("TABLE_NAME")}_geography_a',
+              func.geography(func.ST_SetSRID(func.ST_MakePoint(longitude_A, latitude_A), 4326)),
+              postgresql_using='gist'),
+        {"postgresql_partition_by": "LIST (release)"},
+    )
+
+class DataQualityReport(Base):
+    __tablename__ = f'{getenv("TABLE_NAME")}_quality'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source_file = Column(String, nullable=False)  # file the report was computed for
+    loaded_at   = Column(DateTime, nullable=False, server_default=func.now())
+    rows        = Column(Integer, nullable=False)
+    problems    = Column(Integer, nullable=False)  # number of problems found
+    report      = Column(JSON, nullable=False)  # see src/utils/data_quality.py
+
+class BorrowedRange(Base):
+    """
+    Data borrowed by one label from another (see src/utils/repair_month.py), stored as a time range
+    instead of copied rows: rows of 'source_label' between source_start and source_end are read as rows
+    of 'target_label', shifted by (target_start - source_start). Resolved by the TABLE_NAME_resolved view.
+    """
+    __tablename__ = f'{getenv("TABLE_NAME")}_borrowed'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    release      = Column(String, nullable=False, server_default='')
+    variant      = Column(String, nullable=False, server_default='')
+    target_label = Column(String, nullable=False)  # label with missing epochs
+    source_label = Column(String, nullable=False)  # label the data is borrowed from
+    target_start = Column(DateTime, nullable=False)  # bounds are inclusive
+    target_end   = Column(DateTime, nullable=False)
+    source_start = Column(DateTime, nullable=False)
+    source_end   = Column(DateTime, nullable=False)
+    n_samples    = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index(f'ix_{getenv("TABLE_NAME")}_borrowed_target', target_label, target_start),
+    )
+
+class Crossover(Base):
+    """
+    Crossovers of ascending and descending passes of one label (see src/utils/crossovers.py and scripts/crossovers.py),
+    with the residuals interpolated on both passes and their differences (ascending - descending).
+    """
+    __tablename__ = f'{getenv("TABLE_NAME")}_crossovers'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    release       = Column(String, nullable=False, server_default='')
+    variant       = Column(String, nullable=False, server_default='')
+    label         = Column(String, nullable=False)
+    satellite     = Column(String(1), nullable=False)  # 'A' or 'B'
+    longitude     = Column(Float, nullable=False)  # degrees
+    latitude      = Column(Float, nullable=False)  # degrees
+    datetime_asc  = Column(DateTime, nullable=False)  # crossing time on the ascending pass
+    datetime_desc = Column(DateTime, nullable=False)  # crossing time on the descending pass
+    dt            = Column(Float, nullable=False)  # datetime_desc - datetime_asc (s)
+    postfit_asc       = Column(Float)
+    postfit_desc      = Column(Float)
+    d_postfit         = Column(Float)
+    up_combined_asc   = Column(Float)
+    up_combined_desc  = Column(Float)
+    d_up_combined     = Column(Float)
+
+    __table_args__ = (
+        Index(f'ix_{getenv("TABLE_NAME")}_crossovers_label_datetime', label, datetime_asc),
+    )
+
+class CatalogEntry(Base):
+    """
+    Coverage of one (release, variant, label, source) group of TABLE_NAME, maintained during ingestion
+    (see scripts/catalog.py), so listing the stored data does not scan the table.
+    """
+    __tablename__ = f'{getenv("TABLE_NAME")}_catalog'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    release    = Column(String, nullable=False, server_default='')
+    variant    = Column(String, nullable=False, server_default='')
+    label      = Column(String, nullable=False, server_default='')
+    source     = Column(String, nullable=False, server_default='')
+    start_time = Column(DateTime)  # first/last datetime of the group
+    end_time   = Column(DateTime)
+    rows       = Column(Integer, nullable=False)
+    min_longitude = Column(Float)  # bounding box of the GRACE-A positions (degrees)
+    min_latitude  = Column(Float)
+    max_longitude = Column(Float)
+    max_latitude  = Column(Float)
+    gaps       = Column(Integer, nullable=False)  # number of cadence gaps
+    loaded_at  = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint(release, variant, label, source, name=f'uq_{getenv("TABLE_NAME")}_catalog_group'),
+    )
+
+class Sketch(Base):
+    """
+    Distribution of one residual column of one (release, variant, label, source) group over one day, as counts in
+    fixed logarithmic bins (see src/utils/sketches.py), maintained with the catalog (see scripts/catalog.py).
+    Sketches of any set of days merge by adding their rows, so quantiles and histograms of long windows are
+    computed without reading TABLE_NAME (see scripts/residual_stats.py).
+    """
+    __tablename__ = f'{getenv("TABLE_NAME")}_sketches'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    release  = Column(String, nullable=False, server_default='')
+    variant  = Column(String, nullable=False, server_default='')
+    label    = Column(String, nullable=False, server_default='')
+    source   = Column(String, nullable=False, server_default='')
+    bucket   = Column(DateTime, nullable=False)  # day
+    variable = Column(String, nullable=False)  # residual column (see SKETCH_VARIABLES)
+    bin      = Column(Integer, nullable=False)
+    count    = Column(Integer, nullable=False)
+    total    = Column(Float, nullable=False)  # sum of the values of the bin
+    total_sq = Column(Float, nullable=False)  # sum of their squares
+    min      = Column(Float, nullable=False)
+    max      = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index(f'ix_{getenv("TABLE_NAME")}_sketches_variable_bucket', variable, bucket),
+        Index(f'ix_{getenv("TABLE_NAME")}_sketches_label', label),
+    )
+
+class Gap(Base):
+    """
+    One cadence gap of one (release, variant, label, source) group of TABLE_NAME: the stored epochs bounding it
+    and the number of epochs missing in between, maintained with the catalog (see scripts/catalog.py), so that
+    completeness checks and repair planning read this table instead of the data (see scripts/gaps.py).
+    """
+    __tablename__ = f'{getenv("TABLE_NAME")}_gaps'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    release    = Column(String, nullable=False, server_default='')
+    variant    = Column(String, nullable=False, server_default='')
+    label      = Column(String, nullable=False, server_default='')
+    source     = Column(String, nullable=False, server_default='')
+    start_time = Column(DateTime, nullable=False)  # last stored epoch before the gap
+    end_time   = Column(DateTime, nullable=False)  # first stored epoch after it
+    missing    = Column(Integer, nullable=False)  # epochs missing in between
+
+    __table_args__ = (
+        Index(f'ix_{getenv("TABLE_NAME")}_gaps_label_start_time', label, start_time),
+    )
+
+def sketch_rows_sql(where: str = "", group: Sequence[str] = ()) -> str:
+    """
+    SQL selecting the sketch rows (variable, bin, count, total, total_sq, min, max) of the TABLE_NAME rows matching
+    the condition 'where', grouped by the SQL expressions 'group' (selected first, e.g. "date_trunc('day', datetime)").
+    """
+    values = ", ".join(f"('{v}', {v})" for v in SKETCH_VARIABLES)
+    group_columns = "".join(f"{g}, " for g in group)
+    return f"""
+        SELECT {group_columns}v.variable, {bin_sql("v.value")} AS bin, COUNT(*) AS count,
+               SUM(v.value) AS total, SUM(v.value * v.value) AS total_sq, MIN(v.value) AS min, MAX(v.value) AS max
+        FROM {getenv("TABLE_NAME")} CROSS JOIN LATERAL (VALUES {values}) AS v(variable, value)
+        WHERE v.value IS NOT NULL AND datetime IS NOT NULL {f"AND {where}" if where else ""}
+        GROUP BY {", ".join(str(i + 1) for i in range(len(group) + 2))}
+    """
+
+def refresh_sketches_sql(all_groups: bool = False) -> str:
+    """
+    SQL inserting the daily sketches of TABLE_NAME, for all groups or for the groups given as the arrays
+    :releases, :variants, :labels and :sources (their previous sketches must be deleted first).
+    """
+    table = getenv("TABLE_NAME")
+    columns = ", ".join(CATALOG_GROUP)
+    where = "" if all_groups else f"""
+        label = ANY(CAST(:labels AS varchar[]))
+        AND ({columns}) IN (SELECT * FROM unnest(CAST(:releases AS varchar[]), CAST(:variants AS varchar[]),
+                                                 CAST(:labels AS varchar[]), CAST(:sources AS varchar[])))
+    """
+    return f"""
+        INSERT INTO {table}_sketches ({columns}, bucket, variable, bin, count, total, total_sq, min, max)
+        {sketch_rows_sql(where, [*CATALOG_GROUP, "date_trunc('day', datetime)"])}
+    """
+
+def refresh_gaps_sql(all_groups: bool = False) -> str:
+    """
+    SQL inserting the cadence gaps of TABLE_NAME (steps longer than :max_step seconds, missing epochs counted at
+    :interval seconds), for all groups or for the groups given as the arrays :releases, :variants, :labels and
+    :sources (their previous gaps must be deleted first).
+    """
+    table = getenv("TABLE_NAME")
+    columns = ", ".join(CATALOG_GROUP)
+    where = "" if all_groups else f"""
+        WHERE label = ANY(CAST(:labels AS varchar[]))
+        AND ({columns}) IN (SELECT * FROM unnest(CAST(:releases AS varchar[]), CAST(:variants AS varchar[]),
+                                                 CAST(:labels AS varchar[]), CAST(:sources AS varchar[])))
+    """
+    return f"""
+        INSERT INTO {table}_gaps ({columns}, start_time, end_time, missing)
+        SELECT {columns}, previous, datetime, CAST(ROUND(step / :interval) AS integer) - 1
+        FROM (
+            SELECT {columns}, datetime,
+                   LAG(datetime) OVER w AS previous, timestamp - LAG(timestamp) OVER w AS step
+            FROM {table}
+            {where}
+            WINDOW w AS (PARTITION BY {columns} ORDER BY timestamp)
+        ) s
+        WHERE step > :max_step
+    """
+
+def resolved_view_sql() -> str:
+    """
+    SQL of the TABLE_NAME_resolved view: stored rows plus borrowed rows resolved at read time
+    through a range join on the (label, datetime) index. Borrowed rows are unique on the natural key:
+    of the rows mapped onto one epoch (overlapping ranges, several sources), the first range and source win,
+    and epochs already stored as copies under the target label (source 'borrowed') are not borrowed again.
+    The DISTINCT ON key includes label and datetime, so filters on them still reach the index.
+    """
+    table = getenv("TABLE_NAME")
+    shift = "(b.target_start - b.source_start)"
+    seconds = f"EXTRACT(EPOCH FROM {shift})::double precision"
+    own, borrowed = [], []
+    for c in KBRGravimetry.__table__.columns:
+        name = f'"{c.name}"'
+        own.append(f"k.{name}")
+        if c.name == "timestamp":
+            borrowed.append(f"k.{name} + {seconds} AS {name}")
+        elif c.name == "datetime":
+            borrowed.append(f"k.{name} + {shift} AS {name}")
+        elif c.name == "label":
+            borrowed.append(f"b.target_label AS {name}")
+        elif c.name == "source":
+            borrowed.append(f"'borrowed'::varchar AS {name}")
+        else:
+            borrowed.append(f"k.{name}")
+    return f"""
+        CREATE OR REPLACE VIEW {table}_resolved AS
+        SELECT {", ".join(own)}, FALSE AS borrowed
+        FROM {table} k
+        UNION ALL
+        SELECT * FROM (
+            SELECT DISTINCT ON (b.target_label, k.release, k.variant, k.datetime + {shift}, k.timestamp + {seconds})
+                   {", ".join(borrowed)}, TRUE AS borrowed
+            FROM {table}_borrowed b
+            JOIN {table} k
+              ON k.label = b.source_label AND k.release = b.release AND k.variant = b.variant
+             AND k.datetime BETWEEN b.source_start AND b.source_end
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {table} c
+                WHERE c.timestamp = k.timestamp + {seconds} AND c.label = b.target_label
+                  AND c.release = k.release AND c.variant = k.variant AND c.source = 'borrowed')
+            ORDER BY b.target_label, k.release, k.variant, k.datetime + {shift}, k.timestamp + {seconds}, b.id, k.source
+        ) d
+    """
+
+def refresh_catalog_sql(all_groups: bool = False) -> str:
+    """
+    SQL upserting the catalog rows of TABLE_NAME, for all groups or for the groups given as the arrays
+    :releases, :variants, :labels and :sources. Steps longer than :max_step seconds are counted as gaps.
+    """
+    table = getenv("TABLE_NAME")
+    columns = ", ".join(CATALOG_GROUP)
+    where = "" if all_groups else f"""
+        WHERE label = ANY(CAST(:labels AS varchar[]))
+        AND ({columns}) IN (SELECT * FROM unnest(CAST(:releases AS varchar[]), CAST(:variants AS varchar[]),
+                                                 CAST(:labels AS varchar[]), CAST(:sources AS varchar[])))
+    """
+    return f"""
+        INSERT INTO {table}_catalog ({columns}, start_time, end_time, rows,
+                                     min_longitude, min_latitude, max_longitude, max_latitude, gaps, loaded_at)
+        SELECT {columns}, MIN(datetime), MAX(datetime), COUNT(*),
+               MIN("longitude_A"), MIN("latitude_A"), MAX("longitude_A"), MAX("latitude_A"),
+               COUNT(*) FILTER (WHERE step > :max_step), now()
+        FROM (
+            SELECT {columns}, datetime, "longitude_A", "latitude_A",
+                   timestamp - LAG(timestamp) OVER (PARTITION BY {columns} ORDER BY timestamp) AS step
+            FROM {table}
+            {where}
+        ) s
+        GROUP BY {columns}
+        ON CONFLICT ON CONSTRAINT uq_{table}_catalog_group DO UPDATE SET
+            start_time = EXCLUDED.start_time, end_time = EXCLUDED.end_time, rows = EXCLUDED.rows,
+            min_longitude = EXCLUDED.min_longitude, min_latitude = EXCLUDED.min_latitude,
+            max_longitude = EXCLUDED.max_longitude, max_latitude = EXCLUDED.max_latitude,
+            gaps = EXCLUDED.gaps, loaded_at = EXCLUDED.loaded_at
+    """
+
+# Database setup: the engine is created on first use, so importing the models has no side effects
+_engine = None
+_session_factory = None
+
+def get_engine():
+    """Returns the engine of DATABASE_URL, created on first use."""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(getenv('DATABASE_URL'))
+    return _engine
+
+def __getattr__(name):
+    # 'engine' and 'SessionLocal' used to be module attributes created at import time
+    global _session_factory
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        if _session_factory is None:
+            _session_factory = sessionmaker(bind=get_engine())
+        return _session_factory
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def init_db():
+    engine = get_engine()
     Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # rows of releases without a partition yet (tables created before partitioning are left as they are)
+        if conn.execute(text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+                        {"table": getenv("TABLE_NAME")}).scalar():
+            conn.execute(text(f'CREATE TABLE IF NOT EXISTS {default_name(getenv("TABLE_NAME"))} '
+                              f'PARTITION OF {getenv("TABLE_NAME")} DEFAULT'))
+        conn.execute(text(resolved_view_sql()))
+        # a new catalog of an existing table starts with the data already stored
+        if not conn.execute(text(f'SELECT EXISTS (SELECT 1 FROM {getenv("TABLE_NAME")}_catalog)')).scalar():
+            conn.execute(text(refresh_catalog_sql(all_groups=True)), {"max_step": GAP_FACTOR * 5})
+            conn.execute(text(f'DELETE FROM {getenv("TABLE_NAME")}_sketches'))
+            conn.execute(text(refresh_sketches_sql(all_groups=True)))
+        # a new gaps table of a catalog with gaps starts with the gaps of the data already stored
+        if conn.execute(text(f'SELECT EXISTS (SELECT 1 FROM {getenv("TABLE_NAME")}_catalog WHERE gaps > 0) '
+                             f'AND NOT EXISTS (SELECT 1 FROM {getenv("TABLE_NAME")}_gaps)')).scalar():
+            conn.execute(text(refresh_gaps_sql(all_groups=True)), {"max_step": GAP_FACTOR * 5, "interval": 5})
@@ -0,0 +1,55 @@
+# src/utils/arcs.py
+import numpy as np
+from typing import Optional
+
+
+def segment_passes(times: np.ndarray, adtrack: Optional[np.ndarray] = None, interval_seconds: float = 5,
+                   max_gap_factor: float = 1.5) -> np.ndarray:
+    """
+    Split a time-sorted series into continuous arcs: a new arc starts after a cadence gap
+    (more than max_gap_factor * interval_seconds between samples) or, if 'adtrack' is given,
+    wherever the track changes between ascending and descending (i.e. each arc is one pass).
+
+    Args:
+        times: Sorted sample times in seconds (e.g. the 'timestamp' column).
+        adtrack: Optional ascending (1) / descending (0) flags of the same samples.
+        interval_seconds: Expected cadence.
+        max_gap_factor: Tolerance on the cadence before a gap is declared.
+
+    Returns:
+        np.ndarray of int64 arc ids (0, 1, 2, ...), one per sample.
+    """
+    times = np.asarray(times, dtype=float)
+    if not len(times):
+        return np.empty(0, dtype=np.int64)
+    breaks = np.diff(times) > max_gap_factor * interval_seconds
+    if adtrack is not None:
+        adtrack = np.asarray(adtrack)
+        breaks |= adtrack[1:] != adtrack[:-1]
+    return np.r_[0, np.cumsum(breaks)].astype(np.int64)
+
+
+def closest_approaches(times: np.ndarray, distances: np.ndarray, separation_seconds: float,
+                       n: Optional[int] = None) -> np.ndarray:
+    """
+    Pick the closest approach of each pass among samples near a point (e.g. the result of a nearest-neighbour
+    query): samples are taken by increasing distance, and a sample is kept only if it is more than
+    'separation_seconds' away from every kept one, so each pass contributes its closest sample only.
+
+    Args:
+        times: Sample times in seconds (any order).
+        distances: Distances of the same samples to the point.
+        separation_seconds: Minimum time between two kept samples (e.g. the half-width of a track window).
+        n: Maximum number of samples to keep (default: all passes).
+
+    Returns:
+        np.ndarray of the indices of the kept samples, closest first.
+    """
+    times = np.asarray(times, dtype=float)
+    kept = []
+    for i in np.argsort(np.asarray(distances, dtype=float), kind="stable"):
+        if n is not None and len(kept) >= n:
+            break
+        if all(abs(times[i] - times[j]) > separation_seconds for j in kept):
+            kept.append(i)
+    return np.asarray(kept, dtype=np.int64)
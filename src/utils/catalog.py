@@ -0,0 +1,19 @@
+# src/utils/catalog.py
+import pandas as pd
+
+# one TABLE_NAME_catalog row per group of stored rows (see scripts/catalog.py)
+CATALOG_GROUP = ("release", "variant", "label", "source")
+GAP_FACTOR = 1.5  # a step longer than 1.5 cadences is a gap, as in src/utils/data_quality.py
+
+
+def catalog_groups(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns the distinct (release, variant, label, source) groups of 'df'; missing columns are ''."""
+    groups = df.assign(**{c: '' for c in CATALOG_GROUP if c not in df.columns})[list(CATALOG_GROUP)]
+    return groups.fillna('').drop_duplicates().reset_index(drop=True)
+
+
+def summarize(catalog: pd.DataFrame) -> pd.DataFrame:
+    """One row per release/label: time range, rows and gaps over variants and sources."""
+    return (catalog.groupby(["release", "label"], as_index=False)
+            .agg(start_time=("start_time", "min"), end_time=("end_time", "max"),
+                 rows=("rows", "sum"), gaps=("gaps", "sum"), groups=("source", "size")))
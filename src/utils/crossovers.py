@@ -0,0 +1,177 @@
+# src/utils/crossovers.py
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence, Tuple
+
+from src.utils.arcs import segment_passes
+
+DEFAULT_VALUES = ("postfit", "up_combined")
+DEFAULT_CELL_DEGREES = 1.0
+MAX_PAIRS_PER_BATCH = 2_000_000  # bounds the memory of the candidate pairs
+
+
+def track_segments(df: pd.DataFrame, satellite: str = "A", time_column: str = "timestamp",
+                   interval_seconds: float = 5, bbox: Optional[Tuple[float, float, float, float]] = None) -> dict:
+    """
+    Builds the straight segments between consecutive samples of the same pass (see src/utils/arcs.py).
+    A segment crossing the antimeridian (|delta longitude| > 180) is unwrapped next to its first sample
+    (e.g. 179.9 to 180.1) and repeated shifted by 360 degrees (-180.1 to -179.9), so that it meets the
+    segments on both sides; both copies share their 'start'.
+
+    Args:
+        df: Samples with time_column, longitude_<satellite>, latitude_<satellite> and adtrack_<satellite>.
+        satellite: 'A' or 'B'.
+        time_column: Time column in seconds (e.g. 'timestamp').
+        interval_seconds: Expected cadence, used to split passes at gaps.
+        bbox: Optional (min_lon, min_lat, max_lon, max_lat); segments outside are dropped.
+
+    Returns:
+        dict of arrays: 'start' (row position of the first sample in the time-sorted frame), 'arc',
+        'ascending', 'x0', 'y0', 'x1', 'y1'; plus 'order', the positions of the sorted rows in 'df'.
+    """
+    t = df[time_column].to_numpy(dtype=float)
+    order = np.argsort(t, kind="stable")
+    t = t[order]
+    lon = df[f"longitude_{satellite}"].to_numpy(dtype=float)[order]
+    lat = df[f"latitude_{satellite}"].to_numpy(dtype=float)[order]
+    adtrack = df[f"adtrack_{satellite}"].to_numpy()[order]
+
+    arc = segment_passes(t, adtrack, interval_seconds)
+    start = np.flatnonzero(arc[1:] == arc[:-1])
+    x0, y0, x1, y1 = lon[start], lat[start], lon[start + 1], lat[start + 1]
+    shift = np.where(np.abs(x1 - x0) > 180, -360 * np.sign(x1 - x0), 0)
+    x1 = x1 + shift
+    wrap = np.flatnonzero(shift)
+    start = np.concatenate([start, start[wrap]])
+    x0, x1 = np.concatenate([x0, x0[wrap] - shift[wrap]]), np.concatenate([x1, x1[wrap] - shift[wrap]])
+    y0, y1 = np.concatenate([y0, y0[wrap]]), np.concatenate([y1, y1[wrap]])
+    keep = np.isfinite(x0 + y0 + x1 + y1)
+    if bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        keep &= ((np.maximum(x0, x1) >= min_lon) & (np.minimum(x0, x1) <= max_lon)
+                 & (np.maximum(y0, y1) >= min_lat) & (np.minimum(y0, y1) <= max_lat))
+    start = start[keep]
+    return {"start": start, "arc": arc[start], "ascending": adtrack[start] == 1,
+            "x0": x0[keep], "y0": y0[keep], "x1": x1[keep], "y1": y1[keep], "order": order}
+
+
+def _cells(seg: dict, index: np.ndarray, cell_degrees: float) -> pd.DataFrame:
+    """Spatial hash: one row per (grid cell, segment) for every cell the segment's bounding box overlaps."""
+    ix0 = np.floor(np.minimum(seg["x0"], seg["x1"])[index] / cell_degrees).astype(np.int64)
+    ix1 = np.floor(np.maximum(seg["x0"], seg["x1"])[index] / cell_degrees).astype(np.int64)
+    iy0 = np.floor(np.minimum(seg["y0"], seg["y1"])[index] / cell_degrees).astype(np.int64)
+    iy1 = np.floor(np.maximum(seg["y0"], seg["y1"])[index] / cell_degrees).astype(np.int64)
+    nx, ny = ix1 - ix0 + 1, iy1 - iy0 + 1
+    n = nx * ny
+    rep = np.repeat(np.arange(len(index)), n)
+    k = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)  # position within each segment's cells
+    cx = ix0[rep] + k % nx[rep]
+    cy = iy0[rep] + k // nx[rep]
+    return pd.DataFrame({"cell": cx * 1_000_000 + cy, "segment": index[rep]})
+
+
+def _candidate_pairs(seg: dict, cell_degrees: float):
+    """Yields batches of (ascending, descending) segment pairs sharing at least one grid cell."""
+    asc = _cells(seg, np.flatnonzero(seg["ascending"]), cell_degrees)
+    desc = _cells(seg, np.flatnonzero(~seg["ascending"]), cell_degrees)
+    counts = (asc["cell"].value_counts().rename("n_asc").to_frame()
+              .join(desc["cell"].value_counts().rename("n_desc"), how="inner"))
+    if counts.empty:
+        return
+    counts = counts.sort_index()
+    batch = np.cumsum((counts["n_asc"] * counts["n_desc"]).to_numpy()) // MAX_PAIRS_PER_BATCH
+    for b in np.unique(batch):
+        cells = counts.index[batch == b]
+        pairs = asc[asc["cell"].isin(cells)].merge(desc[desc["cell"].isin(cells)], on="cell",
+                                                   suffixes=("_asc", "_desc"))
+        yield pairs["segment_asc"].to_numpy(), pairs["segment_desc"].to_numpy()
+
+
+def _intersect(seg: dict, i: np.ndarray, j: np.ndarray):
+    """
+    Vectorized segment intersection: solves p + s*r = q + u*v for each pair.
+    Parameters are half-open ([0, 1)) so a crossing at a shared vertex is counted once.
+    """
+    px, py = seg["x0"][i], seg["y0"][i]
+    rx, ry = seg["x1"][i] - px, seg["y1"][i] - py
+    qx, qy = seg["x0"][j], seg["y0"][j]
+    vx, vy = seg["x1"][j] - qx, seg["y1"][j] - qy
+    denom = rx * vy - ry * vx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = ((qx - px) * vy - (qy - py) * vx) / denom
+        u = ((qx - px) * ry - (qy - py) * rx) / denom
+    hit = (denom != 0) & (s >= 0) & (s < 1) & (u >= 0) & (u < 1)
+    return hit, s, u
+
+
+def find_crossovers(df: pd.DataFrame, satellite: str = "A", time_column: str = "timestamp",
+                    values: Sequence[str] = DEFAULT_VALUES, interval_seconds: float = 5,
+                    max_dt: Optional[float] = None, bbox: Optional[Tuple[float, float, float, float]] = None,
+                    cell_degrees: float = DEFAULT_CELL_DEGREES) -> pd.DataFrame:
+    """
+    Finds the crossovers of ascending and descending passes of one satellite.
+    Consecutive samples of each pass are joined by straight segments (in longitude/latitude);
+    candidate pairs come from a spatial hash of the segments on a 'cell_degrees' grid, so the cost
+    grows with the number of crossings rather than with the square of the number of samples.
+    Times and 'values' are linearly interpolated at the crossing point on both passes.
+
+    Args:
+        df: Samples of one label (see track_segments for the required columns).
+        satellite: 'A' or 'B'.
+        time_column: Time column in seconds (e.g. 'timestamp').
+        values: Columns interpolated at the crossing points.
+        interval_seconds: Expected cadence, used to split passes at gaps.
+        max_dt: Optional maximum time between the two passes (seconds).
+        bbox: Optional (min_lon, min_lat, max_lon, max_lat) region.
+        cell_degrees: Grid cell size of the spatial hash.
+
+    Returns:
+        pd.DataFrame with one row per crossover: longitude, latitude, time_asc, time_desc, dt (desc - asc),
+        arc_asc, arc_desc and, for each value, <value>_asc, <value>_desc and d_<value> (asc - desc),
+        sorted by time_asc.
+    """
+    values = list(values)
+    columns = ["longitude", "latitude", "time_asc", "time_desc", "dt", "arc_asc", "arc_desc"]
+    columns += [f"{v}{s}" for v in values for s in ("_asc", "_desc")] + [f"d_{v}" for v in values]
+
+    seg = track_segments(df, satellite, time_column, interval_seconds, bbox)
+    t = df[time_column].to_numpy(dtype=float)[seg["order"]]
+    data = {v: df[v].to_numpy(dtype=float)[seg["order"]] for v in values}
+
+    hits = []
+    for i, j in _candidate_pairs(seg, cell_degrees):
+        hit, s, u = _intersect(seg, i, j)
+        hits.append((i[hit], j[hit], s[hit], u[hit]))
+    if not hits:
+        hits = [(np.empty(0, dtype=np.int64),) * 2 + (np.empty(0),) * 2]
+    i, j, s, u = (np.concatenate(h) for h in zip(*hits))
+    # a pair sharing several grid cells is found once per cell, and a pair crossing at the antimeridian
+    # once per copy of its segments (see track_segments)
+    _, first = np.unique(seg["start"][i] * len(t) + seg["start"][j], return_index=True)
+    i, j, s, u = i[first], j[first], s[first], u[first]
+
+    def at(x, k, w):
+        a = seg["start"][k]
+        return x[a] + w * (x[a + 1] - x[a])
+
+    longitude = seg["x0"][i] + s * (seg["x1"][i] - seg["x0"][i])
+    result = pd.DataFrame({
+        "longitude": np.where(longitude > 180, longitude - 360, np.where(longitude < -180, longitude + 360, longitude)),
+        "latitude": seg["y0"][i] + s * (seg["y1"][i] - seg["y0"][i]),
+        "time_asc": at(t, i, s),
+        "time_desc": at(t, j, u),
+        "arc_asc": seg["arc"][i],
+        "arc_desc": seg["arc"][j],
+    })
+    result["dt"] = result["time_desc"] - result["time_asc"]
+    for v in values:
+        result[f"{v}_asc"] = at(data[v], i, s)
+        result[f"{v}_desc"] = at(data[v], j, u)
+        result[f"d_{v}"] = result[f"{v}_asc"] - result[f"{v}_desc"]
+    result = result[columns]
+    if max_dt is not None:
+        result = result[result["dt"].abs() <= max_dt]
+    if bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        result = result[result["longitude"].between(min_lon, max_lon) & result["latitude"].between(min_lat, max_lat)]
+    return result.sort_values("time_asc", kind="stable").reset_index(drop=True)
@@ -0,0 +1,203 @@
+# src/utils/data_quality.py
+import numpy as np
+import pandas as pd
+from typing import Iterable, Optional, Sequence
+
+# Physically valid ranges of the coordinate columns
+COORDINATE_RANGES = {
+    "latitude_A": (-90.0, 90.0),
+    "longitude_A": (-180.0, 180.0),
+    "latitude_B": (-90.0, 90.0),
+    "longitude_B": (-180.0, 180.0),
+    "latitude_MP": (-90.0, 90.0),
+    "longitude_MP": (-180.0, 180.0),
+}
+
+# Columns that identify one observation; only these are hashed to find duplicates
+DEFAULT_KEY_COLUMNS = ("timestamp", "label", "release", "variant", "source")
+
+
+def _label_codes(df: pd.DataFrame, label_column: str):
+    """Factorize the label column (missing labels are grouped together)."""
+    if label_column not in df.columns:
+        return np.zeros(len(df), dtype=np.int64), np.array([None], dtype=object)
+    codes, uniques = pd.factorize(df[label_column], use_na_sentinel=False)
+    return codes, np.asarray(uniques, dtype=object)
+
+
+def chunk_stats(df: pd.DataFrame,
+                interval_seconds: float = 5,
+                time_column: str = "timestamp",
+                label_column: str = "label",
+                key_columns: Sequence[str] = DEFAULT_KEY_COLUMNS) -> dict:
+    """
+    Compute data-quality statistics of one chunk in a single vectorized pass.
+
+    Args:
+        df: Chunk of satellite data.
+        interval_seconds: Expected cadence of the time series.
+        time_column: Numeric time column (seconds) used for cadence checks.
+        label_column: Column the cadence and duplicate checks are grouped by.
+        key_columns: Columns forming the natural key; only these are hashed.
+
+    Returns:
+        dict: Mergeable statistics (see merge_stats and finalize_stats).
+    """
+    numeric = df.select_dtypes(include="number")
+    stats = {
+        "rows": int(len(df)),
+        "nulls": {k: int(v) for k, v in df.isna().sum().items()},
+        "min": {k: float(v) for k, v in numeric.min().items() if pd.notna(v)},
+        "max": {k: float(v) for k, v in numeric.max().items() if pd.notna(v)},
+        "out_of_range": {},
+        "labels": {},
+    }
+
+    for column, (lo, hi) in COORDINATE_RANGES.items():
+        if column in df.columns:
+            values = df[column].to_numpy(dtype=float, na_value=np.nan)
+            stats["out_of_range"][column] = int(np.count_nonzero((values < lo) | (values > hi)))
+
+    # Hash only the key columns; duplicates are counted once all chunks are merged
+    keys = [c for c in key_columns if c in df.columns]
+    if keys and len(df):
+        stats["_key_hashes"] = pd.util.hash_pandas_object(df[keys], index=False).to_numpy()
+    else:
+        stats["_key_hashes"] = np.empty(0, dtype=np.uint64)
+
+    if time_column not in df.columns or not len(df):
+        return stats
+
+    # Sort by (label, time) once and look at consecutive differences within each label
+    codes, uniques = _label_codes(df, label_column)
+    times = df[time_column].to_numpy(dtype=float, na_value=np.nan)
+    order = np.lexsort((times, codes))
+    t, c = times[order], codes[order]
+    valid = ~np.isnan(t)
+    t, c = t[valid], c[valid]
+    if not len(t):
+        return stats
+
+    dt = np.diff(t)
+    same = c[1:] == c[:-1]
+    gap = same & (dt > 1.5 * interval_seconds)
+    duplicate_time = same & (dt == 0)
+    missing = np.where(gap, np.rint(dt / interval_seconds) - 1, 0)
+
+    starts = np.flatnonzero(np.r_[True, ~same])
+    ends = np.r_[starts[1:], len(t)] - 1
+    pair_code = c[1:]
+    n_labels = len(uniques)
+    gaps_per_label = np.bincount(pair_code[gap], minlength=n_labels)
+    missing_per_label = np.bincount(pair_code, weights=missing, minlength=n_labels)
+    dups_per_label = np.bincount(pair_code[duplicate_time], minlength=n_labels)
+    max_gap = np.zeros(n_labels)
+    np.maximum.at(max_gap, pair_code[gap], dt[gap])
+
+    for s, e in zip(starts, ends):
+        code = c[s]
+        label = uniques[code]
+        stats["labels"][None if pd.isna(label) else str(label)] = {
+            "first": float(t[s]),
+            "last": float(t[e]),
+            "rows": int(e - s + 1),
+            "gaps": int(gaps_per_label[code]),
+            "missing_epochs": int(missing_per_label[code]),
+            "max_gap_seconds": float(max_gap[code]),
+            "duplicate_timestamps": int(dups_per_label[code]),
+        }
+
+    stats["interval_seconds"] = interval_seconds
+    return stats
+
+
+def merge_stats(a: dict, b: dict) -> dict:
+    """
+    Merge the statistics of two consecutive chunks ('a' precedes 'b' in time).
+    Cadence gaps spanning the chunk boundary are accounted for.
+    """
+    interval = a.get("interval_seconds") or b.get("interval_seconds") or 5
+    merged = {
+        "rows": a["rows"] + b["rows"],
+        "nulls": {k: a["nulls"].get(k, 0) + b["nulls"].get(k, 0) for k in {**a["nulls"], **b["nulls"]}},
+        "min": {k: min(v for v in (a["min"].get(k), b["min"].get(k)) if v is not None) for k in {**a["min"], **b["min"]}},
+        "max": {k: max(v for v in (a["max"].get(k), b["max"].get(k)) if v is not None) for k in {**a["max"], **b["max"]}},
+        "out_of_range": {k: a["out_of_range"].get(k, 0) + b["out_of_range"].get(k, 0)
+                         for k in {**a["out_of_range"], **b["out_of_range"]}},
+        "labels": dict(a["labels"]),
+        "interval_seconds": interval,
+        "_key_hashes": np.concatenate([a.get("_key_hashes", np.empty(0, dtype=np.uint64)),
+                                       b.get("_key_hashes", np.empty(0, dtype=np.uint64))]),
+    }
+
+    for label, right in b["labels"].items():
+        left = merged["labels"].get(label)
+        if left is None:
+            merged["labels"][label] = dict(right)
+            continue
+        boundary = right["first"] - left["last"]
+        boundary_gap = boundary > 1.5 * interval
+        merged["labels"][label] = {
+            "first": min(left["first"], right["first"]),
+            "last": max(left["last"], right["last"]),
+            "rows": left["rows"] + right["rows"],
+            "gaps": left["gaps"] + right["gaps"] + int(boundary_gap),
+            "missing_epochs": left["missing_epochs"] + right["missing_epochs"]
+                              + (int(round(boundary / interval)) - 1 if boundary_gap else 0),
+            "max_gap_seconds": max(left["max_gap_seconds"], right["max_gap_seconds"],
+                                   boundary if boundary_gap else 0.0),
+            "duplicate_timestamps": left["duplicate_timestamps"] + right["duplicate_timestamps"] + int(boundary == 0),
+        }
+
+    return merged
+
+
+def finalize_stats(stats: dict) -> dict:
+    """
+    Turn merged statistics into a JSON-serializable report.
+    Duplicate natural keys are counted here, over the hashes of all chunks.
+    """
+    report = {k: v for k, v in stats.items() if not k.startswith("_")}
+    hashes = stats.get("_key_hashes", np.empty(0, dtype=np.uint64))
+    report["duplicate_keys"] = int(len(hashes) - len(np.unique(hashes)))
+    report["gaps"] = sum(v["gaps"] for v in stats["labels"].values())
+    report["missing_epochs"] = sum(v["missing_epochs"] for v in stats["labels"].values())
+    report["out_of_range_total"] = sum(stats["out_of_range"].values())
+    return report
+
+
+def quality_report(chunks: Iterable[pd.DataFrame], **kwargs) -> dict:
+    """
+    Stream chunks (in time order) through chunk_stats and merge them into one report.
+
+    Args:
+        chunks: Iterable of DataFrames.
+        **kwargs: Passed to chunk_stats.
+
+    Returns:
+        dict: Finalized data-quality report.
+    """
+    merged: Optional[dict] = None
+    for chunk in chunks:
+        stats = chunk_stats(chunk, **kwargs)
+        merged = stats if merged is None else merge_stats(merged, stats)
+    if merged is None:
+        merged = chunk_stats(pd.DataFrame(), **kwargs)
+    return finalize_stats(merged)
+
+
+def report_problems(report: dict) -> list:
+    """List human-readable problems found in a finalized report (empty if none)."""
+    problems = []
+    if report["duplicate_keys"]:
+        problems.append(f"{report['duplicate_keys']} duplicated natural keys")
+    for column, count in report["out_of_range"].items():
+        if count:
+            problems.append(f"{count} out-of-range values in '{column}'")
+    for label, info in report["labels"].items():
+        if info["gaps"]:
+            problems.append(f"label {label}: {info['gaps']} cadence gaps, {info['missing_epochs']} missing epochs "
+                            f"(largest {info['max_gap_seconds']:.0f} s)")
+        if info["duplicate_timestamps"]:
+            problems.append(f"label {label}: {info['duplicate_timestamps']} duplicate timestamps")
+    return problems
@@ -0,0 +1,132 @@
+# src/utils/downsample.py
+import numpy as np
+import pandas as pd
+from typing import Iterable, Optional
+
+# Downsampling of time series for plots. With M4, each of 'width' equal time buckets (one per pixel column)
+# keeps its first, last, minimum and maximum samples: a line plot of these at most 4 * width points is
+# identical to the plot of the whole series, peaks included. LTTB (Largest-Triangle-Three-Buckets) keeps
+# exactly one sample per bucket, the one spanning the largest triangle with its neighbours, for a fixed
+# number of points that still follows the shape of the series.
+METHODS = ("m4", "lttb")
+
+
+def bucket_index(x, start: float, end: float, width: int) -> np.ndarray:
+    """Bucket (0 .. width - 1) of each x within [start, end]; x == end falls in the last bucket."""
+    if width < 1:
+        raise ValueError("width must be at least 1")
+    span = end - start
+    if span <= 0:
+        return np.zeros(len(x), dtype=np.int64)
+    return np.clip(np.floor((np.asarray(x, dtype=float) - start) / span * width), 0, width - 1).astype(np.int64)
+
+
+def _first_by(buckets: np.ndarray, key: np.ndarray):
+    """For each bucket present, the position of the row with the smallest 'key' (ties: first row)."""
+    order = np.lexsort((np.arange(len(key)), key, buckets))
+    keep = np.r_[True, buckets[order][1:] != buckets[order][:-1]]
+    return buckets[order][keep], order[keep]
+
+
+def m4_indices(x, y, width: int, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+    """
+    Sorted positions of the samples kept by M4 in 'width' buckets between 'start' and 'end' (default: the range
+    of x). NaN values of y are skipped.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    if not len(valid):
+        return valid
+    x, y = x[valid], y[valid]
+    buckets = bucket_index(x, x.min() if start is None else start, x.max() if end is None else end, width)
+    picks = [_first_by(buckets, key)[1] for key in (x, -x, y, -y)]
+    return valid[np.unique(np.concatenate(picks))]
+
+
+class M4Accumulator:
+    """
+    M4 over batches of a series streamed in any order, in constant memory: four samples per bucket are kept
+    between batches. Example:
+
+        acc = M4Accumulator(start, end, width=1000)
+        for chunk in chunks:
+            acc.add(chunk["timestamp"], chunk["postfit"])
+        points = acc.points()  # DataFrame with x, y
+    """
+
+    def __init__(self, start: float, end: float, width: int):
+        self.start, self.end, self.width = float(start), float(end), int(width)
+        bucket_index([], self.start, self.end, self.width)  # validates width
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+
+    def add(self, x, y) -> None:
+        """Adds a batch of samples; samples outside [start, end] and NaN values are ignored."""
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        inside = (x >= self.start) & (x <= self.end) & ~np.isnan(y)
+        x, y = np.concatenate([self.x, x[inside]]), np.concatenate([self.y, y[inside]])
+        keep = m4_indices(x, y, self.width, self.start, self.end)
+        self.x, self.y = x[keep], y[keep]
+
+    def points(self) -> pd.DataFrame:
+        """The samples kept so far, sorted by x."""
+        order = np.argsort(self.x, kind="stable")
+        return pd.DataFrame({"x": self.x[order], "y": self.y[order]})
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Positions of the 'n_out' samples kept by LTTB from a series sorted by x (the first and last samples are
+    always kept; all samples if there are at most n_out).
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])[:max(n_out, 1)]
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 buckets between the end points
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        nxt = slice(hi, max(edges[i + 2], hi + 1)) if i + 2 < len(edges) else slice(n - 1, n)
+        cx, cy = x[nxt].mean(), y[nxt].mean()  # average of the next bucket
+        ax, ay = x[kept[i]], y[kept[i]]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        kept[i + 1] = lo + int(np.argmax(area))
+    return kept
+
+
+def downsample(x, y, width: int, method: str = "m4") -> np.ndarray:
+    """Sorted positions of the samples of a series kept for a plot 'width' pixels wide ('m4' or 'lttb')."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}' (expected one of {METHODS})")
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    order = np.argsort(x, kind="stable")
+    kept = order[m4_indices(x[order], y[order], width)]
+    if method == "lttb":
+        kept = kept[lttb_indices(x[kept], y[kept], width)]
+    return kept
+
+
+def downsample_frames(frames: Iterable[pd.DataFrame], start_time, end_time, width: int, variable: str = "postfit",
+                      method: str = "m4") -> pd.DataFrame:
+    """
+    Downsamples a series streamed as DataFrames (columns 'datetime' and 'variable', e.g. chunks of a query or of
+    a Parquet/month cache read) for a plot 'width' pixels wide between 'start_time' and 'end_time'.
+
+    Returns:
+        pd.DataFrame with columns datetime and 'variable', sorted by time.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}' (expected one of {METHODS})")
+    origin = pd.Timestamp(start_time)
+    acc = M4Accumulator(0.0, (pd.Timestamp(end_time) - origin).total_seconds(), width)  # seconds since start_time
+    for df in frames:
+        acc.add((pd.to_datetime(df["datetime"]) - origin).dt.total_seconds(), df[variable])
+    points = acc.points()
+    if method == "lttb":
+        points = points.iloc[lttb_indices(points["x"], points["y"], width)]
+    return pd.DataFrame({"datetime": origin + pd.to_timedelta(np.round(points["x"].to_numpy() * 1e6), unit="us"),
+                         variable: points["y"].to_numpy()})
@@ -0,0 +1,61 @@
+# src/utils/fanout.py
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+import pandas as pd
+
+
+class TimeWindow(NamedTuple):
+    """Sub-window of a query: [start, end) or, for the last window, [start, end]."""
+    start: pd.Timestamp
+    end: pd.Timestamp
+    closed: bool  # True if 'end' is included
+
+
+def split_time_range(start_time, end_time, freq: str = "MS") -> List[TimeWindow]:
+    """
+    Splits the inclusive window [start_time, end_time] into consecutive sub-windows aligned on 'freq'
+    (a pandas frequency: 'MS' for calendar months, '7D' for weeks, ...). Sub-windows are half-open
+    except the last one, so each epoch falls in exactly one of them.
+    """
+    start, end = pd.Timestamp(start_time), pd.Timestamp(end_time)
+    if end < start:
+        raise ValueError(f"End time {end} is before start time {start}.")
+    bounds = [start] + [b for b in pd.date_range(start.normalize(), end, freq=freq) if start < b <= end] + [end]
+    windows = [TimeWindow(a, b, False) for a, b in zip(bounds[:-1], bounds[1:]) if a < b]
+    if not windows:
+        return [TimeWindow(start, end, True)]  # start == end
+    windows[-1] = windows[-1]._replace(closed=True)
+    return windows
+
+
+def fan_out(fetch: Callable, items: Iterable, max_workers: int = 4, max_pending: Optional[int] = None) -> Iterator:
+    """
+    Runs fetch(item) for each item on a thread pool and yields the results in the order of 'items'
+    as soon as they are available, so time-ordered sub-windows stream out in time order.
+    At most 'max_pending' results are computed ahead of the consumer (backpressure: a slow writer
+    does not let results pile up in memory). If a call fails, pending calls are cancelled and the error is raised.
+
+    Args:
+        fetch: Function called with one item; each call should use its own database connection.
+        items: Work items (e.g. TimeWindow's from split_time_range).
+        max_workers: Number of concurrent calls (keep it within the engine's pool size + overflow).
+        max_pending: Maximum number of submitted but not yet consumed calls (default: 2 * max_workers).
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+    max_pending = max(max_pending or 2 * max_workers, max_workers)
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(fetch, item))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
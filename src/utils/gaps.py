@@ -0,0 +1,108 @@
+# src/utils/gaps.py
+import numpy as np
+import pandas as pd
+from typing import Sequence
+from src.utils.catalog import CATALOG_GROUP, GAP_FACTOR
+
+# Cadence gaps of series sampled every 'interval_seconds'. A gap is a step between consecutive epochs longer than
+# GAP_FACTOR cadences, described by the epochs bounding it (start_time, end_time) and the number of epochs missing
+# in between. TABLE_NAME_gaps holds the gaps of every catalog group, computed at ingestion (see
+# src/models.refresh_gaps_sql): with the catalog spans, they give the missing epochs of any window without
+# reading the data or building its full time grid.
+GAP_COLUMNS = ["start_time", "end_time", "missing"]
+
+
+def find_gaps(df: pd.DataFrame, group_columns: Sequence[str] = (), time_column: str = "datetime",
+              interval_seconds: float = 5) -> pd.DataFrame:
+    """
+    Gaps of the time series of each group of 'df' (one sort and one diff over all groups), as stored in
+    TABLE_NAME_gaps: columns 'group_columns', start_time, end_time and missing, ordered by group and time.
+    """
+    group_columns = list(group_columns)
+    columns = group_columns + GAP_COLUMNS
+    times = pd.to_datetime(df[time_column]).to_numpy("datetime64[ns]").astype(np.int64)
+    codes = df.groupby(group_columns, sort=False).ngroup().to_numpy() if group_columns else np.zeros(len(df), np.int64)
+    order = np.lexsort((times, codes))
+    t, c = times[order], codes[order]
+    step = np.diff(t)
+    gap = (c[1:] == c[:-1]) & (step > GAP_FACTOR * interval_seconds * 1e9)
+    if not gap.any():
+        return pd.DataFrame(columns=columns)
+    after = order[1:][gap]
+    gaps = df.iloc[after][group_columns].reset_index(drop=True)
+    gaps["start_time"] = pd.to_datetime(t[:-1][gap])
+    gaps["end_time"] = pd.to_datetime(t[1:][gap])
+    gaps["missing"] = (np.rint(step[gap] / (interval_seconds * 1e9)) - 1).astype(np.int64)
+    return gaps[columns]
+
+
+def covered_intervals(spans: pd.DataFrame, gaps: pd.DataFrame, group_columns: Sequence[str] = CATALOG_GROUP) -> pd.DataFrame:
+    """
+    Continuous runs of stored epochs (start_time, end_time) of groups spanning their catalog 'spans' (start_time,
+    end_time) with their 'gaps', i.e. each span cut at each of its gaps.
+    """
+    group_columns = list(group_columns)
+    starts = pd.concat([spans[group_columns + ["start_time"]],
+                        gaps[group_columns + ["end_time"]].rename(columns={"end_time": "start_time"})])
+    ends = pd.concat([gaps[group_columns + ["start_time"]].rename(columns={"start_time": "end_time"}),
+                      spans[group_columns + ["end_time"]]])
+    # each span has one run more than gaps, so the sorted starts and ends of a group pair up
+    starts = starts.sort_values(group_columns + ["start_time"], ignore_index=True)
+    ends = ends.sort_values(group_columns + ["end_time"], ignore_index=True)
+    return pd.DataFrame({"start_time": pd.to_datetime(starts["start_time"]), "end_time": pd.to_datetime(ends["end_time"])})
+
+
+def holes(intervals: pd.DataFrame, start_time, end_time, interval_seconds: float = 5) -> pd.DataFrame:
+    """
+    Gaps (start_time, end_time, missing) of the union of the runs 'intervals' within the window
+    [start_time, end_time]: runs less than GAP_FACTOR cadences apart are continuous. Missing epochs follow the
+    cadence of the run before them (of the run after them, before the first run). Gaps crossing an edge of the
+    window are cut there: their bounds are then the epochs just outside the window.
+    """
+    step = int(round(interval_seconds * 1e9))
+    lo, hi = pd.Timestamp(start_time).value, pd.Timestamp(end_time).value
+    s = pd.to_datetime(intervals["start_time"]).to_numpy("datetime64[ns]").astype(np.int64)
+    e = pd.to_datetime(intervals["end_time"]).to_numpy("datetime64[ns]").astype(np.int64)
+    order = np.argsort(s, kind="stable")
+    s, e = s[order], np.maximum.accumulate(e[order])
+    block_start, block_end = s[:0], e[:0]
+    if len(s):
+        new = np.flatnonzero(np.r_[True, s[1:] > e[:-1] + GAP_FACTOR * step])
+        block_start, block_end = s[new], e[np.r_[new[1:] - 1, len(s) - 1]]
+
+    bounds, counts = [], []
+    # before the first run: epochs counted back from its start
+    if not len(block_start) or block_start[0] > lo:
+        anchor = block_start[0] if len(block_start) else hi + step
+        k_min, k_max = max(1, -((hi - anchor) // step)), (anchor - lo) // step
+        if k_max >= k_min:
+            bounds.append(anchor - (k_max + 1) * step)
+            counts.append(k_max - k_min + 1)
+    # between runs and after the last one: epochs counted from the end of the run before
+    for i, a in enumerate(block_end):
+        k_min = max(1, -((a - lo) // step))
+        k_max = (hi - a) // step
+        if i + 1 < len(block_start):
+            k_max = min(k_max, int(np.rint((block_start[i + 1] - a) / step)) - 1)
+        if k_max >= k_min:
+            bounds.append(a + (k_min - 1) * step)
+            counts.append(k_max - k_min + 1)
+    start = np.asarray(bounds, dtype=np.int64)
+    missing = np.asarray(counts, dtype=np.int64)
+    return pd.DataFrame({"start_time": pd.to_datetime(start), "end_time": pd.to_datetime(start + (missing + 1) * step),
+                         "missing": missing})
+
+
+def gap_epochs(gaps: pd.DataFrame, interval_seconds: float = 5) -> pd.DatetimeIndex:
+    """Missing epochs of 'gaps': start_time + k * interval_seconds for k = 1 .. missing, in order."""
+    step = int(round(interval_seconds * 1e9))
+    missing = gaps["missing"].to_numpy(dtype=np.int64)
+    starts = pd.to_datetime(gaps["start_time"]).to_numpy("datetime64[ns]").astype(np.int64)
+    offsets = np.arange(missing.sum()) - np.repeat(np.cumsum(missing) - missing, missing) + 1
+    return pd.DatetimeIndex(np.sort(np.repeat(starts, missing) + offsets * step).astype("datetime64[ns]"))
+
+
+def month_window(first_time, interval_seconds: float = 5):
+    """Window (first, last epoch) of the month starting on the day of 'first_time', as in repair_month.missing_timestamps."""
+    start = pd.Timestamp(first_time).floor("D")
+    return start, (start + pd.DateOffset(months=1)).floor("D") - pd.Timedelta(seconds=interval_seconds)
@@ -60,7 +60,8 @@ def get_default_allowed_labels() -> List[str]:
 
 def validate_data_labels(df, label_column: str = "label") -> dict:
     """
-    Validate labels in a DataFrame.
+    Validate labels in a DataFrame. Unlabelled rows (NULL, or '' as stored in the database, where
+    the label is part of the natural key) are not validated.
     
     Args:
         df: DataFrame containing label column
@@ -72,7 +73,8 @@ def validate_data_labels(df, label_column: str = "label") -> dict:
     if label_column not in df.columns:
         return {"error": f"Column '{label_column}' not found in DataFrame"}
     
-    labels = df[label_column].dropna().unique()
+    labels = df[label_column].dropna()
+    labels = labels[labels != ""].unique()
     allowed = get_default_allowed_labels()
     errors = validate_label_list(labels, allowed)
     
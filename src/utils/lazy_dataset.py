@@ -0,0 +1,75 @@
+# src/utils/lazy_dataset.py
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Lazy xarray view of the residuals: the samples are laid on a regular time grid at the cadence of the data
+# (missing epochs are NaN), cut into chunks aligned on whole periods (e.g. days). The grid only needs the time
+# extent of the data, so opening a dataset reads nothing; each chunk is a dask task that runs one time-bounded
+# query (see scripts/lazy_dataset.py) when its values are computed. Selections keep only the chunks they overlap.
+EPOCH = pd.Timestamp("2000-01-01")  # origin of the 'timestamp' column (seconds)
+
+
+def time_grid(start_time, end_time, cadence: float = 5) -> Tuple[float, int]:
+    """First epoch (seconds since EPOCH, a multiple of 'cadence') and number of epochs of a grid covering [start, end]."""
+    start = (pd.Timestamp(start_time) - EPOCH).total_seconds()
+    end = (pd.Timestamp(end_time) - EPOCH).total_seconds()
+    first = np.floor(start / cadence) * cadence
+    return float(first), int(np.ceil(end / cadence) - first / cadence) + 1
+
+
+def grid_times(first: float, n: int, cadence: float = 5) -> pd.DatetimeIndex:
+    """Datetimes of the grid epochs (computed in integer nanoseconds, so that they are exact)."""
+    step, origin = int(round(cadence * 1e9)), int(round(first * 1e9))
+    return pd.DatetimeIndex(EPOCH.to_datetime64() + (origin + step * np.arange(n, dtype=np.int64)).astype("timedelta64[ns]"))
+
+
+def chunk_bounds(first: float, n: int, cadence: float = 5, chunk_seconds: float = 86400) -> List[Tuple[int, int]]:
+    """(start, end) positions of the chunks of the grid, cut where the epochs cross a multiple of 'chunk_seconds'."""
+    if n <= 0:
+        return []
+    last = first + (n - 1) * cadence
+    boundaries = np.arange(np.floor(first / chunk_seconds) + 1, np.floor(last / chunk_seconds) + 1) * chunk_seconds
+    cuts = np.ceil((boundaries - first) / cadence - 1e-9).astype(np.int64)
+    edges = np.unique(np.r_[0, cuts[(cuts > 0) & (cuts < n)], n])
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def place(df: pd.DataFrame, first: float, lo: int, hi: int, cadence: float, columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Arrays of grid positions lo..hi (NaN where no row) of 'columns', from rows with a 'timestamp' column.
+    Rows are assigned to the nearest epoch; when several rows fall on one epoch, the first one is kept.
+    """
+    out = {c: np.full(hi - lo, np.nan) for c in columns}
+    if df.empty:
+        return out
+    positions = np.rint((df["timestamp"].to_numpy(dtype=float) - first) / cadence).astype(np.int64) - lo
+    keep = (positions >= 0) & (positions < hi - lo)
+    positions, rows = np.unique(positions[keep], return_index=True)
+    rows = np.flatnonzero(keep)[rows]
+    for c in columns:
+        out[c][positions] = df[c].to_numpy(dtype=float)[rows]
+    return out
+
+
+def lazy_dataset(reader: Callable[[int, int], Dict[str, np.ndarray]], first: float, n: int, variables: Sequence[str],
+                 coordinates: Sequence[str] = (), cadence: float = 5, chunk_seconds: float = 86400,
+                 attrs: Optional[dict] = None):
+    """
+    xarray Dataset on a 'time' dimension of n epochs from 'first', whose 'variables' (and non-index 'coordinates')
+    are dask arrays: chunk (lo, hi) (see chunk_bounds) is computed by reader(lo, hi), which returns the arrays of
+    all of them (see place). Each chunk is read once, whatever the number of variables computed from it.
+    """
+    import dask
+    import dask.array as da
+    import xarray as xr
+    columns = list(variables) + list(coordinates)
+    parts = {c: [] for c in columns}
+    for lo, hi in chunk_bounds(first, n, cadence, chunk_seconds):
+        chunk = dask.delayed(reader, pure=True)(lo, hi)
+        for c in columns:
+            parts[c].append(da.from_delayed(chunk[c], shape=(hi - lo,), dtype=np.float64))
+    arrays = {c: da.concatenate(parts[c]) if parts[c] else da.empty(0, dtype=np.float64) for c in columns}
+    coords = {"time": grid_times(first, n, cadence)}
+    coords.update({c: ("time", arrays[c]) for c in coordinates})
+    return xr.Dataset({v: ("time", arrays[v]) for v in variables}, coords=coords, attrs=dict(attrs or {}))
@@ -0,0 +1,137 @@
+# src/utils/month_cache.py
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# One directory per (release, label): <root>/<release>/<label>/ with one <column>.npy file per column
+# (string columns as <column>.codes.npy + categories in the manifest) and a manifest.json written last.
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+
+def entry_dir(root, release: str, label: str) -> Path:
+    """Directory of the cached (release, label) month."""
+    safe = [re.sub(r"[^A-Za-z0-9_.-]", "_", name).lstrip(".") or "_" for name in (release, label)]  # no '..' nor hidden names
+    return Path(root).expanduser() / safe[0] / safe[1]
+
+
+def write_entry(root, release: str, label: str, df: pd.DataFrame, token: str) -> Path:
+    """
+    Materializes 'df' as the cached (release, label) month, tagged with 'token' (identifies the stored version,
+    see read_manifest). Files are written to a temporary directory and swapped in with a rename, so readers see
+    either the old or the new entry; readers still mapping the old files keep their pages until they close them.
+    """
+    target = entry_dir(root, release, label)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.parent / f".{target.name}.{uuid.uuid4().hex[:8]}.tmp"
+    tmp.mkdir()
+    columns = {}
+    try:
+        for name in df.columns:
+            series = df[name]
+            if series.dtype == object or isinstance(series.dtype, (pd.StringDtype, pd.CategoricalDtype)):
+                codes, categories = pd.factorize(series.astype(object).fillna(""), sort=True)
+                np.save(tmp / f"{name}.codes.npy", codes.astype(np.int32 if len(categories) > 32767 else np.int16))
+                columns[name] = {"kind": "category", "categories": [str(c) for c in categories]}
+            else:
+                values = series.to_numpy()
+                if values.dtype.kind == "M":
+                    values = values.astype("datetime64[ns]")
+                elif values.dtype.kind not in "biuf":
+                    values = series.to_numpy(dtype=float, na_value=np.nan)
+                np.save(tmp / f"{name}.npy", np.ascontiguousarray(values))
+                columns[name] = {"kind": "array"}
+        manifest = {"version": FORMAT_VERSION, "release": release, "label": label, "token": token,
+                    "rows": len(df), "columns": columns, "created": time.time(),
+                    "nbytes": sum(f.stat().st_size for f in tmp.iterdir())}
+        (tmp / MANIFEST).write_text(json.dumps(manifest))
+
+        if target.exists():
+            old = read_manifest(target)
+            if old is not None and old.get("token") == token:  # written meanwhile by another process
+                shutil.rmtree(tmp, ignore_errors=True)
+                return target
+            trash = target.parent / f".{target.name}.{uuid.uuid4().hex[:8]}.old"
+            os.replace(target, trash)
+            shutil.rmtree(trash, ignore_errors=True)
+        os.replace(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return target
+
+
+def read_manifest(path) -> Optional[dict]:
+    """Manifest of a cache entry directory, or None if it is missing, incomplete or of another format version."""
+    try:
+        manifest = json.loads((Path(path) / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == FORMAT_VERSION else None
+
+
+def open_entry(root, release: str, label: str, token: Optional[str] = None) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Opens the cached (release, label) month as read-only memory maps, one per column (string columns as
+    pandas Categoricals on memory-mapped codes). Returns None if the month is not cached, or if 'token' is given
+    and differs from the cached one (stale entry). Processes opening the same month share the page cache,
+    so an open costs no copy and no resident memory until the data is read.
+    """
+    path = entry_dir(root, release, label)
+    manifest = read_manifest(path)
+    if manifest is None or (token is not None and manifest["token"] != token):
+        return None
+    columns = {}
+    try:
+        for name, spec in manifest["columns"].items():
+            if spec["kind"] == "category":
+                codes = np.load(path / f"{name}.codes.npy", mmap_mode="r")
+                columns[name] = pd.Categorical.from_codes(codes, spec["categories"], validate=False)
+            else:
+                columns[name] = np.load(path / f"{name}.npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return None  # evicted or replaced while opening
+    os.utime(path / MANIFEST)  # last use, for evict()
+    return columns
+
+
+def to_dataframe(columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """DataFrame view of opened columns (see open_entry), without copying the memory-mapped arrays."""
+    return pd.DataFrame(columns, copy=False)
+
+
+def cache_entries(root) -> List[dict]:
+    """Manifests of the cached months, with their 'path' and 'last_used' time, least recently used first."""
+    entries = []
+    for manifest_path in Path(root).expanduser().glob(f"*/*/{MANIFEST}"):
+        manifest = read_manifest(manifest_path.parent)
+        if manifest is not None:
+            entries.append({**manifest, "path": str(manifest_path.parent), "last_used": manifest_path.stat().st_mtime})
+    return sorted(entries, key=lambda e: e["last_used"])
+
+
+def evict(root, max_bytes: int, keep: tuple = ()) -> List[str]:
+    """
+    Removes least recently used months until the cache holds at most 'max_bytes' (entries in 'keep',
+    given as directories, are never removed). Returns the removed directories.
+    """
+    entries = cache_entries(root)
+    keep = {str(Path(k)) for k in keep}
+    total = sum(e["nbytes"] for e in entries)
+    removed = []
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        if entry["path"] in keep:
+            continue
+        shutil.rmtree(entry["path"], ignore_errors=True)
+        total -= entry["nbytes"]
+        removed.append(entry["path"])
+    return removed
@@ -0,0 +1,97 @@
+# src/utils/netcdf_writer.py
+import os
+import numpy as np
+import pandas as pd
+import netCDF4
+from typing import Optional
+
+SAMPLE_DIM = "sample"
+TIME_UNITS = "seconds since 2000-01-01 00:00:00"  # same epoch as the 'timestamp' column
+ORBIT_SAMPLES = 1134  # one GRACE orbit (~94.5 min) of 5-second samples
+
+
+def _flag_attrs(meanings: list) -> dict:
+    return {"flag_values": np.arange(len(meanings), dtype=np.int16), "flag_meanings": " ".join(meanings)}
+
+
+def _encode_strings(var, values: pd.Series) -> np.ndarray:
+    """Encodes strings as int16 codes; the code table lives in the CF flag_meanings attribute."""
+    meanings = var.getncattr("flag_meanings").split() if "flag_meanings" in var.ncattrs() else []
+    values = values.fillna("").astype(str).str.replace(" ", "_")
+    new = [v for v in pd.unique(values) if v and v not in meanings]
+    if new:
+        meanings += new
+        var.setncatts(_flag_attrs(meanings))
+    lookup = {m: i for i, m in enumerate(meanings)}
+    return values.map(lambda v: lookup.get(v, -1)).to_numpy(dtype=np.int16)
+
+
+def _create_variable(nc, name: str, series: pd.Series, chunk_size: int, complevel: int):
+    options = dict(zlib=True, shuffle=True, complevel=complevel, chunksizes=(chunk_size,))
+    if pd.api.types.is_datetime64_any_dtype(series):
+        var = nc.createVariable(name, "f8", (SAMPLE_DIM,), **options)
+        var.setncatts({"units": TIME_UNITS, "calendar": "standard", "standard_name": "time"})
+    elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        var = nc.createVariable(name, "i4", (SAMPLE_DIM,), fill_value=np.int32(-2147483647), **options)
+    elif pd.api.types.is_numeric_dtype(series):
+        var = nc.createVariable(name, "f8", (SAMPLE_DIM,), fill_value=np.nan, **options)
+    else:
+        var = nc.createVariable(name, "i2", (SAMPLE_DIM,), fill_value=np.int16(-1), **options)
+        var.setncattr("flag_meanings", "")
+    return var
+
+
+def _encode(var, series: pd.Series) -> np.ndarray:
+    if "units" in var.ncattrs() and var.getncattr("units") == TIME_UNITS:
+        return (pd.to_datetime(series) - pd.Timestamp("2000-01-01")).dt.total_seconds().to_numpy()
+    if "flag_meanings" in var.ncattrs():
+        return _encode_strings(var, series)
+    if var.dtype == np.int32:
+        return series.fillna(-2147483647).to_numpy(dtype=np.int32)
+    return series.to_numpy(dtype=float, na_value=np.nan)
+
+
+def append_netcdf(df: pd.DataFrame, filename: str, mode: str = "a", chunk_size: int = ORBIT_SAMPLES,
+                  complevel: int = 4, title: Optional[str] = None) -> int:
+    """
+    Appends the rows of 'df' to a NetCDF4 file along an unlimited 'sample' dimension.
+    Rows with the same datetime but different labels are stored as separate samples.
+    Variables are compressed (zlib + shuffle) and chunked by 'chunk_size' samples (one orbit by default),
+    so the file can be written batch by batch and read lazily, e.g. with xr.open_dataset(filename, chunks={}).
+    String columns (label, source, ...) are stored as int16 codes with CF flag_values/flag_meanings attributes.
+
+    Args:
+        df: Batch of rows to write.
+        filename: Output NetCDF file, created if it does not exist.
+        mode: 'a' appends to an existing file, 'w' overwrites it.
+        chunk_size: Chunk length in samples.
+        complevel: zlib compression level.
+        title: Optional global title attribute (only used when creating the file).
+
+    Returns:
+        int: Number of samples in the file after writing.
+    """
+    create = mode == "w" or not os.path.exists(filename)
+    with netCDF4.Dataset(filename, "w" if create else "a", format="NETCDF4") as nc:
+        if create:
+            nc.createDimension(SAMPLE_DIM, None)
+            nc.setncattr("Conventions", "CF-1.8")
+            if title:
+                nc.setncattr("title", title)
+        start = len(nc.dimensions[SAMPLE_DIM])
+
+        for name in df.columns:
+            if name not in nc.variables:
+                if not create and start:
+                    raise ValueError(f"Column '{name}' is not in {filename}; all batches must have the same columns.")
+                _create_variable(nc, name, df[name], chunk_size, complevel)
+            nc.variables[name][start:start + len(df)] = _encode(nc.variables[name], df[name])
+
+        return start + len(df)
+
+
+def decode_flags(da) -> np.ndarray:
+    """Decodes an int16 flag variable (e.g. 'label') of an xarray dataset back to strings."""
+    meanings = np.array(da.attrs["flag_meanings"].split() + [""], dtype=object)
+    codes = np.nan_to_num(np.asarray(da.values, dtype=float), nan=-1).astype(int)  # missing -> ""
+    return meanings[codes]
@@ -0,0 +1,40 @@
+# src/utils/pagination.py
+import base64
+import binascii
+import hashlib
+import json
+import pandas as pd
+from typing import Tuple
+
+# Keyset pagination: pages are ordered by (datetime, id), and the continuation token of a page holds the key of
+# its last row, so the next page starts with an index range scan at that key ('(datetime, id) > key') whatever
+# its depth in the result, unlike OFFSET which reads and discards every preceding row.
+# Tokens are opaque to clients (URL-safe base64 of JSON) and tied to the query they continue.
+PAGE_SIZE = 10000
+TOKEN_VERSION = 1
+
+
+def query_key(**params) -> str:
+    """Identifier of a paginated query (its parameters other than the page), stored in its tokens."""
+    normalized = {k: (pd.Timestamp(v).isoformat() if k.endswith("_time") and v is not None else v)
+                  for k, v in params.items()}
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def encode_token(last_datetime, last_id: int, key: str) -> str:
+    """Continuation token after the row (last_datetime, last_id) of the query 'key'."""
+    payload = {"v": TOKEN_VERSION, "q": key, "d": pd.Timestamp(last_datetime).isoformat(), "i": int(last_id)}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_token(token: str, key: str) -> Tuple[pd.Timestamp, int]:
+    """Key (datetime, id) of the last row before the page of 'token'; ValueError if it is not a token of query 'key'."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        last = (pd.Timestamp(payload["d"]), int(payload["i"]))
+        version, token_key = payload["v"], payload["q"]
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise ValueError("Invalid page token") from None
+    if version != TOKEN_VERSION or token_key != key:
+        raise ValueError("Page token of another query")
+    return last
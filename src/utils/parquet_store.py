@@ -0,0 +1,176 @@
+# src/utils/parquet_store.py
+import json
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import shapely
+from typing import List, Optional, Tuple
+
+from src.utils.utils import check_polygon_validity, polygon_geometry
+
+# Hive partition layout: <root>/release=RL06/label=RL06_12-03/month=2012-03/part-*.parquet
+PARTITION_COLUMNS = ("release", "label", "month")
+PARTITIONING = ds.partitioning(pa.schema([(c, pa.string()) for c in PARTITION_COLUMNS]), flavor="hive")
+
+GEOMETRY_COLUMN = "geometry"
+DEFAULT_ROW_GROUP_SIZE = 17280  # one day of 5-second data
+
+
+def to_arrow_table(df: pd.DataFrame, time_column: str = "datetime") -> pa.Table:
+    """
+    Converts a DataFrame of satellite data to an Arrow table ready to be partitioned:
+    sorted by time, with a 'month' partition column and a WKB point geometry of GRACE-A.
+    GeoParquet metadata is attached to the schema.
+    """
+    df = df.sort_values(time_column, kind="stable").reset_index(drop=True)
+    df = df.assign(month=pd.to_datetime(df[time_column]).dt.strftime("%Y-%m"))
+
+    lon = df["longitude_A"].to_numpy(dtype=float)
+    lat = df["latitude_A"].to_numpy(dtype=float)
+    df[GEOMETRY_COLUMN] = shapely.to_wkb(shapely.points(lon, lat))
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    geo = {
+        "version": "1.0.0",
+        "primary_column": GEOMETRY_COLUMN,
+        "columns": {GEOMETRY_COLUMN: {
+            "encoding": "WKB",
+            "geometry_types": ["Point"],
+            "bbox": [float(np.nanmin(lon)), float(np.nanmin(lat)), float(np.nanmax(lon)), float(np.nanmax(lat))]
+                    if len(df) else [],
+        }},  # no "crs" member: OGC:CRS84 (lon/lat on WGS84), same as SRID 4326 in the database
+    }
+    return table.replace_schema_metadata({**(table.schema.metadata or {}), b"geo": json.dumps(geo).encode()})
+
+
+def write_partitioned(df: pd.DataFrame, root: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                      compression: str = "zstd", replace: bool = True) -> None:
+    """
+    Writes satellite data as a Hive-partitioned (release/label/month) GeoParquet dataset.
+    Partitions present in 'df' replace any existing files of the same partitions, so 'df' must hold
+    whole months; with replace=False its files are added next to the existing ones instead.
+
+    Args:
+        df: DataFrame with at least datetime, release, label, latitude_A and longitude_A.
+        root: Root directory of the dataset.
+        row_group_size: Maximum number of rows per row group (statistics are kept per row group).
+        compression: Parquet compression codec.
+        replace: Whether to delete the existing files of the partitions in 'df' first.
+    """
+    if df.empty:
+        return
+    table = to_arrow_table(df)
+    options = ds.ParquetFileFormat().make_write_options(compression=compression, write_statistics=True)
+    ds.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=PARTITIONING,
+        file_options=options,
+        max_rows_per_group=row_group_size,
+        min_rows_per_group=min(row_group_size, len(df)),
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="delete_matching" if replace else "overwrite_or_ignore",
+    )
+
+
+def month_windows(start_time, end_time, partial_months: bool = False) -> List[Tuple[pd.Timestamp, pd.Timestamp, bool]]:
+    """
+    Splits the inclusive window [start_time, end_time] into monthly [start, end) windows to export,
+    as (start, end, replace) tuples for write_partitioned.
+
+    By default the first and last windows are widened to whole months, since writing a month replaces
+    its partition. With partial_months=True they are cut at start_time/end_time and only add their
+    rows to the partition (replace=False); exporting the same partial window twice duplicates its rows.
+    """
+    start_time, end_time = pd.Timestamp(start_time), pd.Timestamp(end_time)
+    windows = []
+    for month_start in pd.date_range(start_time.to_period("M").to_timestamp(), end_time, freq="MS"):
+        month_end = month_start + pd.DateOffset(months=1)
+        if not partial_months:
+            windows.append((month_start, month_end, True))
+            continue
+        window_start, window_end = max(month_start, start_time), min(month_end, end_time + pd.Timedelta(1, "us"))
+        windows.append((window_start, window_end, window_start == month_start and window_end == month_end))
+    return windows
+
+
+def open_dataset(root: str) -> ds.Dataset:
+    return ds.dataset(root, format="parquet", partitioning=PARTITIONING)
+
+
+def _months(start_time, end_time) -> List[str]:
+    periods = pd.period_range(pd.Timestamp(start_time).to_period("M"), pd.Timestamp(end_time).to_period("M"), freq="M")
+    return [str(p) for p in periods]
+
+
+def build_filter(start_time=None, end_time=None, polygon_coordinates: Optional[list] = None,
+                 labels: Optional[List[str]] = None, releases: Optional[List[str]] = None):
+    """
+    Builds a PyArrow filter expression. Partition columns (release, label, month) prune whole
+    directories; datetime and coordinate bounds skip row groups through their statistics.
+    """
+    expr = None
+
+    def add(e):
+        nonlocal expr
+        expr = e if expr is None else expr & e
+
+    if releases:
+        add(ds.field("release").isin(list(releases)))
+    if labels:
+        add(ds.field("label").isin(list(labels)))
+    if start_time is not None and end_time is not None:
+        add(ds.field("month").isin(_months(start_time, end_time)))
+    if start_time is not None:
+        add(ds.field("datetime") >= pd.Timestamp(start_time).to_datetime64())
+    if end_time is not None:
+        add(ds.field("datetime") <= pd.Timestamp(end_time).to_datetime64())
+    if polygon_coordinates is not None:
+        min_lon, min_lat, max_lon, max_lat = polygon_geometry(polygon_coordinates).bounds
+        add((ds.field("longitude_A") >= min_lon) & (ds.field("longitude_A") <= max_lon)
+            & (ds.field("latitude_A") >= min_lat) & (ds.field("latitude_A") <= max_lat))
+    return expr
+
+
+def read_residuals(root: str, start_time=None, end_time=None, polygon_coordinates: Optional[list] = None,
+                   labels: Optional[List[str]] = None, releases: Optional[List[str]] = None,
+                   columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Offline counterpart of the queries in scripts/space_time_query.py, reading an exported
+    Parquet dataset instead of the database. The time window is inclusive, as in the database queries.
+
+    Args:
+        root: Root directory of the dataset written by write_partitioned.
+        start_time, end_time: Optional time window.
+        polygon_coordinates: Optional polygon as a list of (longitude, latitude) tuples.
+        labels, releases: Optional lists of labels/releases to keep.
+        columns: Columns to read (default: all but the geometry).
+
+    Returns:
+        pd.DataFrame sorted by datetime.
+    """
+    if polygon_coordinates is not None and not check_polygon_validity(polygon_coordinates):
+        raise ValueError("Invalid polygon coordinates provided.")
+
+    dataset = open_dataset(root)
+    if columns is None:
+        columns = [c for c in dataset.schema.names if c != GEOMETRY_COLUMN]
+    read_columns = list(columns)
+    if polygon_coordinates is not None:
+        read_columns += [c for c in ("longitude_A", "latitude_A") if c not in read_columns]
+
+    table = dataset.to_table(columns=read_columns,
+                             filter=build_filter(start_time, end_time, polygon_coordinates, labels, releases))
+    df = table.to_pandas()
+
+    if polygon_coordinates is not None:
+        inside = shapely.contains_xy(polygon_geometry(polygon_coordinates),
+                                     df["longitude_A"].to_numpy(), df["latitude_A"].to_numpy())
+        df = df.loc[inside, columns]
+
+    if "datetime" in df.columns:
+        df = df.sort_values("datetime", kind="stable")
+    return df.reset_index(drop=True)
@@ -0,0 +1,88 @@
+# src/utils/partitions.py
+import hashlib
+import re
+from typing import List, Optional
+
+# Layout of TABLE_NAME: one partition per release (PARTITION BY LIST (release)), itself partitioned into one
+# table per label (PARTITION BY LIST (label)), with DEFAULT partitions at both levels for rows stored before
+# their partition existed. Every partition carries a CHECK constraint equal to its partition bound, so it can be
+# detached and attached again (or attached after being loaded separately) without a validation scan: dropping,
+# archiving or replacing a whole release or month is a change of the system catalogs (see scripts/releases.py).
+NAME_LENGTH = 54  # PostgreSQL identifiers have at most 63 bytes: room is left for the suffixes below
+DEFAULT_SUFFIX = "_default"
+CHECK_SUFFIX = "_check"
+ARCHIVE_SUFFIX = "_archive"  # schema of the archived partitions
+
+
+def sql_literal(value: str) -> str:
+    """SQL string literal of 'value' (partition bounds and constraints cannot take bound parameters)."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def partition_name(table: str, release: str, label: Optional[str] = None) -> str:
+    """
+    Name of the partition of a release (label None) or of one of its labels: a readable slug of the values and
+    a hash of them, so that distinct values never share a name once lowercased or truncated.
+    """
+    values = [release] if label is None else [release, label]
+    digest = hashlib.sha1("\x00".join(values).encode()).hexdigest()[:8]
+    prefix = f"{table}_p_"
+    slug = re.sub(r"[^a-z0-9]+", "_", "_".join(values).lower()).strip("_")
+    slug = slug[:max(NAME_LENGTH - len(prefix) - len(digest) - 1, 0)].rstrip("_")
+    return f"{prefix}{slug}_{digest}" if slug else f"{prefix}{digest}"
+
+
+def default_name(table: str, release: Optional[str] = None) -> str:
+    """DEFAULT partition of TABLE_NAME (release None) or of the partition of a release."""
+    return f"{table}{DEFAULT_SUFFIX}" if release is None else partition_name(table, release) + DEFAULT_SUFFIX
+
+
+def archive_schema(table: str) -> str:
+    return f"{table}{ARCHIVE_SUFFIX}"
+
+
+def partition_check(release: str, label: Optional[str] = None) -> str:
+    """CHECK expression equal to the bound of the partition (implies the partition constraint when attaching)."""
+    check = f"release = {sql_literal(release)}"
+    return check if label is None else f"{check} AND label = {sql_literal(label)}"
+
+
+def create_partition_sql(table: str, name: str, release: str, label: Optional[str] = None) -> List[str]:
+    """
+    Statements creating the standalone table 'name' for the rows of a release (partitioned by label, with its
+    DEFAULT partition) or of a month, with the columns and defaults of 'table' and the CHECK constraint of its
+    bound. The table is attached with attach_sql once filled, or right away.
+    """
+    statements = [f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"
+                  + (" PARTITION BY LIST (label)" if label is None else ""),
+                  f"ALTER TABLE {name} ADD CONSTRAINT {name}{CHECK_SUFFIX} CHECK ({partition_check(release, label)})"]
+    if label is None:
+        statements.append(f"CREATE TABLE {name}{DEFAULT_SUFFIX} PARTITION OF {name} DEFAULT")
+    return statements
+
+
+def attach_sql(parent: str, name: str, value: str) -> str:
+    return f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES IN ({sql_literal(value)})"
+
+
+def index_on(definition: str, table: str) -> str:
+    """
+    Rewrites a CREATE INDEX statement (from pg_get_indexdef) to build the same index, unnamed, on 'table'.
+    Definitions of partitioned indexes read 'ON ONLY', which would not cascade to the partitions.
+    """
+    match = re.match(r"CREATE (UNIQUE )?INDEX \S+ ON (?:ONLY )?\S+ (USING .*)$", definition.strip(), re.S)
+    if match is None:
+        raise ValueError(f"Unexpected index definition: {definition}")
+    return f"CREATE {match.group(1) or ''}INDEX ON {table} {match.group(2)}"
+
+
+def check_values(definitions: List[str]) -> dict:
+    """
+    Values of 'release' and 'label' fixed by CHECK constraints (as returned by pg_get_constraintdef, e.g.
+    "CHECK (((release)::text = 'RL06'::text))"), to tell which release and month a partition holds.
+    """
+    values = {}
+    for definition in definitions:
+        for column, value in re.findall(r"\b(release|label)\b[^=']*= '((?:[^']|'')*)'", definition or ""):
+            values[column] = value.replace("''", "'")
+    return values
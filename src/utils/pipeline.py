@@ -0,0 +1,155 @@
+# src/utils/pipeline.py
+import logging
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+# Stage counters and step durations of the loads are logged at INFO here (silent unless configured, e.g. by echo_counters)
+logger = logging.getLogger("grace_db.ingestion")
+
+
+class StageCounter:
+    """Thread-safe throughput counter of one pipeline stage: items, rows and busy time."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, rows: int) -> None:
+        with self._lock:
+            self.items += 1
+            self.rows += rows
+            self.seconds += seconds
+
+    def as_dict(self) -> dict:
+        return {"items": self.items, "rows": self.rows, "seconds": self.seconds,
+                "rows_per_second": self.rows / self.seconds if self.seconds else float("inf")}
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+def run_pipeline(source: Iterable, transform: Callable, sink: Callable, workers: int = 2, queue_size: int = 4,
+                 size: Callable = len) -> dict:
+    """
+    Runs a read -> transform -> write pipeline whose stages overlap:
+    - read: 'source' is iterated in a background thread (e.g. loading files, slicing chunks);
+    - transform: transform(item) runs on a pool of 'workers' threads (e.g. validation, CSV encoding);
+    - write: sink(result) runs in the calling thread, in source order (e.g. COPY on the caller's connection).
+    At most 'queue_size' items are in flight between read and write, which bounds memory and lets a slow
+    writer throttle the readers. If any stage fails, the other stages stop and the error is raised.
+
+    Args:
+        source: Iterable of items.
+        transform: Function applied to each item.
+        sink: Function called with each transformed item.
+        workers: Transform threads.
+        queue_size: Maximum number of items between read and write.
+        size: Number of rows of an item, for the counters.
+
+    Returns:
+        dict: per-stage counters ('read', 'transform', 'write', see StageCounter.as_dict) and 'write_wait_seconds',
+        the time the writer spent waiting for the other stages (close to 0 when the writer is the bottleneck).
+    """
+    if workers < 1 or queue_size < 1:
+        raise ValueError("workers and queue_size must be at least 1.")
+    counters = {name: StageCounter(name) for name in ("read", "transform", "write")}
+    pending = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                pending.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def timed_transform(item):
+        start = time.perf_counter()
+        result = transform(item)
+        rows = size(item)
+        counters["transform"].add(time.perf_counter() - start, rows)
+        return rows, result
+
+    def read(pool):
+        try:
+            items = iter(source)
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                counters["read"].add(time.perf_counter() - start, size(item))
+                if not put(pool.submit(timed_transform, item)):
+                    return
+            put(_DONE)
+        except BaseException as error:
+            put(_Failure(error))
+
+    write_wait = 0.0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        reader = threading.Thread(target=read, args=(pool,), name="pipeline-read", daemon=True)
+        reader.start()
+        try:
+            while True:
+                start = time.perf_counter()
+                entry = pending.get()
+                if entry is _DONE:
+                    break
+                if isinstance(entry, _Failure):
+                    raise entry.error
+                rows, result = entry.result()
+                write_wait += time.perf_counter() - start
+
+                start = time.perf_counter()
+                sink(result)
+                counters["write"].add(time.perf_counter() - start, rows)
+        finally:
+            stop.set()
+            while True:  # unblock the reader and drop queued work
+                try:
+                    entry = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if hasattr(entry, "cancel"):
+                    entry.cancel()
+            reader.join()
+
+    return {**{name: c.as_dict() for name, c in counters.items()}, "write_wait_seconds": write_wait}
+
+
+def format_counters(counters: dict) -> str:
+    """One line per stage: rows, busy time and throughput."""
+    lines = [f"{name:>9}: {c['rows']} rows in {c['seconds']:.1f} s ({c['rows_per_second']:.0f} rows/s)"
+             for name, c in counters.items() if isinstance(c, dict)]
+    lines.append(f"{'write':>9} waited {counters['write_wait_seconds']:.1f} s for the other stages")
+    return "\n".join(lines)
+
+
+def log_counters(counters: dict) -> None:
+    """Logs the counters of a pipeline (see format_counters) at INFO on the 'grace_db.ingestion' logger."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(format_counters(counters))
+
+
+def echo_counters() -> None:
+    """Prints the INFO records of the 'grace_db.ingestion' logger on stdout, for the command-line entry points."""
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
@@ -0,0 +1,168 @@
+# src/utils/query_metrics.py
+import datetime
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from typing import Optional
+
+import pandas as pd
+
+# Instrumentation of the queries of scripts/space_time_query.py. Each call of read_sql records:
+#   name           function that ran the query
+#   shape          hash of the SQL text with normalized whitespace (values are bound parameters, so calls that
+#                  differ only by their parameters share a shape)
+#   db_seconds     execution, until the result is available to the client (includes its transfer)
+#   fetch_seconds  decoding of the rows into Python objects
+#   build_seconds  construction of the DataFrame
+#   rows, bytes    size of the result (bytes: memory of the DataFrame)
+# Records are kept in memory (recent()), logged as JSON on the 'grace_db.queries' logger, and appended to the
+# SQLite file QUERY_METRICS if that variable is set. Queries slower than QUERY_EXPLAIN_SECONDS are run a second
+# time with EXPLAIN (ANALYZE, BUFFERS) on PostgreSQL and their plan is stored with the record.
+logger = logging.getLogger("grace_db.queries")
+
+COLUMNS = ["started_at", "name", "shape", "sql", "params", "rows", "bytes", "db_seconds", "fetch_seconds",
+           "build_seconds", "total_seconds", "plan"]
+_recent = deque(maxlen=1000)
+_settings = {}
+
+
+def configure(metrics_path: Optional[str] = None, explain_seconds: Optional[float] = None) -> None:
+    """Overrides QUERY_METRICS (SQLite file of the records) and QUERY_EXPLAIN_SECONDS (threshold of EXPLAIN ANALYZE)."""
+    _settings.update(metrics_path=metrics_path, explain_seconds=explain_seconds)
+
+
+def metrics_path() -> Optional[str]:
+    return _settings.get("metrics_path") or os.getenv("QUERY_METRICS") or None
+
+
+def explain_seconds() -> Optional[float]:
+    value = _settings.get("explain_seconds")
+    if value is None and os.getenv("QUERY_EXPLAIN_SECONDS"):
+        value = float(os.getenv("QUERY_EXPLAIN_SECONDS"))
+    return value
+
+
+def sql_shape(sql: str) -> str:
+    """Short hash identifying the text of a query, whitespace aside."""
+    return hashlib.sha1(" ".join(sql.split()).encode()).hexdigest()[:12]
+
+
+def _json_params(params: Optional[dict]) -> str:
+    def value(v):
+        if isinstance(v, (list, tuple)) and len(v) > 20:
+            return [value(x) for x in v[:20]] + [f"... {len(v) - 20} more"]
+        if isinstance(v, str) and len(v) > 200:
+            return v[:200] + "..."
+        return v if v is None or isinstance(v, (bool, int, float, str)) else (
+            [value(x) for x in v] if isinstance(v, (list, tuple)) else str(v))
+    return json.dumps({k: value(v) for k, v in (params or {}).items()})
+
+
+def read_sql(query, conn, params: Optional[dict] = None, name: Optional[str] = None) -> pd.DataFrame:
+    """
+    Drop-in for pd.read_sql_query(query, conn, params=params) that records the timings of the call (see above).
+    'name' defaults to the calling function.
+    """
+    name = name or sys._getframe(1).f_code.co_name
+    started_at = datetime.datetime.now()
+    t0 = time.perf_counter()
+    result = conn.execute(query, params or {})
+    t1 = time.perf_counter()
+    columns = list(result.keys())
+    rows = result.fetchall()
+    t2 = time.perf_counter()
+    df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    t3 = time.perf_counter()
+
+    sql = str(getattr(query, "text", query))
+    record = {"started_at": started_at.isoformat(), "name": name, "shape": sql_shape(sql), "sql": " ".join(sql.split()),
+              "params": _json_params(params), "rows": len(df), "bytes": int(df.memory_usage(index=False, deep=True).sum()),
+              "db_seconds": t1 - t0, "fetch_seconds": t2 - t1, "build_seconds": t3 - t2, "total_seconds": t3 - t0,
+              "plan": None}
+    threshold = explain_seconds()
+    if threshold is not None and record["total_seconds"] >= threshold and conn.dialect.name == "postgresql":
+        record["plan"] = explain(query, conn, params)
+    _record(record)
+    return df
+
+
+def explain(query, conn, params: Optional[dict] = None) -> Optional[str]:
+    """Plan of a query from EXPLAIN (ANALYZE, BUFFERS) as JSON text (the query is executed again), or None on failure."""
+    from sqlalchemy import text
+    sql = str(getattr(query, "text", query))
+    try:
+        with conn.begin_nested():  # a failing EXPLAIN does not abort the caller's transaction
+            plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params or {}).scalar()
+    except Exception as error:  # the plan is a diagnostic: never fail the query because of it
+        logger.warning("EXPLAIN failed: %s", error)
+        return None
+    return plan if isinstance(plan, str) else json.dumps(plan)
+
+
+def _record(record: dict) -> None:
+    _recent.append(record)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({k: v for k, v in record.items() if k not in ("sql", "plan")}))
+    path = metrics_path()
+    if path:
+        try:
+            with sqlite3.connect(os.path.expanduser(path), timeout=10) as db:
+                db.execute(f"CREATE TABLE IF NOT EXISTS queries ({', '.join(COLUMNS)})")
+                db.execute(f"INSERT INTO queries VALUES ({', '.join('?' * len(COLUMNS))})", [record[c] for c in COLUMNS])
+        except sqlite3.Error as error:
+            logger.warning("Could not write query metrics to %s: %s", path, error)
+
+
+def recent() -> pd.DataFrame:
+    """Records of the last 1000 queries of this process, oldest first."""
+    return pd.DataFrame(list(_recent), columns=COLUMNS)
+
+
+def read_metrics(path: Optional[str] = None) -> pd.DataFrame:
+    """Records stored in the SQLite file 'path' (default: QUERY_METRICS)."""
+    path = path or metrics_path()
+    if not path or not os.path.exists(os.path.expanduser(path)):
+        return pd.DataFrame(columns=COLUMNS)
+    with sqlite3.connect(os.path.expanduser(path)) as db:
+        try:
+            return pd.read_sql_query("SELECT * FROM queries", db)
+        except pd.errors.DatabaseError:  # no query recorded yet
+            return pd.DataFrame(columns=COLUMNS)
+
+
+def plan_nodes(plan: Optional[str]) -> str:
+    """Node types of an EXPLAIN JSON plan, outermost first (e.g. 'Sort > Seq Scan'), to spot sequential scans."""
+    if not plan:
+        return ""
+    nodes, stack = [], [json.loads(plan)[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        nodes.append(node["Node Type"] + (f" on {node['Relation Name']}" if "Relation Name" in node else ""))
+        stack.extend(reversed(node.get("Plans", [])))
+    return " > ".join(nodes)
+
+
+def summarize(records: pd.DataFrame, top: Optional[int] = 10) -> pd.DataFrame:
+    """
+    One row per query shape, slowest in total first: calls, total/mean/p95/max seconds, mean db/fetch/build
+    seconds, mean rows and bytes, the function that ran it, and the node types of its latest captured plan.
+    """
+    if records.empty:
+        return pd.DataFrame(columns=["shape", "name", "calls", "total_seconds", "mean_seconds", "p95_seconds",
+                                     "max_seconds", "db_seconds", "fetch_seconds", "build_seconds", "rows",
+                                     "bytes", "plan"])
+    records = records.sort_values("started_at")
+    summary = records.groupby("shape").agg(
+        name=("name", "last"), calls=("total_seconds", "size"), total_seconds=("total_seconds", "sum"),
+        mean_seconds=("total_seconds", "mean"), p95_seconds=("total_seconds", lambda s: s.quantile(0.95)),
+        max_seconds=("total_seconds", "max"), db_seconds=("db_seconds", "mean"), fetch_seconds=("fetch_seconds", "mean"),
+        build_seconds=("build_seconds", "mean"), rows=("rows", "mean"), bytes=("bytes", "mean"),
+        plan=("plan", lambda s: plan_nodes(s.dropna().iloc[-1]) if s.notna().any() else ""),
+    ).reset_index()
+    summary = summary.sort_values("total_seconds", ascending=False, ignore_index=True)
+    return summary.head(top) if top else summary
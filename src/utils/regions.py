@@ -0,0 +1,81 @@
+# src/utils/regions.py
+import geopandas as gpd
+import shapely
+from typing import Optional, Union
+
+RegionsLike = Union[str, dict, gpd.GeoDataFrame]
+
+
+def check_region_validity(geometry) -> bool:
+    """
+    Validate a region geometry (the multi-polygon counterpart of check_polygon_validity):
+    - It must be a Polygon or MultiPolygon with a non-empty area
+    - It must be a valid geometry (no self-intersections)
+    - Longitude must be between -180 and 180
+    - Latitude must be between -90 and 90
+
+    Returns:
+        True if the region is valid.
+    """
+    if geometry is None or geometry.geom_type not in ("Polygon", "MultiPolygon"):
+        raise ValueError(f"Regions must be polygons or multi-polygons, got {getattr(geometry, 'geom_type', None)}.")
+    if geometry.is_empty or geometry.area == 0:
+        raise ValueError("A region must have a non-empty area.")
+    if not geometry.is_valid:
+        raise ValueError(f"Invalid region geometry: {shapely.is_valid_reason(geometry)}")
+
+    minx, miny, maxx, maxy = geometry.bounds
+    if minx < -180 or maxx > 180:
+        raise ValueError(f"Invalid longitude range [{minx}, {maxx}]. Must be between -180 and 180.")
+    if miny < -90 or maxy > 90:
+        raise ValueError(f"Invalid latitude range [{miny}, {maxy}]. Must be between -90 and 90.")
+
+    return True
+
+
+def load_regions(regions: RegionsLike, id_column: Optional[str] = None) -> gpd.GeoDataFrame:
+    """
+    Load a set of regions (e.g. river basins or mascons) as a GeoDataFrame in EPSG:4326
+    with a 'region_id' column and a validated polygon/multi-polygon 'geometry' column.
+
+    Args:
+        regions: Path to a file readable by geopandas (GeoJSON, shapefile, ...),
+            a GeoJSON FeatureCollection as a dict, or a GeoDataFrame.
+        id_column: Column holding the region identifiers (default: the row index).
+
+    Returns:
+        gpd.GeoDataFrame with columns 'region_id' and 'geometry'.
+
+    Raises:
+        ValueError: If there are no regions, or an identifier or a geometry is invalid.
+    """
+    if isinstance(regions, gpd.GeoDataFrame):
+        gdf = regions.copy()
+    elif isinstance(regions, dict):
+        if not regions.get("features"):
+            raise ValueError("No regions found.")
+        gdf = gpd.GeoDataFrame.from_features(regions, crs="EPSG:4326")  # GeoJSON is always lon/lat (RFC 7946)
+    else:
+        gdf = gpd.read_file(regions)
+    if gdf.empty:
+        raise ValueError("No regions found.")
+
+    if gdf.crs is None:
+        gdf = gdf.set_crs("EPSG:4326")
+    elif not gdf.crs.equals("EPSG:4326"):
+        gdf = gdf.to_crs("EPSG:4326")
+
+    if id_column is not None:
+        if id_column not in gdf.columns:
+            raise ValueError(f"Column '{id_column}' not found in regions.")
+        ids = gdf[id_column]
+    else:
+        ids = gdf.index.to_series()
+    gdf = gpd.GeoDataFrame({"region_id": ids.astype(str).to_numpy()}, geometry=gdf.geometry.to_numpy(), crs=gdf.crs)
+
+    if gdf["region_id"].duplicated().any():
+        raise ValueError("Region identifiers must be unique.")
+    for geometry in gdf.geometry:
+        check_region_validity(geometry)
+
+    return gdf
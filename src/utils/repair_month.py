@@ -1,5 +1,21 @@
+import numpy as np
 import pandas as pd
 
+def missing_timestamps(df_month: pd.DataFrame, time_column="datetime", interval_seconds=5) -> pd.DatetimeIndex:
+    """
+    Return the epochs of the month of 'df_month' (from the first day of its data, for one month,
+    every 'interval_seconds') that are missing from 'df_month'.
+    """
+    real_times = pd.to_datetime(df_month[time_column])
+
+    # Compute expected full time range
+    start_time = real_times.min().floor('D')
+    end_time = (start_time + pd.DateOffset(months=1)).floor('D')
+    expected_times = pd.date_range(start=start_time, end=end_time - pd.Timedelta(seconds=interval_seconds), freq=f"{interval_seconds}s")
+
+    # Find missing timestamps
+    return expected_times.difference(real_times)
+
 def repair_month(df_month: pd.DataFrame , 
                  df_next_month: pd.DataFrame, 
                  time_column="datetime", 
@@ -24,14 +40,7 @@ def repair_month(df_month: pd.DataFrame ,
     df_month[time_column] = pd.to_datetime(df_month[time_column])
     df_next_month[time_column] = pd.to_datetime(df_next_month[time_column])
 
-    # Compute expected full time range
-    start_time = df_month[time_column].min().floor('D')
-    end_time = (start_time + pd.DateOffset(months=1)).floor('D')
-    expected_times = pd.date_range(start=start_time, end=end_time - pd.Timedelta(seconds=interval_seconds), freq=f"{interval_seconds}s")
-
-    # Find missing timestamps
-    real_times = df_month[time_column]
-    missing_times = expected_times.difference(real_times)
+    missing_times = missing_timestamps(df_month, time_column, interval_seconds)
 
     if missing_times.empty:
         df_month['borrowed'] = False
@@ -53,3 +62,75 @@ def repair_month(df_month: pd.DataFrame ,
     df_repaired = df_repaired.sort_values(time_column).reset_index(drop=True)
 
     return df_repaired
+
+def plan_borrowed_ranges(df_month: pd.DataFrame,
+                         df_next_month: pd.DataFrame,
+                         time_column="datetime",
+                         interval_seconds=5) -> pd.DataFrame:
+    """
+    Describe the repair done by repair_month as time ranges instead of copied rows:
+    each range maps a run of missing epochs of the target month onto a run of epochs of the next month,
+    shifted by a constant offset. Storing these ranges (see scripts/borrow_map.py) avoids duplicating data.
+
+    Args:
+        df_month (pd.DataFrame): DataFrame with data for the target month (only 'time_column' is used).
+        df_next_month (pd.DataFrame): DataFrame with data for the next month (only 'time_column' is used).
+        time_column (str): Name of the timestamp column.
+        interval_seconds (int): Expected time interval between readings.
+
+    Returns:
+        pd.DataFrame with columns target_start, target_end, source_start, source_end (inclusive bounds)
+        and n_samples; empty if nothing is missing.
+    """
+    missing_times = missing_timestamps(df_month, time_column, interval_seconds)
+    return borrowed_ranges(missing_times, df_next_month[time_column], interval_seconds)
+
+def borrowed_ranges(missing_times, source_times, interval_seconds=5) -> pd.DataFrame:
+    """
+    Ranges (see plan_borrowed_ranges) mapping the sorted 'missing_times' of a month onto the first epochs of
+    the sorted 'source_times' of the month it borrows from.
+    """
+    columns = ["target_start", "target_end", "source_start", "source_end", "n_samples"]
+    missing_times = pd.DatetimeIndex(missing_times)
+    if missing_times.empty:
+        return pd.DataFrame(columns=columns)
+
+    source_times = pd.to_datetime(pd.Series(source_times)).iloc[:len(missing_times)]
+    if len(source_times) < len(missing_times):
+        raise ValueError("Not enough data in df_next_month to borrow for missing timestamps.")
+
+    target = missing_times.asi8
+    source = pd.DatetimeIndex(source_times).asi8
+    step = int(pd.Timedelta(seconds=interval_seconds).value)
+
+    # a new range starts wherever either side is not contiguous
+    breaks = np.flatnonzero((np.diff(target) != step) | (np.diff(source) != step)) + 1
+    starts = np.r_[0, breaks]
+    ends = np.r_[breaks, len(target)] - 1
+
+    return pd.DataFrame({
+        "target_start": pd.to_datetime(target[starts]),
+        "target_end": pd.to_datetime(target[ends]),
+        "source_start": pd.to_datetime(source[starts]),
+        "source_end": pd.to_datetime(source[ends]),
+        "n_samples": ends - starts + 1,
+    })
+
+def apply_borrowed_ranges(df_next_month: pd.DataFrame, ranges: pd.DataFrame, time_column="datetime") -> pd.DataFrame:
+    """
+    Resolve borrowed ranges (see plan_borrowed_ranges) into rows, as the database view does at read time.
+    Where ranges overlap, each target epoch keeps the row of the first range mapped onto it.
+
+    Returns:
+        pd.DataFrame: rows of 'df_next_month' re-stamped onto the target epochs, with 'borrowed' set to True.
+    """
+    times = pd.to_datetime(df_next_month[time_column])
+    parts = []
+    for r in ranges.itertuples(index=False):
+        rows = df_next_month[(times >= r.source_start) & (times <= r.source_end)].copy()
+        rows[time_column] = pd.to_datetime(rows[time_column]) + (r.target_start - r.source_start)
+        parts.append(rows)
+    borrowed = pd.concat(parts, ignore_index=True) if parts else df_next_month.iloc[:0].copy()
+    borrowed = borrowed.drop_duplicates(subset=[time_column], keep="first", ignore_index=True)
+    borrowed['borrowed'] = True
+    return borrowed
@@ -0,0 +1,115 @@
+# src/utils/sketches.py
+import numpy as np
+import pandas as pd
+from typing import Iterable, List, Optional, Sequence
+
+# Residual distributions are stored as fixed logarithmic bins (as in DDSketch): a value x is counted in bin
+#   0                                                   if |x| < MIN_MAGNITUDE
+#   sign(x) * (ceil(ln(|x| / MIN_MAGNITUDE) / ln(GAMMA)) + 1)   otherwise
+# Bins are the same for every bucket, so sketches of any set of buckets merge by adding their counts, and every
+# quantile estimated from them is within RELATIVE_ACCURACY of a value of the right rank.
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+MIN_MAGNITUDE = 1e-15  # residuals are in m/s; smaller values count as 0
+
+# residual columns of TABLE_NAME sketched per day (see TABLE_NAME_sketches in src/models.py)
+SKETCH_VARIABLES = ("postfit", "observation_vector", "up_combined", "up_local", "up_common", "up_global")
+SKETCH_COLUMNS = ["bin", "count", "total", "total_sq", "min", "max"]
+DEFAULT_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+def bin_index(values) -> np.ndarray:
+    """Bin of each value (see above); NaNs are not allowed."""
+    values = np.asarray(values, dtype=float)
+    magnitude = np.abs(values)
+    with np.errstate(divide="ignore"):
+        index = np.ceil(np.log(np.maximum(magnitude, MIN_MAGNITUDE) / MIN_MAGNITUDE) / np.log(GAMMA)) + 1
+    return np.where(magnitude < MIN_MAGNITUDE, 0, np.sign(values) * index).astype(np.int64)
+
+
+def bin_sql(expr: str) -> str:
+    """SQL computing the bin of 'expr', identical to bin_index."""
+    return (f"CASE WHEN abs({expr}) < {MIN_MAGNITUDE!r} THEN 0 "
+            f"ELSE CAST(sign({expr}) AS integer) * (CAST(ceil(ln(abs({expr}) / {MIN_MAGNITUDE!r}) / ln({GAMMA!r})) AS integer) + 1) END")
+
+
+def bin_value(bins) -> np.ndarray:
+    """Representative value of each bin: within RELATIVE_ACCURACY of any value of the bin."""
+    bins = np.asarray(bins, dtype=np.int64)
+    magnitude = MIN_MAGNITUDE * 2 * GAMMA ** (np.abs(bins) - 1.0) / (GAMMA + 1)
+    return np.where(bins == 0, 0.0, np.sign(bins) * magnitude)
+
+
+def sketch(values) -> pd.DataFrame:
+    """Sketch of 'values' in memory (the rows TABLE_NAME_sketches holds for one bucket); NaNs are ignored."""
+    values = pd.Series(np.asarray(values, dtype=float)).dropna()
+    df = pd.DataFrame({"bin": bin_index(values), "value": values.to_numpy(), "square": values.to_numpy() ** 2})
+    return (df.groupby("bin", as_index=False)
+            .agg(count=("value", "size"), total=("value", "sum"), total_sq=("square", "sum"),
+                 min=("value", "min"), max=("value", "max"))[SKETCH_COLUMNS])
+
+
+def merge(sketches: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Merges sketches (e.g. of several buckets) into one."""
+    df = pd.concat(list(sketches), ignore_index=True)
+    return (df.groupby("bin", as_index=False)
+            .agg(count=("count", "sum"), total=("total", "sum"), total_sq=("total_sq", "sum"),
+                 min=("min", "min"), max=("max", "max"))[SKETCH_COLUMNS])
+
+
+def quantiles(bins: pd.DataFrame, qs: Sequence[float] = DEFAULT_QUANTILES) -> np.ndarray:
+    """
+    Estimates quantiles from a sketch (columns bin, count, min, max), with the 'lower' interpolation of
+    numpy.quantile: each estimate is within RELATIVE_ACCURACY of the value of that rank (exact for 0 and 1).
+    """
+    if bins.empty or bins["count"].sum() == 0:
+        return np.full(len(qs), np.nan)
+    bins = bins.sort_values("bin")
+    cumulative = bins["count"].to_numpy().cumsum()
+    ranks = np.floor(np.asarray(qs, dtype=float) * (cumulative[-1] - 1))
+    rows = np.searchsorted(cumulative, ranks, side="right")
+    values = bin_value(bins["bin"].to_numpy()[rows])
+    return np.clip(values, bins["min"].to_numpy()[rows], bins["max"].to_numpy()[rows])
+
+
+def histogram(bins: pd.DataFrame, edges: Sequence[float]) -> np.ndarray:
+    """
+    Counts of a sketch between consecutive 'edges' (like numpy.histogram: the last interval is closed).
+    Sketch bins are assigned whole by their representative value, so counts near an edge are approximate.
+    """
+    edges = np.asarray(edges, dtype=float)
+    values = np.clip(bin_value(bins["bin"]), bins["min"], bins["max"])
+    counts, _ = np.histogram(values, bins=edges, weights=bins["count"])
+    return counts.astype(np.int64)
+
+
+def whole_days(start_time=None, end_time=None):
+    """
+    Returns (first_day, end_day) such that the days [first_day, end_day) lie entirely within [start_time, end_time]
+    (None for an open end), or None if the window holds no whole day.
+    """
+    first_day = pd.Timestamp(start_time).ceil("D") if start_time is not None else None
+    end_day = (pd.Timestamp(end_time) + pd.Timedelta(1, "ns")).floor("D") if end_time is not None else None
+    if first_day is not None and end_day is not None and first_day >= end_day:
+        return None
+    return first_day, end_day
+
+
+def describe(bins: pd.DataFrame, by: Optional[List[str]] = None, qs: Sequence[float] = DEFAULT_QUANTILES) -> pd.DataFrame:
+    """
+    Summary statistics of sketches, one row per group of the 'by' columns: count, mean, std, min and max
+    (exact) and the quantiles 'qs' (approximate, columns q01, q50, ...).
+    """
+    by = list(by or [])
+    names = [f"q{round(100 * q):02d}" if 100 * q == round(100 * q) else f"q{100 * q:g}" for q in qs]
+    rows = []
+    for key, group in (bins.groupby(by, sort=True) if by else [((), bins)]):
+        n = group["count"].sum()
+        mean = group["total"].sum() / n if n else np.nan
+        var = (group["total_sq"].sum() - n * mean ** 2) / (n - 1) if n > 1 else np.nan
+        row = dict(zip(by, key if isinstance(key, tuple) else (key,)))
+        row.update(count=int(n), mean=mean, std=np.sqrt(max(var, 0.0)) if n > 1 else np.nan,
+                   min=group["min"].min(), max=group["max"].max())
+        row.update(zip(names, quantiles(group, qs)))
+        rows.append(row)
+    return pd.DataFrame(rows, columns=by + ["count", "mean", "std", "min", "max"] + names)
@@ -0,0 +1,185 @@
+# src/utils/spectra.py
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence, Tuple
+from src.utils.arcs import segment_passes
+
+# Along-track spectra and filters of residuals, computed for many arcs at once: the Welch segments of all arcs
+# are stacked into one matrix and transformed with a single FFT call, and arcs are filtered in batches of equal
+# padded length. Only NumPy is needed: spectra match scipy.signal.welch (periodic Hann window, constant
+# detrending, one-sided density), and filters have the gain of Butterworth high-/low-pass filters applied
+# forwards and backwards (as scipy.signal.filtfilt), computed in the frequency domain.
+ARC_KEYS = ["release", "variant", "label", "source"]
+SAMPLING_HZ = 0.2  # 5-second samples
+MAX_BATCH = 2**22  # values per FFT batch (32 MB of float64)
+
+
+def arc_ids(df: pd.DataFrame, interval_seconds: float = 5) -> np.ndarray:
+    """
+    Continuous arcs of rows sorted by ARC_KEYS (those present) and timestamp: a new arc starts with each
+    release/variant/label/source, after a cadence gap, and where 'adtrack_A' changes (see arcs.segment_passes).
+    """
+    if df.empty:
+        return np.empty(0, dtype=np.int64)
+    adtrack = df["adtrack_A"].to_numpy() if "adtrack_A" in df else None
+    passes = segment_passes(df["timestamp"].to_numpy(), adtrack, interval_seconds)
+    breaks = np.diff(passes) > 0
+    for key in [k for k in ARC_KEYS if k in df]:
+        values = df[key].to_numpy()
+        breaks |= values[1:] != values[:-1]
+    return np.r_[0, np.cumsum(breaks)].astype(np.int64)
+
+
+def arc_bounds(arcs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) positions of each run of equal arc ids."""
+    arcs = np.asarray(arcs)
+    starts = np.flatnonzero(np.r_[True, arcs[1:] != arcs[:-1]]) if len(arcs) else np.empty(0, dtype=np.int64)
+    return starts, np.r_[starts[1:], len(arcs)].astype(np.int64)
+
+
+def arc_table(df: pd.DataFrame, arcs: np.ndarray) -> pd.DataFrame:
+    """One row per arc: its ARC_KEYS, start_time, end_time, adtrack_A and number of samples."""
+    starts, ends = arc_bounds(arcs)
+    table = pd.DataFrame({k: df[k].to_numpy()[starts] for k in ARC_KEYS if k in df})
+    table["start_time"] = df["datetime"].to_numpy()[starts]
+    table["end_time"] = df["datetime"].to_numpy()[ends - 1]
+    if "adtrack_A" in df:
+        table["adtrack_A"] = df["adtrack_A"].to_numpy()[starts]
+    table["n_samples"] = ends - starts
+    return table
+
+
+def hann(n: int) -> np.ndarray:
+    """Periodic Hann window (as scipy.signal.get_window('hann', n)), the usual choice for spectral estimation."""
+    return 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n) / n)
+
+
+def welch_psd(values, arcs, fs: float = SAMPLING_HZ, nperseg: int = 256, overlap: float = 0.5
+              ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Welch power spectral density of each arc: the arc is cut into segments of 'nperseg' samples overlapping
+    by 'overlap', each segment is demeaned and Hann-windowed, and the periodograms are averaged.
+    Segments holding NaNs are skipped; arcs shorter than one segment get NaN spectra.
+
+    Args:
+        values: Samples sorted by arc (e.g. the 'postfit' column).
+        arcs: Arc id of each sample (see arc_ids).
+        fs: Sampling frequency (Hz).
+
+    Returns:
+        (frequencies (Hz), PSD of shape (arcs, frequencies) in units**2/Hz, number of segments of each arc).
+    """
+    values = np.asarray(values, dtype=float)
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be in [0, 1)")
+    step = max(nperseg - int(nperseg * overlap), 1)
+    starts, ends = arc_bounds(arcs)
+    offsets = [np.arange(s, e - nperseg + 1, step) for s, e in zip(starts, ends)]
+    seg_starts = np.concatenate(offsets) if offsets else np.empty(0, dtype=np.int64)
+    owners = np.repeat(np.arange(len(starts)), [len(o) for o in offsets])
+
+    window = hann(nperseg)
+    scale = 1.0 / (fs * (window ** 2).sum())
+    freqs = np.fft.rfftfreq(nperseg, 1 / fs)
+    totals = np.zeros((len(starts), len(freqs)))
+    counts = np.zeros(len(starts), dtype=np.int64)
+    rows = max(MAX_BATCH // nperseg, 1)
+    for lo in range(0, len(seg_starts), rows):
+        segments = values[seg_starts[lo:lo + rows, None] + np.arange(nperseg)]
+        owner = owners[lo:lo + rows]
+        valid = ~np.isnan(segments).any(axis=1)
+        segments, owner = segments[valid], owner[valid]
+        segments = (segments - segments.mean(axis=1, keepdims=True)) * window
+        spectra = np.abs(np.fft.rfft(segments, axis=1)) ** 2 * scale
+        spectra[:, 1:None if nperseg % 2 else -1] *= 2  # one-sided: fold negative frequencies (not DC/Nyquist)
+        np.add.at(totals, owner, spectra)
+        counts += np.bincount(owner, minlength=len(starts))
+    with np.errstate(invalid="ignore"):
+        psd = totals / counts[:, None]
+    return freqs, psd, counts
+
+
+def mean_psd(psd: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """PSD averaged over arcs, weighted by their number of segments (the Welch PSD of all segments together)."""
+    weights = np.asarray(counts, dtype=float)
+    if not weights.sum():
+        return np.full(psd.shape[1], np.nan)
+    return np.nansum(psd * weights[:, None], axis=0) / weights.sum()
+
+
+def butterworth_gain(freqs, low_cut: Optional[float] = None, high_cut: Optional[float] = None, order: int = 4) -> np.ndarray:
+    """
+    Gain of Butterworth filters of 'order' applied forwards and backwards (zero phase): high-pass above 'low_cut'
+    and/or low-pass below 'high_cut' (Hz); with both, the two are cascaded into a band-pass.
+    """
+    freqs = np.abs(np.asarray(freqs, dtype=float))
+    gain = np.ones_like(freqs)
+    with np.errstate(divide="ignore"):
+        if low_cut is not None:
+            gain /= 1 + (low_cut / freqs) ** (2 * order)
+        if high_cut is not None:
+            gain /= 1 + (freqs / high_cut) ** (2 * order)
+    return gain
+
+
+def zero_phase_filter(values, arcs, fs: float = SAMPLING_HZ, low_cut: Optional[float] = None,
+                      high_cut: Optional[float] = None, order: int = 4) -> np.ndarray:
+    """
+    Filters each arc separately without phase shift (see butterworth_gain). Arcs are mirrored at both ends,
+    which limits edge effects like the padding of filtfilt, and padded arcs of the same FFT length are
+    filtered together. NaN samples are interpolated for filtering and are NaN in the result.
+
+    Returns:
+        np.ndarray of the filtered values, in the order of 'values'.
+    """
+    if low_cut is None and high_cut is None:
+        raise ValueError("Give low_cut (high-pass), high_cut (low-pass) or both")
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    filled = values.copy()
+    if missing.any() and not missing.all():
+        filled[missing] = np.interp(np.flatnonzero(missing), np.flatnonzero(~missing), values[~missing])
+    out = np.full_like(values, np.nan)
+
+    starts, ends = arc_bounds(arcs)
+    lengths = ends - starts
+    sizes = 2 ** np.ceil(np.log2(np.maximum(2 * lengths, 16))).astype(np.int64)  # room for the mirrored ends
+    for size in np.unique(sizes):
+        group = np.flatnonzero(sizes == size)
+        gain = butterworth_gain(np.fft.rfftfreq(size, 1 / fs), low_cut, high_cut, order)
+        for lo in range(0, len(group), max(MAX_BATCH // size, 1)):
+            batch = group[lo:lo + max(MAX_BATCH // size, 1)]
+            length = lengths[batch, None]
+            pad = (size - length) // 2
+            position = (np.arange(size) - pad) % (2 * length)  # even extension around each arc
+            position = np.where(position < length, position, 2 * length - 1 - position)
+            filtered = np.fft.irfft(np.fft.rfft(filled[starts[batch, None] + position], axis=1) * gain, n=size, axis=1)
+            for row, arc in enumerate(batch):
+                out[starts[arc]:ends[arc]] = filtered[row, pad[row, 0]:pad[row, 0] + lengths[arc]]
+    out[missing] = np.nan
+    return out
+
+
+def psd_dataset(arcs: pd.DataFrame, freqs: np.ndarray, psd: np.ndarray, counts: np.ndarray, variable: str,
+                attrs: Optional[dict] = None):
+    """
+    xarray Dataset of per-arc spectra (see welch_psd): 'psd' on (arc, frequency), 'mean_psd' on frequency,
+    and the columns of 'arcs' (see arc_table) plus 'n_segments' as coordinates of the arc dimension.
+    """
+    import xarray as xr
+    coords = {"frequency": ("frequency", freqs, {"units": "Hz"})}
+    coords.update({c: ("arc", arcs[c].to_numpy()) for c in arcs.columns})
+    coords["n_segments"] = ("arc", np.asarray(counts))
+    return xr.Dataset(
+        {"psd": (("arc", "frequency"), psd, {"long_name": f"power spectral density of {variable}", "units": "(m/s)**2/Hz"}),
+         "mean_psd": ("frequency", mean_psd(psd, counts), {"long_name": f"mean power spectral density of {variable}", "units": "(m/s)**2/Hz"})},
+        coords=coords, attrs=dict(attrs or {}))
+
+
+def filter_columns(df: pd.DataFrame, variables: Sequence[str], interval_seconds: float = 5, **kwargs) -> pd.DataFrame:
+    """Adds '<v>_filtered' (see zero_phase_filter, keyword arguments) and 'arc' columns to rows sorted as in arc_ids."""
+    arcs = arc_ids(df, interval_seconds)
+    out = df.assign(arc=arcs)
+    for v in variables:
+        out[f"{v}_filtered"] = zero_phase_filter(df[v], arcs, fs=1 / interval_seconds, **kwargs)
+    return out
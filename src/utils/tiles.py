@@ -0,0 +1,133 @@
+# src/utils/tiles.py
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+# Mapbox Vector Tiles of the residuals in the XYZ (web map) scheme, Web Mercator (EPSG:3857). From POINT_ZOOM on,
+# a tile holds the stored points; below, points are aggregated on a grid of CLUSTER_PIXELS tile pixels, so a
+# tile of the whole globe holds at most a few thousand features whatever the number of rows.
+# Rendered tiles are cached as <root>/<z>/<x>/<y>/<request>.<version>.mvt: 'request' identifies the labels and
+# time window, 'version' the stored data (see scripts/tiles.py); a new version replaces the tile of the request.
+RADIUS = 6378137.0
+WORLD = np.pi * RADIUS  # half the width of the Web Mercator square (m)
+MAX_LATITUDE = 85.0511287798066  # latitude of the edges of the square
+MAX_ZOOM = 24
+EXTENT = 4096  # tile coordinates per tile width
+BUFFER = 64  # margin of tile coordinates kept around the tile, so symbols crossing the edges are drawn
+LAYER = "residuals"
+POINT_ZOOM = 8
+CLUSTER_PIXELS = 8  # of a 256-pixel tile
+# Below FILTERED_ZOOM, a tile covers more than 1/4096 of the globe: rendering it for every row of the table would
+# aggregate a large share of the table, so it must be restricted to labels or to a window of at most MAX_WINDOW.
+FILTERED_ZOOM = 6
+MAX_WINDOW = pd.Timedelta(days=31)
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Web Mercator bounds (xmin, ymin, xmax, ymax) of tile z/x/y (y = 0 at the north edge)."""
+    if not 0 <= z <= MAX_ZOOM:
+        raise ValueError(f"Zoom {z} out of range (0 .. {MAX_ZOOM})")
+    if not (0 <= x < 2**z and 0 <= y < 2**z):
+        raise ValueError(f"Tile {z}/{x}/{y} does not exist")
+    size = 2 * WORLD / 2**z
+    return -WORLD + x * size, WORLD - (y + 1) * size, -WORLD + (x + 1) * size, WORLD - y * size
+
+
+def lonlat_bounds(z: int, x: int, y: int, buffer: float = BUFFER) -> Tuple[float, float, float, float]:
+    """
+    Bounds (west, south, east, north) in degrees of tile z/x/y grown by 'buffer' tile coordinates, for an index
+    search on the lon/lat points. Web Mercator maps rectangles to rectangles, so these bounds are exact.
+    """
+    xmin, ymin, xmax, ymax = tile_bounds(z, x, y)
+    margin = (xmax - xmin) * buffer / EXTENT
+    lon = np.degrees(np.clip([xmin - margin, xmax + margin], -WORLD, WORLD) / RADIUS)
+    lat = np.degrees(2 * np.arctan(np.exp(np.clip([ymin - margin, ymax + margin], -WORLD, WORLD) / RADIUS)) - np.pi / 2)
+    return float(lon[0]), float(lat[0]), float(lon[1]), float(lat[1])
+
+
+def cell_size(z: int) -> Optional[float]:
+    """Web Mercator size (m) of the aggregation cells of zoom z, or None from POINT_ZOOM on (single points)."""
+    if z >= POINT_ZOOM:
+        return None
+    return 2 * WORLD / 2**z * CLUSTER_PIXELS / 256
+
+
+def check_filters(z: int, labels: Optional[Sequence[str]] = None, start_time=None, end_time=None) -> None:
+    """Raises ValueError for a tile below FILTERED_ZOOM restricted neither to labels nor to a short time window."""
+    if z >= FILTERED_ZOOM or labels:
+        return
+    if start_time is None or end_time is None or pd.Timestamp(end_time) - pd.Timestamp(start_time) > MAX_WINDOW:
+        raise ValueError(f"Tiles below zoom {FILTERED_ZOOM} need a label, or a start_time and end_time "
+                         f"at most {MAX_WINDOW.days} days apart")
+
+
+def request_key(labels: Optional[Sequence[str]] = None, start_time=None, end_time=None) -> str:
+    """Identifier of the labels and time window of a tile request (same for equivalent requests)."""
+    window = [None if t is None else pd.Timestamp(t).isoformat() for t in (start_time, end_time)]
+    return _digest([sorted(set(labels or [])), *window])
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def tile_path(root, z: int, x: int, y: int, key: str, version: str) -> Path:
+    """Cache file of tile z/x/y of request 'key' (see request_key) rendered from data 'version'."""
+    return Path(root).expanduser() / str(z) / str(x) / str(y) / f"{key}.{_digest(version)}.mvt"
+
+
+def read_tile(root, z: int, x: int, y: int, key: str, version: str) -> Optional[bytes]:
+    """Cached tile, or None if it is not cached or was rendered from another version of the data."""
+    path = tile_path(root, z, x, y, key, version)
+    try:
+        data = path.read_bytes()
+        os.utime(path)  # last use, for evict()
+    except OSError:
+        return None  # not cached, or evicted meanwhile
+    return data
+
+
+def write_tile(root, z: int, x: int, y: int, key: str, version: str, data: bytes) -> Path:
+    """
+    Caches a rendered tile and removes the tiles of the same request rendered from other versions.
+    The file is written under a temporary name and renamed, so readers never see a partial tile.
+    """
+    path = tile_path(root, z, x, y, key, version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    for stale in path.parent.glob(f"{key}.*.mvt"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return path
+
+
+def evict(root, max_bytes: int) -> List[str]:
+    """Removes least recently used tiles until the cache holds at most 'max_bytes'. Returns the removed files."""
+    tiles = []
+    for path in Path(root).expanduser().glob("*/*/*/*.mvt"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        tiles.append((stat.st_mtime, stat.st_size, path))
+    tiles.sort(key=lambda t: t[0])
+    total = sum(size for _, size, _ in tiles)
+    removed = []
+    for _, size, path in tiles:
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed.append(str(path))
+    return removed
@@ -1,3 +1,8 @@
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, box
+from shapely.affinity import translate
+
 def check_polygon_validity(polygon_coordinates: list) -> bool:
     """
     Validate the polygon:
@@ -27,3 +32,52 @@ def check_polygon_validity(polygon_coordinates: list) -> bool:
             raise ValueError(f"Invalid latitude {lat}. Must be between -90 and 90.")
 
     return True
+
+def polygon_geometry(polygon_coordinates: list, antimeridian: bool = False):
+    """
+    Convert polygon coordinates to a planar (lon/lat) geometry that can be used with ST_Contains
+    in SRID 4326. By default the ring is taken as given, so a polygon may be wider than 180 degrees
+    (e.g. -100 -> 100 is an edge of 200 degrees). With antimeridian=True, polygons crossing the
+    antimeridian or enclosing a pole are supported instead:
+    - consecutive longitudes are unwrapped, so an edge never spans more than 180 degrees
+      (e.g. 170 -> -170 is an edge of 20 degrees across the antimeridian)
+    - a ring that winds once around the globe encloses the pole on the side of its mean latitude,
+      and is closed through that pole
+    - the result is split at +/-180 degrees into a MultiPolygon if needed
+
+    Args:
+        polygon_coordinates: List of tuples containing (longitude, latitude) pairs (see check_polygon_validity).
+        antimeridian: Edges take the short way round the globe, across +/-180 degrees if needed.
+    Returns:
+        shapely Polygon or MultiPolygon with longitudes between -180 and 180.
+    """
+    check_polygon_validity(polygon_coordinates)
+
+    lon = np.array([p[0] for p in polygon_coordinates], dtype=float)
+    lat = np.array([p[1] for p in polygon_coordinates], dtype=float)
+    if not antimeridian:
+        polygon = Polygon(zip(lon, lat))
+        if not polygon.is_valid:
+            raise ValueError(f"Invalid polygon: {shapely.is_valid_reason(polygon)}")
+        return polygon
+
+    step = (np.diff(lon) + 180) % 360 - 180
+    unwrapped = np.r_[lon[0], lon[0] + np.cumsum(step)]
+    unwrapped = lon + 360 * np.round((unwrapped - lon) / 360)  # whole turns only, keeps the input values exact
+    ring = list(zip(unwrapped, lat))
+
+    if abs(unwrapped[-1] - unwrapped[0]) > 180:  # winds around a pole
+        pole = 90.0 if lat.mean() >= 0 else -90.0
+        ring += [(unwrapped[-1], pole), (unwrapped[0], pole)]
+
+    polygon = Polygon(ring)
+    if not polygon.is_valid:
+        raise ValueError(f"Invalid polygon: {shapely.is_valid_reason(polygon)}")
+
+    parts = []
+    for shift in (-360.0, 0.0, 360.0):
+        piece = polygon.intersection(box(-180.0 - shift, -90.0, 180.0 - shift, 90.0))
+        parts += [translate(p, xoff=shift) for p in shapely.get_parts(piece) if p.geom_type == "Polygon" and p.area > 0]
+
+    return shapely.union_all(parts)
+
@@ -1,10 +1,72 @@
 import os
+import numpy as np
+import pandas as pd
 import pytest
 from sqlalchemy import create_engine, text
 from src.machinery import getenv
 # from scripts.populate_db import add_test_row
 # from src.models import init_db  # Make sure this points to your correct init_db function
 
+TEST_RELEASE = "RLTEST"  # everything stored under this release is removed after each test using clean_release
+
+
 @pytest.fixture(scope="session")
 def engine():
     return create_engine(getenv("DATABASE_URL"))
+
+
+def synthetic_rows(times, label="RL99_02-03", variant="CSR_v1", source="original", offset=0.0):
+    """Rows of TEST_RELEASE at 'times': noise around 'offset' in postfit, 'offset' in up_combined."""
+    n_rows = len(times)
+    return pd.DataFrame({
+        "timestamp": (times - pd.Timestamp("2000-01-01")).total_seconds(),
+        "postfit": np.random.default_rng(0).normal(0, 1e-7, n_rows) + offset,
+        "up_combined": offset,
+        "latitude_A": np.linspace(-89, 89, n_rows),
+        "longitude_A": np.linspace(-179, 179, n_rows),
+        "latitude_B": np.linspace(-89, 89, n_rows),
+        "longitude_B": np.linspace(-179, 179, n_rows),
+        "shadow_A": 0,
+        "adtrack_A": 1,
+        "source": source,
+        "variant": variant,
+        "label": label,
+        "release": TEST_RELEASE,
+        "datetime": times,
+    })
+
+
+def synthetic_month(n_rows, label="RL99_02-03", offset=0.0):
+    """The first 'n_rows' 5-second epochs from 2002-03-01 (see synthetic_rows)."""
+    times = pd.Timestamp("2002-03-01") + pd.to_timedelta(np.arange(n_rows) * 5, unit="s")
+    return synthetic_rows(times, label, offset=offset)
+
+
+def count_rows(engine, **where):
+    """Rows of TEST_RELEASE in TABLE_NAME matching the column values 'where'."""
+    condition = "".join(f" AND {k} = :{k}" for k in where)
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {getenv('TABLE_NAME')} WHERE release = :release{condition}"),
+                            {"release": TEST_RELEASE, **where}).scalar()
+
+
+@pytest.fixture
+def clean_release(engine):
+    """
+    Creates the tables, then removes TEST_RELEASE after the test: its partitions, its rows in the DEFAULT partitions
+    and in the tables derived from TABLE_NAME (catalog, sketches, gaps, crossovers, borrowed ranges), and its
+    archived or detached partitions.
+    """
+    from src.models import init_db
+    from src.utils.partitions import archive_schema, partition_name
+    from scripts.releases import drop, list_partitions
+    init_db()
+    yield
+    table = getenv("TABLE_NAME")
+    drop(engine, TEST_RELEASE)
+    partitions = list_partitions(engine)
+    left = partitions[(partitions["release"] == TEST_RELEASE) & (partitions["status"] != "attached")]
+    with engine.begin() as conn:
+        for name, status in left[["partition", "status"]].itertuples(index=False):
+            conn.execute(text(f"DROP TABLE IF EXISTS {archive_schema(table) + '.' if status == 'archived' else ''}{name}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {archive_schema(table)}.{partition_name(table, TEST_RELEASE)}"))
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+from scripts.populate_db import upsert_dataframe
+from scripts.borrow_map import register_borrowed_ranges, repair_label
+from scripts.space_time_query import query_satellite_data_by_label, query_satellite_data_by_time
+from tests.conftest import TEST_RELEASE, synthetic_rows
+
+
+@pytest.fixture
+def month_with_gap(engine, clean_release):
+    """February 2002 (RL99_02-02) with a 1-hour gap, and the first day of March 2002 (RL99_02-03)."""
+    february = pd.date_range("2002-02-01", "2002-03-01", freq="5s", inclusive="left")
+    february = february[(february < "2002-02-10 10:00") | (february >= "2002-02-10 11:00")]
+    march = pd.date_range("2002-03-01", "2002-03-02", freq="5s", inclusive="left")
+    upsert_dataframe(synthetic_rows(february, "RL99_02-02"), engine)
+    upsert_dataframe(synthetic_rows(march, "RL99_02-03"), engine)
+
+
+def test_borrowed_ranges_resolve_at_read_time(engine, month_with_gap):
+    ranges = repair_label(engine, TEST_RELEASE, "CSR_v1", "RL99_02-02", "RL99_02-03")
+    assert len(ranges) == 1 and ranges["n_samples"].sum() == 720
+
+    df = query_satellite_data_by_label("RL99_02-02")
+    assert len(df) == 28 * 17280
+    assert (df["datetime"].diff().dropna() == pd.Timedelta(seconds=5)).all()
+    assert df["borrowed"].sum() == 720
+
+    stored = query_satellite_data_by_label("RL99_02-02", resolve_borrowed=False)
+    assert len(stored) == 28 * 17280 - 720
+
+
+def test_gaps_are_stored_at_ingestion(engine, month_with_gap):
+    from scripts.gaps import is_complete, read_gaps, window_completeness
+    gaps = read_gaps(engine, labels=["RL99_02-02"], release=TEST_RELEASE)
+    assert gaps[["start_time", "end_time", "missing"]].values.tolist() == [
+        [pd.Timestamp("2002-02-10 09:59:55"), pd.Timestamp("2002-02-10 11:00:00"), 720]]
+
+    summary = window_completeness(engine, "2002-02-10", "2002-02-10 23:59:55", release=TEST_RELEASE)
+    assert summary[["epochs", "missing", "gaps"]].values.tolist() == [[17280, 720, 1]]
+    assert is_complete(engine, "2002-02-11", "2002-03-01 23:59:55", release=TEST_RELEASE)
+    assert not is_complete(engine, "2002-03-01", "2002-03-02 00:00:05", release=TEST_RELEASE)
+
+
+def test_complete_arcs_skip_the_days_of_gaps(engine, month_with_gap):
+    df = query_satellite_data_by_time("2002-02-09", "2002-02-11 23:59:55", complete_arcs=True)
+    assert sorted(df["datetime"].dt.normalize().unique()) == [pd.Timestamp("2002-02-09"), pd.Timestamp("2002-02-11")]
+    assert len(df) == 2 * 17280
+
+
+def test_overlapping_borrowed_ranges_resolve_once(engine, month_with_gap):
+    ranges = repair_label(engine, TEST_RELEASE, "CSR_v1", "RL99_02-02", "RL99_02-03")
+    # the same range twice, a second source under the source label and copies already stored under the target label
+    register_borrowed_ranges(engine, pd.concat([ranges, ranges], ignore_index=True), TEST_RELEASE, "CSR_v1",
+                             "RL99_02-02", "RL99_02-03")
+    upsert_dataframe(synthetic_rows(pd.date_range("2002-03-01", periods=100, freq="5s"), "RL99_02-03",
+                                    source="other"), engine)
+    upsert_dataframe(synthetic_rows(pd.date_range("2002-02-10 10:00", periods=10, freq="5s"), "RL99_02-02",
+                                    source="borrowed"), engine)
+
+    df = query_satellite_data_by_label("RL99_02-02")
+    assert not df["datetime"].duplicated().any()
+    assert len(df) == 28 * 17280
+    assert df["borrowed"].sum() == 710
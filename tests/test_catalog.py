@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from src.utils.catalog import catalog_groups, summarize
+
+
+def catalog():
+    return pd.DataFrame({
+        "release": ["RL06", "RL06", "RL06"],
+        "variant": ["CSR_v1", "CSR_v1", "CSR_v1"],
+        "label": ["RL06_12-03", "RL06_12-04", "RL06_12-04"],
+        "source": ["a", "b", "borrowed"],
+        "start_time": pd.to_datetime(["2012-03-01", "2012-04-01", "2012-04-20"]),
+        "end_time": pd.to_datetime(["2012-03-31 23:59:55", "2012-04-19 23:59:55", "2012-04-30 23:59:55"]),
+        "rows": [535680, 328000, 207000],
+        "min_longitude": [-180.0, -180.0, -180.0],
+        "min_latitude": [-89.0, -89.0, -89.0],
+        "max_longitude": [180.0, 180.0, 180.0],
+        "max_latitude": [89.0, 89.0, 89.0],
+        "gaps": [0, 3, 0],
+    })
+
+
+def test_catalog_groups_fills_missing_key_columns():
+    df = pd.DataFrame({"label": ["RL06_12-03", "RL06_12-03", None], "release": "RL06", "timestamp": np.arange(3)})
+    groups = catalog_groups(df)
+    assert groups.to_dict("records") == [
+        {"release": "RL06", "variant": "", "label": "RL06_12-03", "source": ""},
+        {"release": "RL06", "variant": "", "label": "", "source": ""},
+    ]
+
+
+def test_summarize_per_label():
+    summary = summarize(catalog())
+    row = summary[summary["label"] == "RL06_12-04"].iloc[0]
+    assert row["rows"] == 535000 and row["gaps"] == 3 and row["groups"] == 2
+    assert row["start_time"] == pd.Timestamp("2012-04-01")
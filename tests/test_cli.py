@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.cli import build_parser, parse_polygon
+
+ROOT = Path(__file__).resolve().parents[1]
+STARTUP_BUDGET = float(os.getenv("STARTUP_BUDGET", "1.0"))  # seconds, including the interpreter start
+HEAVY_MODULES = ("pandas", "numpy", "sqlalchemy", "shapely", "geopandas", "xarray", "netCDF4", "pyarrow")
+
+
+def run_python(code, **env):
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                            env={**os.environ, **env}, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()
+
+
+def run_help(argv):
+    """Runs 'grace-db <argv>' in a fresh interpreter; returns its duration and the heavy modules it imported."""
+    lines = run_python(f"""
+import sys, time
+start = time.perf_counter()
+from src import cli
+try:
+    cli.main({argv!r})
+except SystemExit:
+    pass
+print(time.perf_counter() - start)
+print("heavy:" + ",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+""")
+    return float(lines[-2]), lines[-1]
+
+
+@pytest.mark.parametrize("argv", [["--help"], ["query", "--help"], ["load", "--help"]])
+def test_help_imports_no_heavy_modules(argv):
+    assert run_help(argv)[1] == "heavy:"
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("argv", [["--help"], ["query", "--help"], ["load", "--help"]])
+def test_help_starts_fast(argv):
+    assert run_help(argv)[0] < STARTUP_BUDGET
+
+
+def test_importing_query_module_creates_no_engine():
+    lines = run_python("""
+import scripts.space_time_query, src.models
+print(src.models._engine is None)
+""", DATABASE_URL="postgresql://nobody@localhost:1/none", TABLE_NAME="kbr_test")
+    assert lines[-1] == "True"
+
+
+def test_parser():
+    args = build_parser().parse_args(["query", "--start_time", "2012-03-01", "--end_time", "2012-04-01",
+                                      "--polygon", "60 10,60 30,80 30,80 10,60 10", "--workers", "4"])
+    assert args.func.__name__ == "cmd_query" and args.workers == 4
+    assert parse_polygon(args.polygon)[1] == (60.0, 30.0)
+    assert build_parser().parse_args(["load", "a.pkl", "b.pkl", "--mode", "bulk"]).filepath == ["a.pkl", "b.pkl"]
+    args = build_parser().parse_args(["residuals", "--variable", "postfit", "--variable", "up_combined", "--by", "month"])
+    assert args.func.__name__ == "cmd_residuals" and args.variable == ["postfit", "up_combined"]
+    args = build_parser().parse_args(["compare", "RL06:CSR_v1", "RL06:CSR_v2", "--by", "pass"])
+    assert args.func.__name__ == "cmd_compare" and args.by == "pass"
+    args = build_parser().parse_args(["query", "--start_time", "2012-01-01", "--end_time", "2013-01-01", "--width", "800"])
+    assert args.width == 800 and args.method == "m4" and args.variable == "postfit"
+    args = build_parser().parse_args(["spectra", "filter", "--start_time", "2012-01-01", "--end_time", "2013-01-01",
+                                      "--low_cut", "0.001", "--workers", "8"])
+    assert args.func.__name__ == "cmd_spectra" and args.low_cut == 0.001 and args.high_cut is None
+    args = build_parser().parse_args(["stats", "--queries", "--top", "5"])
+    assert args.queries == "" and args.top == 5 and build_parser().parse_args(["stats"]).queries is None
+    assert build_parser().parse_args(["stats", "--refresh"]).refresh
+    assert build_parser().parse_args(["residuals", "--histogram", "40", "--range", "-0.5", "0.5"]).range == [-0.5, 0.5]
+    args = build_parser().parse_args(["cache", "load", "--release", "RL06", "--label", "RL06_12-03", "RL06_12-04"])
+    assert args.func.__name__ == "cmd_cache" and args.label == ["RL06_12-03", "RL06_12-04"]
+    args = build_parser().parse_args(["release", "swap", "RL06_12-03.pkl", "--release", "RL06", "--label", "RL06_12-03",
+                                      "--archive_old"])
+    assert args.func.__name__ == "cmd_release" and args.filepath == ["RL06_12-03.pkl"] and args.archive_old
+    assert build_parser().parse_args(["release", "list"]).lock_timeout == "10s"
+    args = build_parser().parse_args(["tiles", "get", "3/4/2", "--label", "RL06_12-03", "--label", "RL06_12-04"])
+    assert args.func.__name__ == "cmd_tiles" and args.tile == "3/4/2" and args.label == ["RL06_12-03", "RL06_12-04"]
+    assert build_parser().parse_args(["tiles", "serve"]).port == 8080
+    args = build_parser().parse_args(["gaps", "check", "--start_time", "2012-03-01", "--end_time", "2012-03-02",
+                                      "--release", "RL06"])
+    assert args.func.__name__ == "cmd_gaps" and args.release == "RL06" and args.interval == 5
+    assert build_parser().parse_args(["query", "--start_time", "2012-03-01", "--end_time", "2012-03-02",
+                                      "--complete_arcs"]).complete_arcs
+    args = build_parser().parse_args(["query", "--start_time", "2012-03-01", "--page_size", "500", "--page_token", "abc"])
+    assert args.page_size == 500 and args.page_token == "abc"
+    assert build_parser().parse_args(["query", "--polygon", "170 -10,-170 -10,-170 10,170 10,170 -10",
+                                      "--antimeridian"]).antimeridian
+
+
+@pytest.mark.parametrize("script, command", [("tiles", "tiles"), ("gaps", "gaps"), ("releases", "release"),
+                                             ("residual_stats", "residuals")])
+def test_scripts_run_their_subcommand(script, command, capsys, monkeypatch):
+    import importlib
+    monkeypatch.setenv("TABLE_NAME", os.getenv("TABLE_NAME", "kbr_test"))
+    module = importlib.import_module(f"scripts.{script}")
+    with pytest.raises(SystemExit):
+        module.main(["--help"])
+    assert capsys.readouterr().out.startswith(f"usage: grace-db {command} ")
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.populate_db import upsert_dataframe
+from scripts.compare import Side, compare_summary, iter_differences
+from tests.conftest import TEST_RELEASE, synthetic_rows
+
+
+def synthetic_variant(times, variant, bias=0.0):
+    rng = np.random.default_rng(0)
+    u = np.arange(len(times)) * 2 * np.pi / 1080  # 90-minute orbits at 5 s
+    return synthetic_rows(times, variant=variant).assign(
+        postfit=np.sin(u) * 1e-7 + bias + (rng.normal(0, 1e-9, len(times)) if bias else 0.0),
+        up_combined=np.cos(u) * 1e-7,
+        latitude_A=np.degrees(np.arcsin(np.sin(np.radians(89)) * np.sin(u))), longitude_A=0.0,
+        latitude_B=0.0, longitude_B=0.0,
+        adtrack_A=(np.cos(u) > 0).astype(int),
+    )
+
+
+@pytest.fixture
+def two_variants(engine, clean_release):
+    """Two days of RL99_02-03 in variants CSR_v1 and CSR_v2 (biased by 1e-9, with noise); v2 misses one hour."""
+    times = pd.date_range("2002-03-01", "2002-03-03", freq="5s", inclusive="left")
+    v2 = synthetic_variant(times, "CSR_v2", bias=1e-9)
+    upsert_dataframe(synthetic_variant(times, "CSR_v1"), engine)
+    upsert_dataframe(v2[(v2["datetime"] < "2002-03-01 10:00") | (v2["datetime"] >= "2002-03-01 11:00")], engine)
+    return len(times) - 720
+
+
+def test_differences_stream_in_time_order(engine, two_variants):
+    chunks = list(iter_differences(engine, Side(TEST_RELEASE, "CSR_v2"), Side(TEST_RELEASE, "CSR_v1"), chunksize=5000))
+    assert len(chunks) > 1 and all(len(c) <= 5000 for c in chunks)
+    df = pd.concat(chunks, ignore_index=True)
+    assert len(df) == two_variants and df["timestamp"].is_monotonic_increasing
+    np.testing.assert_allclose(df["d_postfit"].mean(), 1e-9, rtol=0.05)
+    assert (df["d_up_combined"] == 0).all()
+
+
+def test_summary_per_day_and_per_pass(engine, two_variants):
+    a, b = Side(TEST_RELEASE, "CSR_v2"), Side.parse(f"{TEST_RELEASE}:CSR_v1:RL99_02-03")
+    daily = compare_summary(engine, a, b, ["postfit"], by="day")
+    assert len(daily) == 2 and daily["n_postfit"].sum() == two_variants
+    np.testing.assert_allclose(daily["bias_postfit"], 1e-9, rtol=0.05)
+    np.testing.assert_allclose(daily["rms_postfit"], np.sqrt(1e-18 + 1e-18), rtol=0.05)
+    assert (daily["corr_postfit"] > 0.99).all()
+
+    passes = compare_summary(engine, a, b, ["postfit"], by="pass")
+    # two passes per 90-minute orbit, plus the split at the missing hour
+    assert 60 <= len(passes) <= 66 and passes["n_postfit"].sum() == two_variants
+    assert compare_summary(engine, a, b, ["postfit"], by=None).loc[0, "n_postfit"] == two_variants
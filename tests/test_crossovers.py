@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.arcs import segment_passes, closest_approaches
+from src.utils.crossovers import find_crossovers, track_segments, _intersect
+
+
+def polar_orbit(days, interval_seconds=5):
+    """Synthetic near-polar orbit of GRACE-A with linear-in-time residuals."""
+    t = np.arange(0, days * 86400, interval_seconds, dtype=float)
+    u = 2 * np.pi * t / 5670.0  # argument of latitude, ~94.5 min period
+    inclination = np.radians(89.0)
+    lat = np.degrees(np.arcsin(np.sin(inclination) * np.sin(u)))
+    lon = np.degrees(np.arctan2(np.cos(inclination) * np.sin(u), np.cos(u))) - 360 * t / 86164.0
+    return pd.DataFrame({
+        "timestamp": t,
+        "longitude_A": (lon + 180) % 360 - 180,
+        "latitude_A": lat,
+        "adtrack_A": (np.cos(u) > 0).astype(int),
+        "postfit": 1e-3 * t,
+        "up_combined": -2e-3 * t,
+    })
+
+
+def test_segment_passes_splits_on_track_and_gaps():
+    times = np.array([0, 5, 10, 15, 40, 45, 50])
+    adtrack = np.array([1, 1, 0, 0, 0, 0, 1])
+    assert segment_passes(times, adtrack).tolist() == [0, 0, 1, 1, 2, 2, 3]
+    assert segment_passes(times).tolist() == [0, 0, 0, 0, 1, 1, 1]
+
+
+def test_closest_approaches_keeps_one_sample_per_pass():
+    # two passes 6000 s apart; distances decrease then increase along each pass
+    times = np.r_[np.arange(0, 100, 5), 6000 + np.arange(0, 100, 5)]
+    distances = np.r_[np.abs(np.arange(20) - 7) + 10.0, np.abs(np.arange(20) - 12) + 3.0]
+    order = np.random.default_rng(0).permutation(len(times))
+    kept = closest_approaches(times[order], distances[order], separation_seconds=600)
+    assert times[order][kept].tolist() == [6060, 35]
+    assert len(closest_approaches(times, distances, 600, n=1)) == 1
+
+
+def test_single_crossing_is_interpolated():
+    # ascending pass along y = x, descending pass along y = 10 - x, crossing at (5, 5)
+    x = np.arange(0, 11, 1.0)
+    df = pd.DataFrame({
+        "timestamp": np.r_[x * 5, 1000 + x * 5],
+        "longitude_A": np.r_[x, x],
+        "latitude_A": np.r_[x, 10 - x],
+        "adtrack_A": np.r_[np.ones(11, int), np.zeros(11, int)],
+        "postfit": np.r_[x, 100 + x],
+        "up_combined": np.r_[2 * x, 0 * x],
+    })
+    result = find_crossovers(df)
+    assert len(result) == 1
+    row = result.iloc[0]
+    assert row["longitude"] == pytest.approx(5) and row["latitude"] == pytest.approx(5)
+    assert row["time_asc"] == pytest.approx(25) and row["time_desc"] == pytest.approx(1025)
+    assert row["dt"] == pytest.approx(1000)
+    assert row["d_postfit"] == pytest.approx(5 - 105)
+    assert row["d_up_combined"] == pytest.approx(10)
+
+
+def test_matches_brute_force():
+    df = polar_orbit(0.5)
+    result = find_crossovers(df)
+
+    seg = track_segments(df)
+    asc, desc = np.flatnonzero(seg["ascending"]), np.flatnonzero(~seg["ascending"])
+    pairs = set()
+    for k in range(0, len(asc), 500):
+        i, j = np.meshgrid(asc[k:k + 500], desc, indexing="ij")
+        hit, _, _ = _intersect(seg, i.ravel(), j.ravel())
+        pairs.update(zip(seg["start"][i.ravel()[hit]], seg["start"][j.ravel()[hit]]))
+    expected = len(pairs)
+
+    assert len(result) == expected > 0
+    # residuals are linear in time, so interpolated values follow the interpolated times
+    assert np.allclose(result["postfit_asc"], 1e-3 * result["time_asc"])
+    assert np.allclose(result["d_up_combined"], 2e-3 * result["dt"])
+
+
+def test_crossing_at_the_antimeridian():
+    # ascending pass from 179.8 to -179.8 (through 180), descending passes along 180 and along +-179.95
+    asc = np.array([179.8, 179.9, -179.9, -179.8])
+    df = pd.DataFrame({
+        "timestamp": np.r_[np.arange(4) * 5.0, 1000 + np.arange(4) * 5.0, 2000 + np.arange(2) * 5.0, 3000 + np.arange(2) * 5.0],
+        "longitude_A": np.r_[asc, asc, 179.95, 179.95, -179.95, -179.95],
+        "latitude_A": np.r_[-3, -1, 1, 3, 3, 1, -1, -3, 3, -3, 3, -3],
+        "adtrack_A": np.r_[np.ones(4, int), np.zeros(8, int)],
+        "postfit": 0.0, "up_combined": 0.0,
+    })
+    result = find_crossovers(df)
+    assert result["time_asc"].tolist() == pytest.approx([6.25, 7.5, 8.75])
+    assert result["time_desc"].tolist() == pytest.approx([2000 + 17.5 / 6, 1007.5, 3000 + 12.5 / 6])
+    assert result["longitude"].abs().tolist() == pytest.approx([179.95, 180, 179.95])
+    assert np.sign(result["longitude"].iloc[[0, 2]]).tolist() == [1, -1]
+    assert result["latitude"].tolist() == pytest.approx([-0.5, 0, 0.5])
+    assert result["longitude"].between(-180, 180).all()
+
+
+def test_time_and_region_filters():
+    df = polar_orbit(2)
+    all_crossovers = find_crossovers(df)
+    bbox = (-60, 50, 60, 80)
+    result = find_crossovers(df, max_dt=86400, bbox=bbox)
+
+    assert len(result) and (result["dt"].abs() <= 86400).all()
+    assert result["longitude"].between(-60, 60).all() and result["latitude"].between(50, 80).all()
+    inside = all_crossovers[all_crossovers["longitude"].between(-60, 60) & all_crossovers["latitude"].between(50, 80)
+                            & (all_crossovers["dt"].abs() <= 86400)]
+    assert len(result) == len(inside)
+
+
+def test_no_crossovers():
+    df = polar_orbit(1)
+    result = find_crossovers(df[df["adtrack_A"] == 1])
+    assert result.empty and "d_postfit" in result.columns
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.data_quality import chunk_stats, merge_stats, finalize_stats, quality_report, report_problems
+
+
+@pytest.fixture
+def synthetic_chunk_data():
+    """Two labels of 5-second data; one label has a 1-minute gap, a duplicate and a bad latitude."""
+    t = np.arange(0, 3600, 5, dtype=float)
+    df_a = pd.DataFrame({"timestamp": t, "label": "RL06_12-03", "latitude_A": 10.0, "longitude_A": 20.0,
+                         "postfit": np.linspace(-1, 1, len(t))})
+    df_b = df_a.copy()
+    df_b["label"] = "RL06_12-04"
+    df_b = df_b[(df_b["timestamp"] < 1000) | (df_b["timestamp"] >= 1060)]  # 12 missing epochs
+    df_b = pd.concat([df_b, df_b.iloc[[5]]])                                # one duplicate
+    df_b.iloc[0, df_b.columns.get_loc("latitude_A")] = 95.0                 # out of range
+    return pd.concat([df_a, df_b], ignore_index=True).sort_values("timestamp", kind="stable")
+
+
+def test_chunk_stats_finds_problems(synthetic_chunk_data):
+    report = finalize_stats(chunk_stats(synthetic_chunk_data))
+
+    assert report["rows"] == len(synthetic_chunk_data)
+    assert report["duplicate_keys"] == 1
+    assert report["out_of_range"]["latitude_A"] == 1
+    assert report["labels"]["RL06_12-03"]["gaps"] == 0
+    assert report["labels"]["RL06_12-04"]["gaps"] == 1
+    assert report["labels"]["RL06_12-04"]["missing_epochs"] == 12
+    assert report["labels"]["RL06_12-04"]["duplicate_timestamps"] == 1
+    assert len(report_problems(report)) == 4
+
+
+def test_merged_chunks_match_single_pass(synthetic_chunk_data):
+    single = finalize_stats(chunk_stats(synthetic_chunk_data))
+    # chunk boundary inside the gap of RL06_12-04
+    chunks = [synthetic_chunk_data.iloc[i:i + 333] for i in range(0, len(synthetic_chunk_data), 333)]
+    streamed = quality_report(chunks)
+
+    assert streamed == single
+
+
+def test_merge_stats_detects_gap_between_chunks():
+    first = pd.DataFrame({"timestamp": [0.0, 5.0, 10.0], "label": "RL06_12-03"})
+    second = pd.DataFrame({"timestamp": [30.0, 35.0], "label": "RL06_12-03"})
+    report = finalize_stats(merge_stats(chunk_stats(first), chunk_stats(second)))
+
+    assert report["labels"]["RL06_12-03"]["gaps"] == 1
+    assert report["labels"]["RL06_12-03"]["missing_epochs"] == 3
+    assert report["labels"]["RL06_12-03"]["max_gap_seconds"] == 20.0
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.downsample import M4Accumulator, downsample, downsample_frames, lttb_indices, m4_indices
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = np.arange(100000, dtype=float)
+    y = np.sin(x / 3000) + rng.normal(0, 0.1, len(x))
+    y[[1234, 56789]] = [25.0, -25.0]  # isolated spikes
+    return x, y
+
+
+def test_m4_keeps_first_last_min_max_of_every_bucket(series):
+    x, y = series
+    kept = m4_indices(x, y, 100)
+    assert len(kept) <= 400 and np.all(np.diff(kept) > 0)
+    for bucket in np.array_split(np.arange(len(x)), 100):
+        ids = set(kept[(kept >= bucket[0]) & (kept <= bucket[-1])])
+        assert {bucket[0], bucket[-1], bucket[np.argmin(y[bucket])], bucket[np.argmax(y[bucket])]} == ids
+
+
+def test_streamed_batches_match_whole_series(series):
+    x, y = series
+    acc = M4Accumulator(x[0], x[-1], 100)
+    order = np.random.default_rng(1).permutation(len(x))  # batches in any order
+    for batch in np.array_split(order, 17):
+        acc.add(x[batch], y[batch])
+    kept = m4_indices(x, y, 100, x[0], x[-1])
+    np.testing.assert_array_equal(acc.points()["x"], x[kept])
+    np.testing.assert_array_equal(acc.points()["y"], y[kept])
+
+
+def test_lttb_keeps_spikes_and_end_points(series):
+    x, y = series
+    kept = downsample(x, y, 300, method="lttb")
+    assert len(kept) == 300 and kept[0] == 0 and kept[-1] == len(x) - 1
+    assert {1234, 56789} <= set(kept)
+    np.testing.assert_array_equal(lttb_indices(x[:10], y[:10], 20), np.arange(10))
+
+
+def test_downsample_frames(series):
+    _, y = series
+    times = pd.date_range("2012-03-01", periods=len(y), freq="5s")
+    frames = [pd.DataFrame({"datetime": times[i:i + 9999], "postfit": y[i:i + 9999]}) for i in range(0, len(y), 9999)]
+    df = downsample_frames(frames, times[0], times[-1], 250)
+    assert df["datetime"].isin(times).all() and df["datetime"].is_monotonic_increasing
+    assert df["postfit"].max() == 25.0 and df["postfit"].min() == -25.0
+    assert len(downsample_frames(frames, times[0], times[-1], 250, method="lttb")) == 250
+    with pytest.raises(ValueError):
+        downsample_frames(frames, times[0], times[-1], 0)
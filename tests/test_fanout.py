@@ -0,0 +1,62 @@
+import threading
+import time
+import pandas as pd
+import pytest
+
+from src.utils.fanout import split_time_range, fan_out
+
+
+def test_split_time_range_is_month_aligned_and_covers_the_window():
+    windows = split_time_range("2012-01-15 12:00", "2012-04-01 00:00", "MS")
+    assert [(str(w.start), str(w.end), w.closed) for w in windows] == [
+        ("2012-01-15 12:00:00", "2012-02-01 00:00:00", False),
+        ("2012-02-01 00:00:00", "2012-03-01 00:00:00", False),
+        ("2012-03-01 00:00:00", "2012-04-01 00:00:00", True),
+    ]
+    # every epoch falls in exactly one window
+    epochs = pd.date_range("2012-01-15 12:00", "2012-04-01 00:00", freq="1h")
+    hits = sum(((epochs >= w.start) & ((epochs <= w.end) if w.closed else (epochs < w.end))).astype(int) for w in windows)
+    assert (hits == 1).all()
+
+
+def test_split_time_range_single_instant():
+    assert split_time_range("2012-03-01", "2012-03-01") == [(pd.Timestamp("2012-03-01"), pd.Timestamp("2012-03-01"), True)]
+    with pytest.raises(ValueError):
+        split_time_range("2012-03-02", "2012-03-01")
+
+
+def test_fan_out_keeps_order_and_bounds_pending_work():
+    running, peak, lock = 0, 0, threading.Lock()
+    submitted = []
+
+    def fetch(i):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01 * (5 - i % 5))  # later items finish first
+        with lock:
+            running -= 1
+        return i
+
+    def items():
+        for i in range(20):
+            submitted.append(i)
+            yield i
+
+    results = []
+    for r in fan_out(fetch, items(), max_workers=4, max_pending=6):
+        results.append(r)
+        assert len(submitted) <= len(results) + 6  # backpressure
+    assert results == list(range(20))
+    assert 1 < peak <= 4
+
+
+def test_fan_out_propagates_errors():
+    def fetch(i):
+        if i == 3:
+            raise RuntimeError("boom")
+        return i
+
+    with pytest.raises(RuntimeError, match="boom"):
+        list(fan_out(fetch, range(10), max_workers=2))
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from src.utils.catalog import CATALOG_GROUP
+from src.utils.gaps import covered_intervals, find_gaps, gap_epochs, holes, month_window
+from src.utils.repair_month import missing_timestamps
+
+
+def month(drop, label="RL06_12-03", source="kbr", start="2012-03-01 02:00", end="2012-03-30 10:00"):
+    times = pd.date_range(start, end, freq="5s")
+    keep = np.ones(len(times), bool)
+    for lo, hi in drop:
+        keep[lo:hi] = False
+    return pd.DataFrame({"datetime": times[keep], "release": "RL06", "variant": "CSR_v1", "label": label, "source": source})
+
+
+def spans_of(df):
+    return df.groupby(list(CATALOG_GROUP), as_index=False).agg(start_time=("datetime", "min"), end_time=("datetime", "max"))
+
+
+def test_find_gaps_per_group():
+    df = pd.concat([month([(100, 150), (5000, 5001)]), month([(10, 20)], source="other")])
+    gaps = find_gaps(df.sample(frac=1, random_state=0), CATALOG_GROUP)
+    assert gaps["source"].tolist() == ["kbr", "kbr", "other"]
+    assert gaps["missing"].tolist() == [50, 1, 10]
+    assert gaps["start_time"].iloc[0] == pd.Timestamp("2012-03-01 02:08:15")
+    assert gaps["end_time"].iloc[0] == pd.Timestamp("2012-03-01 02:12:30")
+    assert find_gaps(month([]), CATALOG_GROUP).empty
+
+
+def test_month_holes_match_missing_timestamps():
+    df = month([(100, 150), (5000, 5001), (20000, 30000)])
+    start_time, end_time = month_window(df["datetime"].min())
+    found = holes(covered_intervals(spans_of(df), find_gaps(df, CATALOG_GROUP)), start_time, end_time)
+    assert found["missing"].tolist() == [1440, 50, 1, 10000, 27359]
+    assert gap_epochs(found).equals(missing_timestamps(df))
+
+
+def test_holes_within_a_window():
+    df = month([(100, 150)])
+    intervals = covered_intervals(spans_of(df), find_gaps(df, CATALOG_GROUP))
+    # cut at both ends of the window
+    found = holes(intervals, "2012-03-01 02:08:20", "2012-03-01 02:10:00")
+    assert found.values.tolist() == [[pd.Timestamp("2012-03-01 02:08:15"), pd.Timestamp("2012-03-01 02:10:05"), 21]]
+    assert holes(intervals, "2012-03-02", "2012-03-03").empty
+    assert holes(intervals.iloc[:0], "2012-03-01", "2012-03-01 00:00:20")["missing"].tolist() == [5]
+
+    # another source filling the gap, and consecutive labels, leave nothing missing
+    filler = month([], source="borrowed", start="2012-03-01 02:08:00", end="2012-03-01 02:13:00")
+    april = month([], label="RL06_12-04", start="2012-03-30 10:00:05", end="2012-04-02")
+    both = pd.concat([df, filler, april])
+    intervals = covered_intervals(spans_of(both), find_gaps(both, CATALOG_GROUP))
+    assert holes(intervals, "2012-03-01 02:00", "2012-04-02").empty
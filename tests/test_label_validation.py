@@ -67,4 +67,8 @@ def test_validate_data_labels():
     assert result["total_unique_labels"] == 3
     assert result["valid_labels"] == 2
     assert result["invalid_labels"] == 1
-    assert len(result["errors"]) > 0
\ No newline at end of file
+    assert len(result["errors"]) > 0
+
+    # Unlabelled rows, as stored in the database
+    result = validate_data_labels(pd.DataFrame({"label": ["RL06_12-03", "", None]}))
+    assert result["total_unique_labels"] == 1 and result["invalid_labels"] == 0
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.lazy_dataset import chunk_bounds, grid_times, lazy_dataset, place, time_grid
+
+
+def test_grid_and_daily_chunks():
+    first, n = time_grid("2012-03-01 12:00:02", "2012-03-03 01:00", cadence=5)
+    times = grid_times(first, n, 5)
+    assert times[0] == pd.Timestamp("2012-03-01 12:00:00") and times[-1] == pd.Timestamp("2012-03-03 01:00:00")
+    chunks = chunk_bounds(first, n, 5, 86400)
+    assert [times[lo] for lo, _ in chunks] == [pd.Timestamp("2012-03-01 12:00"), pd.Timestamp("2012-03-02"),
+                                               pd.Timestamp("2012-03-03")]
+    assert chunks[0][0] == 0 and chunks[-1][1] == n and all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    assert chunk_bounds(first, 0) == []
+
+
+def test_place_keeps_the_first_row_per_epoch():
+    # 104.9 lands on 105; of 110.2 and 110.0 the first row is kept; rows outside the chunk are dropped
+    df = pd.DataFrame({"timestamp": [90.0, 100.0, 104.9, 110.2, 110.0, 200.0], "postfit": [0.0, 1.0, 2.0, 3.0, 9.0, 4.0]})
+    out = place(df, first=100.0, lo=0, hi=4, cadence=5, columns=["postfit"])["postfit"]
+    np.testing.assert_array_equal(out, [1.0, 2.0, 3.0, np.nan])
+    shifted = place(df, first=100.0, lo=1, hi=3, cadence=5, columns=["postfit"])["postfit"]
+    np.testing.assert_array_equal(shifted, [2.0, 3.0])
+    assert np.isnan(place(df.iloc[:0], 100.0, 0, 2, 5, ["postfit"])["postfit"]).all()
+
+
+def test_selections_read_only_their_chunks():
+    pytest.importorskip("dask")
+    first, n = time_grid("2012-03-01", "2012-03-10 23:59:55", cadence=5)
+    calls = []
+
+    def reader(lo, hi):
+        calls.append((lo, hi))
+        return {"postfit": np.arange(lo, hi, dtype=float), "latitude_A": np.zeros(hi - lo)}
+
+    ds = lazy_dataset(reader, first, n, ["postfit"], ["latitude_A"], cadence=5, chunk_seconds=86400)
+    assert ds.sizes["time"] == 10 * 17280 and ds["postfit"].chunks == ((17280,) * 10,) and calls == []
+
+    day = ds.sel(time=slice("2012-03-04", "2012-03-04 23:59:59")).compute()
+    assert calls == [(3 * 17280, 4 * 17280)]  # one query for both the variable and the coordinate
+    assert day["postfit"].values[0] == 3 * 17280 and (day["latitude_A"] == 0).all()
@@ -0,0 +1,73 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.month_cache import cache_entries, entry_dir, evict, open_entry, read_manifest, to_dataframe, write_entry
+
+
+def month(label="RL06_12-03", n=1000, offset=0.0):
+    times = pd.date_range("2012-03-01", periods=n, freq="5s")
+    return pd.DataFrame({
+        "datetime": times,
+        "timestamp": (times - pd.Timestamp("2000-01-01")).total_seconds(),
+        "postfit": np.arange(n, dtype=float) + offset,
+        "adtrack_A": np.arange(n) % 2,
+        "label": label,
+        "variant": np.where(np.arange(n) % 3 == 0, "CSR_v1", "CSR_v2"),
+    })
+
+
+def test_roundtrip_is_memory_mapped(tmp_path):
+    df = month()
+    write_entry(tmp_path, "RL06", "RL06_12-03", df, "t1")
+    columns = open_entry(tmp_path, "RL06", "RL06_12-03")
+    assert isinstance(columns["postfit"], np.memmap) and not columns["postfit"].flags.writeable
+    assert isinstance(columns["variant"].codes, np.memmap)
+
+    cached = to_dataframe(columns)
+    assert np.shares_memory(cached["postfit"].to_numpy(), columns["postfit"])
+    assert np.shares_memory(cached["datetime"].to_numpy(), columns["datetime"])
+    pd.testing.assert_frame_equal(cached.astype({"label": object, "variant": object}), df)
+
+
+def test_stale_token_and_replacement(tmp_path):
+    write_entry(tmp_path, "RL06", "RL06_12-03", month(), "t1")
+    assert open_entry(tmp_path, "RL06", "RL06_12-03", "t2") is None
+    old = open_entry(tmp_path, "RL06", "RL06_12-03", "t1")
+
+    write_entry(tmp_path, "RL06", "RL06_12-03", month(offset=0.5), "t2")
+    new = open_entry(tmp_path, "RL06", "RL06_12-03", "t2")
+    assert new["postfit"][0] == 0.5
+    assert old["postfit"][0] == 0.0  # maps opened before the replacement stay valid
+    assert not [p for p in entry_dir(tmp_path, "RL06", "x").parent.iterdir() if p.name.startswith(".")]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    for i, label in enumerate(["RL06_12-03", "RL06_12-04", "RL06_12-05"]):
+        path = write_entry(tmp_path, "RL06", label, month(label), "t")
+        os.utime(path / "manifest.json", (1000 + i, 1000 + i))
+    open_entry(tmp_path, "RL06", "RL06_12-03")  # now the most recently used
+    size = read_manifest(entry_dir(tmp_path, "RL06", "RL06_12-03"))["nbytes"]
+
+    removed = evict(tmp_path, 2 * size)
+    assert removed == [str(entry_dir(tmp_path, "RL06", "RL06_12-04"))]
+    assert [e["label"] for e in cache_entries(tmp_path)] == ["RL06_12-05", "RL06_12-03"]
+    assert evict(tmp_path, 0, keep=(str(entry_dir(tmp_path, "RL06", "RL06_12-03")),)) == \
+        [str(entry_dir(tmp_path, "RL06", "RL06_12-05"))]
+
+
+@pytest.mark.benchmark
+def test_reopening_is_fast(tmp_path):
+    write_entry(tmp_path, "RL06", "RL06_12-03", month(n=200000), "t1")
+    start = time.perf_counter()
+    for _ in range(10):
+        df = to_dataframe(open_entry(tmp_path, "RL06", "RL06_12-03", "t1"))
+    assert len(df) == 200000
+    assert (time.perf_counter() - start) / 10 < 0.05
+
+
+@pytest.mark.parametrize("name", ["../RL06", "RL06/x", "..", ""])
+def test_entry_dir_stays_inside_the_cache(tmp_path, name):
+    assert entry_dir(tmp_path, name, name).parent.parent == tmp_path
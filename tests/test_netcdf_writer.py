@@ -0,0 +1,51 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from src.utils.netcdf_writer import append_netcdf, decode_flags, ORBIT_SAMPLES
+
+
+@pytest.fixture
+def query_result():
+    """One day of 5-second residuals for two labels sharing the same datetimes."""
+    times = pd.date_range("2012-03-31", periods=17280, freq="5s")
+    frames = []
+    for label in ["RL06_12-03", "RL06_12-04"]:
+        frames.append(pd.DataFrame({
+            "id": np.arange(len(times)),
+            "datetime": times,
+            "latitude_A": 89 * np.sin(np.linspace(0, 30, len(times))),
+            "longitude_A": np.linspace(-180, 180, len(times)),
+            "postfit": np.round(np.random.default_rng(0).normal(0, 1e-7, len(times)), 10),
+            "up_combined": 0.0,
+            "label": label,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_append_batches_with_duplicate_datetimes(tmp_path, query_result):
+    filename = str(tmp_path / "out.nc")
+    batch_size = len(query_result) // 4 + 1
+    for i in range(0, len(query_result), batch_size):
+        append_netcdf(query_result.iloc[i:i + batch_size], filename, mode="w" if i == 0 else "a")
+
+    with xr.open_dataset(filename, chunks={}) as ds:
+        assert ds.sizes["sample"] == len(query_result)
+        assert ds["postfit"].chunks is not None  # lazily loaded with dask
+        assert ds["postfit"].encoding["zlib"] and ds["postfit"].encoding["shuffle"]
+        assert ds["postfit"].encoding["chunksizes"] == (ORBIT_SAMPLES,)
+        np.testing.assert_array_equal(ds["datetime"].values, query_result["datetime"].values)
+        np.testing.assert_array_equal(decode_flags(ds["label"]), query_result["label"].values)
+
+
+def test_compressed_file_is_smaller_than_eager_export(tmp_path, query_result):
+    compressed = str(tmp_path / "compressed.nc")
+    eager = str(tmp_path / "eager.nc")
+    append_netcdf(query_result, compressed, mode="w")
+    # previous implementation of save_data (only possible for a single label: datetimes must be unique)
+    single = query_result[query_result["label"] == "RL06_12-03"].drop(columns="label")
+    single.set_index("datetime").to_xarray().to_netcdf(eager)
+
+    assert os.path.getsize(compressed) < os.path.getsize(eager)
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from src.utils.pagination import decode_token, encode_token, query_key
+
+
+def test_token_round_trip():
+    key = query_key(start_time="2012-03-01", end_time=None, polygon_coordinates=[(60.0, 10.0), (60.0, 30.0)])
+    token = encode_token(pd.Timestamp("2012-03-01 02:00:05.5"), 123456789, key)
+    assert token.replace("-", "").replace("_", "").isalnum()
+    assert decode_token(token, key) == (pd.Timestamp("2012-03-01 02:00:05.5"), 123456789)
+
+
+def test_query_key_normalizes_times():
+    assert query_key(start_time="2012-03-01", end_time=None) == query_key(start_time=pd.Timestamp("2012-03-01"), end_time=None)
+    assert query_key(start_time="2012-03-01", geodesic=False) != query_key(start_time="2012-03-01", geodesic=True)
+
+
+def test_tokens_of_other_queries_are_rejected():
+    token = encode_token("2012-03-01", 1, query_key(start_time="2012-03-01"))
+    with pytest.raises(ValueError, match="another query"):
+        decode_token(token, query_key(start_time="2012-03-02"))
+    for bad in ("", "not a token", token[:-3]):
+        with pytest.raises(ValueError, match="Invalid"):
+            decode_token(bad, query_key(start_time="2012-03-01"))
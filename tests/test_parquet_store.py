@@ -0,0 +1,94 @@
+import json
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from src.utils.parquet_store import write_partitioned, read_residuals, open_dataset, build_filter, month_windows
+
+
+@pytest.fixture
+def synthetic_dataset(tmp_path):
+    """Writes two labels of hourly data spanning March and April 2012."""
+    times = pd.date_range("2012-03-01", "2012-04-30 23:00", freq="h")
+    frames = []
+    for label in ["RL06_12-03", "RL06_12-04"]:
+        frames.append(pd.DataFrame({
+            "datetime": times,
+            "timestamp": (times - pd.Timestamp("2000-01-01")).total_seconds(),
+            "latitude_A": np.linspace(-80, 80, len(times)),
+            "longitude_A": np.linspace(-170, 170, len(times)),
+            "postfit": np.arange(len(times), dtype=float),
+            "label": label,
+            "release": "RL06",
+        }))
+    df = pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0)  # unsorted on purpose
+    write_partitioned(df, str(tmp_path), row_group_size=100)
+    return tmp_path, df
+
+
+def test_partition_layout_and_geoparquet_metadata(synthetic_dataset):
+    root, _ = synthetic_dataset
+    files = sorted(root.rglob("*.parquet"))
+    assert len(files) == 4  # 2 labels x 2 months
+    assert all("release=RL06" in str(f) for f in files)
+
+    f = files[0]
+    geo = json.loads(pq.read_schema(f).metadata[b"geo"])
+    assert geo["primary_column"] == "geometry"
+    assert geo["columns"]["geometry"]["encoding"] == "WKB"
+
+    table = pq.read_table(f)
+    times = table.column("datetime").to_pandas()
+    assert times.is_monotonic_increasing
+    assert pq.ParquetFile(f).metadata.row_group(0).column(0).statistics is not None
+
+
+def test_time_filter_prunes_partitions(synthetic_dataset):
+    root, df = synthetic_dataset
+    expr = build_filter("2012-03-10", "2012-03-11", labels=["RL06_12-03"])
+    fragments = list(open_dataset(str(root)).get_fragments(filter=expr))
+    assert len(fragments) == 1
+
+    result = read_residuals(str(root), "2012-03-10", "2012-03-11", labels=["RL06_12-03"])
+    assert len(result) == 25  # inclusive window of hourly data
+    assert result["datetime"].is_monotonic_increasing
+
+
+def test_polygon_filter_matches_pandas(synthetic_dataset):
+    root, df = synthetic_dataset
+    polygon = [(-10.0, -10.0), (-10.0, 10.0), (10.0, 10.0), (10.0, -10.0), (-10.0, -10.0)]
+    result = read_residuals(str(root), polygon_coordinates=polygon, columns=["datetime", "label", "postfit"])
+
+    expected = df[(df["longitude_A"].abs() < 10) & (df["latitude_A"].abs() < 10)]
+    assert len(result) == len(expected) > 0
+    assert list(result.columns) == ["datetime", "label", "postfit"]
+
+
+def export_window(df, root, start_time, end_time, partial_months=False):
+    """What scripts/export_parquet.py does, with 'df' in place of the table."""
+    for window_start, window_end, replace in month_windows(start_time, end_time, partial_months):
+        rows = df[(df["datetime"] >= window_start) & (df["datetime"] < window_end)]
+        write_partitioned(rows, str(root), row_group_size=100, replace=replace)
+
+
+def test_reexporting_a_sub_window_keeps_the_rest_of_the_month(synthetic_dataset):
+    root, df = synthetic_dataset
+    export_window(df, root, "2012-03-15", "2012-03-20")
+
+    march = read_residuals(str(root), "2012-03-01", "2012-03-31 23:00", labels=["RL06_12-03"])
+    assert len(march) == 31 * 24
+    assert march["datetime"].is_unique
+    assert len(read_residuals(str(root), labels=["RL06_12-04"])) == 61 * 24  # other partitions untouched
+
+
+def test_partial_months_only_add_rows(synthetic_dataset):
+    root, df = synthetic_dataset
+    assert month_windows("2012-02-01", "2012-03-20", partial_months=True) == [
+        (pd.Timestamp("2012-02-01"), pd.Timestamp("2012-03-01"), True),
+        (pd.Timestamp("2012-03-01"), pd.Timestamp("2012-03-20 00:00:00.000001"), False),
+    ]
+    export_window(df, root, "2012-03-15", "2012-03-20", partial_months=True)
+
+    march = read_residuals(str(root), "2012-03-01", "2012-03-31 23:00", labels=["RL06_12-03"])
+    assert len(march) == 31 * 24 + (5 * 24 + 1)  # the whole month, plus the inclusive sub-window added again
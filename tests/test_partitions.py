@@ -0,0 +1,40 @@
+import pytest
+
+from src.utils.partitions import (check_values, create_partition_sql, default_name, index_on, partition_check,
+                                  partition_name, sql_literal)
+
+
+def test_partition_names_are_short_distinct_and_stable():
+    names = {partition_name("kbr", release, label) for release, label in
+             [("RL06", None), ("RL06", "RL06_12-03"), ("RL06", "RL06_12_03"), ("rl06", None), ("", None), ("", "")]}
+    assert len(names) == 6
+    assert partition_name("kbr", "RL06", "RL06_12-03") == partition_name("kbr", "RL06", "RL06_12-03")
+    assert partition_name("kbr", "RL06").startswith("kbr_p_rl06_")
+    long = partition_name("k" * 40, "RL06" * 30, "RL06_12-03")
+    assert len(default_name("k" * 40, "RL06" * 30)) <= 63 and len(long + "_check") <= 63
+
+
+def test_bounds_are_quoted_and_read_back_from_constraints():
+    assert sql_literal("RL'06") == "'RL''06'"
+    assert partition_check("RL'06", "x") == "release = 'RL''06' AND label = 'x'"
+    definitions = ["CHECK (((release)::text = 'RL''06'::text))",
+                   "CHECK ((((release)::text = 'RL''06'::text) AND ((label)::text = 'RL06_12-03'::text)))"]
+    assert check_values(definitions) == {"release": "RL'06", "label": "RL06_12-03"}
+    assert check_values(definitions[:1]) == {"release": "RL'06"}
+
+
+def test_create_partition_sql():
+    release = create_partition_sql("kbr", "kbr_new", "RL06")
+    assert "PARTITION BY LIST (label)" in release[0] and release[-1].endswith("PARTITION OF kbr_new DEFAULT")
+    month = create_partition_sql("kbr", "kbr_new", "RL06", "RL06_12-03")
+    assert len(month) == 2 and "PARTITION" not in month[0]
+    assert month[1].endswith("CHECK (release = 'RL06' AND label = 'RL06_12-03')")
+
+
+def test_index_on_builds_the_same_index_on_another_table():
+    definition = 'CREATE INDEX ix_kbr_point_a ON ONLY public.kbr USING gist (st_setsrid(st_makepoint("longitude_A", "latitude_A"), 4326))'
+    assert index_on(definition, "kbr_new") == \
+        'CREATE INDEX ON kbr_new USING gist (st_setsrid(st_makepoint("longitude_A", "latitude_A"), 4326))'
+    assert index_on("CREATE UNIQUE INDEX u ON public.kbr USING btree (a, b)", "t") == "CREATE UNIQUE INDEX ON t USING btree (a, b)"
+    with pytest.raises(ValueError):
+        index_on("ALTER TABLE kbr", "t")
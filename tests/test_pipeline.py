@@ -0,0 +1,82 @@
+import logging
+import threading
+import time
+import pytest
+
+from src.utils.pipeline import run_pipeline, format_counters, log_counters
+
+
+def test_pipeline_keeps_order_and_overlaps_stages(caplog):
+    written = []
+    in_flight, peak, lock = 0, 0, threading.Lock()
+
+    def source():
+        for i in range(12):
+            yield list(range(i + 1))
+
+    def transform(item):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02 * (3 - len(item) % 3))  # later chunks finish first
+        with lock:
+            in_flight -= 1
+        return sum(item)
+
+    def sink(result):
+        time.sleep(0.02)
+        written.append(result)
+
+    start = time.perf_counter()
+    counters = run_pipeline(source(), transform, sink, workers=3, queue_size=4)
+    elapsed = time.perf_counter() - start
+
+    assert written == [sum(range(i + 1)) for i in range(12)]
+    assert peak > 1
+    assert counters["read"]["rows"] == counters["transform"]["rows"] == counters["write"]["rows"] == 78
+    assert counters["write"]["items"] == 12
+    # serial execution would take >= 12 * (0.02 + 0.04 on average)
+    assert elapsed < counters["transform"]["seconds"] + counters["write"]["seconds"]
+    assert "rows/s" in format_counters(counters)
+
+    with caplog.at_level(logging.INFO, logger="grace_db.ingestion"):
+        log_counters(counters)
+    assert [r.getMessage() for r in caplog.records] == [format_counters(counters)]
+
+
+def test_pipeline_bounds_read_ahead():
+    read = []
+
+    def source():
+        for i in range(50):
+            read.append(i)
+            yield [i]
+
+    def sink(result):
+        time.sleep(0.005)
+        assert len(read) <= result[0] + 1 + 4 + 1  # queue_size items ahead, plus one being read
+
+    run_pipeline(source(), lambda item: item, sink, workers=2, queue_size=4)
+    assert len(read) == 50
+
+
+@pytest.mark.parametrize("stage", ["read", "transform", "write"])
+def test_pipeline_propagates_errors(stage):
+    def source():
+        for i in range(100):
+            if stage == "read" and i == 5:
+                raise RuntimeError("read failed")
+            yield [i]
+
+    def transform(item):
+        if stage == "transform" and item[0] == 5:
+            raise RuntimeError("transform failed")
+        return item
+
+    def sink(result):
+        if stage == "write" and result[0] == 5:
+            raise RuntimeError("write failed")
+
+    with pytest.raises(RuntimeError, match=f"{stage} failed"):
+        run_pipeline(source(), transform, sink, workers=2, queue_size=2)
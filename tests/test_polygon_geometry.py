@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+import shapely
+
+from src.utils.utils import polygon_geometry
+
+
+@pytest.fixture
+def polar_orbit():
+    """Ground track of a near-polar (89 deg inclination) circular orbit over one day, sampled every 5 s."""
+    t = np.arange(0, 86400, 5.0)
+    inclination = np.radians(89.0)
+    u = 2 * np.pi * t / 5640.0                   # argument of latitude (~94 min period)
+    node = -2 * np.pi * t / 86164.0              # Earth rotation under the orbit
+    lat = np.degrees(np.arcsin(np.sin(inclination) * np.sin(u)))
+    lon = np.degrees(np.arctan2(np.cos(inclination) * np.sin(u), np.cos(u)) + node)
+    lon = (lon + 180) % 360 - 180
+    return lon, lat
+
+
+def test_plain_polygon_is_unchanged():
+    coordinates = [(71.44, 20.25), (71.44, 20.91), (71.48, 20.91), (71.48, 20.25), (71.44, 20.25)]
+    assert polygon_geometry(coordinates).equals(shapely.Polygon(coordinates))
+
+
+def test_antimeridian_polygon(polar_orbit):
+    lon, lat = polar_orbit
+    pacific = [(170, -10), (-170, -10), (-170, 10), (170, 10), (170, -10)]
+    geometry = polygon_geometry(pacific, antimeridian=True)
+
+    assert geometry.geom_type == "MultiPolygon"
+    inside = shapely.contains_xy(geometry, lon, lat)
+    expected = (np.abs(lon) > 170) & (np.abs(lat) < 10)
+    assert inside.sum() > 0
+    np.testing.assert_array_equal(inside, expected)
+
+
+@pytest.mark.parametrize("cap_latitude", [80.0, -75.0])
+def test_pole_enclosing_polygon(polar_orbit, cap_latitude):
+    lon, lat = polar_orbit
+    ring = [(float(l), cap_latitude) for l in np.arange(-180, 180, 30)]
+    cap = polygon_geometry(ring + [ring[0]], antimeridian=True)
+
+    inside = shapely.contains_xy(cap, lon, lat)
+    expected = lat > cap_latitude if cap_latitude > 0 else lat < cap_latitude
+    assert inside.sum() > 0
+    np.testing.assert_array_equal(inside, expected)
+
+
+def test_wide_polygon_is_not_unwrapped(polar_orbit):
+    lon, lat = polar_orbit
+    wide = [(-100, 0), (100, 0), (100, 10), (-100, 10), (-100, 0)]
+    geometry = polygon_geometry(wide)
+
+    assert geometry.equals(shapely.Polygon(wide)) and geometry.contains(shapely.Point(0, 5))
+    inside = shapely.contains_xy(geometry, lon, lat)
+    expected = (np.abs(lon) < 100) & (lat > 0) & (lat < 10)
+    assert inside.sum() > 0
+    np.testing.assert_array_equal(inside, expected)
+    # the same ring read across the antimeridian is the complement in longitude
+    assert not polygon_geometry(wide, antimeridian=True).contains(shapely.Point(0, 5))
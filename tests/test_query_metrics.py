@@ -0,0 +1,53 @@
+import json
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.utils import query_metrics
+from src.utils.query_metrics import plan_nodes, read_metrics, read_sql, recent, sql_shape, summarize
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine("sqlite://")
+    pd.DataFrame({"id": range(100), "postfit": [i / 10 for i in range(100)], "label": "RL06_12-03"}).to_sql("kbr", engine, index=False)
+    query_metrics.configure(str(tmp_path / "metrics.sqlite"))
+    yield engine
+    query_metrics.configure()
+
+
+def lookup(conn, low):
+    return read_sql(text("SELECT * FROM kbr WHERE id >= :low ORDER BY id"), conn, params={"low": low})
+
+
+def test_read_sql_matches_pandas_and_records_the_call(engine):
+    with engine.connect() as conn:
+        df = lookup(conn, 90)
+        expected = pd.read_sql_query(text("SELECT * FROM kbr WHERE id >= :low ORDER BY id"), conn, params={"low": 90})
+    pd.testing.assert_frame_equal(df, expected)
+
+    record = recent().iloc[-1]
+    assert record["name"] == "lookup" and record["rows"] == 10 and json.loads(record["params"]) == {"low": 90}
+    assert record["bytes"] > 0 and record["total_seconds"] >= record["db_seconds"] >= 0
+    assert record["shape"] == sql_shape("SELECT *  FROM kbr\n WHERE id >= :low ORDER BY id")
+
+
+def test_summary_groups_calls_by_shape(engine):
+    with engine.connect() as conn:
+        for low in range(5):
+            lookup(conn, low)
+        read_sql(text("SELECT COUNT(*) AS n FROM kbr"), conn)
+    records = read_metrics()
+    assert len(records) == 6
+    summary = summarize(records)
+    assert summary["total_seconds"].is_monotonic_decreasing
+    assert dict(zip(summary["name"], summary["calls"])) == {"lookup": 5, "test_summary_groups_calls_by_shape": 1}
+    assert summarize(records, top=1).shape[0] == 1
+    assert summarize(read_metrics(str(engine.url) + ".missing")).empty
+
+
+def test_plan_nodes():
+    plan = json.dumps([{"Plan": {"Node Type": "Sort", "Plans": [
+        {"Node Type": "Bitmap Heap Scan", "Relation Name": "kbr", "Plans": [{"Node Type": "Bitmap Index Scan"}]}]}}])
+    assert plan_nodes(plan) == "Sort > Bitmap Heap Scan on kbr > Bitmap Index Scan"
+    assert plan_nodes(None) == ""
@@ -0,0 +1,63 @@
+import pytest
+import geopandas as gpd
+from shapely.geometry import Polygon, MultiPolygon, Point
+
+from src.utils.regions import load_regions, check_region_validity
+
+BASIN_A = [(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)]
+BASIN_B = [(20, 20), (20, 30), (30, 30), (30, 20), (20, 20)]
+
+
+@pytest.fixture
+def feature_collection():
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": {"basin": "A"},
+             "geometry": {"type": "Polygon", "coordinates": [BASIN_A]}},
+            {"type": "Feature", "properties": {"basin": "B"},
+             "geometry": {"type": "MultiPolygon", "coordinates": [[BASIN_B], [[(40, 40), (40, 45), (45, 45), (40, 40)]]]}},
+        ],
+    }
+
+
+def test_load_regions_from_feature_collection(feature_collection):
+    gdf = load_regions(feature_collection, id_column="basin")
+    assert list(gdf["region_id"]) == ["A", "B"]
+    assert gdf.crs.to_epsg() == 4326
+    assert gdf.geometry.iloc[1].geom_type == "MultiPolygon"
+
+
+def test_load_regions_from_file(tmp_path, feature_collection):
+    path = tmp_path / "basins.geojson"
+    gpd.GeoDataFrame.from_features(feature_collection, crs="EPSG:4326").to_file(path, driver="GeoJSON")
+    gdf = load_regions(str(path))
+    assert list(gdf["region_id"]) == ["0", "1"]
+
+
+def test_check_region_validity():
+    assert check_region_validity(MultiPolygon([Polygon(BASIN_A), Polygon(BASIN_B)]))
+
+    with pytest.raises(ValueError):
+        check_region_validity(Point(0, 0))
+    with pytest.raises(ValueError):
+        check_region_validity(Polygon([(0, 0), (10, 10), (10, 0), (0, 10), (0, 0)]))  # self-intersecting
+    with pytest.raises(ValueError):
+        check_region_validity(Polygon([(170, 0), (190, 0), (190, 10), (170, 0)]))  # longitude > 180
+
+
+def test_duplicate_region_ids_are_rejected(feature_collection):
+    feature_collection["features"][1]["properties"]["basin"] = "A"
+    with pytest.raises(ValueError):
+        load_regions(feature_collection, id_column="basin")
+
+
+def test_empty_regions_are_rejected(tmp_path, feature_collection):
+    empty = {"type": "FeatureCollection", "features": []}
+    with pytest.raises(ValueError, match="No regions"):
+        load_regions(empty)
+
+    path = tmp_path / "regions.geojson"
+    gpd.GeoDataFrame.from_features(feature_collection, crs="EPSG:4326").iloc[:0].to_file(path, driver="GeoJSON")
+    with pytest.raises(ValueError, match="No regions"):
+        load_regions(str(path))
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import text
+from src.machinery import getenv
+from src.utils.partitions import archive_schema, partition_name
+from scripts.populate_db import append_dataframe
+from scripts.catalog import read_catalog
+from scripts.releases import archive, drop, list_partitions, restore, swap
+from tests.conftest import TEST_RELEASE, count_rows, synthetic_month
+
+
+def test_loads_land_in_month_partitions_and_drop_is_instant(engine, clean_release):
+    append_dataframe(synthetic_month(1000), engine)
+    append_dataframe(synthetic_month(1000, label="RL99_02-04"), engine)
+    partitions = list_partitions(engine)
+    months = partitions[(partitions["release"] == TEST_RELEASE) & partitions["label"].notna()]
+    assert sorted(months["label"]) == ["RL99_02-03", "RL99_02-04"] and set(months["status"]) == {"attached"}
+
+    counts = drop(engine, TEST_RELEASE, "RL99_02-03")
+    assert counts["partition"] == partition_name(getenv("TABLE_NAME"), TEST_RELEASE, "RL99_02-03")
+    assert counts["default_rows"] == 0 and counts["catalog"] == 1
+    assert count_rows(engine, label="RL99_02-03") == 0 and count_rows(engine, label="RL99_02-04") == 1000
+    assert set(read_catalog(engine, releases=[TEST_RELEASE])["label"]) == {"RL99_02-04"}
+
+
+def test_archive_and_restore(engine, clean_release):
+    append_dataframe(synthetic_month(1000), engine)
+    archived = archive(engine, TEST_RELEASE, "RL99_02-03")
+    assert archived.startswith(archive_schema(getenv("TABLE_NAME")) + ".")
+    assert count_rows(engine) == 0 and read_catalog(engine, releases=[TEST_RELEASE]).empty
+
+    restore(engine, TEST_RELEASE, "RL99_02-03")
+    assert count_rows(engine, label="RL99_02-03") == 1000
+    assert read_catalog(engine, releases=[TEST_RELEASE])["rows"].tolist() == [1000]
+
+
+def test_swap_replaces_a_month_atomically(engine, clean_release):
+    append_dataframe(synthetic_month(1000), engine)
+    append_dataframe(synthetic_month(1000, label="RL99_02-04"), engine)
+    frames = [("a.pkl", synthetic_month(600, offset=1.0)), ("b.pkl", synthetic_month(600, offset=1.0))]
+    reports, counts, timings = swap(frames, engine, TEST_RELEASE, "RL99_02-03", archive_old=True)
+    assert counts == {"inserted": 600, "skipped": 600} and "swap" in timings
+    assert count_rows(engine, label="RL99_02-03") == 600 and count_rows(engine, label="RL99_02-04") == 1000
+    with engine.connect() as conn:
+        assert conn.execute(text(f"SELECT MIN(up_combined) FROM {getenv('TABLE_NAME')} WHERE release = :r AND label = :l"),
+                            {"r": TEST_RELEASE, "l": "RL99_02-03"}).scalar() == 1.0
+        # the replaced rows are archived, and the natural key constraint holds on the new partition
+        archived = f"{archive_schema(getenv('TABLE_NAME'))}.{partition_name(getenv('TABLE_NAME'), TEST_RELEASE, 'RL99_02-03')}"
+        assert conn.execute(text(f"SELECT COUNT(*) FROM {archived}")).scalar() == 1000
+    with pytest.raises(Exception):
+        append_dataframe(synthetic_month(10, offset=2.0), engine)
+    catalog = read_catalog(engine, releases=[TEST_RELEASE])
+    assert dict(zip(catalog["label"], catalog["rows"])) == {"RL99_02-03": 600, "RL99_02-04": 1000}
+
+    with pytest.raises(ValueError):
+        swap([("c.pkl", synthetic_month(10, label="RL99_02-05"))], engine, TEST_RELEASE, "RL99_02-03")
+    assert count_rows(engine, label="RL99_02-03") == 600
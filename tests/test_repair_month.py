@@ -1,7 +1,7 @@
 import pytest
 import pandas as pd
 
-from src.utils.repair_month import repair_month  # adjust this import path
+from src.utils.repair_month import repair_month, plan_borrowed_ranges, apply_borrowed_ranges  # adjust this import path
 
 @pytest.fixture
 def synthetic_dataframes_with_gap():
@@ -50,3 +50,37 @@ def test_repair_month_from_dataframes(synthetic_dataframes_with_gap):
     expected_borrowed = int(gap_seconds / 5)
 
     assert len
+
+
+def test_borrowed_ranges_resolve_to_repaired_month(synthetic_dataframes_with_gap):
+    df_march, df_april = synthetic_dataframes_with_gap
+
+    ranges = plan_borrowed_ranges(df_march, df_april, time_column="datetime", interval_seconds=5)
+    assert len(ranges) == 1  # a single gap borrowed from a contiguous source
+    assert ranges["n_samples"].sum() == len(repair_month(df_march, df_april)) - len(df_march)
+
+    resolved = pd.concat([df_march.assign(borrowed=False), apply_borrowed_ranges(df_april, ranges)], ignore_index=True)
+    resolved = resolved.sort_values("datetime").reset_index(drop=True)
+    pd.testing.assert_frame_equal(resolved, repair_month(df_march, df_april))
+
+
+def test_borrowed_ranges_split_on_source_gaps(synthetic_dataframes_with_gap):
+    df_march, df_april = synthetic_dataframes_with_gap
+    df_april = df_april.drop(index=[100, 101])  # the source is not contiguous either
+
+    ranges = plan_borrowed_ranges(df_march, df_april)
+    assert len(ranges) == 2
+    resolved = pd.concat([df_march.assign(borrowed=False), apply_borrowed_ranges(df_april, ranges)], ignore_index=True)
+    pd.testing.assert_frame_equal(resolved.sort_values("datetime").reset_index(drop=True), repair_month(df_march, df_april))
+
+
+def test_overlapping_borrowed_ranges_resolve_once(synthetic_dataframes_with_gap):
+    df_march, df_april = synthetic_dataframes_with_gap
+
+    ranges = plan_borrowed_ranges(df_march, df_april)
+    overlapping = pd.concat([ranges, ranges.assign(source_start=ranges["source_start"] + pd.Timedelta("5s"),
+                                                   source_end=ranges["source_end"] + pd.Timedelta("5s"))],
+                            ignore_index=True)
+    resolved = pd.concat([df_march.assign(borrowed=False), apply_borrowed_ranges(df_april, overlapping)], ignore_index=True)
+    assert not resolved["datetime"].duplicated().any()
+    pd.testing.assert_frame_equal(resolved.sort_values("datetime").reset_index(drop=True), repair_month(df_march, df_april))
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from src.utils.sketches import (RELATIVE_ACCURACY, bin_index, bin_value, describe, histogram, merge, quantiles,
+                                sketch, whole_days)
+
+
+def residuals(n=100000, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.r_[rng.normal(2e-9, 3e-8, n), rng.standard_t(3, n // 10) * 1e-7, 0.0]
+
+
+def test_quantiles_are_within_relative_accuracy():
+    values = residuals()
+    qs = [0, 0.001, 0.01, 0.25, 0.5, 0.75, 0.99, 0.999, 1]
+    estimates = quantiles(sketch(values), qs)
+    exact = np.quantile(values, qs, method="lower")
+    assert np.all(np.abs(estimates - exact) <= RELATIVE_ACCURACY * np.abs(exact) + 1e-15)
+    assert estimates[0] == values.min() and estimates[-1] == values.max()
+
+
+def test_bins_are_ordered_like_values():
+    values = np.sort(residuals(1000))
+    assert np.all(np.diff(bin_index(values)) >= 0)
+    representative = bin_value(bin_index(values))
+    nonzero = np.abs(values) >= 1e-15
+    assert np.all(np.abs(representative[nonzero] - values[nonzero]) <= RELATIVE_ACCURACY * np.abs(values[nonzero]))
+
+
+def test_daily_sketches_merge_into_the_sketch_of_the_window():
+    values = residuals()
+    days = np.array_split(values, 7)
+    merged = merge(sketch(day) for day in days)
+    whole = sketch(values)
+    assert merged["bin"].tolist() == whole["bin"].tolist()
+    assert merged["count"].tolist() == whole["count"].tolist()
+    np.testing.assert_allclose(merged["total"], whole["total"], rtol=1e-9, atol=1e-20)
+
+    stats = describe(merged.assign(day=0), by=["day"], qs=(0.5,))
+    assert stats.loc[0, "count"] == len(values)
+    np.testing.assert_allclose(stats.loc[0, ["mean", "std"]].astype(float), [values.mean(), values.std(ddof=1)], rtol=1e-6)
+    assert list(stats.columns) == ["day", "count", "mean", "std", "min", "max", "q50"]
+
+
+def test_histogram_counts_every_value():
+    values = residuals()
+    edges = np.linspace(values.min(), values.max(), 21)
+    counts = histogram(sketch(values), edges)
+    exact, _ = np.histogram(values, edges)
+    assert counts.sum() == len(values)
+    assert np.abs(counts - exact).max() <= 0.02 * exact.max()
+
+
+def test_whole_days_of_a_window():
+    assert whole_days("2012-01-15 12:00", "2012-03-31 00:00") == (pd.Timestamp("2012-01-16"), pd.Timestamp("2012-03-31"))
+    assert whole_days("2012-01-01", "2012-01-01 23:59:55") is None
+    assert whole_days(None, "2012-02-01") == (None, pd.Timestamp("2012-02-01"))
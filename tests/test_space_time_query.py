@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import pytest
+import geopandas as gpd
+from shapely.geometry import Polygon
+
+from scripts.space_time_query import (
+    query_satellite_data_within_polygon,
+    query_satellite_data_by_regions,
+    query_satellite_data_within_radius,
+    query_satellite_data_by_time,
+    query_satellite_data_parallel,
+    query_nearest_neighbours,
+    query_along_track,
+    query_downsampled,
+)
+
+START_TIME = pd.to_datetime("2010-02-28T22:00:00")
+END_TIME = pd.to_datetime("2012-10-01T00:00:00")
+POLYGONS = {
+    "small": [(71.44, 20.25), (71.44, 20.91), (71.48, 20.91), (71.48, 20.25), (71.44, 20.25)],
+    "large": [(60.0, 10.0), (60.0, 30.0), (80.0, 30.0), (80.0, 10.0), (60.0, 10.0)],
+}
+
+
+def test_batch_region_query_matches_single_polygon_queries():
+    regions = gpd.GeoDataFrame({"name": list(POLYGONS)}, geometry=[Polygon(p) for p in POLYGONS.values()], crs="EPSG:4326")
+
+    batch = query_satellite_data_by_regions(regions, START_TIME, END_TIME, id_column="name")
+    for name, polygon in POLYGONS.items():
+        single = query_satellite_data_within_polygon(START_TIME, END_TIME, polygon)
+        assert sorted(batch.loc[batch["region_id"] == name, "id"]) == sorted(single["id"])
+
+    stats = query_satellite_data_by_regions(regions, START_TIME, END_TIME, id_column="name", aggregate=True)
+    assert dict(zip(stats["region_id"], stats["n"])) == batch.groupby("region_id").size().reindex(list(POLYGONS), fill_value=0).to_dict()
+
+
+def test_antimeridian_polygon_matches_split_polygons():
+    crossing = [(170.0, -30.0), (-170.0, -30.0), (-170.0, 30.0), (170.0, 30.0), (170.0, -30.0)]
+    east = [(170.0, -30.0), (180.0, -30.0), (180.0, 30.0), (170.0, 30.0), (170.0, -30.0)]
+    west = [(-180.0, -30.0), (-170.0, -30.0), (-170.0, 30.0), (-180.0, 30.0), (-180.0, -30.0)]
+
+    df = query_satellite_data_within_polygon(START_TIME, END_TIME, crossing, antimeridian=True)
+    split = pd.concat([query_satellite_data_within_polygon(START_TIME, END_TIME, p) for p in (east, west)])
+    assert sorted(df["id"]) == sorted(split["id"].unique())
+    assert (df["longitude_A"].abs() >= 170).all()
+
+
+def test_radius_query_uses_geodesic_distance():
+    lon, lat, radius_km = 179.5, 75.0, 500.0  # across the antimeridian, close to the pole
+    df = query_satellite_data_within_radius(lon, lat, radius_km, START_TIME, END_TIME)
+
+    # haversine distance on a sphere agrees with the WGS84 geodesic to well within 1%
+    phi1, phi2 = np.radians(lat), np.radians(df["latitude_A"])
+    dphi, dlmb = phi2 - phi1, np.radians(df["longitude_A"] - lon)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    haversine_km = 2 * 6371.0 * np.arcsin(np.sqrt(a))
+    assert (df["distance_km"] <= radius_km).all()
+    np.testing.assert_allclose(df["distance_km"], haversine_km, rtol=1e-2)
+
+
+def test_parallel_query_matches_single_query():
+    serial = query_satellite_data_within_polygon(START_TIME, END_TIME, POLYGONS["large"])
+    parallel = query_satellite_data_parallel(START_TIME, END_TIME, POLYGONS["large"], max_workers=4)
+    assert list(parallel["id"]) == list(serial["id"])  # same rows, same (time) order
+    assert parallel["datetime"].is_monotonic_increasing
+
+    serial = query_satellite_data_by_time(START_TIME, START_TIME + pd.Timedelta(days=45))
+    parallel = query_satellite_data_parallel(START_TIME, START_TIME + pd.Timedelta(days=45), freq="7D", max_workers=3)
+    assert sorted(parallel["id"]) == sorted(serial["id"])
+
+
+def test_nearest_neighbours_match_radius_query():
+    lon, lat = 179.5, 75.0
+    nearest = query_nearest_neighbours(lon, lat, 20, START_TIME, END_TIME)
+    assert len(nearest) == 20 and nearest["distance_km"].is_monotonic_increasing
+
+    # every record within the distance of the 20th neighbour is one of the 20
+    within = query_satellite_data_within_radius(lon, lat, nearest["distance_km"].iloc[-1] - 1e-3, START_TIME, END_TIME)
+    assert set(within["id"]) <= set(nearest["id"])
+
+
+def test_along_track_window_is_centered_on_the_closest_approach():
+    lon, lat, minutes = 71.46, 20.5, 10
+    df = query_along_track(lon, lat, minutes, passes=2, start_time=START_TIME, end_time=END_TIME)
+    assert 1 <= df["anchor_id"].nunique() <= 2
+    closest = query_nearest_neighbours(lon, lat, 1, START_TIME, END_TIME)
+    first = df[df["anchor_id"] == df["anchor_id"].iloc[0]]
+    assert first["anchor_id"].iloc[0] == closest["id"].iloc[0]
+    assert first["dt_seconds"].abs().max() <= minutes * 60
+    assert (first["dt_seconds"] == 0).sum() == 1
+
+
+def test_downsampled_series_keeps_the_extremes():
+    end_time, width = START_TIME + pd.Timedelta(days=3), 200
+    full = query_satellite_data_by_time(START_TIME, end_time).dropna(subset=["postfit"])
+    m4 = query_downsampled(START_TIME, end_time, width)
+    series = m4.groupby(["release", "variant"]).ngroups
+    assert len(m4) <= 4 * width * max(series, 1)
+    if not full.empty:
+        assert m4["postfit"].max() == full["postfit"].max() and m4["postfit"].min() == full["postfit"].min()
+        assert m4["datetime"].min() == full["datetime"].min()
+    lttb = query_downsampled(START_TIME, end_time, width, method="lttb")
+    assert len(lttb) <= width * max(series, 1) and set(lttb["datetime"]) <= set(m4["datetime"])
+
+
+def test_slow_queries_are_recorded_with_their_plan(tmp_path):
+    from src.utils import query_metrics
+    query_metrics.configure(str(tmp_path / "metrics.sqlite"), explain_seconds=0.0)
+    try:
+        query_satellite_data_by_time(START_TIME, START_TIME + pd.Timedelta(hours=6))
+    finally:
+        query_metrics.configure()
+    record = query_metrics.read_metrics(str(tmp_path / "metrics.sqlite")).iloc[-1]
+    assert record["name"] == "query_satellite_data_by_time"
+    assert "Scan" in query_metrics.plan_nodes(record["plan"])
+
+
+def test_lazy_dataset_reads_the_selected_day():
+    pytest.importorskip("dask")
+    from src.models import get_engine
+    from scripts.catalog import read_catalog
+    from scripts.lazy_dataset import open_grace_dataset
+    catalog = read_catalog(get_engine())
+    if catalog.empty:
+        pytest.skip("no data stored")
+    entry = catalog.iloc[0]
+    ds = open_grace_dataset(entry["release"], entry["label"], ["postfit"], entry["variant"], chunk="6h")
+    assert ds["postfit"].chunks[0][0] <= 6 * 720
+    day = ds.isel(time=slice(0, 17280)).compute()
+    stored = query_satellite_data_by_time(day["time"].values[0], day["time"].values[-1])
+    assert 0 < int(day["postfit"].notnull().sum()) <= len(stored)
+
+
+def test_tiles_are_cached_until_the_data_changes(tmp_path):
+    from src.models import get_engine
+    from scripts.catalog import catalog_version
+    from scripts.tiles import get_tile
+    from src.utils.tiles import read_tile, request_key
+    version = catalog_version(get_engine(), ["TRUE"], {})
+    if version is None:
+        pytest.skip("no data stored")
+    world = get_tile(0, 0, 0, root=str(tmp_path))
+    assert world and get_tile(0, 0, 0, root=str(tmp_path)) == world
+    assert read_tile(tmp_path, 0, 0, 0, request_key(), version) == world
+    assert read_tile(tmp_path, 0, 0, 0, request_key(), "another version") is None
+    assert isinstance(get_tile(9, 350, 200, start_time=START_TIME, end_time=END_TIME, root=str(tmp_path)), bytes)
+
+
+def test_pages_walk_the_combined_query_in_order():
+    from scripts.space_time_query import iter_pages, query_page
+    serial = query_satellite_data_within_polygon(START_TIME, END_TIME, POLYGONS["large"])
+    pages = list(iter_pages(START_TIME, END_TIME, POLYGONS["large"], page_size=1000))
+    assert pages[-1][1] is None and all(token for _, token in pages[:-1])
+    assert all(len(df) == 1000 for df, _ in pages[:-1])
+    df = pd.concat([df for df, _ in pages], ignore_index=True)
+    assert sorted(df["id"]) == sorted(serial["id"]) and df["datetime"].is_monotonic_increasing
+    if len(pages) > 1:
+        with pytest.raises(ValueError):
+            query_page(START_TIME, END_TIME, page_token=pages[0][1], page_size=1000)
+
+
+def test_page_size_must_be_positive():
+    from scripts.space_time_query import query_page
+    for page_size in (0, -5):
+        with pytest.raises(ValueError, match="page_size"):
+            query_page(START_TIME, END_TIME, page_size=page_size)
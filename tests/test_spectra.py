@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.spectra import arc_ids, arc_table, butterworth_gain, filter_columns, psd_dataset, welch_psd, zero_phase_filter
+
+FS = 0.2
+LENGTHS = [540, 1000, 300, 100, 2000]
+
+
+@pytest.fixture
+def arcs():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.normal(size=n) + np.sin(2 * np.pi * 0.01 * np.arange(n) / FS) for n in LENGTHS])
+    return values, np.repeat(np.arange(len(LENGTHS)), LENGTHS)
+
+
+def test_arc_ids_split_on_groups_gaps_and_track_changes():
+    df = pd.DataFrame({
+        "label": ["a"] * 6 + ["b"] * 2,
+        "timestamp": [0, 5, 10, 30, 35, 40, 40, 45],  # gap after 10
+        "adtrack_A": [1, 1, 1, 1, 0, 0, 0, 0],  # track change after 35
+        "datetime": pd.date_range("2012-03-01", periods=8, freq="5s"),
+    })
+    ids = arc_ids(df)
+    assert ids.tolist() == [0, 0, 0, 1, 2, 2, 3, 3]
+    assert arc_table(df, ids)["n_samples"].tolist() == [3, 1, 2, 2]
+
+
+def test_welch_matches_scipy(arcs):
+    signal = pytest.importorskip("scipy.signal")
+    values, ids = arcs
+    for nperseg in (256, 255):
+        freqs, psd, counts = welch_psd(values, ids, FS, nperseg)
+        start = 0
+        for arc, n in enumerate(LENGTHS):
+            if n < nperseg:
+                assert counts[arc] == 0 and np.isnan(psd[arc]).all()
+            else:
+                expected_freqs, expected = signal.welch(values[start:start + n], FS, nperseg=nperseg)
+                np.testing.assert_allclose(freqs, expected_freqs)
+                np.testing.assert_allclose(psd[arc], expected)
+            start += n
+
+
+def test_welch_finds_the_sine_and_integrates_to_the_variance(arcs):
+    values, ids = arcs
+    freqs, psd, counts = welch_psd(values, ids, FS, 256)
+    assert freqs[np.nanargmax(psd[4])] == pytest.approx(0.01, abs=freqs[1])
+    white = np.random.default_rng(1).normal(size=20000)
+    _, psd, _ = welch_psd(white, np.zeros(len(white)), FS, 256)
+    assert np.sum(psd[0]) * FS / 256 == pytest.approx(1.0, rel=0.05)
+
+    ds = psd_dataset(pd.DataFrame({"n_samples": LENGTHS}), freqs, welch_psd(values, ids, FS, 256)[1], counts, "postfit")
+    assert ds["psd"].shape == (len(LENGTHS), len(freqs)) and not np.isnan(ds["mean_psd"]).any()
+
+
+def test_zero_phase_filter(arcs):
+    values, ids = arcs
+    low = zero_phase_filter(values, ids, FS, high_cut=0.02)  # keeps the 0.01 Hz sine, removes most noise
+    start = 540
+    sine = np.sin(2 * np.pi * 0.01 * np.arange(1000) / FS)
+    residual = low[start:start + 1000][100:-100] - sine[100:-100]
+    assert np.std(residual) < 0.5 * np.std(values[start:start + 1000] - sine)
+    assert np.argmax(np.correlate(low[start:start + 1000], sine, "full")) == 999  # no phase shift
+
+    high = zero_phase_filter(values, ids, FS, low_cut=0.05)
+    np.testing.assert_allclose(butterworth_gain([0.0, 0.05, 1.0], low_cut=0.05), [0.0, 0.5, 1.0], atol=1e-9)
+    assert np.abs(np.fft.rfft(high[start:start + 1000]))[50] < 0.05 * np.abs(np.fft.rfft(values[start:start + 1000]))[50]
+
+    with_gap = values.copy()
+    with_gap[600] = np.nan
+    assert np.isnan(zero_phase_filter(with_gap, ids, FS, high_cut=0.02)[600])
+    with pytest.raises(ValueError):
+        zero_phase_filter(values, ids, FS)
+
+
+def test_filter_columns_filters_each_arc_separately():
+    df = pd.DataFrame({"label": ["a"] * 300 + ["b"] * 300, "timestamp": np.r_[np.arange(300), np.arange(300)] * 5.0,
+                       "postfit": np.r_[np.zeros(300), np.ones(300)]})
+    out = filter_columns(df, ["postfit"], high_cut=0.02)
+    np.testing.assert_allclose(out["postfit_filtered"], df["postfit"], atol=1e-9)  # no leakage between arcs
+    assert out["arc"].tolist() == [0] * 300 + [1] * 300
@@ -0,0 +1,90 @@
+import os
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from scripts import tiles
+from src.utils.tiles import (FILTERED_ZOOM, MAX_LATITUDE, WORLD, cell_size, check_filters, evict, lonlat_bounds,
+                             read_tile, request_key, tile_bounds, tile_path, write_tile)
+
+
+def test_tile_bounds():
+    assert tile_bounds(0, 0, 0) == (-WORLD, -WORLD, WORLD, WORLD)
+    xmin, ymin, xmax, ymax = tile_bounds(1, 1, 0)  # north-east quarter
+    assert (xmin, ymin, xmax) == (0, 0, WORLD) and ymax == pytest.approx(WORLD)
+    assert lonlat_bounds(1, 1, 0, buffer=0) == pytest.approx((0, 0, 180, MAX_LATITUDE))
+    west, south, _, north = lonlat_bounds(2, 0, 1)  # buffered, clipped at the edges of the square
+    assert west == pytest.approx(-180) and south < 0 < north < MAX_LATITUDE
+    with pytest.raises(ValueError):
+        tile_bounds(2, 4, 0)
+    assert cell_size(0) == pytest.approx(2 * WORLD / 32) and cell_size(12) is None
+
+
+def test_request_key():
+    assert request_key(["b", "a"], "2012-03-01") == request_key(["a", "b", "a"], "2012-03-01T00:00:00")
+    assert request_key(["a"]) != request_key(["a"], end_time="2012-03-01")
+
+
+def test_low_zoom_tiles_need_filters():
+    with pytest.raises(ValueError, match="need a label"):
+        check_filters(0)
+    with pytest.raises(ValueError):
+        check_filters(FILTERED_ZOOM - 1, start_time="2012-03-01")
+    with pytest.raises(ValueError):
+        check_filters(3, start_time="2012-01-01", end_time="2012-03-01")
+    check_filters(0, labels=["RL06_12-03"])
+    check_filters(3, start_time="2012-03-01", end_time="2012-04-01")
+    check_filters(FILTERED_ZOOM)
+    with pytest.raises(ValueError):  # refused before any query
+        tiles.get_tile(0, 0, 0, engine=object())
+
+
+def test_handler_maps_errors_to_status_codes(monkeypatch):
+    def get_tile(z, x, y, **kwargs):
+        if z == 1:
+            raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+        check_filters(z, kwargs["labels"], kwargs["start_time"], kwargs["end_time"])
+        return b"tile"
+
+    monkeypatch.setattr(tiles, "get_tile", get_tile)
+    monkeypatch.setattr(tiles.TileHandler, "log_message", lambda *args: None)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), tiles.TileHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        assert urllib.request.urlopen(f"{url}/0/0/0.mvt?label=RL06_12-03").read() == b"tile"
+        for path, status in (("/0/0/0.mvt", 400), ("/1/0/0.mvt?label=RL06_12-03", 503), ("/0/0.mvt", 404)):
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(url + path)
+            assert error.value.code == status
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_new_data_version_replaces_the_tile(tmp_path):
+    key = request_key(["RL06_12-03"])
+    write_tile(tmp_path, 3, 4, 2, key, "v1", b"old")
+    write_tile(tmp_path, 3, 4, 2, request_key(), "v1", b"all")
+    assert read_tile(tmp_path, 3, 4, 2, key, "v1") == b"old"
+    assert read_tile(tmp_path, 3, 4, 2, key, "v2") is None
+
+    write_tile(tmp_path, 3, 4, 2, key, "v2", b"new")
+    assert read_tile(tmp_path, 3, 4, 2, key, "v2") == b"new"
+    assert sorted(p.name for p in tile_path(tmp_path, 3, 4, 2, key, "v2").parent.iterdir()) == sorted(
+        [tile_path(tmp_path, 3, 4, 2, key, "v2").name, tile_path(tmp_path, 3, 4, 2, request_key(), "v1").name])
+
+
+def test_evicts_least_recently_used(tmp_path):
+    key = request_key()
+    for i in range(3):
+        path = write_tile(tmp_path, 2, i, 0, key, "v", bytes(100))
+        os.utime(path, (1000 + i, 1000 + i))
+    assert read_tile(tmp_path, 2, 0, 0, key, "v") is not None  # now the most recently used
+    removed = evict(tmp_path, 200)
+    assert removed == [str(tile_path(tmp_path, 2, 1, 0, key, "v"))]
+    assert evict(tmp_path, 0) and not list(tmp_path.glob("*/*/*/*.mvt"))
@@ -0,0 +1,133 @@
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import text
+from src.machinery import getenv
+from scripts.populate_db import upsert_dataframe, copy_pipelined, bulk_load, secondary_indexes, append_dataframe
+from scripts.catalog import read_catalog, refresh_catalog
+from src.utils.catalog import catalog_groups
+from scripts.residual_stats import residual_distribution
+from tests.conftest import TEST_RELEASE, count_rows, synthetic_month
+
+BENCH_ROWS = int(os.getenv("BENCH_ROWS", "500000"))  # a month of 5-second data is ~535k rows
+
+logger = logging.getLogger(__name__)
+
+
+def test_upsert_is_idempotent_and_updates(engine, clean_release):
+    df = synthetic_month(1000)
+    _, counts = upsert_dataframe(df, engine)
+    assert counts["inserted"] == 1000
+
+    _, counts = upsert_dataframe(synthetic_month(1000, offset=1.0), engine)
+    assert counts == {"inserted": 0, "updated": 1000, "deleted": 0}
+    assert count_rows(engine, label="RL99_02-03") == 1000
+    assert count_rows(engine, label="RL99_02-03", up_combined=1.0) == 1000
+
+
+def test_replace_drops_rows_missing_from_redelivery(engine, clean_release):
+    upsert_dataframe(synthetic_month(1000), engine)
+    upsert_dataframe(synthetic_month(1000, label="RL99_02-04"), engine)
+
+    _, counts = upsert_dataframe(synthetic_month(600), engine, replace=True)
+    assert counts["deleted"] == 400
+    assert count_rows(engine, label="RL99_02-03") == 600
+    assert count_rows(engine, label="RL99_02-04") == 1000  # other labels are untouched
+
+
+@pytest.mark.benchmark
+def test_benchmark_month_replacement(engine, clean_release):
+    """
+    Replacing a full month: delete-then-insert vs. upsert, both COPYing the rows in one transaction and
+    refreshing the catalog. Timings are logged (pytest -m benchmark --log-cli-level=INFO).
+    """
+    df = synthetic_month(BENCH_ROWS)
+    upsert_dataframe(df, engine)
+
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {getenv('TABLE_NAME')} WHERE release = :release AND label = :label"),
+                     {"release": TEST_RELEASE, "label": "RL99_02-03"})
+        copy_pipelined([(None, df)], conn, getenv("TABLE_NAME"))
+    refresh_catalog(engine, catalog_groups(df))
+    delete_insert_seconds = time.perf_counter() - start
+    assert count_rows(engine, label="RL99_02-03") == BENCH_ROWS
+
+    start = time.perf_counter()
+    _, counts = upsert_dataframe(synthetic_month(BENCH_ROWS, offset=1.0), engine, replace=True)
+    upsert_seconds = time.perf_counter() - start
+    assert counts == {"inserted": 0, "updated": BENCH_ROWS, "deleted": 0}
+    assert count_rows(engine, label="RL99_02-03", up_combined=1.0) == BENCH_ROWS
+
+    logger.info("Replacing %d rows: delete+insert %.1f s, upsert %.1f s", BENCH_ROWS, delete_insert_seconds, upsert_seconds)
+
+
+def test_bulk_load_restores_indexes_and_skips_stored_rows(engine, clean_release):
+    with engine.connect() as conn:
+        before = secondary_indexes(conn, getenv("TABLE_NAME"))
+    upsert_dataframe(synthetic_month(500), engine)
+
+    frames = [("a.pkl", synthetic_month(1000)), ("b.pkl", synthetic_month(1000, label="RL99_02-04"))]
+    reports, counts, timings = bulk_load(frames, engine, chunksize=300)
+    assert counts == {"inserted": 1500, "skipped": 500}
+    assert set(reports) == {"a.pkl", "b.pkl"} and reports["a.pkl"]["rows"] == 1000
+    assert {"drop indexes", "move rows", "analyze"} <= set(timings)
+    assert count_rows(engine, label="RL99_02-03") == 1000
+
+    with engine.connect() as conn:
+        assert secondary_indexes(conn, getenv("TABLE_NAME")) == before
+    _, counts = upsert_dataframe(synthetic_month(1000), engine)  # natural key constraint is back
+    assert counts["updated"] == 1000
+
+
+def test_catalog_follows_ingestion(engine, clean_release):
+    upsert_dataframe(synthetic_month(1000).drop(index=range(100, 110)), engine)
+    entry = read_catalog(engine, releases=[TEST_RELEASE]).set_index("label").loc["RL99_02-03"]
+    assert entry["rows"] == 990 and entry["gaps"] == 1
+    assert entry["start_time"] == pd.Timestamp("2002-03-01")
+    assert entry["max_latitude"] <= 89
+
+    upsert_dataframe(synthetic_month(600), engine, replace=True)
+    entry = read_catalog(engine, releases=[TEST_RELEASE]).set_index("label").loc["RL99_02-03"]
+    assert entry["rows"] == 600 and entry["gaps"] == 0
+
+
+def test_pipelined_append_is_atomic(engine, clean_release):
+    report, counters = append_dataframe(synthetic_month(1000), engine, chunksize=300)
+    assert report["rows"] == 1000 and counters["write"]["rows"] == 1000 and counters["write"]["items"] == 4
+    assert count_rows(engine, label="RL99_02-03") == 1000
+
+    df = synthetic_month(1000, label="RL99_02-04")
+    with pytest.raises(Exception):  # repeated natural keys in the last chunk: the whole append is rolled back
+        append_dataframe(pd.concat([df, df.iloc[:10]]), engine, chunksize=300)
+    assert count_rows(engine, label="RL99_02-04") == 0
+
+
+def test_residual_distribution_from_daily_sketches(engine, clean_release):
+    df = synthetic_month(50000)  # ~3 days
+    upsert_dataframe(df, engine)
+
+    start, end = "2002-03-01 06:00", "2002-03-03 12:00"  # one whole day and two partial ones
+    stats = residual_distribution(engine, ["postfit"], start, end, labels=["RL99_02-03"], releases=[TEST_RELEASE],
+                                  quantiles=(0, 0.5, 0.99, 1)).iloc[0]
+    window = df.loc[df["datetime"].between(start, end), "postfit"]
+    assert stats["count"] == len(window)
+    np.testing.assert_allclose(stats["mean"], window.mean(), rtol=1e-6)
+    exact = np.quantile(window, [0, 0.5, 0.99, 1], method="lower")
+    np.testing.assert_allclose(stats[["q00", "q50", "q99", "q100"]].astype(float), exact, rtol=0.011)
+
+    monthly = residual_distribution(engine, ["postfit", "up_combined"], releases=[TEST_RELEASE], by="month")
+    assert set(monthly["variable"]) == {"postfit", "up_combined"} and (monthly["count"] == len(df)).all()
+
+
+def test_queries_do_not_trust_a_stale_catalog(engine, clean_release):
+    from scripts.space_time_query import query_satellite_data_by_time, query_satellite_data_parallel
+    upsert_dataframe(synthetic_month(1000), engine)
+    with engine.begin() as conn:  # as after rows written without refreshing the catalog
+        conn.execute(text(f"DELETE FROM {getenv('TABLE_NAME')}_catalog WHERE release = :release"), {"release": TEST_RELEASE})
+    start, end = pd.Timestamp("2002-03-01"), pd.Timestamp("2002-03-01 01:23:15")
+    assert len(query_satellite_data_by_time(start, end)) >= 1000
+    assert len(query_satellite_data_parallel(start, end, freq="30min", max_workers=2)) >= 1000